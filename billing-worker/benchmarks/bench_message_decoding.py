@@ -0,0 +1,76 @@
+"""
+Messages per second decoded by the ContextBuilderHandler, for CSV rows and for
+rows in the binary encoding (`FormatVersion` 1).
+
+The same rows are handled as messages of each format, with no handler after the
+ContextBuilderHandler. Prints the time to build the context of every message, the
+rate, the average size of a message body and the messages that could not be decoded.
+
+Usage (from billing-worker/):
+    PYTHONPATH=. python -m benchmarks.bench_message_decoding [rows]
+"""
+import sys
+import time
+import uuid
+from src.config.settings import get_settings
+from src.encoding.row_codec import FORMAT_VERSION_ATTRIBUTE, ROW_FORMAT_VERSION, encode_row
+from src.handlers.context_builder_handler import ContextBuilderHandler
+from src.models.data_status import DataStatus
+from src.models.sqs_message import SQSMessage
+
+DEFAULT_ROWS = 200_000
+
+"""
+One row in `QUOTED_NAME_EVERY` has a quoted name with a comma, which the CSV
+path must parse and the binary encoding keeps whole
+"""
+QUOTED_NAME_EVERY = 10
+
+
+def build_rows(rows: int) -> list[str]:
+    return [
+        f"{row_name(index)},{index:011d},name{index}@kanastra.com.br,{index % 100000}.{index % 100:02d},"
+        f"2024-{index % 12 + 1:02d}-{index % 28 + 1:02d},{uuid.UUID(int=index * 7919 + 1)}"
+        for index in range(rows)
+    ]
+
+
+def row_name(index: int) -> str:
+    return f'"Doe, Name {index}"' if index % QUOTED_NAME_EVERY == 0 else f"Name {index}"
+
+
+def build_messages(bodies: list[str], attributes: dict) -> list[SQSMessage]:
+    return [
+        SQSMessage({"Body": body, "ReceiptHandle": "receipt", "MessageAttributes": attributes})
+        for body in bodies
+    ]
+
+
+def measure(handler: ContextBuilderHandler, messages: list[SQSMessage]) -> tuple[float, int]:
+    """
+    The seconds taken and the number of messages that could not be decoded.
+    """
+    invalid = 0
+    started_at = time.perf_counter()
+    for message in messages:
+        invalid += handler.handle(message).status != DataStatus.VALID
+    return time.perf_counter() - started_at, invalid
+
+
+def main():
+    rows = build_rows(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS)
+    handler = ContextBuilderHandler(get_settings())
+    binary_attributes = {FORMAT_VERSION_ATTRIBUTE: {"DataType": "Number", "StringValue": str(ROW_FORMAT_VERSION)}}
+
+    print(f"{'format':>8} {'seconds':>8} {'messages/s':>12} {'body (bytes)':>13} {'invalid':>8}")
+    for name, messages in (
+        ("csv", build_messages(rows, {})),
+        ("binary", build_messages([encode_row(row) for row in rows], binary_attributes)),
+    ):
+        seconds, invalid = measure(handler, messages)
+        body_size = sum(len(message.body) for message in messages) / len(messages)
+        print(f"{name:>8} {seconds:>8.2f} {len(messages) / seconds:>12.0f} {body_size:>13.1f} {invalid:>8}")
+
+
+if __name__ == "__main__":
+    main()
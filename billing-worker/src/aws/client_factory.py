@@ -0,0 +1,96 @@
+import boto3
+from threading import Lock
+from functools import lru_cache
+from botocore.config import Config
+from botocore.client import BaseClient
+from src.config.settings import Settings, get_settings
+from src.logger.logger import get_logger
+from src.metrics.metrics_registry_manager import get_metrics_registry
+
+
+METRICS = get_metrics_registry()
+METRICS.register_gauge("aws_client_connections_created", "Number of HTTP connections opened by the AWS clients", {"client"})
+METRICS.register_gauge("aws_client_requests", "Number of HTTP requests sent by the AWS clients", {"client"})
+
+
+class AWSClientFactory:
+    """
+    One boto3 session for the whole process and one client per service and
+    endpoint, created on the first request and reused afterwards.
+
+    Each client keeps its own connection pool, sized and tuned from the settings.
+    The connections opened against the requests sent show how much they are reused.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.logger = get_logger(__name__)
+        self._session = boto3.session.Session(region_name=settings.aws_region)
+        self._clients = {}
+        self._lock = Lock()
+
+    def client(self, service_name: str, endpoint_url: str | None = None) -> BaseClient:
+        key = (service_name, endpoint_url)
+
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = self._create_client(service_name, endpoint_url)
+            return self._clients[key]
+
+    def close(self):
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients = {}
+
+    def config(self) -> Config:
+        return Config(
+            max_pool_connections=self.settings.aws_max_pool_connections,
+            connect_timeout=self.settings.aws_connect_timeout,
+            read_timeout=self.settings.aws_read_timeout,
+            tcp_keepalive=self.settings.aws_tcp_keepalive,
+            retries={
+                "mode": self.settings.aws_retry_mode,
+                "total_max_attempts": self.settings.aws_max_attempts
+            }
+        )
+
+    def _create_client(self, service_name: str, endpoint_url: str | None) -> BaseClient:
+        client = self._session.client(
+            service_name,
+            endpoint_url=endpoint_url or None,
+            config=self.config()
+        )
+
+        labels = {"client": service_name}
+        METRICS.get("aws_client_connections_created", labels).set_function(
+            lambda: connection_pool_stats(client)[0]
+        )
+        METRICS.get("aws_client_requests", labels).set_function(
+            lambda: connection_pool_stats(client)[1]
+        )
+
+        self.logger.info("AWS client created", extra={"service_name": service_name})
+        return client
+
+
+def connection_pool_stats(client: BaseClient) -> tuple[int, int]:
+    """
+    Connections opened and requests sent by the urllib3 pools of the client.
+    botocore does not expose its pool manager, so this reads it from the endpoint.
+    """
+    try:
+        pools = client._endpoint.http_session._manager.pools
+        connection_pools = [pools[key] for key in pools.keys()]
+    except AttributeError:
+        return 0, 0
+
+    return (
+        sum(pool.num_connections for pool in connection_pools),
+        sum(pool.num_requests for pool in connection_pools)
+    )
+
+
+@lru_cache()
+def get_aws_client_factory() -> AWSClientFactory:
+    return AWSClientFactory(get_settings())
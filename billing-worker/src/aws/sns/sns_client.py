@@ -1,6 +1,8 @@
-import boto3
+from time import sleep
 from src.config.settings import Settings
 from src.logger.logger import get_logger
+from src.aws.client_factory import get_aws_client_factory
+from src.aws.retry import RetryBudget, backoff_delay
 from src.aws.sns.exceptions.sns_client_exception import SNSClientException
 from src.metrics.metrics_registry_manager import get_metrics_registry
 
@@ -8,6 +10,7 @@ from src.metrics.metrics_registry_manager import get_metrics_registry
 METRICS = get_metrics_registry()
 METRICS.register_counter("notification_sent", "Notification sent")
 METRICS.register_counter("notification_sent_errors", "Notification sent with errors")
+METRICS.register_counter("notification_sent_retries", "Notification resent after a failed batch entry")
 
 
 class SNSClient:
@@ -16,13 +19,13 @@ class SNSClient:
         self.topic_arn = topic_arn
         self.settings = settings
         self.logger = get_logger(__name__)
+        self._retry_budget = RetryBudget(
+            settings.sns_batch_retry_budget_ratio,
+            settings.sns_batch_retry_budget_max_tokens
+        )
 
     def create_client(self):
-        self._client = boto3.client(
-            "sns",
-            region_name=self.settings.aws_region,
-            endpoint_url=self.settings.sns_endpoint_url
-        )
+        self._client = get_aws_client_factory().client("sns", self.settings.sns_endpoint_url)
         self.logger.debug("SNS client created")
 
     def publish(self, message: str):
@@ -35,36 +38,94 @@ class SNSClient:
                           self.topic_arn}", extra={"content": message})
         METRICS.get("notification_sent").inc()
 
-    def publish_batch(self, messages: list):
+    def publish_batch(self, messages: list) -> list[int]:
+        """
+        Publish the messages and republish only the entries SNS did not accept,
+        with a jittered exponential backoff, while the retry budget allows it.
+        Entries rejected because of their content (sender fault) are not retried.
+        Returns the indexes of the messages that could not be published.
+        """
         self._validate_client()
 
-        messages_len = len(messages)
+        entries = {
+            str(i): {"Id": str(i), "Message": message} for i, message in enumerate(messages)
+        }
+        pending_ids = list(entries)
+        failed_ids = []
+        last_error = None
+        max_retries = self.settings.sns_batch_max_retries
 
-        entries = [
-            {"Id": str(i), "Message": message} for i, message in enumerate(messages)
-        ]
+        for attempt in range(max_retries + 1):
+            retryable_ids, rejected_ids, error = self._publish_entries(
+                [entries[entry_id] for entry_id in pending_ids])
+            failed_ids.extend(rejected_ids)
+            last_error = error or last_error
 
-        try:
-            self._client.publish_batch(
-                TopicArn=self.topic_arn,
-                PublishBatchRequestEntries=entries
-            )
-            self.logger.debug(
-                f"Messages published to topic {self.topic_arn}",
+            if not retryable_ids:
+                break
+
+            allowed = self._retry_budget.withdraw(len(retryable_ids)) if attempt < max_retries else 0
+            failed_ids.extend(retryable_ids[allowed:])
+            pending_ids = retryable_ids[:allowed]
+
+            if not pending_ids:
+                break
+
+            self.logger.warning(
+                f"Retrying messages to topic {self.topic_arn}",
                 extra={
-                    "messages": messages
+                    "attempt": attempt + 1,
+                    "messages": [entries[entry_id]["Message"] for entry_id in pending_ids]
                 }
             )
-            METRICS.get("notification_sent").inc(messages_len)
-        except Exception as e:
+            METRICS.get("notification_sent_retries").inc(len(pending_ids))
+            sleep(backoff_delay(
+                attempt,
+                self.settings.sns_batch_retry_base_delay,
+                self.settings.sns_batch_retry_max_delay
+            ))
+
+        if failed_ids:
             self.logger.error(
                 f"Error publishing messages to topic {self.topic_arn}",
                 extra={
-                    "messages": messages,
-                    "error": str(e)
+                    "messages": [entries[entry_id]["Message"] for entry_id in failed_ids],
+                    "error": last_error or "Batch entries failed"
                 }
             )
-            METRICS.get("notification_sent_errors").inc(messages_len)
+            METRICS.get("notification_sent_errors").inc(len(failed_ids))
+
+        return sorted(int(entry_id) for entry_id in failed_ids)
+
+    def _publish_entries(self, entries: list) -> tuple[list[str], list[str], str]:
+        """
+        Returns the ids of the entries worth retrying, the ids of the rejected ones
+        and the error raised by the request, if any.
+        """
+        try:
+            response = self._client.publish_batch(
+                TopicArn=self.topic_arn,
+                PublishBatchRequestEntries=entries
+            )
+        except Exception as e:
+            return [entry["Id"] for entry in entries], [], str(e)
+
+        failed = response.get("Failed") or []
+        failed_ids = {entry["Id"] for entry in failed}
+        retryable_ids = [entry["Id"] for entry in failed if not entry.get("SenderFault")]
+        rejected_ids = [entry["Id"] for entry in failed if entry.get("SenderFault")]
+        published_messages = [entry["Message"] for entry in entries if entry["Id"] not in failed_ids]
+
+        self._retry_budget.deposit(len(published_messages))
+        self.logger.debug(
+            f"Messages published to topic {self.topic_arn}",
+            extra={
+                "messages": published_messages
+            }
+        )
+        METRICS.get("notification_sent").inc(len(published_messages))
+
+        return retryable_ids, rejected_ids, None
 
     def _validate_client(self):
         if not self._client:
@@ -0,0 +1,43 @@
+from src.config.settings import Settings
+
+
+"""
+The names of the FIFO queues end with `.fifo`
+"""
+FIFO_SUFFIX = ".fifo"
+
+
+def shard_queue_url(queue_url: str, shard: int) -> str:
+    """
+    The shard queues are named after the queue, followed by the number of the shard
+    and by the `.fifo` suffix of a FIFO queue. Kept in sync with the importer-api
+    (`src/aws/sqs/queue_shards.py`).
+    """
+    if queue_url.endswith(FIFO_SUFFIX):
+        return f"{queue_url.removesuffix(FIFO_SUFFIX)}-{shard}{FIFO_SUFFIX}"
+    return f"{queue_url}-{shard}"
+
+
+def owned_shards(settings: Settings) -> list[int]:
+    """
+    The shards consumed by this worker, `sqs_owned_shards` (e.g. "0,2"), or every
+    shard when it is not set. Raises ValueError when a shard does not exist.
+    """
+    if not settings.sqs_owned_shards.strip():
+        return list(range(settings.sqs_queue_shards))
+
+    shards = [int(shard) for shard in settings.sqs_owned_shards.split(",") if shard.strip()]
+    for shard in shards:
+        if not 0 <= shard < settings.sqs_queue_shards:
+            raise ValueError(f"Shard {shard} out of the {settings.sqs_queue_shards} shards of the queue")
+    return shards
+
+
+def owned_queues(settings: Settings) -> list[tuple[int | None, str]]:
+    """
+    The shard and the URL of each queue consumed by this worker. Without shards,
+    the only queue is `sqs_queue_url` and has no shard.
+    """
+    if settings.sqs_queue_shards <= 1:
+        return [(None, settings.sqs_queue_url)]
+    return [(shard, shard_queue_url(settings.sqs_queue_url, shard)) for shard in owned_shards(settings)]
@@ -1,4 +1,5 @@
-import boto3
+from src.aws.client_factory import get_aws_client_factory
+from src.aws.sqs.queue_shards import owned_queues
 from src.aws.sqs.exceptions.sqs_consumer_exception import SQSConsumerException
 from src.config.settings import Settings
 from src.logger.logger import get_logger
@@ -11,6 +12,8 @@ METRICS.register_counter("sqs_consumer_messages_received",
                          "Number of messages received by the SQS consumer")
 METRICS.register_counter("sqs_consumer_messages_deleted",
                          "Number of messages deleted by the SQS consumer")
+METRICS.register_counter("sqs_consumer_shard_messages_received",
+                         "Number of messages received by the SQS consumer from each shard queue", {"shard"})
 
 
 class SQSConsumer:
@@ -20,26 +23,35 @@ class SQSConsumer:
         self.logger = get_logger(__name__)
 
     def create_client(self):
-        self._client = boto3.client(
-            "sqs",
-            region_name=self.settings.aws_region,
-            endpoint_url=self.settings.sqs_endpoint_url
-        )
+        self._client = get_aws_client_factory().client("sqs", self.settings.sqs_endpoint_url)
         self.logger.info("Client created")
 
     def consume(self, run_forever=True):
+        """
+        The queues of the shards owned by the worker are received from in turn.
+        While any of them has messages, the others are not waited on, so a busy
+        shard is not held back by the idle ones.
+        """
         self._validate_client()
+        queues = owned_queues(self.settings)
         should_run_forever = True
+        idle = False
         while should_run_forever:
             should_run_forever = run_forever
-            messages = self._get_messages()
-            for message in messages:
-                METRICS.get("sqs_consumer_messages_received").inc()
-                yield SQSMessage(message)
+            received = 0
+            for shard, queue_url in queues:
+                messages = self._get_messages(queue_url, self._wait_time_seconds(len(queues), idle))
+                received += len(messages)
+                for message in messages:
+                    METRICS.get("sqs_consumer_messages_received").inc()
+                    if shard is not None:
+                        METRICS.get("sqs_consumer_shard_messages_received", {"shard": str(shard)}).inc()
+                    yield SQSMessage(message, queue_url)
+            idle = not received
 
     def delete_message(self, message: SQSMessage):
         self._validate_client()
-        queue_url = self.settings.sqs_queue_url
+        queue_url = message.queue_url or self.settings.sqs_queue_url
         try:
             self._client.delete_message(
                 QueueUrl=queue_url,
@@ -51,15 +63,29 @@ class SQSConsumer:
         except Exception as e:
             self.logger.error("Error deleting message", extra={"error": e})
 
-    def _get_messages(self):
-        queue_url = self.settings.sqs_queue_url
+    def _get_messages(self, queue_url: str | None = None, wait_time_seconds: int | None = None):
         messages = self._client.receive_message(
-            QueueUrl=queue_url,
+            QueueUrl=queue_url or self.settings.sqs_queue_url,
             MaxNumberOfMessages=self.settings.sqs_max_messages,
-            WaitTimeSeconds=self.settings.sqs_wait_time_seconds
+            WaitTimeSeconds=self.settings.sqs_wait_time_seconds if wait_time_seconds is None else wait_time_seconds,
+            MessageAttributeNames=["All"]
         )
         return messages.get("Messages", [])
 
+    def _wait_time_seconds(self, queues: int, idle: bool) -> int:
+        """
+        With many queues, a long poll is only made when none of them had messages
+        in the last round, splitting `sqs_wait_time_seconds` between the queues.
+        Each queue waits at least a second, so an idle worker with more queues
+        than seconds to wait does not spin on empty receives.
+        """
+        wait_time_seconds = self.settings.sqs_wait_time_seconds
+        if queues == 1:
+            return wait_time_seconds
+        if not idle:
+            return 0
+        return max(min(wait_time_seconds, 1), wait_time_seconds // queues)
+
     def _validate_client(self):
         if not self._client:
             message = "SQS client not created"
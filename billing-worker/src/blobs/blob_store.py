@@ -0,0 +1,102 @@
+import mmap
+import os
+from botocore.client import BaseClient
+from src.aws.client_factory import get_aws_client_factory
+from src.blobs.exceptions.blob_not_found_exception import BlobNotFoundException
+from src.blobs.exceptions.invalid_blob_key_exception import InvalidBlobKeyException
+from src.config.settings import Settings
+
+
+"""
+The prefix of the keys of the chunks saved by the importer-api, kept in sync with
+its `CLAIM_CHECK_KEY_PREFIX`
+"""
+CLAIM_CHECK_KEY_PREFIX = "chunks"
+
+
+class LocalBlobStore:
+    """
+    Blobs saved as files under `directory`, a volume shared with the importer-api.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def read(self, key: str, start: int, end: int) -> bytes:
+        """
+        Only the pages of the byte range are read, through a memory map of the blob.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as blob_file:
+                if os.fstat(blob_file.fileno()).st_size == 0:
+                    return b""
+                with mmap.mmap(blob_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+                    return mapped_file[start:end]
+        except FileNotFoundError as e:
+            raise BlobNotFoundException(f"Blob not found: {key}") from e
+
+    def delete(self, key: str):
+        path = self._path(key)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _path(self, key: str) -> str:
+        """
+        The keys come from the message bodies, so a key that resolves (symbolic links
+        included) outside the chunks of `directory` is refused.
+        """
+        validate_key(key)
+        chunks_directory = os.path.realpath(os.path.join(self.directory, CLAIM_CHECK_KEY_PREFIX))
+        path = os.path.realpath(os.path.join(self.directory, key))
+        if path == chunks_directory or os.path.commonpath((chunks_directory, path)) != chunks_directory:
+            raise InvalidBlobKeyException(f"Invalid blob key: {key}")
+        return path
+
+
+class S3BlobStore:
+    """
+    Blobs saved as objects of an S3 (or S3-compatible) bucket, read with ranged GETs.
+    """
+
+    def __init__(self, bucket: str, client: BaseClient):
+        self.bucket = bucket
+        self.client = client
+
+    def read(self, key: str, start: int, end: int) -> bytes:
+        validate_key(key)
+        if end <= start:
+            return b""
+
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=key, Range=f"bytes={start}-{end - 1}")
+        except self.client.exceptions.NoSuchKey as e:
+            raise BlobNotFoundException(f"Blob not found: {key}") from e
+        return response["Body"].read()
+
+    def delete(self, key: str):
+        validate_key(key)
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+
+def validate_key(key: str):
+    """
+    Only the relative keys of the chunks (`chunks/...`) can be read or removed.
+    """
+    if (
+        not isinstance(key, str)
+        or os.path.isabs(key)
+        or not key.startswith(f"{CLAIM_CHECK_KEY_PREFIX}/")
+    ):
+        raise InvalidBlobKeyException(f"Invalid blob key: {key}")
+
+
+def create_blob_store(settings: Settings) -> LocalBlobStore | S3BlobStore:
+    """
+    An S3 bucket when `blob_store_bucket` is set, else the local `blob_store_dir`.
+    """
+    if settings.blob_store_bucket:
+        return S3BlobStore(settings.blob_store_bucket, get_aws_client_factory().client("s3", settings.s3_endpoint_url))
+    return LocalBlobStore(settings.blob_store_dir)
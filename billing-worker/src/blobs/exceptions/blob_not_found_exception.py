@@ -0,0 +1,2 @@
+class BlobNotFoundException(Exception):
+    pass
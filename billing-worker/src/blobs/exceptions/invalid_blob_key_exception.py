@@ -0,0 +1,2 @@
+class InvalidBlobKeyException(Exception):
+    pass
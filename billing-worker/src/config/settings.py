@@ -4,7 +4,15 @@ from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
+    aws_connect_timeout: float = float(getenv("AWS_CONNECT_TIMEOUT", 5))
+    aws_max_attempts: int = int(getenv("AWS_MAX_ATTEMPTS", 3))
+    aws_max_pool_connections: int = int(getenv("AWS_MAX_POOL_CONNECTIONS", 10))
+    aws_read_timeout: float = float(getenv("AWS_READ_TIMEOUT", 60))
     aws_region: str = getenv("AWS_REGION", "us-east-1")
+    aws_retry_mode: str = getenv("AWS_RETRY_MODE", "adaptive")
+    aws_tcp_keepalive: bool = getenv("AWS_TCP_KEEPALIVE", "true").lower() == "true"
+    blob_store_bucket: str = getenv("BLOB_STORE_BUCKET", "")
+    blob_store_dir: str = getenv("BLOB_STORE_DIR", "/tmp/billing-worker/blobs")
     log_level: str = getenv("LOG_LEVEL", "INFO")
     max_sns_send_message_batch_size: int = int(getenv("MAX_SNS_SEND_MESSAGE_BATCH_SIZE", 10))
     metrics_port: int = int(getenv("METRICS_PORT", 8001))
@@ -16,10 +24,18 @@ class Settings(BaseSettings):
     redis_host: str = getenv("REDIS_HOST", "")
     redis_operation_timeout: int = int(getenv("REDIS_OPERATION_TIMEOUT", 5))
     redis_port: int = int(getenv("REDIS_PORT", 6379))
+    s3_endpoint_url: str = getenv("S3_ENDPOINT_URL", "")
+    sns_batch_max_retries: int = int(getenv("SNS_BATCH_MAX_RETRIES", 5))
+    sns_batch_retry_base_delay: float = float(getenv("SNS_BATCH_RETRY_BASE_DELAY", 0.1))
+    sns_batch_retry_budget_max_tokens: int = int(getenv("SNS_BATCH_RETRY_BUDGET_MAX_TOKENS", 100))
+    sns_batch_retry_budget_ratio: float = float(getenv("SNS_BATCH_RETRY_BUDGET_RATIO", 0.2))
+    sns_batch_retry_max_delay: float = float(getenv("SNS_BATCH_RETRY_MAX_DELAY", 5))
     sns_endpoint_url: str = getenv("SNS_ENDPOINT_URL", "")
     sns_topic_arn: str = getenv("SNS_TOPIC_ARN", "")
     sqs_endpoint_url: str = getenv("SQS_ENDPOINT_URL", "")
     sqs_max_messages: int = int(getenv("SQS_MAX_MESSAGES", 10))
+    sqs_owned_shards: str = getenv("SQS_OWNED_SHARDS", "")
+    sqs_queue_shards: int = int(getenv("SQS_QUEUE_SHARDS", 1))
     sqs_queue_url: str = getenv("SQS_QUEUE_URL", "")
     sqs_wait_time_seconds: int = int(getenv("SQS_WAIT_TIME_SECONDS", 20))
     notification_flush_interval: int = int(getenv("NOTIFICATION_FLUSH_INTERVAL", 30))
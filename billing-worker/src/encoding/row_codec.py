@@ -0,0 +1,118 @@
+import base64
+import binascii
+import csv
+import struct
+from uuid import UUID
+
+
+FIELDS_SEPARATOR = ","
+QUOTE = '"'
+
+"""
+Version 1 of the binary encoding of a row, in the `FormatVersion` attribute of
+the messages. The messages without the attribute carry CSV rows. The encoding is
+kept in sync with the importer-api (`src/encoding/row_codec.py`).
+"""
+ROW_FORMAT_VERSION = 1
+FORMAT_VERSION_ATTRIBUTE = "FormatVersion"
+
+"""
+governmentId (uint64), debtAmount (float64), debtDueDate (YYYY-MM-DD), debtId (16
+bytes) and the sizes of the name and the email, which follow in UTF-8
+"""
+ROW_HEADER = struct.Struct("<Qd10s16sHH")
+DATE_SIZE = 10
+
+
+def encode_row(row: str) -> str:
+    """
+    Encode a valid CSV row, with the columns in the order the billing-worker reads them.
+    Raises ValueError when the row can't be encoded.
+    """
+    fields = split_row(row)
+    if len(fields) != 6:
+        raise ValueError(f"Expected 6 fields, got {len(fields)}")
+    return encode_fields(*fields)
+
+
+def split_row(row: str) -> list[str]:
+    """
+    The fields of a CSV row. A quoted field may have commas and doubled quotes
+    (RFC 4180); the rows without quotes are split at once.
+    Raises ValueError when the quotes of the row are not balanced.
+    """
+    if QUOTE not in row:
+        return row.split(FIELDS_SEPARATOR)
+
+    try:
+        return next(csv.reader([row], strict=True))
+    except csv.Error as e:
+        raise ValueError(str(e)) from e
+
+
+def join_row(fields: list[str]) -> str:
+    """
+    The CSV row of the fields, quoting the ones with commas or quotes.
+    """
+    row = FIELDS_SEPARATOR.join(fields)
+    if QUOTE not in row and row.count(FIELDS_SEPARATOR) == len(fields) - 1:
+        return row
+    return FIELDS_SEPARATOR.join(quote_field(field) for field in fields)
+
+
+def quote_field(field: str) -> str:
+    if FIELDS_SEPARATOR not in field and QUOTE not in field:
+        return field
+    return QUOTE + field.replace(QUOTE, QUOTE * 2) + QUOTE
+
+
+def encode_fields(name: str, government_id: str, email: str, debt_amount: str, debt_due_date: str, debt_id: str) -> str:
+    """
+    The fields are encoded apart, so a name or email with commas is kept whole.
+    SQS message bodies are text, so the record is base64 encoded, which never has
+    the line separator of the packed messages.
+    """
+    name = name.encode()
+    email = email.encode()
+    if len(debt_due_date) != DATE_SIZE:
+        raise ValueError(f"Invalid debtDueDate: {debt_due_date}")
+
+    try:
+        header = ROW_HEADER.pack(
+            int(government_id),
+            float(debt_amount),
+            debt_due_date.encode(),
+            UUID(debt_id).bytes,
+            len(name),
+            len(email)
+        )
+    except struct.error as e:
+        raise ValueError(str(e)) from e
+
+    return base64.b64encode(header + name + email).decode()
+
+
+def decode_row(encoded_row: str) -> tuple[str, int, str, float, str, str]:
+    """
+    The name, governmentId, email, debtAmount, debtDueDate and debtId of the row.
+    Raises ValueError when the row is not a valid record.
+    """
+    try:
+        data = binascii.a2b_base64(encoded_row, strict_mode=True)
+        government_id, debt_amount, debt_due_date, debt_id, name_size, email_size = ROW_HEADER.unpack_from(data)
+    except (binascii.Error, struct.error) as e:
+        raise ValueError(str(e)) from e
+
+    name_end = ROW_HEADER.size + name_size
+    if len(data) != name_end + email_size:
+        raise ValueError(f"Expected {name_end + email_size} bytes, got {len(data)}")
+
+    debt_id = debt_id.hex()
+    return (
+        data[ROW_HEADER.size:name_end].decode(),
+        government_id,
+        data[name_end:].decode(),
+        debt_amount,
+        debt_due_date.decode(),
+        f"{debt_id[:8]}-{debt_id[8:12]}-{debt_id[12:16]}-{debt_id[16:20]}-{debt_id[20:]}"
+    )
@@ -1,6 +1,7 @@
+from src.encoding.row_codec import ROW_FORMAT_VERSION, decode_row, split_row
 from src.handlers.abstract_handler import AbstractHandler
 from src.models.data_context import DataContext
-from src.models.sqs_message import SQSMessage
+from src.models.sqs_message import CSV_FORMAT_VERSION, SQSMessage
 from src.models.bill_details import BillDetails
 from src.models.data_status import DataStatus
 from src.metrics.metrics_registry_manager import get_metrics_registry
@@ -21,7 +22,19 @@ class ContextBuilderHandler(AbstractHandler):
             METRICS.get("invalid_messages").inc()
             return super().handle(sqs_message,  context)
 
-        splited_body = sqs_message.body.split(',')
+        if sqs_message.format_version == ROW_FORMAT_VERSION:
+            return super().handle(sqs_message,  self._decode(sqs_message, context))
+
+        if sqs_message.format_version != CSV_FORMAT_VERSION:
+            self.logger.error('Unsupported SQS message format', extra={'sqs_message': sqs_message.content})
+            context.status = DataStatus.INVALID
+            METRICS.get("invalid_messages").inc()
+            return super().handle(sqs_message,  context)
+
+        try:
+            splited_body = split_row(sqs_message.body)
+        except ValueError:
+            splited_body = []
 
         if len(splited_body) != 6:
             self.logger.error('Invalid SQS message content', extra={'sqs_message': sqs_message.content})
@@ -46,3 +59,27 @@ class ContextBuilderHandler(AbstractHandler):
             METRICS.get("invalid_messages").inc()
 
         return super().handle(sqs_message,  context)
+
+    def _decode(self, sqs_message: SQSMessage, context: DataContext) -> DataContext:
+        """
+        The binary encoded rows already have the fields apart and typed, so nothing is parsed.
+        """
+        try:
+            bill_details = BillDetails()
+            (
+                bill_details.name,
+                bill_details.government_id,
+                bill_details.email,
+                bill_details.debt_amount,
+                bill_details.debt_due_date,
+                bill_details.debt_id
+            ) = decode_row(sqs_message.body)
+
+            context.bill_details = bill_details
+            context.status = DataStatus.VALID
+        except ValueError:
+            self.logger.error('Invalid SQS message content', extra={'sqs_message': sqs_message.content})
+            context.status = DataStatus.INVALID
+            METRICS.get("invalid_messages").inc()
+
+        return context
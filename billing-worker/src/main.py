@@ -1,6 +1,7 @@
 from prometheus_client import start_http_server
 from src.aws.sns.sns_client import SNSClient
 from src.aws.sqs.sqs_consumer import SQSConsumer
+from src.blobs.blob_store import create_blob_store
 from src.cache.redis_client import RedisClient
 from src.config.settings import get_settings
 from src.handlers.check_billing_handler import CheckBillingHandler
@@ -34,7 +35,7 @@ def main():
     context_builder.set_next(check_billing).set_next(
         process_billing).set_next(notification)
 
-    message_processor = MessageProcessor(context_builder, sqs_consumer)
+    message_processor = MessageProcessor(context_builder, sqs_consumer, create_blob_store(settings))
     message_processor.process()
 
 
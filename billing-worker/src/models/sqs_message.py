@@ -1,5 +1,62 @@
+from src.encoding.row_codec import FORMAT_VERSION_ATTRIBUTE
+
+
+ROWS_SEPARATOR = "\n"
+
+"""
+The messages without the `FormatVersion` attribute carry CSV rows
+"""
+CSV_FORMAT_VERSION = 0
+
+"""
+The `MessageType` attribute of the messages that refer to a chunk of rows in the
+blob store, instead of carrying the rows
+"""
+MESSAGE_TYPE_ATTRIBUTE = "MessageType"
+CLAIM_CHECK_MESSAGE_TYPE = "claim-check"
+
+
 class SQSMessage:
-    def __init__(self, message: dict):
+    def __init__(self, message: dict, queue_url: str | None = None):
+        """
+        `queue_url` is the queue the message was received from, when the worker
+        consumes more than one.
+        """
         self.content = message
+        self.queue_url = queue_url
         self.body = message.get("Body")
         self.receipt_handle = message.get("ReceiptHandle")
+        self.attributes = message.get("MessageAttributes") or {}
+
+    @property
+    def is_claim_check(self) -> bool:
+        return self.attribute(MESSAGE_TYPE_ATTRIBUTE) == CLAIM_CHECK_MESSAGE_TYPE
+
+    @property
+    def format_version(self) -> int:
+        return int(self.attribute(FORMAT_VERSION_ATTRIBUTE) or CSV_FORMAT_VERSION)
+
+    def attribute(self, name: str) -> str | None:
+        return self.attributes.get(name, {}).get("StringValue")
+
+    def with_rows(self, rows: str) -> list["SQSMessage"]:
+        """
+        The rows of the chunk a claim-check message refers to, one message per row
+        sharing the receipt handle and the format version of the original one.
+        """
+        attributes = {name: value for name, value in self.attributes.items() if name != MESSAGE_TYPE_ATTRIBUTE}
+        content = {**self.content, "MessageAttributes": attributes}
+        return [SQSMessage({**content, "Body": row}, self.queue_url) for row in rows.split(ROWS_SEPARATOR) if row]
+
+    def unpack(self) -> list["SQSMessage"]:
+        """
+        A packed message carries many CSV rows, one per line.
+        Each row becomes a message sharing the receipt handle of the original one.
+        """
+        if not self.body or ROWS_SEPARATOR not in self.body:
+            return [self]
+
+        return [
+            SQSMessage({**self.content, "Body": row}, self.queue_url)
+            for row in self.body.split(ROWS_SEPARATOR) if row
+        ]
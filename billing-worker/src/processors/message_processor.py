@@ -1,29 +1,105 @@
+import json
 from src.aws.sqs.sqs_consumer import SQSConsumer
+from src.blobs.blob_store import LocalBlobStore, S3BlobStore
+from src.blobs.exceptions.blob_not_found_exception import BlobNotFoundException
+from src.blobs.exceptions.invalid_blob_key_exception import InvalidBlobKeyException
 from src.logger.logger import get_logger
 from src.handlers.handler import Handler
 from src.metrics.metrics_registry_manager import get_metrics_registry
+from src.models.sqs_message import SQSMessage
 
 
 METRICS = get_metrics_registry()
 METRICS.register_counter("messages_processed_successfully", "Messages processed successfully")
 METRICS.register_counter("messages_processed_errors", "Messages processed with errors")
+METRICS.register_counter("rows_processed_successfully", "Rows of packed messages processed successfully")
+METRICS.register_counter("rows_processed_errors", "Rows of packed messages processed with errors")
+METRICS.register_counter("claim_check_chunks_read", "Chunks of rows read from the blob store")
+METRICS.register_counter("claim_check_chunks_missing", "Claim-check messages whose chunk was not found in the blob store")
+METRICS.register_counter("claim_check_chunk_read_errors", "Claim-check messages whose chunk could not be read from the blob store")
+METRICS.register_counter("claim_check_invalid_keys", "Claim-check messages whose key is not a chunk of the blob store")
 
 
 class MessageProcessor:
-    def __init__(self, handler: Handler, sqs_consumer: SQSConsumer):
+    def __init__(self, handler: Handler, sqs_consumer: SQSConsumer, blob_store: LocalBlobStore | S3BlobStore | None = None):
         self.handler = handler
         self.sqs_consumer = sqs_consumer
+        self.blob_store = blob_store
         self.logger = get_logger(__name__)
 
     def process(self):
         self.logger.debug("Starting message processing")
         for message in self.sqs_consumer.consume():
+            if message.is_claim_check:
+                self._process_claim_check(message)
+                continue
+
+            rows = message.unpack()
+
+            if len(rows) == 1:
+                self._process_message(message)
+            else:
+                self._process_packed_message(message, rows)
+
+            self.sqs_consumer.delete_message(message)
+
+    def _process_claim_check(self, message: SQSMessage):
+        """
+        The rows are in the chunk of the blob store the message refers to, which is
+        removed with the message once its rows are processed. A chunk not found was
+        removed by an earlier delivery of the same message, so the message is dropped,
+        like a message whose key is not a chunk of the blob store (e.g. `../`).
+        When the chunk can't be read, the message is kept and delivered again.
+        """
+        try:
+            reference = json.loads(message.body)
+            chunk = self.blob_store.read(reference["key"], reference["start"], reference["end"])
+        except BlobNotFoundException as e:
+            self.logger.warning(f"Chunk of claim-check message not found: {e}")
+            METRICS.get("claim_check_chunks_missing").inc()
+            self.sqs_consumer.delete_message(message)
+            return
+        except InvalidBlobKeyException as e:
+            self.logger.error(f"Invalid claim-check message: {e}", extra={"body": message.body})
+            METRICS.get("claim_check_invalid_keys").inc()
+            self.sqs_consumer.delete_message(message)
+            return
+        except Exception as e:
+            self.logger.error(f"Error reading chunk of claim-check message: {e}", extra={"body": message.body})
+            METRICS.get("claim_check_chunk_read_errors").inc()
+            return
+
+        METRICS.get("claim_check_chunks_read").inc()
+        self._process_packed_message(message, message.with_rows(chunk.decode()))
+        self.sqs_consumer.delete_message(message)
+        try:
+            self.blob_store.delete(reference["key"])
+        except Exception as e:
+            self.logger.warning(f"Error removing chunk of claim-check message: {e}", extra={"key": reference["key"]})
+
+    def _process_message(self, message: SQSMessage):
+        try:
+            self.logger.debug(f"Processing message: {message.body}")
+            self.handler.handle(message)
+            METRICS.get("messages_processed_successfully").inc()
+        except Exception as e:
+            self.logger.error(f"Error processing message: {e}")
+            METRICS.get("messages_processed_errors").inc()
+
+    def _process_packed_message(self, message: SQSMessage, rows: list[SQSMessage]):
+        self.logger.debug(f"Processing packed message with {len(rows)} rows")
+        failed_rows = 0
+
+        for row in rows:
             try:
-                self.logger.debug(f"Processing message: {message.body}")
-                self.handler.handle(message)
-                METRICS.get("messages_processed_successfully").inc()
+                self.handler.handle(row)
+                METRICS.get("rows_processed_successfully").inc()
             except Exception as e:
-                self.logger.error(f"Error processing message: {e}")
-                METRICS.get("messages_processed_errors").inc()
+                self.logger.error(f"Error processing row: {e}", extra={"row": row.body})
+                METRICS.get("rows_processed_errors").inc()
+                failed_rows += 1
 
-            self.sqs_consumer.delete_message(message)
+        if failed_rows:
+            METRICS.get("messages_processed_errors").inc()
+        else:
+            METRICS.get("messages_processed_successfully").inc()
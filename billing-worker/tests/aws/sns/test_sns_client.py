@@ -8,9 +8,28 @@ def settings():
     _settings = MagicMock()
     _settings.aws_region = "us-east-1"
     _settings.sns_endpoint_url = "http://localhost:4566"
+    _settings.sns_batch_max_retries = 2
+    _settings.sns_batch_retry_base_delay = 0.1
+    _settings.sns_batch_retry_max_delay = 1
+    _settings.sns_batch_retry_budget_ratio = 0.5
+    _settings.sns_batch_retry_budget_max_tokens = 10
     return _settings
 
 
+@pytest.fixture(autouse=True)
+def sleep():
+    with patch("src.aws.sns.sns_client.sleep") as _sleep:
+        yield _sleep
+
+
+@pytest.fixture
+def metrics():
+    _metrics = {}
+    with patch("src.aws.sns.sns_client.METRICS") as mock_metrics:
+        mock_metrics.get.side_effect = lambda name: _metrics.setdefault(name, MagicMock())
+        yield _metrics
+
+
 @patch("src.aws.sns.sns_client.get_logger")
 def test_init(get_logger, settings):
     sns_client = SNSClient(
@@ -22,19 +41,15 @@ def test_init(get_logger, settings):
     get_logger.assert_called_once_with("src.aws.sns.sns_client")
 
 
-@patch("src.aws.sns.sns_client.boto3.client")
+@patch("src.aws.sns.sns_client.get_aws_client_factory")
 @patch("src.aws.sns.sns_client.get_logger")
-def test_create_client(get_logger, boto3_client, settings):
+def test_create_client(get_logger, get_aws_client_factory, settings):
     sns_client = SNSClient(
         "arn:aws:sns:us-east-1:123456789012:topic", settings)
     sns_client.create_client()
 
-    boto3_client.assert_called_once_with(
-        "sns",
-        region_name="us-east-1",
-        endpoint_url="http://localhost:4566"
-    )
-    assert sns_client._client == boto3_client.return_value
+    get_aws_client_factory.return_value.client.assert_called_once_with("sns", "http://localhost:4566")
+    assert sns_client._client == get_aws_client_factory.return_value.client.return_value
 
 
 @patch("src.aws.sns.sns_client.get_logger")
@@ -118,6 +133,88 @@ def test_publish_batch_error(get_logger, settings):
     )
 
 
+@patch("src.aws.sns.sns_client.get_logger")
+def test_publish_batch_retries_only_failed_entries(get_logger, settings, metrics, sleep):
+    sns_client = SNSClient(
+        "arn:aws:sns:us-east-1:123456789012:topic", settings)
+    sns_client._client = MagicMock()
+    sns_client._client.publish_batch.side_effect = [
+        {"Successful": [{"Id": "0"}], "Failed": [{"Id": "1", "SenderFault": False}]},
+        {"Successful": [{"Id": "1"}]}
+    ]
+
+    failed = sns_client.publish_batch(["Kanastra", "Kanastra 2"])
+
+    assert failed == []
+    assert sns_client._client.publish_batch.call_args_list[1].kwargs["PublishBatchRequestEntries"] == [
+        {"Id": "1", "Message": "Kanastra 2"}
+    ]
+    sleep.assert_called_once()
+    metrics["notification_sent"].inc.assert_any_call(1)
+    assert metrics["notification_sent"].inc.call_count == 2
+    metrics["notification_sent_retries"].inc.assert_called_once_with(1)
+    assert "notification_sent_errors" not in metrics
+
+
+@patch("src.aws.sns.sns_client.get_logger")
+def test_publish_batch_gives_up_after_max_retries(get_logger, settings, metrics, sleep):
+    sns_client = SNSClient(
+        "arn:aws:sns:us-east-1:123456789012:topic", settings)
+    sns_client._client = MagicMock()
+    sns_client._client.publish_batch.return_value = {
+        "Successful": [{"Id": "0"}],
+        "Failed": [{"Id": "1", "SenderFault": False}]
+    }
+
+    failed = sns_client.publish_batch(["Kanastra", "Kanastra 2"])
+
+    assert failed == [1]
+    assert sns_client._client.publish_batch.call_count == 3
+    assert sleep.call_count == 2
+    metrics["notification_sent_errors"].inc.assert_called_once_with(1)
+    get_logger.return_value.error.assert_called_once_with(
+        "Error publishing messages to topic arn:aws:sns:us-east-1:123456789012:topic",
+        extra={
+            "messages": ["Kanastra 2"],
+            "error": "Batch entries failed"
+        }
+    )
+
+
+@patch("src.aws.sns.sns_client.get_logger")
+def test_publish_batch_does_not_retry_sender_fault(get_logger, settings, metrics, sleep):
+    sns_client = SNSClient(
+        "arn:aws:sns:us-east-1:123456789012:topic", settings)
+    sns_client._client = MagicMock()
+    sns_client._client.publish_batch.return_value = {
+        "Successful": [{"Id": "0"}],
+        "Failed": [{"Id": "1", "SenderFault": True}]
+    }
+
+    failed = sns_client.publish_batch(["Kanastra", "Kanastra 2"])
+
+    assert failed == [1]
+    sns_client._client.publish_batch.assert_called_once()
+    sleep.assert_not_called()
+    metrics["notification_sent_errors"].inc.assert_called_once_with(1)
+
+
+@patch("src.aws.sns.sns_client.get_logger")
+def test_publish_batch_respects_retry_budget(get_logger, settings, metrics, sleep):
+    settings.sns_batch_retry_budget_max_tokens = 0
+    sns_client = SNSClient(
+        "arn:aws:sns:us-east-1:123456789012:topic", settings)
+    sns_client._client = MagicMock()
+    sns_client._client.publish_batch.side_effect = Exception("Throttled")
+
+    failed = sns_client.publish_batch(["Kanastra", "Kanastra 2"])
+
+    assert failed == [0, 1]
+    sns_client._client.publish_batch.assert_called_once()
+    sleep.assert_not_called()
+    metrics["notification_sent_errors"].inc.assert_called_once_with(2)
+
+
 @patch("src.aws.sns.sns_client.get_logger")
 def test_validate_client(get_logger, settings):
     sns_client = SNSClient(
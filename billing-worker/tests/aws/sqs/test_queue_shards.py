@@ -0,0 +1,48 @@
+import pytest
+from unittest.mock import MagicMock
+from src.aws.sqs.queue_shards import owned_queues, owned_shards, shard_queue_url
+
+
+@pytest.fixture
+def settings():
+    _settings = MagicMock()
+    _settings.sqs_queue_url = "queue"
+    _settings.sqs_queue_shards = 4
+    _settings.sqs_owned_shards = ""
+    return _settings
+
+
+def test_shard_queue_url():
+    assert shard_queue_url("queue", 2) == "queue-2"
+
+
+def test_owned_shards_defaults_to_every_shard(settings):
+    assert owned_shards(settings) == [0, 1, 2, 3]
+
+
+def test_owned_shards(settings):
+    settings.sqs_owned_shards = "0, 2"
+    assert owned_shards(settings) == [0, 2]
+
+
+@pytest.mark.parametrize("owned", ["4", "-1"])
+def test_owned_shards_out_of_range(settings, owned):
+    settings.sqs_owned_shards = owned
+    with pytest.raises(ValueError) as exc:
+        owned_shards(settings)
+    assert str(exc.value) == f"Shard {owned} out of the 4 shards of the queue"
+
+
+def test_owned_queues(settings):
+    settings.sqs_owned_shards = "1,3"
+    assert owned_queues(settings) == [(1, "queue-1"), (3, "queue-3")]
+
+
+def test_owned_queues_without_shards(settings):
+    settings.sqs_queue_shards = 1
+    settings.sqs_owned_shards = "1"
+    assert owned_queues(settings) == [(None, "queue")]
+
+
+def test_shard_queue_url_of_a_fifo_queue():
+    assert shard_queue_url("queue.fifo", 2) == "queue-2.fifo"
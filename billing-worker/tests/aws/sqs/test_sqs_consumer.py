@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, call, patch
 from src.aws.sqs.exceptions.sqs_consumer_exception import SQSConsumerException
 from src.aws.sqs.sqs_consumer import SQSConsumer
 from src.config.settings import Settings
@@ -25,13 +25,12 @@ def test_init(get_logger, settings):
 
 
 @patch("src.aws.sqs.sqs_consumer.get_logger")
-@patch("src.aws.sqs.sqs_consumer.boto3")
-def test_create_client(boto3, get_logger, settings):
+@patch("src.aws.sqs.sqs_consumer.get_aws_client_factory")
+def test_create_client(get_aws_client_factory, get_logger, settings):
     consumer = SQSConsumer(settings)
     consumer.create_client()
-    assert consumer._client == boto3.client.return_value
-    boto3.client.assert_called_once_with(
-        "sqs", region_name="aws_region", endpoint_url=None)
+    assert consumer._client == get_aws_client_factory.return_value.client.return_value
+    get_aws_client_factory.return_value.client.assert_called_once_with("sqs", None)
     get_logger.return_value.info.assert_called_once_with("Client created")
 
 
@@ -54,6 +53,50 @@ def test_consume(settings):
     consumer._get_messages.assert_called_once()
 
 
+def test_consume_shard_queues(settings):
+    settings.sqs_queue_shards = 2
+    settings.sqs_wait_time_seconds = 20
+    consumer = SQSConsumer(settings)
+    consumer._validate_client = MagicMock()
+    consumer._get_messages = MagicMock(side_effect=[[{"Body": "message_1"}], []])
+
+    messages = list(consumer.consume(run_forever=False))
+
+    assert [message.content for message in messages] == [{"Body": "message_1"}]
+    assert messages[0].queue_url == "sqs_queue_url-0"
+    consumer._get_messages.assert_has_calls([call("sqs_queue_url-0", 0), call("sqs_queue_url-1", 0)])
+
+
+def test_consume_shard_queues_long_polls_when_idle(settings):
+    settings.sqs_queue_shards = 2
+    settings.sqs_wait_time_seconds = 20
+    consumer = SQSConsumer(settings)
+    consumer._validate_client = MagicMock()
+    consumer._get_messages = MagicMock(side_effect=[[], [], [{"Body": "message_1"}]])
+
+    messages = consumer.consume()
+    next(messages)
+
+    consumer._get_messages.assert_has_calls([
+        call("sqs_queue_url-0", 0),
+        call("sqs_queue_url-1", 0),
+        call("sqs_queue_url-0", 10)
+    ])
+
+
+@pytest.mark.parametrize("queues, idle, wait_time_seconds", [
+    (1, False, 20), (1, True, 20), (4, False, 0), (4, True, 5), (32, True, 1), (32, False, 0)
+])
+def test_wait_time_seconds(settings, queues, idle, wait_time_seconds):
+    settings.sqs_wait_time_seconds = 20
+    assert SQSConsumer(settings)._wait_time_seconds(queues, idle) == wait_time_seconds
+
+
+def test_wait_time_seconds_without_long_polling(settings):
+    settings.sqs_wait_time_seconds = 0
+    assert SQSConsumer(settings)._wait_time_seconds(32, True) == 0
+
+
 @patch("src.aws.sqs.sqs_consumer.get_logger")
 def test_delete_message(get_logger, settings):
     consumer = SQSConsumer(settings)
@@ -97,7 +140,31 @@ def test_get_messages(settings):
     assert consumer._get_messages() == [1, 2, 3]
     consumer._client.receive_message.assert_called_once_with(QueueUrl="sqs_queue_url",
                                                              MaxNumberOfMessages=settings.sqs_max_messages,
-                                                             WaitTimeSeconds=settings.sqs_wait_time_seconds)
+                                                             WaitTimeSeconds=settings.sqs_wait_time_seconds,
+                                                             MessageAttributeNames=["All"])
+
+
+@patch("src.aws.sqs.sqs_consumer.get_logger")
+def test_delete_message_from_shard_queue(get_logger, settings):
+    consumer = SQSConsumer(settings)
+    consumer._validate_client = MagicMock()
+    consumer._client = MagicMock()
+
+    consumer.delete_message(SQSMessage({"ReceiptHandle": "receipt_handle"}, "sqs_queue_url-1"))
+
+    consumer._client.delete_message.assert_called_once_with(QueueUrl="sqs_queue_url-1",
+                                                            ReceiptHandle="receipt_handle")
+
+
+def test_get_messages_from_shard_queue(settings):
+    consumer = SQSConsumer(settings)
+    consumer._client = MagicMock()
+    consumer._client.receive_message = MagicMock(return_value={"Messages": [1]})
+    assert consumer._get_messages("sqs_queue_url-1", 0) == [1]
+    consumer._client.receive_message.assert_called_once_with(QueueUrl="sqs_queue_url-1",
+                                                             MaxNumberOfMessages=settings.sqs_max_messages,
+                                                             WaitTimeSeconds=0,
+                                                             MessageAttributeNames=["All"])
 
 
 def test_get_messages_no_messages(settings):
@@ -107,7 +174,8 @@ def test_get_messages_no_messages(settings):
     assert consumer._get_messages() == []
     consumer._client.receive_message.assert_called_once_with(QueueUrl="sqs_queue_url",
                                                              MaxNumberOfMessages=settings.sqs_max_messages,
-                                                             WaitTimeSeconds=settings.sqs_wait_time_seconds)
+                                                             WaitTimeSeconds=settings.sqs_wait_time_seconds,
+                                                             MessageAttributeNames=["All"])
 
 
 def test_validate_client_has_client(settings):
@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+import pytest
+
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.mark.parametrize("benchmark, args", [
+    ("bench_message_decoding", ["200"]),
+])
+def test_benchmark_runs_on_a_small_input(benchmark, args):
+    """
+    Each benchmark runs in its own process, as documented in its usage, so the
+    settings and clients it changes do not leak into the other tests.
+    """
+    result = subprocess.run(
+        [sys.executable, "-m", f"benchmarks.{benchmark}", *args],
+        cwd=SERVICE_DIR,
+        env={**os.environ, "PYTHONPATH": "."},
+        capture_output=True,
+        timeout=120
+    )
+
+    assert result.returncode == 0, result.stderr.decode(errors="replace")
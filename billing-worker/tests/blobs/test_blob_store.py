@@ -0,0 +1,134 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from src.blobs.blob_store import LocalBlobStore, S3BlobStore, create_blob_store
+from src.blobs.exceptions.blob_not_found_exception import BlobNotFoundException
+from src.blobs.exceptions.invalid_blob_key_exception import InvalidBlobKeyException
+
+
+class NoSuchKey(Exception):
+    pass
+
+
+@pytest.fixture
+def s3_client():
+    client = MagicMock()
+    client.exceptions.NoSuchKey = NoSuchKey
+    return client
+
+
+def test_local_blob_store_read(tmp_path):
+    (tmp_path / "chunks").mkdir()
+    (tmp_path / "chunks" / "key.csv").write_bytes(b"line1\nline2\nline3")
+
+    store = LocalBlobStore(str(tmp_path))
+
+    assert store.read("chunks/key.csv", 0, 17) == b"line1\nline2\nline3"
+    assert store.read("chunks/key.csv", 6, 11) == b"line2"
+
+
+def test_local_blob_store_read_empty_blob(tmp_path):
+    (tmp_path / "chunks").mkdir()
+    (tmp_path / "chunks" / "key.csv").write_bytes(b"")
+
+    assert LocalBlobStore(str(tmp_path)).read("chunks/key.csv", 0, 0) == b""
+
+
+def test_local_blob_store_read_missing_blob(tmp_path):
+    with pytest.raises(BlobNotFoundException, match="Blob not found: chunks/key.csv"):
+        LocalBlobStore(str(tmp_path)).read("chunks/key.csv", 0, 5)
+
+
+def test_local_blob_store_delete(tmp_path):
+    (tmp_path / "chunks").mkdir()
+    (tmp_path / "chunks" / "key.csv").write_bytes(b"line1")
+    store = LocalBlobStore(str(tmp_path))
+
+    store.delete("chunks/key.csv")
+    store.delete("chunks/key.csv")
+
+    assert not (tmp_path / "chunks" / "key.csv").exists()
+
+
+@pytest.mark.parametrize("key", [
+    "chunks/../../secret",
+    "chunks/../secret",
+    "secret",
+    "../secret",
+    "/tmp/secret",
+    "chunks/link/secret",
+    "chunks/",
+    None,
+])
+def test_local_blob_store_refuses_keys_out_of_the_chunks(tmp_path, key):
+    (tmp_path / "blobs" / "chunks").mkdir(parents=True)
+    (tmp_path / "blobs" / "secret").write_bytes(b"secret")
+    (tmp_path / "secret").write_bytes(b"secret")
+    (tmp_path / "blobs" / "chunks" / "link").symlink_to(tmp_path)
+    store = LocalBlobStore(str(tmp_path / "blobs"))
+
+    with pytest.raises(InvalidBlobKeyException):
+        store.read(key, 0, 6)
+    with pytest.raises(InvalidBlobKeyException):
+        store.delete(key)
+
+    assert (tmp_path / "secret").exists()
+    assert (tmp_path / "blobs" / "secret").exists()
+
+
+def test_s3_blob_store_read(s3_client):
+    s3_client.get_object.return_value = {"Body": MagicMock(read=MagicMock(return_value=b"line2"))}
+
+    assert S3BlobStore("bucket", s3_client).read("chunks/key.csv", 6, 11) == b"line2"
+    s3_client.get_object.assert_called_once_with(Bucket="bucket", Key="chunks/key.csv", Range="bytes=6-10")
+
+
+def test_s3_blob_store_read_empty_range(s3_client):
+    assert S3BlobStore("bucket", s3_client).read("chunks/key.csv", 0, 0) == b""
+    s3_client.get_object.assert_not_called()
+
+
+def test_s3_blob_store_read_missing_blob(s3_client):
+    s3_client.get_object.side_effect = NoSuchKey()
+
+    with pytest.raises(BlobNotFoundException):
+        S3BlobStore("bucket", s3_client).read("chunks/key.csv", 0, 5)
+
+
+@pytest.mark.parametrize("key", ["secret", "/chunks/key.csv"])
+def test_s3_blob_store_refuses_keys_out_of_the_chunks(s3_client, key):
+    store = S3BlobStore("bucket", s3_client)
+
+    with pytest.raises(InvalidBlobKeyException):
+        store.read(key, 0, 5)
+    with pytest.raises(InvalidBlobKeyException):
+        store.delete(key)
+
+    s3_client.get_object.assert_not_called()
+    s3_client.delete_object.assert_not_called()
+
+
+def test_s3_blob_store_delete(s3_client):
+    S3BlobStore("bucket", s3_client).delete("chunks/key.csv")
+
+    s3_client.delete_object.assert_called_once_with(Bucket="bucket", Key="chunks/key.csv")
+
+
+@patch("src.blobs.blob_store.get_aws_client_factory")
+def test_create_blob_store(get_aws_client_factory):
+    settings = MagicMock(blob_store_bucket="", blob_store_dir="/var/lib/blobs")
+
+    store = create_blob_store(settings)
+
+    assert isinstance(store, LocalBlobStore)
+    assert store.directory == "/var/lib/blobs"
+
+
+@patch("src.blobs.blob_store.get_aws_client_factory")
+def test_create_blob_store_with_bucket(get_aws_client_factory):
+    settings = MagicMock(blob_store_bucket="bucket", s3_endpoint_url="http://localstack:4566")
+
+    store = create_blob_store(settings)
+
+    assert isinstance(store, S3BlobStore)
+    assert store.client == get_aws_client_factory.return_value.client.return_value
+    get_aws_client_factory.return_value.client.assert_called_once_with("s3", "http://localstack:4566")
@@ -1,5 +1,6 @@
 import pytest
 from unittest.mock import MagicMock
+from src.encoding.row_codec import encode_fields, encode_row
 from src.handlers.context_builder_handler import ContextBuilderHandler
 from src.models.data_status import DataStatus
 
@@ -12,7 +13,7 @@ def settings():
 @pytest.fixture
 def sqs_message():
     body = 'John Doe,11111111111,johndoe@kanastra.com.br,1000000.00,2022-10-12,1adb6ccf-ff16-467f-bea7-5f05d494280f'
-    return MagicMock(body=body, receipt_handle='1234567890')
+    return MagicMock(body=body, receipt_handle='1234567890', format_version=0)
 
 
 def test_handle_valid_message(settings, sqs_message):
@@ -61,3 +62,78 @@ def test_handle_invalid_message_content_type(settings, sqs_message):
     assert context.status == DataStatus.INVALID
     handler.logger.error.assert_called_once_with(
         'Invalid SQS message content', extra={'sqs_message': sqs_message.content})
+
+
+def test_handle_message_with_a_quoted_comma_in_the_name(settings, sqs_message):
+    sqs_message.body = '"Doe, John",11111111111,johndoe@kanastra.com.br,10.00,2022-10-12,1adb6ccf-ff16-467f-bea7-5f05d494280f'
+    handler = ContextBuilderHandler(settings)
+    handler.logger = MagicMock()
+    context = handler.handle(sqs_message)
+
+    assert context.status == DataStatus.VALID
+    assert context.bill_details.name == 'Doe, John'
+    assert context.bill_details.government_id == 11111111111
+    handler.logger.error.assert_not_called()
+
+
+def test_handle_message_with_unbalanced_quotes(settings, sqs_message):
+    sqs_message.body = '"Doe, John,11111111111,johndoe@kanastra.com.br,10.00,2022-10-12,1adb6ccf-ff16-467f-bea7-5f05d494280f'
+    handler = ContextBuilderHandler(settings)
+    handler.logger = MagicMock()
+    context = handler.handle(sqs_message)
+
+    assert context.status == DataStatus.INVALID
+    handler.logger.error.assert_called_once_with(
+        'Invalid SQS message content', extra={'sqs_message': sqs_message.content})
+
+
+def test_handle_binary_encoded_message(settings, sqs_message):
+    sqs_message.body = encode_row(sqs_message.body)
+    sqs_message.format_version = 1
+    handler = ContextBuilderHandler(settings)
+    handler.logger = MagicMock()
+    context = handler.handle(sqs_message)
+
+    assert context.status == DataStatus.VALID
+    assert context.bill_details.name == 'John Doe'
+    assert context.bill_details.government_id == 11111111111
+    assert context.bill_details.email == 'johndoe@kanastra.com.br'
+    assert context.bill_details.debt_amount == 1000000.00
+    assert context.bill_details.debt_due_date == '2022-10-12'
+    assert context.bill_details.debt_id == '1adb6ccf-ff16-467f-bea7-5f05d494280f'
+    handler.logger.error.assert_not_called()
+
+
+def test_handle_binary_encoded_message_with_a_comma_in_the_name(settings, sqs_message):
+    sqs_message.body = encode_fields(
+        'Doe, John', '11111111111', 'johndoe@kanastra.com.br', '10.00', '2022-10-12', '1adb6ccf-ff16-467f-bea7-5f05d494280f'
+    )
+    sqs_message.format_version = 1
+    handler = ContextBuilderHandler(settings)
+    handler.logger = MagicMock()
+    context = handler.handle(sqs_message)
+
+    assert context.status == DataStatus.VALID
+    assert context.bill_details.name == 'Doe, John'
+
+
+def test_handle_invalid_binary_encoded_message(settings, sqs_message):
+    sqs_message.format_version = 1
+    handler = ContextBuilderHandler(settings)
+    handler.logger = MagicMock()
+    context = handler.handle(sqs_message)
+
+    assert context.status == DataStatus.INVALID
+    handler.logger.error.assert_called_once_with(
+        'Invalid SQS message content', extra={'sqs_message': sqs_message.content})
+
+
+def test_handle_unsupported_message_format(settings, sqs_message):
+    sqs_message.format_version = 2
+    handler = ContextBuilderHandler(settings)
+    handler.logger = MagicMock()
+    context = handler.handle(sqs_message)
+
+    assert context.status == DataStatus.INVALID
+    handler.logger.error.assert_called_once_with(
+        'Unsupported SQS message format', extra={'sqs_message': sqs_message.content})
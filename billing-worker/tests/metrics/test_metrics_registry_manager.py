@@ -63,6 +63,25 @@ def test_register_counter(counter, ):
     )
 
 
+@patch("src.metrics.metrics_registry_manager.Gauge")
+def test_register_gauge(gauge, ):
+    metrics = MetricsRegistryManager()
+    metrics.register_gauge("metric_name", "metric_description", {"key"})
+
+    register = metrics.metrics_pool["metric_name"]
+
+    assert register == gauge.return_value
+    gauge.assert_called_with(
+        name="metric_name",
+        documentation="metric_description",
+        registry=metrics.registry,
+        labelnames={
+            "app",
+            "key",
+        }
+    )
+
+
 @patch("src.metrics.metrics_registry_manager.Summary")
 def test_register_summary(summary, ):
     metrics = MetricsRegistryManager()
@@ -106,6 +125,18 @@ def test_register_summary_raises_error():
     assert str(ex.value) == "Metric metric_name already exists"
 
 
+def test_register_gauge_raises_error():
+    metrics = MetricsRegistryManager()
+    metrics.metrics_pool = {
+        "metric_name": MagicMock()
+    }
+
+    with pytest.raises(ValueError) as ex:
+        metrics.register_gauge("metric_name", "metric_description")
+
+    assert str(ex.value) == "Metric metric_name already exists"
+
+
 def test_abstract_register():
     metric_constructor = MagicMock()
     metrics = MetricsRegistryManager()
@@ -0,0 +1,95 @@
+from src.models.sqs_message import SQSMessage
+
+
+def test_init():
+    message = SQSMessage({"Body": "body", "ReceiptHandle": "receipt"})
+
+    assert message.content == {"Body": "body", "ReceiptHandle": "receipt"}
+    assert message.body == "body"
+    assert message.receipt_handle == "receipt"
+
+
+def test_unpack_single_row():
+    message = SQSMessage({"Body": "row1", "ReceiptHandle": "receipt"})
+
+    assert message.unpack() == [message]
+
+
+def test_unpack_empty_body():
+    message = SQSMessage({"ReceiptHandle": "receipt"})
+
+    assert message.unpack() == [message]
+
+
+def test_unpack_packed_rows():
+    message = SQSMessage({
+        "MessageId": "id",
+        "Body": "row1\nrow2\n\nrow3",
+        "ReceiptHandle": "receipt"
+    })
+
+    rows = message.unpack()
+
+    assert [row.body for row in rows] == ["row1", "row2", "row3"]
+    assert [row.receipt_handle for row in rows] == ["receipt"] * 3
+    assert rows[0].content == {"MessageId": "id", "Body": "row1", "ReceiptHandle": "receipt"}
+
+
+def test_unpack_keeps_the_queue_url():
+    message = SQSMessage({"Body": "row1\nrow2", "ReceiptHandle": "receipt"}, "queue-1")
+
+    assert [row.queue_url for row in message.unpack()] == ["queue-1", "queue-1"]
+
+
+def test_attribute():
+    message = SQSMessage({
+        "Body": "row1",
+        "MessageAttributes": {"MessageType": {"DataType": "String", "StringValue": "claim-check"}}
+    })
+
+    assert message.attribute("MessageType") == "claim-check"
+    assert message.attribute("Other") is None
+    assert message.is_claim_check
+
+
+def test_is_claim_check_without_attributes():
+    assert not SQSMessage({"Body": "row1"}).is_claim_check
+
+
+def test_with_rows():
+    message = SQSMessage({
+        "Body": '{"key": "chunks/key.csv", "start": 0, "end": 16}',
+        "ReceiptHandle": "receipt",
+        "MessageAttributes": {"MessageType": {"DataType": "String", "StringValue": "claim-check"}}
+    })
+
+    rows = message.with_rows("row1\nrow2\n\nrow3")
+
+    assert [row.body for row in rows] == ["row1", "row2", "row3"]
+    assert all(row.receipt_handle == "receipt" for row in rows)
+    assert not any(row.is_claim_check for row in rows)
+
+
+def test_format_version():
+    message = SQSMessage({
+        "Body": "row1",
+        "MessageAttributes": {"FormatVersion": {"DataType": "Number", "StringValue": "1"}}
+    })
+
+    assert message.format_version == 1
+    assert SQSMessage({"Body": "row1"}).format_version == 0
+
+
+def test_with_rows_keeps_the_format_version():
+    message = SQSMessage({
+        "Body": '{"key": "chunks/key.csv", "start": 0, "end": 10}',
+        "MessageAttributes": {
+            "MessageType": {"DataType": "String", "StringValue": "claim-check"},
+            "FormatVersion": {"DataType": "Number", "StringValue": "1"}
+        }
+    })
+
+    rows = message.with_rows("row1\nrow2")
+
+    assert [row.format_version for row in rows] == [1, 1]
+    assert not any(row.is_claim_check for row in rows)
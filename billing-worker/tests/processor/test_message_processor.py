@@ -1,6 +1,20 @@
 import pytest
 from unittest.mock import MagicMock, patch
+from src.models.sqs_message import SQSMessage
 from src.processors.message_processor import MessageProcessor
+from src.blobs.exceptions.blob_not_found_exception import BlobNotFoundException
+from src.blobs.exceptions.invalid_blob_key_exception import InvalidBlobKeyException
+
+
+CLAIM_CHECK_ATTRIBUTES = {"MessageType": {"DataType": "String", "StringValue": "claim-check"}}
+
+
+def claim_check_message():
+    return SQSMessage({
+        "Body": '{"key": "chunks/key.csv", "start": 0, "end": 14}',
+        "ReceiptHandle": "receipt",
+        "MessageAttributes": CLAIM_CHECK_ATTRIBUTES
+    })
 
 
 @pytest.fixture
@@ -25,8 +39,8 @@ def test_init(get_logger, handler, sqs_consumer):
 @patch("src.processors.message_processor.METRICS")
 @patch("src.processors.message_processor.get_logger")
 def test_process(get_logger, metrics, handler, sqs_consumer):
-    message1 = MagicMock(body="message1")
-    message2 = MagicMock(body="message2")
+    message1 = SQSMessage({"Body": "message1", "ReceiptHandle": "receipt1"})
+    message2 = SQSMessage({"Body": "message2", "ReceiptHandle": "receipt2"})
     sqs_consumer.consume.return_value = [message1, message2]
 
     message_processor = MessageProcessor(handler, sqs_consumer)
@@ -46,11 +60,12 @@ def test_process(get_logger, metrics, handler, sqs_consumer):
     get_logger.return_value.error.assert_not_called()
     metrics.get("messages_processed_successfully").inc.assert_any_call()
 
+
 @patch("src.processors.message_processor.METRICS")
 @patch("src.processors.message_processor.get_logger")
 def test_process_error(get_logger, metrics, handler, sqs_consumer):
-    message1 = MagicMock(body="message1")
-    message2 = MagicMock(body="message2")
+    message1 = SQSMessage({"Body": "message1", "ReceiptHandle": "receipt1"})
+    message2 = SQSMessage({"Body": "message2", "ReceiptHandle": "receipt2"})
     sqs_consumer.consume.return_value = [message1, message2]
     handler.handle.side_effect = Exception("error")
 
@@ -71,3 +86,142 @@ def test_process_error(get_logger, metrics, handler, sqs_consumer):
     get_logger.return_value.error.assert_any_call(
         "Error processing message: error")
     metrics.get.assert_called_with("messages_processed_errors")
+
+
+@patch("src.processors.message_processor.METRICS")
+@patch("src.processors.message_processor.get_logger")
+def test_process_packed_message(get_logger, metrics, handler, sqs_consumer):
+    message = SQSMessage({"Body": "row1\nrow2\nrow3", "ReceiptHandle": "receipt"})
+    sqs_consumer.consume.return_value = [message]
+
+    message_processor = MessageProcessor(handler, sqs_consumer)
+    message_processor.process()
+
+    rows = [call.args[0] for call in handler.handle.call_args_list]
+    assert [row.body for row in rows] == ["row1", "row2", "row3"]
+    assert all(row.receipt_handle == "receipt" for row in rows)
+    sqs_consumer.delete_message.assert_called_once_with(message)
+    get_logger.return_value.debug.assert_any_call(
+        "Processing packed message with 3 rows")
+    metrics.get.assert_any_call("rows_processed_successfully")
+    metrics.get.assert_called_with("messages_processed_successfully")
+    get_logger.return_value.error.assert_not_called()
+
+
+@patch("src.processors.message_processor.METRICS")
+@patch("src.processors.message_processor.get_logger")
+def test_process_packed_message_row_error(get_logger, metrics, handler, sqs_consumer):
+    message = SQSMessage({"Body": "row1\nrow2\nrow3", "ReceiptHandle": "receipt"})
+    sqs_consumer.consume.return_value = [message]
+    handler.handle.side_effect = [None, Exception("error"), None]
+    row_metrics = {}
+    metrics.get.side_effect = lambda name: row_metrics.setdefault(name, MagicMock())
+
+    message_processor = MessageProcessor(handler, sqs_consumer)
+    message_processor.process()
+
+    assert handler.handle.call_count == 3
+    sqs_consumer.delete_message.assert_called_once_with(message)
+    get_logger.return_value.error.assert_called_once_with(
+        "Error processing row: error", extra={"row": "row2"})
+    assert row_metrics["rows_processed_successfully"].inc.call_count == 2
+    assert row_metrics["rows_processed_errors"].inc.call_count == 1
+    row_metrics["messages_processed_errors"].inc.assert_called_once()
+    assert "messages_processed_successfully" not in row_metrics
+
+
+@patch("src.processors.message_processor.METRICS")
+@patch("src.processors.message_processor.get_logger")
+def test_process_claim_check_message(get_logger, metrics, handler, sqs_consumer):
+    message = claim_check_message()
+    sqs_consumer.consume.return_value = [message]
+    blob_store = MagicMock()
+    blob_store.read.return_value = b"row1\nrow2\nrow3"
+
+    message_processor = MessageProcessor(handler, sqs_consumer, blob_store)
+    message_processor.process()
+
+    blob_store.read.assert_called_once_with("chunks/key.csv", 0, 14)
+    rows = [call.args[0] for call in handler.handle.call_args_list]
+    assert [row.body for row in rows] == ["row1", "row2", "row3"]
+    assert all(row.receipt_handle == "receipt" for row in rows)
+    sqs_consumer.delete_message.assert_called_once_with(message)
+    blob_store.delete.assert_called_once_with("chunks/key.csv")
+    metrics.get.assert_any_call("claim_check_chunks_read")
+    get_logger.return_value.error.assert_not_called()
+
+
+@patch("src.processors.message_processor.METRICS")
+@patch("src.processors.message_processor.get_logger")
+def test_process_claim_check_message_with_a_single_row(get_logger, metrics, handler, sqs_consumer):
+    sqs_consumer.consume.return_value = [claim_check_message()]
+    blob_store = MagicMock()
+    blob_store.read.return_value = b"row1"
+
+    MessageProcessor(handler, sqs_consumer, blob_store).process()
+
+    assert handler.handle.call_args.args[0].body == "row1"
+
+
+@patch("src.processors.message_processor.METRICS")
+@patch("src.processors.message_processor.get_logger")
+def test_process_claim_check_message_without_chunk(get_logger, metrics, handler, sqs_consumer):
+    message = claim_check_message()
+    sqs_consumer.consume.return_value = [message]
+    blob_store = MagicMock()
+    blob_store.read.side_effect = BlobNotFoundException("Blob not found: chunks/key.csv")
+
+    MessageProcessor(handler, sqs_consumer, blob_store).process()
+
+    handler.handle.assert_not_called()
+    sqs_consumer.delete_message.assert_called_once_with(message)
+    blob_store.delete.assert_not_called()
+    metrics.get.assert_called_with("claim_check_chunks_missing")
+
+
+@patch("src.processors.message_processor.METRICS")
+@patch("src.processors.message_processor.get_logger")
+def test_process_claim_check_message_with_an_invalid_key(get_logger, metrics, handler, sqs_consumer):
+    message = claim_check_message()
+    sqs_consumer.consume.return_value = [message]
+    blob_store = MagicMock()
+    blob_store.read.side_effect = InvalidBlobKeyException("Invalid blob key: ../secret")
+
+    MessageProcessor(handler, sqs_consumer, blob_store).process()
+
+    handler.handle.assert_not_called()
+    sqs_consumer.delete_message.assert_called_once_with(message)
+    blob_store.delete.assert_not_called()
+    metrics.get.assert_called_with("claim_check_invalid_keys")
+    get_logger.return_value.error.assert_called_once()
+
+
+@patch("src.processors.message_processor.METRICS")
+@patch("src.processors.message_processor.get_logger")
+def test_process_claim_check_message_keeps_the_message_when_the_chunk_is_not_read(get_logger, metrics, handler, sqs_consumer):
+    sqs_consumer.consume.return_value = [claim_check_message()]
+    blob_store = MagicMock()
+    blob_store.read.side_effect = OSError("unavailable")
+
+    MessageProcessor(handler, sqs_consumer, blob_store).process()
+
+    handler.handle.assert_not_called()
+    sqs_consumer.delete_message.assert_not_called()
+    metrics.get.assert_called_with("claim_check_chunk_read_errors")
+    get_logger.return_value.error.assert_called_once()
+
+
+@patch("src.processors.message_processor.METRICS")
+@patch("src.processors.message_processor.get_logger")
+def test_process_claim_check_message_when_the_chunk_is_not_removed(get_logger, metrics, handler, sqs_consumer):
+    message = claim_check_message()
+    sqs_consumer.consume.return_value = [message]
+    blob_store = MagicMock()
+    blob_store.read.return_value = b"row1\nrow2"
+    blob_store.delete.side_effect = OSError("unavailable")
+
+    MessageProcessor(handler, sqs_consumer, blob_store).process()
+
+    assert handler.handle.call_count == 2
+    sqs_consumer.delete_message.assert_called_once_with(message)
+    get_logger.return_value.warning.assert_called_once()
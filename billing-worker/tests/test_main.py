@@ -2,6 +2,7 @@ from unittest.mock import patch
 from src.main import main
 
 
+@patch('src.main.create_blob_store')
 @patch('src.main.start_http_server')
 @patch('src.main.SNSClient')
 @patch('src.main.SQSConsumer')
@@ -24,7 +25,8 @@ def test_main(
     mock_redis_client,
     mock_sqs_consumer,
     mock_sns_client,
-    mock_start_http_server
+    mock_start_http_server,
+    mock_create_blob_store
 ):
     main()
 
@@ -44,5 +46,10 @@ def test_main(
     mock_process_billing_handler.assert_called_with(settings, mock_redis_client.return_value)
     mock_notification_schedule_handler.assert_called_with(settings, mock_redis_client.return_value, mock_notification_service.return_value)
 
-    mock_message_processor.assert_called_with(mock_context_builder_handler.return_value, mock_sqs_consumer.return_value)
+    mock_create_blob_store.assert_called_with(settings)
+    mock_message_processor.assert_called_with(
+        mock_context_builder_handler.return_value,
+        mock_sqs_consumer.return_value,
+        mock_create_blob_store.return_value
+    )
     mock_message_processor.return_value.process.assert_called_once()
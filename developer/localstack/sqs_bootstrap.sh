@@ -8,6 +8,20 @@ awslocal sqs create-queue --queue-name data-process-dlq --attributes VisibilityT
 awslocal sqs create-queue --queue-name process-email --attributes VisibilityTimeout=30
 
 
+echo "Creating SQS shard queues of data-process (SQS_QUEUE_SHARDS up to 4)"
+for shard in 0 1 2 3; do
+  awslocal sqs create-queue --queue-name data-process-$shard --attributes VisibilityTimeout=30
+done
+
+
+echo "Creating SQS FIFO queue data-process.fifo"
+awslocal sqs create-queue --queue-name data-process.fifo --attributes FifoQueue=true,VisibilityTimeout=30
+
+
+echo "Creating S3 bucket of the claim-check chunks"
+awslocal s3 mb s3://data-process-chunks
+
+
 echo "Creating SNS topic"
 awslocal sns create-topic --name data-process-topic
 
@@ -0,0 +1,82 @@
+"""
+Validation throughput of the BlockValidator against the RowValidator.
+
+Validates the same rows one by one with the RowValidator and in blocks of
+`CSV_VALIDATION_BLOCK_SIZE` rows with the BlockValidator, which runs each check
+over whole columns with NumPy. A small share of the rows is invalid, so the
+block path also pays for checking them again one by one.
+
+Usage (from importer-api/):
+    PYTHONPATH=. python -m benchmarks.bench_block_validation [rows] [block_size]
+"""
+import sys
+import time
+from src.processor.block_validator import BlockValidator
+from src.processor.exceptions.invalid_row_exception import InvalidRowException
+from src.processor.row_validator import RowValidator
+
+HEADER = "name,governmentId,email,debtAmount,debtDueDate,debtId"
+ROW = "John Doe,11111111111,johndoe@kanastra.com.br,1000000.00,2022-10-12,1adb6ccf-ff16-467f-bea7-5f05d494280f"
+INVALID_ROW = "John Doe,11111111111,johndoe@kanastra.com.br,1000000.00,2022-02-30,1adb6ccf-ff16-467f-bea7-5f05d494280f"
+INVALID_EVERY = 1000
+DEFAULT_ROWS = 1_000_000
+DEFAULT_BLOCK_SIZE = 10000
+
+
+def build_lines(rows: int) -> list[str]:
+    return [INVALID_ROW if index % INVALID_EVERY == 0 else ROW for index in range(rows)]
+
+
+def validate_rows(lines: list[str]) -> int:
+    validator = RowValidator(HEADER)
+    valid = 0
+    for line in lines:
+        try:
+            validator.validate(line)
+            valid += 1
+        except InvalidRowException:
+            pass
+    return valid
+
+
+def validate_blocks(lines: list[str], block_size: int) -> int:
+    validator = RowValidator(HEADER)
+    block_validator = BlockValidator(validator)
+    valid = 0
+    for start in range(0, len(lines), block_size):
+        block = lines[start:start + block_size]
+        mask, _ = block_validator.validate(block)
+        valid += int(mask.sum())
+        for index, is_valid in enumerate(mask.tolist()):
+            if is_valid:
+                continue
+            try:
+                validator.validate(block[index])
+                valid += 1
+            except InvalidRowException:
+                pass
+    return valid
+
+
+def measure(function, *args) -> tuple[int, float]:
+    started_at = time.perf_counter()
+    valid = function(*args)
+    return valid, time.perf_counter() - started_at
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    block_size = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_BLOCK_SIZE
+    lines = build_lines(rows)
+
+    print(f"{'validator':>10} {'valid rows':>12} {'seconds':>10} {'rows/s':>12}")
+    for name, function, args in (
+        ("row", validate_rows, (lines,)),
+        ("block", validate_blocks, (lines, block_size)),
+    ):
+        valid, elapsed = measure(function, *args)
+        print(f"{name:>10} {valid:>12} {elapsed:>10.2f} {rows / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
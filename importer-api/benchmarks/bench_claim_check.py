@@ -0,0 +1,69 @@
+"""
+Messages sent to the queue, and bytes they carry, for one message per row, packed
+messages and claim-check chunks.
+
+The CSV is processed with an SQS client that accepts every message and counts the
+messages and their size. In claim-check mode the chunks are saved to a local blob
+store in a temporary directory, so the time includes writing them.
+
+Usage (from importer-api/):
+    PYTHONPATH=. python -m benchmarks.bench_claim_check [rows] [chunk_size]
+"""
+import asyncio
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+from src.blobs.blob_store import LocalBlobStore
+from src.config.settings import get_settings
+from src.processor.csv_processor import CSVProcessor
+from benchmarks.bench_stream_upload import DEFAULT_ROWS, build_csv
+
+DEFAULT_CHUNK_SIZE = 4194304
+
+
+class CountingSQSClient:
+    def __init__(self):
+        self.requests = 0
+        self.messages = 0
+        self.bytes = 0
+
+    async def send_message_batch_async(self, messages: list, message_attributes: dict | None = None) -> list:
+        self.requests += 1
+        self.messages += len(messages)
+        self.bytes += sum(len(message.encode()) for message in messages)
+        return []
+
+
+def measure(settings, content: bytes, directory: str) -> tuple[CountingSQSClient, float]:
+    sqs_client = CountingSQSClient()
+    started_at = time.perf_counter()
+
+    with patch("src.processor.csv_processor.get_blob_store", return_value=LocalBlobStore(directory)):
+        asyncio.run(CSVProcessor(settings, content, sqs_client).process())
+
+    return sqs_client, time.perf_counter() - started_at
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_CHUNK_SIZE
+    content = build_csv(rows)
+    settings = get_settings()
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'mode':>12} {'requests':>10} {'messages':>10} {'queue (KB)':>11} {'seconds':>8}")
+        for name, update in (
+            ("row", {"sqs_message_packing_enabled": False, "claim_check_enabled": False}),
+            ("packed", {"sqs_message_packing_enabled": True, "claim_check_enabled": False}),
+            ("claim-check", {"claim_check_enabled": True, "claim_check_chunk_size": chunk_size}),
+        ):
+            sqs_client, seconds = measure(settings.model_copy(update=update), content, directory)
+            print(
+                f"{name:>12} {sqs_client.requests:>10} {sqs_client.messages:>10} "
+                f"{sqs_client.bytes / 1000:>11.1f} {seconds:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
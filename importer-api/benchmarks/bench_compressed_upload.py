@@ -0,0 +1,105 @@
+"""
+Upload-to-enqueue latency of plain, gzip and zstd uploads over a slow link.
+
+The upload is read from a file throttled to the given bandwidth, standing in for
+the client link, and saved to the spool, decompressed on the fly when compressed.
+The spooled CSV is then processed with an SQS client that accepts every message.
+Prints the bytes sent over the link, the time to spool the upload, the time to
+enqueue its rows and the total. The time the client spends compressing the file
+is not counted.
+
+Usage (from importer-api/):
+    PYTHONPATH=. python -m benchmarks.bench_compressed_upload [rows] [bandwidth_mbit]
+"""
+import asyncio
+import gzip
+import sys
+import tempfile
+import time
+import uuid
+import zstandard
+from io import BytesIO
+from src.config.settings import get_settings
+from src.processor.csv_processor import CSVProcessor
+from src.spool.decompression import GZIP, ZSTD
+from src.spool.upload_spool import UploadSpool, map_file
+
+HEADER = "name,governmentId,email,debtAmount,debtDueDate,debtId"
+DEFAULT_ROWS = 200_000
+DEFAULT_BANDWIDTH_MBIT = 100
+
+
+class NullSQSClient:
+    async def send_message_batch_async(self, messages: list) -> list:
+        return []
+
+
+class ThrottledFile:
+    """
+    Gives the bytes no faster than `bytes_per_second`, as a client sending them
+    over a link of that bandwidth.
+    """
+
+    def __init__(self, content: bytes, bytes_per_second: float):
+        self.file = BytesIO(content)
+        self.bytes_per_second = bytes_per_second
+        self.started_at = None
+
+    def seek(self, offset: int):
+        self.file.seek(offset)
+
+    def read(self, size: int = -1) -> bytes:
+        if self.started_at is None:
+            self.started_at = time.perf_counter()
+
+        chunk = self.file.read(size)
+        arrives_at = self.started_at + self.file.tell() / self.bytes_per_second
+        time.sleep(max(arrives_at - time.perf_counter(), 0))
+        return chunk
+
+
+def build_csv(rows: int) -> bytes:
+    lines = [HEADER] + [
+        f"Name {index},{index:011d},name{index}@kanastra.com.br,{index % 100000}.{index % 100:02d},"
+        f"2024-{index % 12 + 1:02d}-{index % 28 + 1:02d},{uuid.UUID(int=index * 7919 + 1)}"
+        for index in range(rows)
+    ]
+    return "\n".join(lines).encode()
+
+
+def measure(settings, payload: bytes, encoding: str | None, bytes_per_second: float) -> tuple[float, float]:
+    started_at = time.perf_counter()
+    spooled_import = UploadSpool(settings).save(ThrottledFile(payload, bytes_per_second), encoding=encoding)
+    spooled_at = time.perf_counter()
+
+    with map_file(spooled_import.path) as file:
+        asyncio.run(CSVProcessor(settings, file, NullSQSClient()).process())
+    UploadSpool(settings).remove(spooled_import)
+
+    return spooled_at - started_at, time.perf_counter() - spooled_at
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    bandwidth_mbit = float(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_BANDWIDTH_MBIT
+    bytes_per_second = bandwidth_mbit * 1_000_000 / 8
+    content = build_csv(rows)
+
+    with tempfile.TemporaryDirectory() as directory:
+        settings = get_settings().model_copy(update={"import_spool_dir": directory})
+
+        print(f"{'upload':>8} {'sent (MB)':>10} {'spool (s)':>10} {'enqueue (s)':>12} {'total (s)':>10}")
+        for name, payload, encoding in (
+            ("plain", content, None),
+            ("gzip", gzip.compress(content, compresslevel=6), GZIP),
+            ("zstd", zstandard.ZstdCompressor(level=3).compress(content), ZSTD),
+        ):
+            spool_seconds, enqueue_seconds = measure(settings, payload, encoding, bytes_per_second)
+            print(
+                f"{name:>8} {len(payload) / 1_000_000:>10.1f} {spool_seconds:>10.2f} "
+                f"{enqueue_seconds:>12.2f} {spool_seconds + enqueue_seconds:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
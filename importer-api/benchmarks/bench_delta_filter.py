@@ -0,0 +1,67 @@
+"""
+Throughput of the DeltaFilter on a daily import of the same source.
+
+Saves the fingerprints of a first import and checks a second import where a
+share of the rows changed, in blocks of `CSV_VALIDATION_BLOCK_SIZE` rows, with the
+store of the first import mapped in memory. Prints the time to fingerprint and
+look up the rows, the size of the store and the rows left to send.
+
+Usage (from importer-api/):
+    PYTHONPATH=. python -m benchmarks.bench_delta_filter [rows] [changed_percent]
+"""
+import os
+import sys
+import tempfile
+import time
+from src.fingerprints.fingerprint_store import open_fingerprint_store
+from src.processor.delta_filter import DeltaFilter
+
+ROW = "John Doe,11111111111,johndoe@kanastra.com.br,{amount}.00,2022-10-12,{index:08x}-ff16-467f-bea7-5f05d494280f"
+DEFAULT_ROWS = 1_000_000
+DEFAULT_CHANGED_PERCENT = 3
+BLOCK_SIZE = 10000
+
+
+def build_rows(rows: int, changed_every: int = 0) -> list[str]:
+    return [
+        ROW.format(amount=2000 if changed_every and index % changed_every == 0 else 1000, index=index)
+        for index in range(rows)
+    ]
+
+
+def check_rows(delta_filter: DeltaFilter, rows: list[str]) -> int:
+    changed = 0
+    for start in range(0, len(rows), BLOCK_SIZE):
+        changed += int((~delta_filter.unchanged_block(rows[start:start + BLOCK_SIZE])).sum())
+    return changed
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    changed_percent = float(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_CHANGED_PERCENT
+    changed_every = max(round(100 / changed_percent), 1)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "source.fingerprints")
+
+        first_import = DeltaFilter()
+        started_at = time.perf_counter()
+        check_rows(first_import, build_rows(rows))
+        first_import.save(path)
+        first_elapsed = time.perf_counter() - started_at
+
+        second_rows = build_rows(rows, changed_every)
+        second_import = DeltaFilter(open_fingerprint_store(path))
+        started_at = time.perf_counter()
+        changed = check_rows(second_import, second_rows)
+        second_elapsed = time.perf_counter() - started_at
+        second_import.close()
+
+        print(f"{'import':>8} {'rows':>10} {'to send':>10} {'seconds':>10} {'rows/s':>12}")
+        print(f"{'first':>8} {rows:>10} {rows:>10} {first_elapsed:>10.2f} {rows / first_elapsed:>12.0f}")
+        print(f"{'second':>8} {rows:>10} {changed:>10} {second_elapsed:>10.2f} {rows / second_elapsed:>12.0f}")
+        print(f"store size: {os.path.getsize(path) / 2 ** 20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Time for a small import to finish while a large import is running.
+
+Both imports send to the same SQS stand-in, which serves at most `capacity`
+SendMessageBatch calls at a time, like a shared network link or a throttled
+queue. Without the send scheduler (a limit larger than both imports) the
+small import queues behind every in-flight batch of the large one; with the
+limit set to the capacity, the free slots are shared round-robin.
+
+Usage (from importer-api/):
+    PYTHONPATH=. python -m benchmarks.bench_fair_send [large_rows] [small_rows] [latency_ms]
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+os.environ.setdefault("SQS_ENDPOINT_URL", "http://localhost:4566")
+
+from benchmarks.bench_sqs_send_throughput import ROW, SQSStandIn
+from src.aws.sqs.sqs_client import SQSClient
+from src.config.settings import get_settings
+from src.processor.csv_processor import CSVProcessor
+from src.processor.send_scheduler import SendScheduler
+
+DEFAULT_LARGE_ROWS = 100000
+DEFAULT_SMALL_ROWS = 100
+DEFAULT_LATENCY_MS = 20
+
+
+class SharedCapacitySQSStandIn(SQSStandIn):
+    def __init__(self, latency: float, capacity: int):
+        super().__init__(latency)
+        self.capacity = threading.Semaphore(capacity)
+
+    def send_message_batch(self, QueueUrl: str, Entries: list):
+        with self.capacity:
+            return super().send_message_batch(QueueUrl, Entries)
+
+
+async def run_import(settings, stand_in, content: bytes) -> float:
+    sqs_client = SQSClient(settings.sqs_queue_url, settings)
+    sqs_client.create_client()
+    sqs_client._client = stand_in
+
+    started_at = time.perf_counter()
+    try:
+        await CSVProcessor(settings, content, sqs_client).process()
+    finally:
+        sqs_client.close()
+    return time.perf_counter() - started_at
+
+
+async def run(large_rows: int, small_rows: int, latency: float, max_in_flight: int) -> float:
+    settings = get_settings()
+    capacity = settings.max_csv_process_concurrent_tasks // 2
+    stand_in = SharedCapacitySQSStandIn(latency, capacity)
+
+    with patch("src.processor.csv_processor.get_send_scheduler", return_value=SendScheduler(max_in_flight or capacity)):
+        large = asyncio.create_task(run_import(settings, stand_in, ROW * large_rows))
+        await asyncio.sleep(0.5)
+        small_elapsed = await run_import(settings, stand_in, ROW * small_rows)
+        large.cancel()
+        await asyncio.gather(large, return_exceptions=True)
+
+    return small_elapsed
+
+
+def main():
+    large_rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_LARGE_ROWS
+    small_rows = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_SMALL_ROWS
+    latency = (float(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_LATENCY_MS) / 1000
+
+    print(f"{small_rows} rows import while a {large_rows} rows import is running, {latency * 1000:.0f} ms per call")
+    print(f"{'scheduler':>12} {'small import (ms)':>18}")
+    for name, max_in_flight in (("none", 1000000), ("fair", None)):
+        elapsed = asyncio.run(run(large_rows, small_rows, latency, max_in_flight))
+        print(f"{name:>12} {elapsed * 1000:>18.0f}")
+
+
+if __name__ == "__main__":
+    main()
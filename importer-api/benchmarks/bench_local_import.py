@@ -0,0 +1,81 @@
+"""
+Total time of an import sent as a multipart upload and of the same file imported
+in place from the server's disk.
+
+Both requests go through the ASGI app in process, with an SQS client that accepts
+every message, and return when the import finishes. The upload is sent over a link
+throttled to the given bandwidth and copied to the spool before its import starts,
+while the local import maps the file in memory and reads it in place.
+
+Usage (from importer-api/):
+    PYTHONPATH=. python -m benchmarks.bench_local_import [rows] [bandwidth_mbit]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import httpx
+from unittest.mock import patch
+from fastapi import FastAPI
+from benchmarks.bench_stream_upload import (
+    BOUNDARY,
+    DEFAULT_BANDWIDTH_MBIT,
+    DEFAULT_ROWS,
+    RecordingSQSClient,
+    build_csv,
+    build_multipart,
+    throttled
+)
+from src.api.file_importer.routes import router, settings
+
+
+async def measure(app: FastAPI, request: dict) -> float:
+    transport = httpx.ASGITransport(app=app)
+
+    with patch("src.api.file_importer.tasks.get_sqs_client", return_value=RecordingSQSClient()):
+        async with httpx.AsyncClient(transport=transport, base_url="http://importer-api", timeout=None) as client:
+            started_at = time.perf_counter()
+            response = await client.post(**request)
+            finished_at = time.perf_counter()
+
+    response.raise_for_status()
+    return finished_at - started_at
+
+
+async def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    bandwidth_mbit = float(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_BANDWIDTH_MBIT
+    bytes_per_second = bandwidth_mbit * 1_000_000 / 8
+    content = build_csv(rows)
+
+    app = FastAPI()
+    app.include_router(router)
+
+    with tempfile.TemporaryDirectory() as directory:
+        settings.import_spool_dir = f"{directory}/spool"
+        settings.import_error_report_dir = f"{directory}/errors"
+        settings.import_fingerprints_dir = f"{directory}/fingerprints"
+        settings.import_local_dir = f"{directory}/local"
+        os.makedirs(settings.import_local_dir)
+        with open(f"{settings.import_local_dir}/debts.csv", "wb") as file:
+            file.write(content)
+
+        body = build_multipart(content)
+        print(f"{'import':>10} {'total (s)':>10}")
+        for name, request in (
+            ("upload", {
+                "url": "/v1/upload",
+                "content": throttled(body, bytes_per_second),
+                "headers": {
+                    "Content-Type": f"multipart/form-data; boundary={BOUNDARY}",
+                    "Content-Length": str(len(body))
+                }
+            }),
+            ("local", {"url": "/v1/imports/local", "json": {"path": "debts.csv"}}),
+        ):
+            print(f"{name:>10} {await measure(app, request):>10.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
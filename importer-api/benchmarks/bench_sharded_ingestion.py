@@ -0,0 +1,72 @@
+"""
+Rows/sec of the sharded ingestion for different numbers of worker processes.
+
+Each worker process sends to the same SQS stand-in used by
+bench_sqs_send_throughput, with no latency, so the parsing and batching are
+the bottleneck and the rows/sec should grow with the number of cores.
+
+Usage (from importer-api/):
+    PYTHONPATH=. python -m benchmarks.bench_sharded_ingestion [rows] [max_workers]
+"""
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault("SQS_ENDPOINT_URL", "http://localhost:4566")
+
+from benchmarks.bench_sqs_send_throughput import ROW, SQSStandIn
+from src.aws.sqs.sqs_client import get_sqs_client
+from src.config.settings import get_settings
+from src.processor.sharded_csv_processor import ShardedCSVProcessor
+
+DEFAULT_ROWS = 1000000
+
+
+def init_bench_worker():
+    get_sqs_client()._client = SQSStandIn(0)
+
+
+async def run(path: str, workers: int) -> float:
+    settings = get_settings()
+    settings.csv_range_size = max(os.path.getsize(path) // (workers * 4), 1)
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_bench_worker
+    ) as executor:
+        """
+        Warm the pool so the process start up is not measured
+        """
+        await asyncio.gather(*(
+            asyncio.get_running_loop().run_in_executor(executor, time.sleep, 0.1) for _ in range(workers)
+        ))
+
+        started_at = time.perf_counter()
+        await ShardedCSVProcessor(settings, path, executor).process()
+        return time.perf_counter() - started_at
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+
+    with tempfile.NamedTemporaryFile(suffix=".csv") as file:
+        file.write(ROW * rows)
+        file.flush()
+
+        print(f"{rows} rows, {os.cpu_count()} cores")
+        print(f"{'workers':>8} {'rows/sec':>12} {'elapsed (s)':>12}")
+        workers = 1
+        while workers <= max_workers:
+            elapsed = asyncio.run(run(file.name, workers))
+            print(f"{workers:>8} {rows / elapsed:>12.0f} {elapsed:>12.2f}")
+            workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Throttled requests, failed rows and elapsed time of an import sent to a queue
+with a request quota, without a rate limiter, with the limiter at the quota and
+with the adaptive limiter starting at twice the quota.
+
+A local stand-in replaces SQS: each SendMessageBatch call sleeps for a fixed
+latency and is throttled when the requests of the last second reach the quota.
+The SQS client retries the throttled requests as usual, within its retry budget.
+
+Usage (from importer-api/):
+    PYTHONPATH=. python -m benchmarks.bench_sqs_rate_limit [rows] [quota_per_second]
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+os.environ.setdefault("SQS_ENDPOINT_URL", "http://localhost:4566")
+
+from botocore.exceptions import ClientError
+from src.aws.rate_limiter import SQSRateLimiter
+from src.aws.sqs.sqs_client import SQSClient
+from src.config.settings import get_settings
+from src.processor.csv_processor import CSVProcessor
+
+ROW = b"John Doe,11111111111,johndoe@kanastra.com.br,1000000.00,2022-10-12,1adb6ccf-ff16-467f-bea7-5f05d494280f\n"
+DEFAULT_ROWS = 20000
+DEFAULT_QUOTA = 200
+LATENCY = 0.02
+
+
+class ThrottlingSQSStandIn:
+    def __init__(self, quota: int):
+        self.quota = quota
+        self.requests = 0
+        self.throttled = 0
+        self._accepted_at = deque()
+        self._lock = threading.Lock()
+
+    def send_message_batch(self, QueueUrl: str, Entries: list):
+        time.sleep(LATENCY)
+        with self._lock:
+            self.requests += 1
+            now = time.monotonic()
+            while self._accepted_at and now - self._accepted_at[0] >= 1:
+                self._accepted_at.popleft()
+
+            if len(self._accepted_at) >= self.quota:
+                self.throttled += 1
+                raise ClientError(
+                    {"Error": {"Code": "AWS.SimpleQueueService.RequestThrottled", "Message": "Request is throttled"}},
+                    "SendMessageBatch"
+                )
+            self._accepted_at.append(now)
+
+        return {"Successful": [{"Id": entry["Id"]} for entry in Entries], "Failed": []}
+
+
+async def run(content: bytes, quota: int, rate_limiter: SQSRateLimiter) -> tuple[float, ThrottlingSQSStandIn, CSVProcessor]:
+    settings = get_settings()
+    sqs = ThrottlingSQSStandIn(quota)
+    sqs_client = SQSClient(settings.sqs_queue_url, settings)
+    sqs_client.create_client()
+    sqs_client._client = sqs
+    sqs_client._rate_limiter = rate_limiter
+
+    processor = CSVProcessor(settings, content, sqs_client)
+    started_at = time.perf_counter()
+    await processor.process()
+    elapsed = time.perf_counter() - started_at
+
+    sqs_client.close()
+    return elapsed, sqs, processor
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    quota = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_QUOTA
+    content = ROW * rows
+
+    print(f"{rows} rows, quota of {quota} SendMessageBatch per second, {LATENCY * 1000:.0f} ms per request")
+    print(f"{'limiter':>10} {'requests':>9} {'throttled':>10} {'rows failed':>12} {'elapsed (s)':>12}")
+    for name, rate_limiter in (
+        ("none", SQSRateLimiter(0, 0)),
+        ("static", SQSRateLimiter(quota, 0)),
+        ("adaptive", SQSRateLimiter(quota * 2, 0, adaptive=True)),
+    ):
+        elapsed, sqs, processor = asyncio.run(run(content, quota, rate_limiter))
+        print(f"{name:>10} {sqs.requests:>9} {sqs.throttled:>10} {processor.rows_failed:>12} {elapsed:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
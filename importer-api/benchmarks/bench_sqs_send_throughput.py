@@ -0,0 +1,86 @@
+"""
+Rows/sec of CSVProcessor with the blocking SQS path against the thread pool path.
+
+A local stand-in replaces SQS: each SendMessageBatch call sleeps for a fixed
+latency, like a network round trip would. The event loop lag column is the
+longest time a coroutine (e.g. the /health route) waited to be scheduled.
+
+Usage (from importer-api/):
+    PYTHONPATH=. python -m benchmarks.bench_sqs_send_throughput [rows] [latency_ms]
+"""
+import asyncio
+import os
+import sys
+import time
+
+os.environ.setdefault("SQS_ENDPOINT_URL", "http://localhost:4566")
+
+from src.aws.sqs.sqs_client import SQSClient
+from src.config.settings import get_settings
+from src.processor.csv_processor import CSVProcessor
+
+ROW = b"John Doe,11111111111,johndoe@kanastra.com.br,1000000.00,2022-10-12,1adb6ccf-ff16-467f-bea7-5f05d494280f\n"
+DEFAULT_ROWS = 20000
+DEFAULT_LATENCY_MS = 20
+
+
+class SQSStandIn:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def send_message_batch(self, QueueUrl: str, Entries: list):
+        time.sleep(self.latency)
+        return {"Successful": [{"Id": entry["Id"]} for entry in Entries], "Failed": []}
+
+
+class BlockingSQSClient(SQSClient):
+    """
+    The previous behaviour: the boto3 call runs on the event loop thread.
+    """
+
+    async def send_message_batch_async(self, messages: list, **options) -> list[int]:
+        return self.send_message_batch(messages, **options)
+
+
+async def measure_loop_lag(stop: asyncio.Event) -> float:
+    max_lag = 0.0
+    interval = 0.01
+    while not stop.is_set():
+        started_at = time.perf_counter()
+        await asyncio.sleep(interval)
+        max_lag = max(max_lag, time.perf_counter() - started_at - interval)
+    return max_lag
+
+
+async def run(sqs_client_class, content: bytes, latency: float):
+    settings = get_settings()
+    sqs_client = sqs_client_class(settings.sqs_queue_url, settings)
+    sqs_client.create_client()
+    sqs_client._client = SQSStandIn(latency)
+
+    stop = asyncio.Event()
+    lag = asyncio.create_task(measure_loop_lag(stop))
+
+    started_at = time.perf_counter()
+    await CSVProcessor(settings, content, sqs_client).process()
+    elapsed = time.perf_counter() - started_at
+
+    stop.set()
+    sqs_client.close()
+    return elapsed, await lag
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_LATENCY_MS) / 1000
+    content = ROW * rows
+
+    print(f"{rows} rows, {latency * 1000:.0f} ms per SendMessageBatch")
+    print(f"{'path':>12} {'rows/sec':>12} {'elapsed (s)':>12} {'max loop lag (ms)':>18}")
+    for name, sqs_client_class in (("blocking", BlockingSQSClient), ("thread pool", SQSClient)):
+        elapsed, lag = asyncio.run(run(sqs_client_class, content, latency))
+        print(f"{name:>12} {rows / elapsed:>12.0f} {elapsed:>12.2f} {lag * 1000:>18.0f}")
+
+
+if __name__ == "__main__":
+    main()
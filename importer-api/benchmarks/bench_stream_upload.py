@@ -0,0 +1,111 @@
+"""
+Time to first message and total latency of the raw body and multipart uploads.
+
+The same CSV is sent to `/v1/upload` as a multipart form and to
+`/v1/upload/stream` as the raw request body, over a link throttled to the given
+bandwidth, through the ASGI app in process. The SQS client accepts every message
+and records when the first one is sent. The multipart upload is parsed and
+spooled before its import starts, while the raw body is processed as it arrives.
+
+Usage (from importer-api/):
+    PYTHONPATH=. python -m benchmarks.bench_stream_upload [rows] [bandwidth_mbit]
+"""
+import asyncio
+import sys
+import tempfile
+import time
+import uuid
+import httpx
+from unittest.mock import patch
+from fastapi import FastAPI
+from src.api.file_importer.routes import router, settings
+
+HEADER = "name,governmentId,email,debtAmount,debtDueDate,debtId"
+BOUNDARY = "benchmark-boundary"
+CHUNK_SIZE = 65536
+DEFAULT_ROWS = 200_000
+DEFAULT_BANDWIDTH_MBIT = 100
+
+
+class RecordingSQSClient:
+    def __init__(self):
+        self.first_message_at = None
+
+    async def send_message_batch_async(self, messages: list) -> list:
+        if self.first_message_at is None:
+            self.first_message_at = time.perf_counter()
+        return []
+
+
+def build_csv(rows: int) -> bytes:
+    lines = [HEADER] + [
+        f"Name {index},{index:011d},name{index}@kanastra.com.br,{index % 100000}.{index % 100:02d},"
+        f"2024-{index % 12 + 1:02d}-{index % 28 + 1:02d},{uuid.UUID(int=index * 7919 + 1)}"
+        for index in range(rows)
+    ]
+    return "\n".join(lines).encode()
+
+
+def build_multipart(content: bytes) -> bytes:
+    return (
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="file.csv"\r\n'
+        "Content-Type: text/csv\r\n\r\n"
+    ).encode() + content + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+async def throttled(body: bytes, bytes_per_second: float):
+    """
+    Gives the body in chunks no faster than `bytes_per_second`, as a client
+    sending it over a link of that bandwidth.
+    """
+    started_at = time.perf_counter()
+    for start in range(0, len(body), CHUNK_SIZE):
+        arrives_at = started_at + (start + CHUNK_SIZE) / bytes_per_second
+        await asyncio.sleep(max(arrives_at - time.perf_counter(), 0))
+        yield body[start:start + CHUNK_SIZE]
+
+
+async def measure(app: FastAPI, path: str, body: bytes, content_type: str, bytes_per_second: float) -> tuple[float, float]:
+    sqs_client = RecordingSQSClient()
+    transport = httpx.ASGITransport(app=app)
+
+    with patch("src.api.file_importer.tasks.get_sqs_client", return_value=sqs_client):
+        async with httpx.AsyncClient(transport=transport, base_url="http://importer-api", timeout=None) as client:
+            started_at = time.perf_counter()
+            response = await client.post(
+                path,
+                content=throttled(body, bytes_per_second),
+                headers={"Content-Type": content_type, "Content-Length": str(len(body))}
+            )
+            finished_at = time.perf_counter()
+
+    response.raise_for_status()
+    return sqs_client.first_message_at - started_at, finished_at - started_at
+
+
+async def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    bandwidth_mbit = float(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_BANDWIDTH_MBIT
+    bytes_per_second = bandwidth_mbit * 1_000_000 / 8
+    content = build_csv(rows)
+
+    app = FastAPI()
+    app.include_router(router)
+
+    with tempfile.TemporaryDirectory() as directory:
+        settings.import_spool_dir = f"{directory}/spool"
+        settings.import_error_report_dir = f"{directory}/errors"
+        settings.import_fingerprints_dir = f"{directory}/fingerprints"
+
+        print(f"{'upload':>10} {'first message (s)':>18} {'total (s)':>10}")
+        for name, path, body, content_type in (
+            ("multipart", "/v1/upload", build_multipart(content), f"multipart/form-data; boundary={BOUNDARY}"),
+            ("stream", "/v1/upload/stream", content, "text/csv"),
+        ):
+            first_message_seconds, total_seconds = await measure(app, path, body, content_type, bytes_per_second)
+            print(f"{name:>10} {first_message_seconds:>18.2f} {total_seconds:>10.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,60 @@
+"""
+Memory high-water mark of CSVProcessor across file sizes.
+
+Compares the streaming path (file object read in chunks) with the previous
+buffered path (whole upload read into memory). The streaming peak should stay
+flat while the buffered peak grows with the file size.
+
+Usage (from importer-api/):
+    PYTHONPATH=. python -m benchmarks.bench_streaming_memory [size_mb ...]
+"""
+import asyncio
+import sys
+import tempfile
+import tracemalloc
+from src.config.settings import get_settings
+from src.processor.csv_processor import CSVProcessor
+
+ROW = b"John Doe,11111111111,johndoe@kanastra.com.br,1000000.00,2022-10-12,1adb6ccf-ff16-467f-bea7-5f05d494280f\n"
+DEFAULT_SIZES_MB = [4, 16, 64]
+
+
+class NullSQSClient:
+    async def send_message_batch_async(self, messages: list) -> list:
+        return []
+
+
+def write_csv(file, size_mb: int):
+    block = ROW * (1048576 // len(ROW))
+    for _ in range(size_mb):
+        file.write(block)
+    file.flush()
+    file.seek(0)
+
+
+def measure_peak(file, buffered: bool) -> int:
+    tracemalloc.start()
+    content = file.read() if buffered else file
+    processor = CSVProcessor(get_settings(), content, NullSQSClient())
+    asyncio.run(processor.process())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1:]] or DEFAULT_SIZES_MB
+
+    print(f"{'file size (MB)':>15} {'streaming peak (MB)':>20} {'buffered peak (MB)':>20}")
+    for size_mb in sizes:
+        with tempfile.TemporaryFile() as file:
+            write_csv(file, size_mb)
+            streaming_peak = measure_peak(file, buffered=False)
+            file.seek(0)
+            buffered_peak = measure_peak(file, buffered=True)
+
+        print(f"{size_mb:>15} {streaming_peak / 1048576:>20.1f} {buffered_peak / 1048576:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,213 @@
-from fastapi import UploadFile, BackgroundTasks, APIRouter
-from src.api.file_importer.tasks import process_file_task
+import os
+from uuid import uuid4
+from fastapi import UploadFile, BackgroundTasks, APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, Field
+from src.api.file_importer.tasks import process_file_task, process_stream
+from src.config.settings import get_settings
+from src.jobs.import_job_registry import get_import_job_registry
+from src.jobs.import_scheduler import get_import_scheduler
+from src.jobs.upload_digest_registry import get_upload_digest_registry
+from src.models.import_job import ImportJob, ImportJobStatus
+from src.models.spooled_import import SpooledImport
+from src.reports.import_error_report import error_report_path
+from src.spool.decompression import MAGIC_NUMBERS, detect_encoding
+from src.spool.exceptions.invalid_upload_exception import InvalidUploadException
+from src.spool.upload_spool import UploadSpool
 
 
 router = APIRouter()
+settings = get_settings()
+
+"""
+The source names the store of fingerprints of its imports, so it must be a valid file name
+"""
+SOURCE_PATTERN = r"^[A-Za-z0-9_-][A-Za-z0-9_.-]{0,127}$"
+
+STREAM_CONTENT_TYPES = ("text/csv", "application/octet-stream")
+
+"""
+Status of the imports an upload with the same content is a retry of
+"""
+IDEMPOTENT_STATUSES = (ImportJobStatus.QUEUED, ImportJobStatus.RUNNING, ImportJobStatus.COMPLETED)
+
+
+class LocalImportRequest(BaseModel):
+    path: str
+    source: str | None = Field(default=None, pattern=SOURCE_PATTERN)
 
 
 @router.post('/v1/upload')
-async def upload_file(file: UploadFile, background_tasks: BackgroundTasks):
-    file_content = await file.read()
-    background_tasks.add_task(process_file_task, file_content)
-    return {"message": "File received. Processing in background."}
+async def upload_file(
+    file: UploadFile,
+    background_tasks: BackgroundTasks,
+    source: str | None = Query(default=None, pattern=SOURCE_PATTERN)
+):
+    """
+    The upload is saved to the spool before the response, so it is not lost if
+    the process restarts before the import finishes.
+
+    With a `source`, only the rows new or changed since the previous import of
+    the same source are sent (delta import).
+
+    A gzip or zstd file, declared by the `Content-Encoding` or the content type of
+    the file part, by its name or detected from its first bytes, is decompressed
+    while it is saved to the spool.
+
+    An upload with the same content (and source) as an import in progress or
+    completed within `import_idempotency_window_seconds` is a retry: the spooled
+    copy is removed and the existing import is returned. The content is only
+    known once spooled, so the retry is found before the admission, and a client
+    retrying an import still in progress gets it even when the scheduler is full.
+    """
+    try:
+        spooled_import = await run_in_threadpool(spool_upload, file, source)
+    except InvalidUploadException as e:
+        raise HTTPException(status_code=400, detail=f"Invalid compressed file. {e}")
+
+    existing_job = find_existing_import(spooled_import)
+    if existing_job:
+        await run_in_threadpool(UploadSpool(settings).remove, spooled_import)
+        return {
+            "message": "File already imported.",
+            "import_id": existing_job.import_id
+        }
+
+    if not get_import_scheduler().admit():
+        await run_in_threadpool(UploadSpool(settings).remove, spooled_import)
+        raise HTTPException(
+            status_code=429,
+            detail="Too many imports in progress. Try again later.",
+            headers={"Retry-After": str(settings.import_retry_after_seconds)}
+        )
+
+    job = get_import_job_registry().create(spooled_import.import_id, os.path.getsize(spooled_import.path))
+    get_upload_digest_registry().add(spooled_import.digest, spooled_import.source, job.import_id)
+    background_tasks.add_task(process_file_task, spooled_import, job)
+    return {
+        "message": "File received. Processing in background.",
+        "import_id": job.import_id
+    }
+
+
+@router.post('/v1/upload/stream')
+async def upload_stream(request: Request, source: str | None = Query(default=None, pattern=SOURCE_PATTERN)):
+    """
+    The CSV is the body of the request, with no multipart encoding, and its rows
+    are sent while it is still being received. The upload is not spooled, so an
+    interrupted upload is not resumed, and the response is sent when the import
+    finishes. Compressed uploads are only accepted by `/v1/upload`.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type not in STREAM_CONTENT_TYPES:
+        raise HTTPException(status_code=415, detail="Unsupported content type. Use text/csv or application/octet-stream.")
+    if request.headers.get("content-encoding", "identity").lower() != "identity":
+        raise HTTPException(status_code=415, detail="Unsupported content encoding. Use /v1/upload for compressed files.")
+
+    scheduler = get_import_scheduler()
+    if not scheduler.admit():
+        raise HTTPException(
+            status_code=429,
+            detail="Too many imports in progress. Try again later.",
+            headers={"Retry-After": str(settings.import_retry_after_seconds)}
+        )
+
+    content_length = request.headers.get("content-length")
+    size = int(content_length) if content_length else None
+    job = get_import_job_registry().create(str(uuid4()), size or 0)
+    await process_stream(job.import_id, request.stream(), job, source, size)
+    return {
+        "message": "File processed.",
+        "import_id": job.import_id
+    }
+
+
+@router.post('/v1/imports/local')
+async def import_local_file(request: LocalImportRequest, background_tasks: BackgroundTasks):
+    """
+    Import of a file already in the server, under `import_local_dir`, mapped in
+    memory and read in place: nothing is uploaded or copied to the spool. The path
+    is relative to `import_local_dir`. The file is not removed by the import and
+    must not be changed until it finishes.
+    """
+    if not settings.import_local_dir:
+        raise HTTPException(status_code=403, detail="Local imports are disabled.")
+
+    path = resolve_local_path(request.path)
+    if path is None:
+        raise HTTPException(status_code=403, detail="Path outside of the local import directory.")
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    scheduler = get_import_scheduler()
+    if not scheduler.admit():
+        raise HTTPException(
+            status_code=429,
+            detail="Too many imports in progress. Try again later.",
+            headers={"Retry-After": str(settings.import_retry_after_seconds)}
+        )
+
+    try:
+        spooled_import = await run_in_threadpool(UploadSpool(settings).register, path, request.source)
+    except BaseException:
+        scheduler.release()
+        raise
+
+    job = get_import_job_registry().create(spooled_import.import_id, os.path.getsize(path))
+    background_tasks.add_task(process_file_task, spooled_import, job)
+    return {
+        "message": "File received. Processing in background.",
+        "import_id": job.import_id
+    }
+
+
+def resolve_local_path(path: str) -> str | None:
+    """
+    The symbolic links are resolved, so a link does not lead out of the directory.
+    """
+    directory = os.path.realpath(settings.import_local_dir)
+    resolved_path = os.path.realpath(os.path.join(directory, path))
+    if os.path.commonpath([directory, resolved_path]) != directory:
+        return None
+    return resolved_path
+
+
+def spool_upload(file: UploadFile, source: str | None) -> SpooledImport:
+    head = file.file.read(max(len(magic_number) for magic_number in MAGIC_NUMBERS.values()))
+    encoding = detect_encoding(head, file.headers.get("content-encoding"), file.content_type, file.filename)
+    return UploadSpool(settings).save(file.file, source, encoding)
+
+
+def find_existing_import(spooled_import: SpooledImport) -> ImportJob | None:
+    import_id = get_upload_digest_registry().get(spooled_import.digest, spooled_import.source)
+    if import_id is None:
+        return None
+
+    job = get_import_job_registry().get(import_id)
+    if job and job.status in IDEMPOTENT_STATUSES:
+        return job
+    return None
+
+
+@router.get('/v1/imports/{import_id}')
+async def get_import(import_id: str):
+    job = get_import_job_registry().get(import_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return job.to_dict()
+
+
+@router.get('/v1/imports/{import_id}/errors')
+async def get_import_errors(import_id: str):
+    """
+    The rows rejected by the import, one JSON object per line.
+    """
+    job = get_import_job_registry().get(import_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import not found")
+
+    path = error_report_path(settings, job.import_id)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="No rows rejected")
+    return FileResponse(path, media_type="application/x-ndjson")
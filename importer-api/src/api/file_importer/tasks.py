@@ -1,14 +1,296 @@
-from src.aws.sqs.sqs_client import SQSClient
+import asyncio
+import os
+from uuid import uuid4
+from typing import AsyncIterable
+from src.aws.sqs.sqs_client import get_sqs_client
+from src.cache.billed_debts_filter import create_billed_debts_filter
 from src.config.settings import get_settings
+from src.fingerprints.fingerprint_store import fingerprint_store_path, open_fingerprint_store
+from src.logger.logger import get_logger
+from src.jobs.import_job_registry import get_import_job_registry
+from src.jobs.import_scheduler import get_import_scheduler
+from src.jobs.upload_digest_registry import get_upload_digest_registry
+from src.models.import_job import ImportJob, ImportJobStatus
+from src.models.spooled_import import SpooledImport
 from src.processor.csv_processor import CSVProcessor
+from src.processor.delta_filter import DeltaFilter
+from src.processor.duplicate_filter import create_duplicate_filter
+from src.processor.exceptions.incomplete_import_exception import IncompleteImportException
+from src.processor.row_validator import RowValidator
+from src.processor.sharded_csv_processor import FileRange, ShardedCSVProcessor
+from src.reports.import_error_report import ImportErrorReport
+from src.spool.import_checkpoint import ImportCheckpoint
+from src.spool.upload_spool import UploadSpool, map_file
+from src.spool.watched_dir import WatchedDir, claimed_import_id
 
 
 settings = get_settings()
+logger = get_logger(__name__)
 
+"""
+References to the imports started outside of a request (resumed or from the
+watched directory), so the tasks are not garbage collected while running
+"""
+background_imports = set()
 
-async def process_file_task(file_content):
-    sqs_client = SQSClient(settings.sqs_queue_url, settings)
-    sqs_client.create_client()
 
-    processor = CSVProcessor(settings, file_content, sqs_client)
-    await processor.process()
+async def process_file_task(spooled_import: SpooledImport, job: ImportJob):
+    """
+    The import must have been admitted by the scheduler; it waits here for its turn.
+    """
+    async with get_import_scheduler().run():
+        await process_import(spooled_import, job)
+
+
+async def process_import(spooled_import: SpooledImport, job: ImportJob):
+    """
+    The spooled upload is removed once processed. When the task is cancelled, or the
+    process dies, the upload stays in the spool and is resumed from the checkpoint
+    on the next start up. So does an import left incomplete by failed file ranges,
+    which ends interrupted.
+    """
+    spool = UploadSpool(settings)
+    checkpoint = ImportCheckpoint(spool, spooled_import, settings.import_checkpoint_interval)
+    job.start()
+
+    try:
+        if should_shard_file(spooled_import.path):
+            processor = ShardedCSVProcessor(
+                settings,
+                spooled_import.path,
+                checkpoint=checkpoint,
+                job=job,
+                import_id=spooled_import.import_id,
+                source=spooled_import.source
+            )
+            await processor.process()
+        else:
+            await process_file(spooled_import, checkpoint, job)
+    except asyncio.CancelledError:
+        job.finish(ImportJobStatus.INTERRUPTED)
+        checkpoint.save()
+        raise
+    except IncompleteImportException as e:
+        logger.error(f"Import incomplete: {e}", extra={"import_id": spooled_import.import_id})
+        job.finish(ImportJobStatus.INTERRUPTED)
+        checkpoint.save()
+        raise
+    except Exception as e:
+        logger.error(f"Error processing import: {e}", extra={"import_id": spooled_import.import_id})
+        job.finish(ImportJobStatus.FAILED)
+        spool.remove(spooled_import)
+        raise
+
+    job.finish(ImportJobStatus.COMPLETED)
+    spool.remove(spooled_import)
+
+
+def should_shard_file(path: str) -> bool:
+    if settings.csv_process_workers <= 1:
+        return False
+    return os.path.getsize(path) >= settings.csv_sharding_min_file_size
+
+
+async def process_file(spooled_import: SpooledImport, checkpoint: ImportCheckpoint, job: ImportJob):
+    """
+    The validator is built from the first line of the file, so a resumed import
+    still knows the header.
+    """
+    with map_file(spooled_import.path) as file:
+        validator = RowValidator(file.readline().decode(errors="replace"))
+        file_size = os.path.getsize(spooled_import.path)
+        await run_processor(
+            spooled_import.import_id,
+            spooled_import.source,
+            FileRange(file, checkpoint.offset, file_size),
+            file_size - checkpoint.offset,
+            job,
+            checkpoint,
+            validator
+        )
+
+
+async def process_stream(
+    import_id: str,
+    chunks: AsyncIterable[bytes],
+    job: ImportJob,
+    source: str | None = None,
+    size: int | None = None
+):
+    """
+    Import of a CSV received as a stream of chunks, processed as the chunks arrive.
+    `size` is None when the length of the stream is unknown (no Content-Length).
+    Nothing is spooled, so a stream interrupted is not resumed: the client sends
+    it again. The import waits for its turn in the scheduler, where it must have
+    been admitted.
+    """
+    async with get_import_scheduler().run():
+        job.start()
+        try:
+            await run_processor(import_id, source, chunks, size, job)
+        except asyncio.CancelledError:
+            job.finish(ImportJobStatus.INTERRUPTED)
+            raise
+        except Exception as e:
+            logger.error(f"Error processing import: {e}", extra={"import_id": import_id})
+            job.finish(ImportJobStatus.FAILED)
+            raise
+
+    job.finish(ImportJobStatus.COMPLETED)
+
+
+async def run_processor(
+    import_id: str,
+    source: str | None,
+    file_content: FileRange | AsyncIterable[bytes],
+    size: int | None,
+    job: ImportJob,
+    checkpoint: ImportCheckpoint | None = None,
+    validator: RowValidator | None = None
+):
+    """
+    `size` is the number of bytes left to read, which sizes the duplicate filter,
+    or None when it is unknown.
+    A resumed import only drops the debtIds repeated since the checkpoint.
+
+    The fingerprints of a delta import replace the ones of the previous import of
+    the source only when every row of the file was read and sent by this run.
+    """
+    error_report = ImportErrorReport(settings, import_id)
+    resumed = bool(checkpoint and checkpoint.offset)
+    duplicate_filter = None
+    if settings.csv_dedup_enabled:
+        duplicate_filter = create_duplicate_filter(settings, size)
+    billed_filter = None
+    if settings.billed_debts_filter_enabled:
+        billed_filter = create_billed_debts_filter(settings)
+    delta_filter = None
+    if source:
+        store_path = fingerprint_store_path(settings, source)
+        delta_filter = DeltaFilter(await asyncio.to_thread(open_fingerprint_store, store_path))
+
+    try:
+        processor = CSVProcessor(
+            settings,
+            file_content,
+            get_sqs_client(),
+            checkpoint,
+            job,
+            validator=validator,
+            error_report=error_report,
+            duplicate_filter=duplicate_filter,
+            delta_filter=delta_filter,
+            billed_filter=billed_filter
+        )
+        await processor.process()
+
+        if delta_filter:
+            await save_fingerprints(import_id, source, delta_filter, processor, resumed)
+    finally:
+        error_report.close()
+        if billed_filter:
+            await billed_filter.close()
+        if delta_filter:
+            delta_filter.close()
+
+
+async def save_fingerprints(import_id: str, source: str, delta_filter: DeltaFilter, processor: CSVProcessor, resumed: bool):
+    """
+    Otherwise the previous fingerprints are kept, so the rows not sent are sent
+    again by the next import of the source.
+    """
+    if resumed or processor.rows_failed:
+        logger.warning("Fingerprints of the delta import not saved", extra={
+            "import_id": import_id,
+            "source": source,
+            "resumed": resumed,
+            "rows_failed": processor.rows_failed
+        })
+        return
+
+    store_path = fingerprint_store_path(settings, source)
+    await asyncio.to_thread(delta_filter.save, store_path)
+
+
+def resume_spooled_imports():
+    for spooled_import in UploadSpool(settings).pending():
+        logger.info("Resuming import", extra={
+            "import_id": spooled_import.import_id,
+            "offset": spooled_import.offset
+        })
+        if spooled_import.digest:
+            get_upload_digest_registry().add(spooled_import.digest, spooled_import.source, spooled_import.import_id)
+        get_import_scheduler().admit(force=True)
+        start_import(spooled_import)
+
+
+def start_import(spooled_import: SpooledImport) -> ImportJob:
+    """
+    The import must have been admitted by the scheduler.
+    """
+    job = get_import_job_registry().create(
+        spooled_import.import_id,
+        os.path.getsize(spooled_import.path),
+        spooled_import.bytes_processed
+    )
+    task = asyncio.create_task(process_file_task(spooled_import, job))
+    background_imports.add(task)
+    task.add_done_callback(background_imports.discard)
+    return job
+
+
+def start_spool_dir_watcher() -> asyncio.Task | None:
+    if not settings.import_watch_dir:
+        return None
+    return asyncio.create_task(watch_spool_dir(WatchedDir(settings)))
+
+
+async def watch_spool_dir(watched_dir: WatchedDir):
+    """
+    Polls the watched directory every `import_watch_interval` seconds, until cancelled.
+    """
+    while True:
+        try:
+            poll_watched_dir(watched_dir)
+        except Exception as e:
+            logger.error(f"Error polling the watched directory: {e}", extra={"path": watched_dir.directory})
+        await asyncio.sleep(settings.import_watch_interval)
+
+
+def poll_watched_dir(watched_dir: WatchedDir):
+    """
+    The claimed files with no manifest left in the spool are the finished imports,
+    and are archived. The ready files are then claimed while the scheduler admits
+    them; the ones over its capacity wait in the directory for the next polls.
+
+    The manifest is written before the file is claimed: if the process dies in
+    between, the manifest of a missing file is dropped on start up and the file is
+    still in the directory.
+    """
+    spool = UploadSpool(settings)
+    pending_paths = {spooled_import.path for spooled_import in spool.pending()}
+
+    for processing_path in watched_dir.claimed_files():
+        if processing_path in pending_paths:
+            continue
+        job = get_import_job_registry().get(claimed_import_id(processing_path))
+        watched_dir.archive(processing_path, failed=bool(job and job.status == ImportJobStatus.FAILED))
+
+    scheduler = get_import_scheduler()
+    for path in watched_dir.ready_files():
+        if not scheduler.admit():
+            break
+
+        import_id = str(uuid4())
+        processing_path = watched_dir.processing_path(path, import_id)
+        spooled_import = spool.register(processing_path, import_id=import_id)
+        try:
+            watched_dir.claim(path, processing_path)
+        except OSError as e:
+            logger.error(f"Error claiming the watched file: {e}", extra={"path": path})
+            spool.remove(spooled_import)
+            scheduler.release()
+            continue
+
+        logger.info("Importing watched file", extra={"import_id": import_id, "path": path})
+        start_import(spooled_import)
@@ -0,0 +1,189 @@
+import threading
+from time import monotonic, sleep
+from functools import lru_cache
+from src.config.settings import get_settings
+from src.metrics.metrics_registry_manager import get_metrics_registry
+
+
+METRICS = get_metrics_registry()
+METRICS.register_gauge("sqs_rate_limiter_tokens", "Tokens available in the SQS rate limiter", {"bucket"})
+METRICS.register_gauge("sqs_rate_limiter_rate", "Tokens per second added to the SQS rate limiter", {"bucket"})
+METRICS.register_summary("sqs_rate_limiter_wait_seconds", "Time a SQS request waited for the rate limiter")
+METRICS.register_counter("sqs_rate_limiter_throttle_events", "Number of SQS requests throttled by AWS")
+
+"""
+Error codes AWS answers with when a request goes over the API quotas
+"""
+THROTTLING_ERROR_CODES = {
+    "AWS.SimpleQueueService.RequestThrottled",
+    "RequestThrottled",
+    "Throttling",
+    "ThrottlingException",
+    "TooManyRequestsException"
+}
+
+"""
+In the adaptive mode, a throttling error halves the rates, down to a tenth of
+the configured ones. The throttling errors of the requests already in flight are
+ignored for a second, and the rates grow back by a tenth of the configured ones
+every second.
+"""
+THROTTLE_DECREASE_FACTOR = 0.5
+THROTTLE_COOLDOWN_SECONDS = 1
+MIN_RATE_RATIO = 0.1
+RECOVERY_RATIO_PER_SECOND = 0.1
+
+"""
+The buckets hold a tenth of a second of tokens, so any second sends at most a
+tenth more than the rate, and an idle process does not burst over the quota
+"""
+BURST_SECONDS = 0.1
+
+
+class TokenBucket:
+    """
+    `rate` tokens are added every second, up to `BURST_SECONDS` of tokens. Tokens are
+    taken even when not available, leaving the bucket in debt, and the taker waits
+    for the time the bucket takes to pay it back. So the takers are served in the
+    order they came, at the rate of the bucket.
+    """
+
+    def __init__(self, rate: float):
+        self.max_rate = rate
+        self.rate = rate
+        self._tokens = self.capacity
+        self._updated_at = monotonic()
+
+    @property
+    def capacity(self) -> float:
+        return max(1.0, self.rate * BURST_SECONDS)
+
+    @property
+    def tokens(self) -> float:
+        return min(self.capacity, self._tokens + (monotonic() - self._updated_at) * self.rate)
+
+    def take(self, tokens: int) -> float:
+        """
+        Returns the seconds to wait before using the tokens.
+        """
+        self._refill()
+        self._tokens -= tokens
+        return max(0.0, -self._tokens / self.rate)
+
+    def set_rate(self, rate: float):
+        self._refill()
+        self.rate = rate
+        self._tokens = min(self._tokens, self.capacity)
+
+    def _refill(self):
+        now = monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+
+class SQSRateLimiter:
+    """
+    Process-wide limit of SQS requests and messages per second, shared by every
+    import. A rate of zero is not limited. `throttle_events` counts the requests
+    AWS throttled, for the worker processes to report them. The process may be
+    limited to a share of the rates, while other processes send at once.
+
+    In the adaptive mode, the rates are lowered when AWS throttles the requests
+    and grow back to the configured ones while it does not.
+    """
+
+    def __init__(self, requests_per_second: float, messages_per_second: float, adaptive: bool = False):
+        self.adaptive = adaptive
+        self.throttle_events = 0
+        self._buckets = {}
+        self._rates = {"requests": requests_per_second, "messages": messages_per_second}
+        self._lock = threading.Lock()
+        self._throttled_at = None
+        self._recovered_at = monotonic()
+
+        if requests_per_second > 0:
+            self._buckets["requests"] = TokenBucket(requests_per_second)
+        if messages_per_second > 0:
+            self._buckets["messages"] = TokenBucket(messages_per_second)
+
+        for name, bucket in self._buckets.items():
+            METRICS.get("sqs_rate_limiter_tokens", {"bucket": name}).set_function(lambda bucket=bucket: bucket.tokens)
+            METRICS.get("sqs_rate_limiter_rate", {"bucket": name}).set_function(lambda bucket=bucket: bucket.rate)
+
+    def acquire(self, messages: int) -> float:
+        """
+        Blocks the calling thread until a request with `messages` messages can be
+        sent, and returns the seconds waited.
+        """
+        if not self._buckets:
+            return 0.0
+
+        with self._lock:
+            self._recover()
+            wait = max(
+                self._buckets["requests"].take(1) if "requests" in self._buckets else 0.0,
+                self._buckets["messages"].take(messages) if "messages" in self._buckets else 0.0
+            )
+
+        if wait > 0:
+            sleep(wait)
+        METRICS.get("sqs_rate_limiter_wait_seconds").observe(wait)
+        return wait
+
+    def set_share(self, share: float):
+        """
+        Limit the process to `share` of the configured rates. Rates lowered by
+        throttling stay lowered in the same proportion.
+        """
+        with self._lock:
+            for name, bucket in self._buckets.items():
+                ratio = bucket.rate / bucket.max_rate
+                bucket.max_rate = self._rates[name] * share
+                bucket.set_rate(bucket.max_rate * ratio)
+
+    def throttled(self):
+        self.throttle_events += 1
+        METRICS.get("sqs_rate_limiter_throttle_events").inc()
+        if not self.adaptive:
+            return
+
+        with self._lock:
+            now = monotonic()
+            if self._throttled_at is not None and now - self._throttled_at < THROTTLE_COOLDOWN_SECONDS:
+                return
+
+            self._throttled_at = now
+            self._recovered_at = now
+            for bucket in self._buckets.values():
+                bucket.set_rate(max(bucket.max_rate * MIN_RATE_RATIO, bucket.rate * THROTTLE_DECREASE_FACTOR))
+
+    def _recover(self):
+        now = monotonic()
+        elapsed = now - self._recovered_at
+        self._recovered_at = now
+
+        for bucket in self._buckets.values():
+            if bucket.rate < bucket.max_rate:
+                bucket.set_rate(min(bucket.max_rate, bucket.rate + bucket.max_rate * RECOVERY_RATIO_PER_SECOND * elapsed))
+
+
+def is_throttling_error(error: Exception) -> bool:
+    """
+    botocore errors carry the error code of the response.
+    """
+    response = getattr(error, "response", None) or {}
+    return response.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES
+
+
+@lru_cache()
+def get_sqs_rate_limiter() -> SQSRateLimiter:
+    """
+    The rates configured are the ones of the service. The processes of the pool,
+    and the API process while they run, get a share of them (`set_share`).
+    """
+    settings = get_settings()
+    return SQSRateLimiter(
+        settings.sqs_rate_limit_requests_per_second,
+        settings.sqs_rate_limit_messages_per_second,
+        settings.sqs_rate_limit_adaptive_enabled
+    )
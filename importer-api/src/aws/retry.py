@@ -0,0 +1,43 @@
+import random
+import threading
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """
+    Exponential backoff with full jitter: a random delay between zero and
+    `base_delay * 2 ** attempt`, capped at `max_delay`.
+    """
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+class RetryBudget:
+    """
+    Limits retries to a fraction of the successful requests, so a throttled
+    service is not flooded with retries on top of the regular traffic.
+
+    Every success deposits `ratio` tokens and every retry withdraws one token.
+    The budget starts full and never holds more than `max_tokens`.
+    """
+
+    def __init__(self, ratio: float, max_tokens: float):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._lock = threading.Lock()
+
+    @property
+    def tokens(self) -> float:
+        return self._tokens
+
+    def deposit(self, successes: int = 1):
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + successes * self.ratio)
+
+    def withdraw(self, retries: int = 1) -> int:
+        """
+        Withdraw up to `retries` tokens and return how many retries are allowed.
+        """
+        with self._lock:
+            allowed = min(retries, int(self._tokens))
+            self._tokens -= allowed
+            return allowed
@@ -0,0 +1,36 @@
+import hashlib
+import re
+
+
+"""
+The names of the FIFO queues end with `.fifo`
+"""
+FIFO_SUFFIX = ".fifo"
+
+"""
+Strategies of the `MessageGroupId` of the messages sent to a FIFO queue. SQS
+delivers the messages of a group in order, one batch at a time, so a group per
+debt keeps the consumers parallel, while a fixed group orders every message.
+"""
+MESSAGE_GROUP_BY_DEBT_ID = "debt_id"
+MESSAGE_GROUP_FIXED = "fixed"
+
+"""
+A `MessageDeduplicationId` has up to 128 printable ASCII characters
+"""
+DEDUPLICATION_ID_PATTERN = re.compile(r"[\x21-\x7e]{1,128}")
+
+
+def is_fifo_queue(queue_url: str) -> bool:
+    return queue_url.endswith(FIFO_SUFFIX)
+
+
+def deduplication_id(debt_ids: list[str]) -> str:
+    """
+    The debtId of a message with a single row, used as is when SQS accepts it.
+    A message with many rows, or a debtId SQS does not accept, is identified by a
+    hash of its debtIds.
+    """
+    if len(debt_ids) == 1 and DEDUPLICATION_ID_PATTERN.fullmatch(debt_ids[0]):
+        return debt_ids[0]
+    return hashlib.sha256("\n".join(debt_ids).encode()).hexdigest()
@@ -0,0 +1,21 @@
+import zlib
+from src.aws.sqs.fifo_queue import FIFO_SUFFIX
+
+
+def shard_of(key: str, shards: int) -> int:
+    """
+    The shard of a debtId. CRC32 gives the same shard in every process and after
+    restarts, unlike `hash`, which is salted per process.
+    """
+    return zlib.crc32(key.encode()) % shards
+
+
+def shard_queue_url(queue_url: str, shard: int) -> str:
+    """
+    The shard queues are named after the queue, followed by the number of the shard
+    and by the `.fifo` suffix of a FIFO queue. Kept in sync with the billing-worker
+    (`src/aws/sqs/queue_shards.py`).
+    """
+    if queue_url.endswith(FIFO_SUFFIX):
+        return f"{queue_url.removesuffix(FIFO_SUFFIX)}-{shard}{FIFO_SUFFIX}"
+    return f"{queue_url}-{shard}"
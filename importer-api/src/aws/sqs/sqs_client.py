@@ -1,24 +1,59 @@
-import boto3
-from src.config.settings import Settings
+import asyncio
+from time import sleep
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ConnectionClosedError, ReadTimeoutError, ConnectionError as BotocoreConnectionError
+from src.aws.client_factory import get_aws_client_factory
+from src.aws.rate_limiter import THROTTLING_ERROR_CODES, get_sqs_rate_limiter, is_throttling_error
+from src.aws.sqs.fifo_queue import MESSAGE_GROUP_BY_DEBT_ID, MESSAGE_GROUP_FIXED, deduplication_id, is_fifo_queue
+from src.config.settings import Settings, get_settings
 from src.logger.logger import get_logger
+from src.aws.retry import RetryBudget, backoff_delay
 from src.aws.sqs.exceptions.sqs_client_exception import SQSClientException
+from src.metrics.metrics_registry_manager import get_metrics_registry
+
+
+METRICS = get_metrics_registry()
+METRICS.register_counter("sqs_client_entries_sent", "Number of batch entries accepted by SQS")
+METRICS.register_counter("sqs_client_entries_failed", "Number of batch entries not accepted by SQS after the retries")
+METRICS.register_counter("sqs_client_entries_retried", "Number of batch entries resent to SQS")
 
 
 class SQSClient:
     def __init__(self, queue_url: str, settings: Settings):
         self._client = None
+        self._executor = None
         self.queue_url = queue_url
         self.settings = settings
         self.logger = get_logger(__name__)
+        self._retry_budget = RetryBudget(
+            settings.sqs_batch_retry_budget_ratio,
+            settings.sqs_batch_retry_budget_max_tokens
+        )
+        self._rate_limiter = get_sqs_rate_limiter()
 
     def create_client(self):
-        self._client = boto3.client(
-            "sqs",
-            region_name=self.settings.aws_region,
-            endpoint_url=self.settings.sqs_endpoint_url
+        """
+        `send_message_batch` retries the entries itself, within the retry budget,
+        so the client makes a single attempt per request.
+        """
+        self._client = get_aws_client_factory().client("sqs", self.settings.sqs_endpoint_url, max_attempts=1)
+        """
+        boto3 clients are blocking, so the requests are run on a thread pool sized
+        like the limit of in-flight sends, to let them overlap. The connection pool
+        of the client (`aws_max_pool_connections`) should be as large.
+        """
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.settings.max_sqs_in_flight_sends,
+            thread_name_prefix="sqs-client"
         )
         self.logger.info("SQS client created")
 
+    def close(self):
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
     def send_message(self, message_body: str):
         self._validate_client()
 
@@ -40,35 +75,174 @@ class SQSClient:
                 }
             )
 
-    def send_message_batch(self, messages: list):
+    def send_message_batch(
+        self,
+        messages: list,
+        message_attributes: dict | None = None,
+        queue_url: str | None = None,
+        deduplication_ids: list[str] | None = None
+    ) -> list[int]:
+        """
+        Send the messages and resend only the entries SQS did not accept, with a
+        jittered exponential backoff, while the retry budget allows it.
+        Entries rejected because of their content (sender fault) are not retried,
+        and a failed request is retried only when it was throttled, failed on the
+        side of AWS (5xx) or lost its connection.
+        Returns the indexes of the messages that could not be sent.
+
+        `message_attributes` are set on every message of the batch. The messages
+        are sent to `queue_url`, when given, instead of the queue of the client.
+
+        On a FIFO queue, every message has the `MessageDeduplicationId` given in
+        `deduplication_ids`, or a hash of its body, so SQS drops the messages already
+        sent within its deduplication window, retries included.
+        """
         self._validate_client()
+        queue_url = queue_url or self.queue_url
 
-        entries = [
-            {"Id": str(i), "MessageBody": message} for i, message in enumerate(messages)
-        ]
+        entries = {
+            str(i): {"Id": str(i), "MessageBody": message} for i, message in enumerate(messages)
+        }
+        if message_attributes:
+            for entry in entries.values():
+                entry["MessageAttributes"] = message_attributes
+        if is_fifo_queue(queue_url):
+            for i, entry in enumerate(entries.values()):
+                entry.update(self._fifo_fields(entry["MessageBody"], deduplication_ids[i] if deduplication_ids else None))
+        pending_ids = list(entries)
+        failed_ids = []
+        max_retries = self.settings.sqs_batch_max_retries
 
-        try:
-            self._client.send_message_batch(
-                QueueUrl=self.queue_url,
-                Entries=entries
-            )
-            self.logger.debug(
-                f"Messages sent to queue {self.queue_url}",
+        for attempt in range(max_retries + 1):
+            retryable_ids, rejected_ids = self._send_entries(
+                [entries[entry_id] for entry_id in pending_ids], queue_url)
+            failed_ids.extend(rejected_ids)
+
+            if not retryable_ids:
+                break
+
+            allowed = self._retry_budget.withdraw(len(retryable_ids)) if attempt < max_retries else 0
+            failed_ids.extend(retryable_ids[allowed:])
+            pending_ids = retryable_ids[:allowed]
+
+            if not pending_ids:
+                break
+
+            METRICS.get("sqs_client_entries_retried").inc(len(pending_ids))
+            sleep(backoff_delay(
+                attempt,
+                self.settings.sqs_batch_retry_base_delay,
+                self.settings.sqs_batch_retry_max_delay
+            ))
+
+        if failed_ids:
+            METRICS.get("sqs_client_entries_failed").inc(len(failed_ids))
+            self.logger.error(
+                f"Messages not sent to queue {queue_url}",
                 extra={
-                    "messages": messages
+                    "messages": [entries[entry_id]["MessageBody"] for entry_id in failed_ids]
                 }
             )
+
+        return sorted(int(entry_id) for entry_id in failed_ids)
+
+    def _fifo_fields(self, message: str, message_deduplication_id: str | None) -> dict:
+        message_deduplication_id = message_deduplication_id or deduplication_id([message])
+        strategy = self.settings.sqs_fifo_message_group_strategy
+
+        if strategy == MESSAGE_GROUP_BY_DEBT_ID:
+            message_group_id = message_deduplication_id
+        elif strategy == MESSAGE_GROUP_FIXED:
+            message_group_id = self.settings.sqs_fifo_message_group_id
+        else:
+            raise SQSClientException(f"Unknown MessageGroupId strategy: {strategy}")
+
+        return {"MessageDeduplicationId": message_deduplication_id, "MessageGroupId": message_group_id}
+
+    def _send_entries(self, entries: list, queue_url: str) -> tuple[list[str], list[str]]:
+        """
+        Returns the ids of the entries worth retrying and of the rejected ones.
+        A request that failed with an error retrying cannot fix (access denied,
+        missing queue...) rejects all of its entries.
+        Every request, retries included, goes through the rate limiter, which is
+        told about the requests and entries AWS throttled.
+        """
+        self._rate_limiter.acquire(len(entries))
+        try:
+            response = self._client.send_message_batch(
+                QueueUrl=queue_url,
+                Entries=entries
+            )
         except Exception as e:
+            if is_throttling_error(e):
+                self._rate_limiter.throttled()
             self.logger.error(
-                f"Error sending messages to queue {self.queue_url}",
+                f"Error sending messages to queue {queue_url}",
                 extra={
-                    "messages": messages,
+                    "messages": [entry["MessageBody"] for entry in entries],
                     "error": str(e)
                 }
             )
+            entry_ids = [entry["Id"] for entry in entries]
+            return (entry_ids, []) if is_retryable_error(e) else ([], entry_ids)
+
+        failed = response.get("Failed") or []
+        if any(entry.get("Code") in THROTTLING_ERROR_CODES for entry in failed):
+            self._rate_limiter.throttled()
+        failed_ids = {entry["Id"] for entry in failed}
+        retryable_ids = [entry["Id"] for entry in failed if not entry.get("SenderFault")]
+        rejected_ids = [entry["Id"] for entry in failed if entry.get("SenderFault")]
+        sent_messages = [entry["MessageBody"] for entry in entries if entry["Id"] not in failed_ids]
+
+        self._retry_budget.deposit(len(sent_messages))
+        METRICS.get("sqs_client_entries_sent").inc(len(sent_messages))
+        self.logger.debug(
+            f"Messages sent to queue {queue_url}",
+            extra={
+                "messages": sent_messages
+            }
+        )
+
+        return retryable_ids, rejected_ids
+
+    async def send_message_batch_async(
+        self,
+        messages: list,
+        message_attributes: dict | None = None,
+        queue_url: str | None = None,
+        deduplication_ids: list[str] | None = None
+    ) -> list[int]:
+        self._validate_client()
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self.send_message_batch, messages, message_attributes, queue_url, deduplication_ids)
 
     def _validate_client(self):
         if not self._client:
             message = "SQS client not created"
             self.logger.error(message)
             raise SQSClientException(message)
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """
+    Throttling, server (5xx) and connection errors. Any other error of a
+    request fails the same way when the request is sent again.
+    """
+    if isinstance(error, (BotocoreConnectionError, ConnectionClosedError, ReadTimeoutError)):
+        return True
+
+    response = getattr(error, "response", None) or {}
+    return is_throttling_error(error) or response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0) >= 500
+
+
+@lru_cache()
+def get_sqs_client() -> SQSClient:
+    """
+    The SQS client of the API process, shared by every import.
+    """
+    settings = get_settings()
+    sqs_client = SQSClient(settings.sqs_queue_url, settings)
+    sqs_client.create_client()
+    return sqs_client
@@ -0,0 +1,51 @@
+import os
+from functools import lru_cache
+from botocore.client import BaseClient
+from src.aws.client_factory import get_aws_client_factory
+from src.config.settings import get_settings
+
+
+class LocalBlobStore:
+    """
+    Blobs saved as files under `directory`, which the billing-worker reads from
+    a shared volume.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def put(self, key: str, data: bytes):
+        """
+        Written to a temporary file and renamed, so a reader never sees a partial blob.
+        """
+        path = os.path.join(self.directory, key)
+        temporary_path = f"{path}.tmp"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with open(temporary_path, "wb") as blob_file:
+            blob_file.write(data)
+        os.replace(temporary_path, path)
+
+
+class S3BlobStore:
+    """
+    Blobs saved as objects of an S3 (or S3-compatible) bucket.
+    """
+
+    def __init__(self, bucket: str, client: BaseClient):
+        self.bucket = bucket
+        self.client = client
+
+    def put(self, key: str, data: bytes):
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data)
+
+
+@lru_cache()
+def get_blob_store() -> LocalBlobStore | S3BlobStore:
+    """
+    An S3 bucket when `blob_store_bucket` is set, else the local `blob_store_dir`.
+    """
+    settings = get_settings()
+    if settings.blob_store_bucket:
+        return S3BlobStore(settings.blob_store_bucket, get_aws_client_factory().client("s3", settings.s3_endpoint_url))
+    return LocalBlobStore(settings.blob_store_dir)
@@ -0,0 +1,56 @@
+import numpy as np
+from redis.asyncio import Redis
+from src.config.settings import Settings
+
+
+"""
+Key written by the billing-worker once the debt is billed
+"""
+BILLED_DEBT_KEY = "processed:{debt_id}"
+
+
+class BilledDebtsFilter:
+    """
+    Looks up the debtIds already billed, so a file uploaded again only sends the
+    rows the billing-worker has not processed yet.
+
+    The keys of a block are read with MGET commands of up to `chunk_size` keys,
+    all sent in a single pipeline, so a block costs one round trip to Redis.
+    """
+
+    def __init__(self, client: Redis, chunk_size: int):
+        self.client = client
+        self.chunk_size = max(chunk_size, 1)
+
+    async def billed_block(self, debt_ids: list[str]) -> np.ndarray:
+        """
+        Returns the mask of the debtIds already billed.
+        """
+        if not debt_ids:
+            return np.zeros(0, dtype=bool)
+
+        keys = [BILLED_DEBT_KEY.format(debt_id=debt_id) for debt_id in debt_ids]
+        pipeline = self.client.pipeline(transaction=False)
+        for start in range(0, len(keys), self.chunk_size):
+            pipeline.mget(keys[start:start + self.chunk_size])
+
+        values = [value for chunk in await pipeline.execute() for value in chunk]
+        return np.array([value is not None for value in values], dtype=bool)
+
+    async def close(self):
+        await self.client.aclose()
+
+
+def create_billed_debts_filter(settings: Settings) -> BilledDebtsFilter:
+    """
+    The client is bound to the event loop it first runs on, so each import has its
+    own one, closed when the import finishes.
+    """
+    client = Redis(
+        host=settings.redis_host,
+        port=settings.redis_port,
+        db=settings.redis_db,
+        socket_connect_timeout=settings.redis_connect_timeout,
+        socket_timeout=settings.redis_operation_timeout
+    )
+    return BilledDebtsFilter(client, settings.billed_debts_filter_chunk_size)
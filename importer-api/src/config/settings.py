@@ -1,15 +1,73 @@
 from os import getenv
 from functools import lru_cache
+from typing import Literal
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
+    aws_connect_timeout: float = float(getenv("AWS_CONNECT_TIMEOUT", 5))
+    aws_max_attempts: int = int(getenv("AWS_MAX_ATTEMPTS", 3))
+    aws_max_pool_connections: int = int(getenv("AWS_MAX_POOL_CONNECTIONS", 250))
+    aws_read_timeout: float = float(getenv("AWS_READ_TIMEOUT", 60))
     aws_region: str = getenv("AWS_REGION", "us-east-1")
+    aws_retry_mode: str = getenv("AWS_RETRY_MODE", "adaptive")
+    aws_tcp_keepalive: bool = getenv("AWS_TCP_KEEPALIVE", "true").lower() == "true"
+    billed_debts_filter_chunk_size: int = int(getenv("BILLED_DEBTS_FILTER_CHUNK_SIZE", 1000))
+    billed_debts_filter_enabled: bool = getenv("BILLED_DEBTS_FILTER_ENABLED", "false").lower() == "true"
+    blob_store_bucket: str = getenv("BLOB_STORE_BUCKET", "")
+    blob_store_dir: str = getenv("BLOB_STORE_DIR", "/tmp/importer-api/blobs")
+    claim_check_chunk_size: int = int(getenv("CLAIM_CHECK_CHUNK_SIZE", 4194304))
+    claim_check_enabled: bool = getenv("CLAIM_CHECK_ENABLED", "false").lower() == "true"
+    csv_dedup_enabled: bool = getenv("CSV_DEDUP_ENABLED", "true").lower() == "true"
+    csv_dedup_exact_max_rows: int = int(getenv("CSV_DEDUP_EXACT_MAX_ROWS", 100000))
+    csv_dedup_false_positive_rate: float = float(getenv("CSV_DEDUP_FALSE_POSITIVE_RATE", 0.0001))
+    csv_dedup_stream_max_rows: int = int(getenv("CSV_DEDUP_STREAM_MAX_ROWS", 10000000))
+    csv_process_queue_size: int = int(getenv("CSV_PROCESS_QUEUE_SIZE", 500))
+    csv_process_workers: int = int(getenv("CSV_PROCESS_WORKERS", 1))
+    csv_range_size: int = int(getenv("CSV_RANGE_SIZE", 67108864))
+    csv_read_chunk_size: int = int(getenv("CSV_READ_CHUNK_SIZE", 1048576))
+    csv_sharding_min_file_size: int = int(getenv("CSV_SHARDING_MIN_FILE_SIZE", 268435456))
+    csv_validation_block_size: int = int(getenv("CSV_VALIDATION_BLOCK_SIZE", 10000))
+    csv_validation_enabled: bool = getenv("CSV_VALIDATION_ENABLED", "true").lower() == "true"
+    import_checkpoint_interval: float = float(getenv("IMPORT_CHECKPOINT_INTERVAL", 1))
+    import_error_report_dir: str = getenv("IMPORT_ERROR_REPORT_DIR", "/tmp/importer-api/errors")
+    import_fingerprints_dir: str = getenv("IMPORT_FINGERPRINTS_DIR", "/tmp/importer-api/fingerprints")
+    import_idempotency_max_entries: int = int(getenv("IMPORT_IDEMPOTENCY_MAX_ENTRIES", 1000))
+    import_idempotency_window_seconds: float = float(getenv("IMPORT_IDEMPOTENCY_WINDOW_SECONDS", 3600))
+    import_jobs_max_entries: int = int(getenv("IMPORT_JOBS_MAX_ENTRIES", 1000))
+    import_local_dir: str = getenv("IMPORT_LOCAL_DIR", "")
+    import_queue_capacity: int = int(getenv("IMPORT_QUEUE_CAPACITY", 10))
+    import_retry_after_seconds: int = int(getenv("IMPORT_RETRY_AFTER_SECONDS", 30))
+    import_spool_dir: str = getenv("IMPORT_SPOOL_DIR", "/tmp/importer-api/spool")
+    import_watch_dir: str = getenv("IMPORT_WATCH_DIR", "")
+    import_watch_interval: float = float(getenv("IMPORT_WATCH_INTERVAL", 5))
     log_level: str = getenv("LOG_LEVEL", "INFO")
+    max_concurrent_imports: int = int(getenv("MAX_CONCURRENT_IMPORTS", 2))
     max_csv_process_concurrent_tasks: int = int(getenv("MAX_CSV_PROCESS_CONCURRENT_TASKS", 250))
+    max_sqs_in_flight_sends: int = int(getenv("MAX_SQS_IN_FLIGHT_SENDS", 250))
     max_sqs_send_message_batch_size: int = int(getenv("MAX_SQS_SEND_MESSAGE_BATCH_SIZE", 10))
+    redis_connect_timeout: float = float(getenv("REDIS_CONNECT_TIMEOUT", 5))
+    redis_db: int = int(getenv("REDIS_DB", 0))
+    redis_host: str = getenv("REDIS_HOST", "localhost")
+    redis_operation_timeout: float = float(getenv("REDIS_OPERATION_TIMEOUT", 5))
+    redis_port: int = int(getenv("REDIS_PORT", 6379))
+    s3_endpoint_url: str = getenv("S3_ENDPOINT_URL", "")
+    sqs_batch_max_retries: int = int(getenv("SQS_BATCH_MAX_RETRIES", 5))
+    sqs_batch_retry_base_delay: float = float(getenv("SQS_BATCH_RETRY_BASE_DELAY", 0.1))
+    sqs_batch_retry_budget_max_tokens: int = int(getenv("SQS_BATCH_RETRY_BUDGET_MAX_TOKENS", 1000))
+    sqs_batch_retry_budget_ratio: float = float(getenv("SQS_BATCH_RETRY_BUDGET_RATIO", 0.2))
+    sqs_batch_retry_max_delay: float = float(getenv("SQS_BATCH_RETRY_MAX_DELAY", 5))
     sqs_endpoint_url: str = getenv("SQS_ENDPOINT_URL", "")
+    sqs_fifo_message_group_id: str = getenv("SQS_FIFO_MESSAGE_GROUP_ID", "data-process")
+    sqs_fifo_message_group_strategy: Literal["debt_id", "fixed"] = getenv("SQS_FIFO_MESSAGE_GROUP_STRATEGY", "debt_id")
+    sqs_max_message_size: int = int(getenv("SQS_MAX_MESSAGE_SIZE", 262144))
+    sqs_message_binary_encoding_enabled: bool = getenv("SQS_MESSAGE_BINARY_ENCODING_ENABLED", "false").lower() == "true"
+    sqs_message_packing_enabled: bool = getenv("SQS_MESSAGE_PACKING_ENABLED", "false").lower() == "true"
+    sqs_queue_shards: int = int(getenv("SQS_QUEUE_SHARDS", 1))
     sqs_queue_url: str = getenv("SQS_QUEUE_URL", "")
+    sqs_rate_limit_adaptive_enabled: bool = getenv("SQS_RATE_LIMIT_ADAPTIVE_ENABLED", "false").lower() == "true"
+    sqs_rate_limit_messages_per_second: float = float(getenv("SQS_RATE_LIMIT_MESSAGES_PER_SECOND", 0))
+    sqs_rate_limit_requests_per_second: float = float(getenv("SQS_RATE_LIMIT_REQUESTS_PER_SECOND", 0))
 
 
 @lru_cache()
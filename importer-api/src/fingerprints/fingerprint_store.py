@@ -0,0 +1,122 @@
+import hashlib
+import mmap
+import os
+import struct
+import numpy as np
+from src.config.settings import Settings
+
+
+"""
+A store file is the header, with the magic and the number of entries, followed
+by the keys sorted and then the fingerprint of each key, all little-endian uint64
+"""
+STORE_MAGIC = b"FPSTORE1"
+STORE_HEADER = struct.Struct("<8sQ")
+STORE_SUFFIX = ".fingerprints"
+FINGERPRINT_DTYPE = np.dtype("<u8")
+FINGERPRINT_SIZE = 8
+
+
+class FingerprintStore:
+    """
+    Read-only view of a store file, mapped in memory. The keys are sorted, so a
+    block of keys is looked up at once with a binary search, and the pages of the
+    file are shared by every process reading the same store.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as file:
+            self._mapped_file = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, count = STORE_HEADER.unpack_from(self._mapped_file)
+        if magic != STORE_MAGIC or len(self._mapped_file) != STORE_HEADER.size + 2 * count * FINGERPRINT_SIZE:
+            self._mapped_file.close()
+            raise ValueError(f"Invalid fingerprint store: {path}")
+
+        self.count = count
+        self.keys = np.frombuffer(self._mapped_file, FINGERPRINT_DTYPE, count, STORE_HEADER.size)
+        self.fingerprints = np.frombuffer(
+            self._mapped_file, FINGERPRINT_DTYPE, count, STORE_HEADER.size + count * FINGERPRINT_SIZE
+        )
+
+    def unchanged_block(self, keys: np.ndarray, fingerprints: np.ndarray) -> np.ndarray:
+        """
+        Returns the mask of the keys stored with the same fingerprint.
+        """
+        if not self.count:
+            return np.zeros(len(keys), dtype=bool)
+
+        positions = np.minimum(np.searchsorted(self.keys, keys), self.count - 1)
+        return (self.keys[positions] == keys) & (self.fingerprints[positions] == fingerprints)
+
+    def close(self):
+        """
+        The arrays are views of the mapped file, so they are dropped before it is closed.
+        """
+        self.keys = self.fingerprints = None
+        self._mapped_file.close()
+
+
+def open_fingerprint_store(path: str) -> FingerprintStore | None:
+    if not os.path.exists(path):
+        return None
+    return FingerprintStore(path)
+
+
+def write_fingerprint_store(path: str, keys: np.ndarray, fingerprints: np.ndarray):
+    """
+    The keys are sorted, keeping the first fingerprint of a repeated key. Written
+    to a temporary file and renamed, so the readers never see a partial store.
+    """
+    keys, indexes = np.unique(keys.astype(FINGERPRINT_DTYPE), return_index=True)
+    fingerprints = fingerprints.astype(FINGERPRINT_DTYPE)[indexes]
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(STORE_HEADER.pack(STORE_MAGIC, len(keys)))
+        file.write(keys.tobytes())
+        file.write(fingerprints.tobytes())
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+
+
+def merge_fingerprint_stores(paths: list[str], path: str):
+    """
+    Write a single store with the entries of the stores in `paths`.
+    """
+    keys = []
+    fingerprints = []
+    for part_path in paths:
+        store = FingerprintStore(part_path)
+        keys.append(store.keys.copy())
+        fingerprints.append(store.fingerprints.copy())
+        store.close()
+
+    write_fingerprint_store(
+        path,
+        np.concatenate(keys) if keys else np.zeros(0, FINGERPRINT_DTYPE),
+        np.concatenate(fingerprints) if fingerprints else np.zeros(0, FINGERPRINT_DTYPE)
+    )
+
+
+def fingerprint(values: list[str]) -> np.ndarray:
+    """
+    64-bit BLAKE2b of each value. Unlike `hash()`, it is the same in every process,
+    so the fingerprints of an import are still valid in the next one.
+    """
+    digests = b"".join(hashlib.blake2b(value.encode(), digest_size=FINGERPRINT_SIZE).digest() for value in values)
+    return np.frombuffer(digests, dtype=FINGERPRINT_DTYPE)
+
+
+def fingerprint_store_path(settings: Settings, source: str) -> str:
+    return os.path.join(settings.import_fingerprints_dir, f"{source}{STORE_SUFFIX}")
+
+
+def fingerprint_part_path(settings: Settings, source: str, import_id: str, start: int) -> str:
+    """
+    Store with the fingerprints of the range of a sharded import starting at `start`.
+    """
+    return os.path.join(settings.import_fingerprints_dir, f"{source}.{import_id}.{start}{STORE_SUFFIX}.part")
@@ -0,0 +1,44 @@
+from collections import OrderedDict
+from functools import lru_cache
+from src.config.settings import get_settings
+from src.models.import_job import ImportJob
+
+
+class ImportJobRegistry:
+    """
+    In-memory registry of the import jobs, bounded to `max_jobs`. When it is
+    full, the oldest finished job is evicted; the running jobs are only evicted
+    when there is no finished job left.
+    """
+
+    def __init__(self, max_jobs: int):
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def create(self, import_id: str, total_bytes: int, bytes_processed: int = 0) -> ImportJob:
+        job = ImportJob(import_id, total_bytes, bytes_processed)
+        self._jobs[import_id] = job
+
+        while len(self._jobs) > self.max_jobs:
+            self._evict()
+
+        return job
+
+    def get(self, import_id: str) -> ImportJob | None:
+        return self._jobs.get(import_id)
+
+    def _evict(self):
+        for import_id, job in self._jobs.items():
+            if job.finished:
+                del self._jobs[import_id]
+                return
+
+        self._jobs.popitem(last=False)
+
+
+@lru_cache()
+def get_import_job_registry() -> ImportJobRegistry:
+    return ImportJobRegistry(get_settings().import_jobs_max_entries)
@@ -0,0 +1,80 @@
+import asyncio
+from time import monotonic
+from functools import lru_cache
+from contextlib import asynccontextmanager
+from src.config.settings import get_settings
+from src.metrics.metrics_registry_manager import get_metrics_registry
+
+
+METRICS = get_metrics_registry()
+METRICS.register_gauge("import_scheduler_active_imports", "Number of imports being processed")
+METRICS.register_gauge("import_scheduler_queued_imports", "Number of imports waiting to be processed")
+METRICS.register_counter("import_scheduler_rejected_imports", "Number of uploads rejected because the import queue was full")
+METRICS.register_summary("import_scheduler_queue_wait_seconds", "Time an import waited in the queue before being processed")
+
+
+class ImportScheduler:
+    """
+    Runs at most `max_concurrent_imports` imports at a time and queues up to
+    `queue_capacity` more. An import is admitted when the upload is received and
+    leaves the scheduler when it finishes running.
+    """
+
+    def __init__(self, max_concurrent_imports: int, queue_capacity: int):
+        self.max_concurrent_imports = max_concurrent_imports
+        self.queue_capacity = queue_capacity
+        self.admitted = 0
+        self.active = 0
+        self._semaphore = asyncio.Semaphore(max_concurrent_imports)
+
+    @property
+    def queued(self) -> int:
+        return self.admitted - self.active
+
+    def admit(self, force: bool = False) -> bool:
+        """
+        `force` admits the import over the capacity, for the imports that were
+        already accepted, e.g. the ones resumed on start up.
+        """
+        if not force and self.admitted >= self.max_concurrent_imports + self.queue_capacity:
+            METRICS.get("import_scheduler_rejected_imports").inc()
+            return False
+
+        self.admitted += 1
+        METRICS.get("import_scheduler_queued_imports").inc()
+        return True
+
+    def release(self):
+        """
+        Give back an admission that will not run, e.g. when saving the upload failed.
+        """
+        self.admitted -= 1
+        METRICS.get("import_scheduler_queued_imports").dec()
+
+    @asynccontextmanager
+    async def run(self):
+        queued_at = monotonic()
+        try:
+            await self._semaphore.acquire()
+        except BaseException:
+            self.release()
+            raise
+
+        METRICS.get("import_scheduler_queue_wait_seconds").observe(monotonic() - queued_at)
+        METRICS.get("import_scheduler_queued_imports").dec()
+        METRICS.get("import_scheduler_active_imports").inc()
+        self.active += 1
+
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self.admitted -= 1
+            METRICS.get("import_scheduler_active_imports").dec()
+            self._semaphore.release()
+
+
+@lru_cache()
+def get_import_scheduler() -> ImportScheduler:
+    settings = get_settings()
+    return ImportScheduler(settings.max_concurrent_imports, settings.import_queue_capacity)
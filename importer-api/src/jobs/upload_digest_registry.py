@@ -0,0 +1,51 @@
+from collections import OrderedDict
+from functools import lru_cache
+from time import monotonic
+from src.config.settings import get_settings
+
+
+class UploadDigestRegistry:
+    """
+    SHA-256 digests of the recent uploads, with the import of each one. Bounded to
+    `max_entries`, evicting the least recently used digest, and each digest is
+    forgotten `window_seconds` after its upload.
+
+    The same content uploaded for another source is a different upload, so the
+    source is part of the key.
+    """
+
+    def __init__(self, max_entries: int, window_seconds: float):
+        self.max_entries = max_entries
+        self.window_seconds = window_seconds
+        self._imports = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._imports)
+
+    def get(self, digest: str, source: str | None = None) -> str | None:
+        key = (digest, source)
+        entry = self._imports.get(key)
+        if entry is None:
+            return None
+
+        import_id, expires_at = entry
+        if monotonic() >= expires_at:
+            del self._imports[key]
+            return None
+
+        self._imports.move_to_end(key)
+        return import_id
+
+    def add(self, digest: str, source: str | None, import_id: str):
+        key = (digest, source)
+        self._imports[key] = (import_id, monotonic() + self.window_seconds)
+        self._imports.move_to_end(key)
+
+        while len(self._imports) > self.max_entries:
+            self._imports.popitem(last=False)
+
+
+@lru_cache()
+def get_upload_digest_registry() -> UploadDigestRegistry:
+    settings = get_settings()
+    return UploadDigestRegistry(settings.import_idempotency_max_entries, settings.import_idempotency_window_seconds)
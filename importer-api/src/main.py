@@ -1,10 +1,26 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from src.api.health_check.routes import router as health_check_router
 from src.api.file_importer.routes import router as importer_router
+from src.api.file_importer.tasks import resume_spooled_imports, start_spool_dir_watcher
 from src.api.metrics.routes import router as metrics_router
+from src.aws.client_factory import get_aws_client_factory
+from src.aws.sqs.sqs_client import get_sqs_client
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    sqs_client = get_sqs_client()
+    resume_spooled_imports()
+    watcher = start_spool_dir_watcher()
+    yield
+    if watcher:
+        watcher.cancel()
+    sqs_client.close()
+    get_aws_client_factory().close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 app.include_router(health_check_router)
@@ -0,0 +1,142 @@
+from datetime import datetime, timedelta, timezone
+from time import monotonic
+
+
+RATE_WINDOW_SECONDS = 1.0
+
+
+class ImportJobStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    INTERRUPTED = "interrupted"
+
+
+class ImportJob:
+    """
+    Progress of an import. The registry keeps many of these in memory, so the
+    attributes are slotted.
+
+    The rows per second are measured over windows of at least `RATE_WINDOW_SECONDS`,
+    so they follow the current speed instead of the average of the whole import.
+    """
+
+    __slots__ = (
+        "import_id", "status", "total_bytes", "bytes_processed", "rows_read", "rows_sent",
+        "rows_failed", "rows_rejected", "rows_duplicated", "rows_unchanged", "rows_already_billed", "created_at", "finished_at",
+        "_rows_per_second", "_window_started_at", "_window_rows"
+    )
+
+    def __init__(self, import_id: str, total_bytes: int, bytes_processed: int = 0):
+        self.import_id = import_id
+        self.status = ImportJobStatus.QUEUED
+        self.total_bytes = total_bytes
+        self.bytes_processed = bytes_processed
+        self.rows_read = 0
+        self.rows_sent = 0
+        self.rows_failed = 0
+        self.rows_rejected = 0
+        self.rows_duplicated = 0
+        self.rows_unchanged = 0
+        self.rows_already_billed = 0
+        self.created_at = datetime.now(timezone.utc)
+        self.finished_at = None
+        self._rows_per_second = 0.0
+        self._window_started_at = monotonic()
+        self._window_rows = 0
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (ImportJobStatus.COMPLETED, ImportJobStatus.FAILED, ImportJobStatus.INTERRUPTED)
+
+    def start(self):
+        self.status = ImportJobStatus.RUNNING
+        self._window_started_at = monotonic()
+        self._window_rows = 0
+
+    def finish(self, status: str):
+        self.status = status
+        self.finished_at = datetime.now(timezone.utc)
+        self._rows_per_second = 0.0
+
+    def record_read(self, rows: int, offset: int):
+        self.rows_read += rows
+        self.bytes_processed = offset
+
+    def record_sent(self, rows_sent: int, rows_failed: int = 0):
+        self.rows_sent += rows_sent
+        self.rows_failed += rows_failed
+        self._window_rows += rows_sent + rows_failed
+
+        now = monotonic()
+        elapsed = now - self._window_started_at
+        if elapsed >= RATE_WINDOW_SECONDS:
+            self._rows_per_second = self._window_rows / elapsed
+            self._window_started_at = now
+            self._window_rows = 0
+
+    def record_rejected(self, rows: int = 1):
+        self.rows_rejected += rows
+
+    def record_duplicated(self, rows: int = 1):
+        self.rows_duplicated += rows
+
+    def record_unchanged(self, rows: int = 1):
+        self.rows_unchanged += rows
+
+    def record_already_billed(self, rows: int = 1):
+        self.rows_already_billed += rows
+
+    def rows_per_second(self) -> float:
+        if self.finished:
+            return 0.0
+
+        """
+        When no rows were sent for a while, the rate of the open window is lower than
+        the last one, so a stuck import shows its rate going down to zero
+        """
+        elapsed = monotonic() - self._window_started_at
+        if elapsed >= 2 * RATE_WINDOW_SECONDS:
+            return self._window_rows / elapsed
+        return self._rows_per_second
+
+    def eta_seconds(self) -> float | None:
+        """
+        The rows left are estimated from the average size of the rows read so far,
+        plus the rows read and not sent yet. Unknown while the size of the file is
+        unknown, e.g. for a stream without `Content-Length`.
+        """
+        rows_per_second = self.rows_per_second()
+        if not rows_per_second or not self.rows_read or not self.bytes_processed or not self.total_bytes:
+            return None
+
+        bytes_per_row = self.bytes_processed / self.rows_read
+        rows_to_read = (self.total_bytes - self.bytes_processed) / bytes_per_row
+        rows_in_flight = self.rows_read - self.rows_sent - self.rows_failed
+        return (rows_to_read + rows_in_flight) / rows_per_second
+
+    def to_dict(self) -> dict:
+        eta_seconds = self.eta_seconds()
+        estimated_completion = None
+        if eta_seconds is not None:
+            estimated_completion = (datetime.now(timezone.utc) + timedelta(seconds=eta_seconds)).isoformat()
+
+        return {
+            "import_id": self.import_id,
+            "status": self.status,
+            "rows_read": self.rows_read,
+            "rows_sent": self.rows_sent,
+            "rows_failed": self.rows_failed,
+            "rows_rejected": self.rows_rejected,
+            "rows_duplicated": self.rows_duplicated,
+            "rows_unchanged": self.rows_unchanged,
+            "rows_already_billed": self.rows_already_billed,
+            "rows_per_second": round(self.rows_per_second(), 2),
+            "bytes_processed": self.bytes_processed,
+            "total_bytes": self.total_bytes,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "eta_seconds": round(eta_seconds, 2) if eta_seconds is not None else None,
+            "estimated_completion": estimated_completion,
+        }
@@ -0,0 +1,39 @@
+class MessageBatch:
+    """
+    `end_offset` is the byte offset of the file right after the last row of the batch.
+    `message_attributes` are the SQS attributes of every message of the batch. A
+    claim-check batch has the rows in `chunk`, saved to the blob store as `chunk_key`
+    before its message, which only refers to the chunk, is sent. `shard` is the shard
+    queue the batch is sent to, when the queue is sharded. `deduplication_ids` has
+    the `MessageDeduplicationId` of each message, when sent to a FIFO queue.
+    """
+
+    def __init__(
+        self,
+        messages: list[str] = None,
+        message_rows: list[int] = None,
+        end_offset: int = 0,
+        message_attributes: dict | None = None,
+        chunk: bytes | None = None,
+        chunk_key: str | None = None,
+        shard: int | None = None,
+        deduplication_ids: list[str] | None = None
+    ):
+        self.messages = messages if messages is not None else []
+        self.message_rows = message_rows if message_rows is not None else [1] * len(self.messages)
+        self.end_offset = end_offset
+        self.message_attributes = message_attributes
+        self.chunk = chunk
+        self.chunk_key = chunk_key
+        self.shard = shard
+        self.deduplication_ids = deduplication_ids if deduplication_ids is not None else []
+
+    @property
+    def rows(self) -> int:
+        return sum(self.message_rows)
+
+    def add(self, message: str, rows: int = 1, deduplication_id: str | None = None):
+        self.messages.append(message)
+        self.message_rows.append(rows)
+        if deduplication_id is not None:
+            self.deduplication_ids.append(deduplication_id)
@@ -0,0 +1,42 @@
+class SpooledImport:
+    """
+    An upload saved in the spool. `offset` is the byte offset up to which every
+    row was acknowledged, and `completed_ranges` are the ranges already processed
+    when the file is split in ranges. `source` names the upstream system of a
+    delta import, whose rows are compared with the previous import of the source.
+    `digest` is the SHA-256 of the upload. A `local` import reads a file of the
+    server in place, which is not part of the spool and is never removed by it.
+    """
+
+    def __init__(
+        self,
+        import_id: str,
+        path: str,
+        offset: int = 0,
+        completed_ranges: list[tuple[int, int]] = None,
+        source: str | None = None,
+        digest: str | None = None,
+        local: bool = False
+    ):
+        self.import_id = import_id
+        self.path = path
+        self.offset = offset
+        self.completed_ranges = completed_ranges if completed_ranges is not None else []
+        self.source = source
+        self.digest = digest
+        self.local = local
+
+    @property
+    def bytes_processed(self) -> int:
+        return self.offset + sum(end - start for start, end in self.completed_ranges)
+
+    def to_manifest(self) -> dict:
+        return {
+            "import_id": self.import_id,
+            "offset": self.offset,
+            "completed_ranges": [list(file_range) for file_range in self.completed_ranges],
+            "source": self.source,
+            "digest": self.digest,
+            "path": self.path,
+            "local": self.local,
+        }
@@ -0,0 +1,204 @@
+import numpy as np
+from src.encoding.row_codec import QUOTE
+from src.processor.row_validator import CSV_COLUMNS, FIELDS_SEPARATOR, RowValidator
+
+
+LINE_SEPARATOR = "\n"
+DATE_SIZE = 10
+DATE_DIGITS = [0, 1, 2, 3, 5, 6, 8, 9]
+DATE_HYPHENS = [4, 7]
+UUID_SIZE = 36
+UUID_HYPHENS = [8, 13, 18, 23]
+UUID_HEX_DIGITS = [index for index in range(UUID_SIZE) if index not in UUID_HYPHENS]
+MAX_NUMBER_SIZE = 20
+
+"""
+Zeros after the block, so the fixed-size fields at its end can be read whole
+"""
+FIELDS_PADDING = max(DATE_SIZE, UUID_SIZE, MAX_NUMBER_SIZE)
+DAYS_IN_MONTH = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+"""
+Bytes `str.strip()` may remove: the ASCII whitespace and the separators \\x1c-\\x1f
+"""
+STRIPPED_BYTES = np.zeros(256, dtype=bool)
+STRIPPED_BYTES[[9, 10, 11, 12, 13, 28, 29, 30, 31, 32]] = True
+
+HEX_BYTES = np.zeros(256, dtype=bool)
+HEX_BYTES[list(b"0123456789abcdef")] = True
+
+
+class BlockValidator:
+    """
+    Validate a block of rows at once. The block is checked as a single buffer of
+    bytes with NumPy: the separators give the start and end of every field, and
+    each check runs over a whole column instead of once per row.
+
+    The checks are stricter than the ones of the RowValidator (e.g. a negative
+    `debtAmount`, a number with more than `MAX_NUMBER_SIZE` characters, a non-ASCII
+    digit, an uppercase debtId or a field with spaces around it is not accepted
+    here), so a row in the mask is always valid. The rows out of the mask must be
+    checked again by the RowValidator, which tells the header and blank lines
+    apart and gives the rejection reason.
+    """
+
+    def __init__(self, validator: RowValidator):
+        self.validator = validator
+        self.canonical = (
+            validator.fields_count == len(CSV_COLUMNS)
+            and validator.indexes == list(range(len(CSV_COLUMNS)))
+        )
+
+    def validate(self, lines: list[str]) -> tuple[np.ndarray, list[str | None]]:
+        """
+        Returns the mask of the valid rows and, for each line, the row to send
+        when it is valid.
+        """
+        mask = np.zeros(len(lines), dtype=bool)
+        rows = [None] * len(lines)
+        if not lines:
+            return mask, rows
+
+        block = (LINE_SEPARATOR.join(lines) + LINE_SEPARATOR).encode()
+        buffer = np.frombuffer(block + bytes(FIELDS_PADDING), dtype=np.uint8)
+        line_ends = np.flatnonzero(buffer == ord(LINE_SEPARATOR))
+        line_starts = np.concatenate(([0], line_ends[:-1] + 1))
+
+        separators = np.flatnonzero(buffer == ord(FIELDS_SEPARATOR))
+        first_separator = np.searchsorted(separators, line_starts)
+        separators_count = np.searchsorted(separators, line_ends) - first_separator
+
+        candidates = np.flatnonzero(
+            (separators_count == self.validator.fields_count - 1)
+            & unquoted_lines(buffer, line_starts, line_ends)
+        )
+        if not len(candidates):
+            return mask, rows
+
+        """
+        One row per candidate line and one column per field, with the offsets of
+        the field in the buffer
+        """
+        line_separators = separators[first_separator[candidates, None] + np.arange(self.validator.fields_count - 1)]
+        starts = np.concatenate((line_starts[candidates, None], line_separators + 1), axis=1)
+        ends = np.concatenate((line_separators, line_ends[candidates, None]), axis=1)
+
+        columns = [(starts[:, index], ends[:, index]) for index in self.validator.indexes]
+        _, government_id, email, debt_amount, debt_due_date, debt_id = columns
+
+        valid = unstripped_fields(buffer, columns)
+        valid &= valid_numbers(buffer, *government_id, max_dots=0)
+        valid &= count_in(np.flatnonzero(buffer == ord("@")), *email) > 0
+        valid &= valid_numbers(buffer, *debt_amount, max_dots=1)
+        valid &= valid_dates(buffer, *debt_due_date)
+        valid &= valid_uuids(buffer, *debt_id)
+
+        valid_indexes = candidates[valid].tolist()
+        mask[valid_indexes] = True
+        for index in valid_indexes:
+            rows[index] = lines[index] if self.canonical else self._canonical_row(lines[index])
+
+        return mask, rows
+
+    def _canonical_row(self, line: str) -> str:
+        fields = line.split(FIELDS_SEPARATOR)
+        return FIELDS_SEPARATOR.join(fields[index] for index in self.validator.indexes)
+
+
+def unquoted_lines(buffer: np.ndarray, line_starts: np.ndarray, line_ends: np.ndarray) -> np.ndarray:
+    """
+    The lines without quotes. A quoted field may have commas, so the lines with
+    quotes are left to the RowValidator, which parses them.
+    """
+    return count_in(np.flatnonzero(buffer == ord(QUOTE)), line_starts, line_ends) == 0
+
+
+def count_in(positions: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """
+    Number of `positions` within each field, for the bytes that are rare in a row.
+    """
+    return np.searchsorted(positions, ends) - np.searchsorted(positions, starts)
+
+
+def field_sizes(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    return ends - starts
+
+
+def unstripped_fields(buffer: np.ndarray, columns: list[tuple[np.ndarray, np.ndarray]]) -> np.ndarray:
+    """
+    Every field is non-empty and starts and ends with an ASCII character that is not
+    removed by `str.strip()`, so the row is sent as it is.
+    """
+    valid = np.ones(len(columns[0][0]), dtype=bool)
+    for starts, ends in columns:
+        not_empty = ends > starts
+        first = buffer[np.where(not_empty, starts, 0)]
+        last = buffer[np.where(not_empty, ends - 1, 0)]
+        valid &= not_empty & (first < 0x80) & (last < 0x80) & ~STRIPPED_BYTES[first] & ~STRIPPED_BYTES[last]
+    return valid
+
+
+def valid_numbers(buffer: np.ndarray, starts: np.ndarray, ends: np.ndarray, max_dots: int) -> np.ndarray:
+    """
+    Up to `MAX_NUMBER_SIZE` ASCII digits, with at most `max_dots` decimal points.
+    """
+    sizes = field_sizes(starts, ends)
+    chars = fixed_size_fields(buffer, starts, MAX_NUMBER_SIZE)
+    in_field = np.arange(MAX_NUMBER_SIZE) < sizes[:, None]
+
+    digits = in_field & (chars >= ord("0")) & (chars <= ord("9"))
+    dots = in_field & (chars == ord("."))
+    digits_count = digits.sum(axis=1)
+    dots_count = dots.sum(axis=1)
+
+    return (
+        (sizes <= MAX_NUMBER_SIZE)
+        & (digits_count > 0)
+        & (dots_count <= max_dots)
+        & (digits_count + dots_count == sizes)
+    )
+
+
+def valid_dates(buffer: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """
+    YYYY-MM-DD dates of the calendar, from year 1.
+    """
+    chars = fixed_size_fields(buffer, starts, DATE_SIZE)
+    digits = chars.astype(np.int64) - ord("0")
+
+    shape = (
+        (field_sizes(starts, ends) == DATE_SIZE)
+        & (chars[:, DATE_HYPHENS] == ord("-")).all(axis=1)
+        & ((digits[:, DATE_DIGITS] >= 0) & (digits[:, DATE_DIGITS] <= 9)).all(axis=1)
+    )
+
+    year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    month = digits[:, 5] * 10 + digits[:, 6]
+    day = digits[:, 8] * 10 + digits[:, 9]
+
+    valid_month = (month >= 1) & (month <= 12)
+    leap_year = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    days_in_month = DAYS_IN_MONTH[np.where(valid_month, month, 0)] + (leap_year & (month == 2))
+
+    return shape & (year >= 1) & valid_month & (day >= 1) & (day <= days_in_month)
+
+
+def valid_uuids(buffer: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """
+    Hyphenated UUIDs (8-4-4-4-12), in lower case. The uppercase ones are left to
+    the RowValidator, which lowercases them.
+    """
+    chars = fixed_size_fields(buffer, starts, UUID_SIZE)
+    return (
+        (field_sizes(starts, ends) == UUID_SIZE)
+        & (chars[:, UUID_HYPHENS] == ord("-")).all(axis=1)
+        & HEX_BYTES[chars[:, UUID_HEX_DIGITS]].all(axis=1)
+    )
+
+
+def fixed_size_fields(buffer: np.ndarray, starts: np.ndarray, size: int) -> np.ndarray:
+    """
+    Matrix with the `size` bytes from the start of each field, up to `FIELDS_PADDING`.
+    The fields of other sizes must be filtered out by the caller.
+    """
+    return buffer[starts[:, None] + np.arange(size)]
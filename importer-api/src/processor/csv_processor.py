@@ -1,59 +1,393 @@
 import asyncio
+import numpy as np
+from io import BytesIO
+from typing import AsyncIterable, BinaryIO
+from src.aws.sqs.fifo_queue import is_fifo_queue
+from src.aws.sqs.queue_shards import shard_queue_url
 from src.aws.sqs.sqs_client import SQSClient
+from src.blobs.blob_store import get_blob_store
+from src.cache.billed_debts_filter import BilledDebtsFilter
 from src.config.settings import Settings
+from src.encoding.row_codec import encode_row
 from src.logger.logger import get_logger
 from src.metrics.metrics_registry_manager import get_metrics_registry
+from src.models.import_job import ImportJob
+from src.models.message_batch import MessageBatch
+from src.processor.line_reader import LineReader, read_file_chunks
+from src.processor.block_validator import BlockValidator
+from src.processor.delta_filter import DeltaFilter
+from src.processor.duplicate_filter import BloomDuplicateFilter, ExactDuplicateFilter
+from src.processor.exceptions.invalid_row_exception import InvalidRowException
+from src.processor.message_batcher import MessageBatcher, ShardedMessageBatcher, create_message_batcher
+from src.processor.row_validator import FIELDS_SEPARATOR, RowValidator
+from src.processor.send_scheduler import get_send_scheduler
+from src.reports.import_error_report import ImportErrorReport
+from src.spool.import_checkpoint import ImportCheckpoint
 
 METRICS = get_metrics_registry()
 METRICS.register_counter("csv_processor_messages_sent", "Number of messages sent to SQS")
 METRICS.register_counter("csv_processor_messages_failed", "Number of messages failed to send to SQS")
+METRICS.register_counter("csv_processor_rows_sent", "Number of CSV rows sent to SQS")
+METRICS.register_counter("csv_processor_rows_failed", "Number of CSV rows failed to send to SQS")
+METRICS.register_counter("csv_processor_rows_rejected", "Number of CSV rows rejected by the validation")
+METRICS.register_counter("csv_processor_rows_duplicated", "Number of CSV rows dropped for repeating a debtId")
+METRICS.register_counter("csv_processor_rows_unchanged", "Number of CSV rows dropped for being unchanged since the previous import of the source")
+METRICS.register_counter("csv_processor_rows_already_billed", "Number of CSV rows dropped for a debtId already billed")
+METRICS.register_counter("csv_processor_chunks_stored", "Number of chunks of rows saved to the blob store")
+METRICS.register_counter("csv_processor_chunk_store_failures", "Number of chunks of rows that could not be saved to the blob store")
+METRICS.register_counter("csv_processor_billed_lookup_failures", "Number of blocks sent without looking up the debtIds already billed")
+METRICS.register_counter("csv_processor_shard_rows_sent", "Number of CSV rows sent to each shard queue", {"shard"})
+METRICS.register_counter("csv_processor_shard_messages_sent", "Number of messages sent to each shard queue", {"shard"})
 METRICS.register_summary("csv_processor_duration_seconds", "Duration of CSV processing in seconds")
+METRICS.register_gauge("csv_processor_queue_depth", "Number of batches waiting for a sender worker")
+METRICS.register_gauge("csv_processor_sender_workers", "Number of running sender workers")
+METRICS.register_gauge("csv_processor_busy_sender_workers", "Number of sender workers sending a batch")
+
+BATCHES_END = None
+
 
 class CSVProcessor:
-    def __init__(self, settings: Settings, file_content: bytes, sqs_client: SQSClient):
+    def __init__(
+        self,
+        settings: Settings,
+        file_content: bytes | BinaryIO | AsyncIterable[bytes],
+        sqs_client: SQSClient,
+        checkpoint: ImportCheckpoint | None = None,
+        job: ImportJob | None = None,
+        validator: RowValidator | None = None,
+        error_report: ImportErrorReport | None = None,
+        duplicate_filter: ExactDuplicateFilter | BloomDuplicateFilter | None = None,
+        delta_filter: DeltaFilter | None = None,
+        billed_filter: BilledDebtsFilter | None = None
+    ):
+        """
+        `file_content` is the content of the CSV, a file or the chunks of a CSV
+        being received, processed as they arrive.
+
+        With a checkpoint, `file_content` starts at the checkpoint offset and every
+        batch is acknowledged to the checkpoint once it is sent. The progress is
+        recorded in the job, when given.
+
+        When the validation is enabled, the rows are checked by the validator, built
+        from the first line read when not given, and the rejected rows are written
+        to the error report instead of being sent.
+
+        With a duplicate filter, the rows with a debtId already read are dropped and
+        written to the error report as well.
+
+        With a delta filter, the rows unchanged since the previous import of the same
+        source are dropped and counted, without being reported as errors.
+
+        With a billed filter, the rows with a debtId the billing-worker already billed
+        are dropped before being sent. They are counted, but not reported as errors.
+        """
         self.settings = settings
         self.file_content = file_content
         self.sqs_client = sqs_client
+        self.checkpoint = checkpoint
+        self.job = job
+        self.validator = validator
+        self.block_validator = None
+        self.error_report = error_report
+        self.duplicate_filter = duplicate_filter
+        self.delta_filter = delta_filter
+        self.billed_filter = billed_filter
+        self.send_scheduler = get_send_scheduler()
         self.logger = get_logger(__name__)
+        self.messages_sent = 0
+        self.messages_failed = 0
+        self.rows_sent = 0
+        self.rows_failed = 0
+        self.rows_rejected = 0
+        self.rows_duplicated = 0
+        self.rows_unchanged = 0
+        self.rows_already_billed = 0
+        self.shard_rows_sent = {}
+        self.shard_messages_sent = {}
 
     @METRICS.get("csv_processor_duration_seconds").time()
     async def process(self):
+        """
+        The lines are read and batched by a single producer while a fixed pool of
+        sender workers drains the batches queue. The queue is bounded, so the reader
+        waits for the workers when they fall behind. Every send takes a slot of the
+        process-wide send scheduler, shared fairly with the other imports.
+        """
         self.logger.debug("Initiating CSV processing")
-        messages = []
-        tasks = []
-        semaphore = asyncio.Semaphore(
-            self.settings.max_csv_process_concurrent_tasks
-        )
+        workers_count = self.settings.max_csv_process_concurrent_tasks
+        batches = asyncio.Queue(maxsize=self.settings.csv_process_queue_size)
+        workers = [
+            asyncio.create_task(self._sender_worker(batches)) for _ in range(workers_count)
+        ]
+
+        try:
+            await self._produce_batches(batches)
+        finally:
+            for _ in workers:
+                await batches.put(BATCHES_END)
+            await asyncio.gather(*workers)
+
+    async def _produce_batches(self, batches: asyncio.Queue):
+        """
+        The lines are validated in blocks of `csv_validation_block_size` lines, so
+        the checks run over whole columns at once.
+        """
+        reader = self._line_reader()
+        batcher = create_message_batcher(self.settings, reader.offset)
+        lines = []
+        offsets = [reader.offset]
 
-        lines = self.file_content.decode().splitlines()
+        async for line in reader.raw_lines():
+            offsets.append(reader.offset)
+            lines.append(line)
+            if len(lines) >= self.settings.csv_validation_block_size:
+                await self._add_block(batches, batcher, lines, offsets)
+                lines = []
+                offsets = [offsets[-1]]
 
-        for line in lines:
-            normalized_line = line.strip()
-            messages.append(normalized_line)
+        if lines:
+            await self._add_block(batches, batcher, lines, offsets)
 
-            if self._is_message_buffer_full(messages):
-                if len(tasks) >= self.settings.max_csv_process_concurrent_tasks:
-                    await asyncio.gather(*tasks)
-                    tasks = []
-                task = asyncio.create_task(self._send_batch_messages(semaphore, messages))
-                tasks.append(task)
-                messages = []
+        while batch := batcher.flush():
+            await self._enqueue_batch(batches, batch)
 
+    async def _add_block(
+        self,
+        batches: asyncio.Queue,
+        batcher: MessageBatcher | ShardedMessageBatcher,
+        lines: list[bytes],
+        offsets: list[int]
+    ):
+        """
+        `offsets` has the offset where the block starts, followed by the offset
+        where each line ends. The debtId of the rows is read before they are
+        encoded, to choose their shard queue and to identify their messages on a
+        FIFO queue.
+        """
+        rows = self._validate_block(lines, offsets)
+        if self.duplicate_filter:
+            self._drop_duplicates(rows, offsets)
+        if self.delta_filter:
+            self._drop_unchanged(rows)
+        if self.billed_filter:
+            await self._drop_billed(rows)
 
-        if messages:
-            task = asyncio.create_task(self._send_batch_messages(semaphore, messages))
-            tasks.append(task)
+        keyed = self.settings.sqs_queue_shards > 1 or is_fifo_queue(self.settings.sqs_queue_url)
+        for row, offset in zip(rows, offsets[1:]):
+            if row is None:
+                continue
 
-        await asyncio.gather(*tasks)
+            debt_id = row.rsplit(FIELDS_SEPARATOR, 1)[-1] if keyed else None
+            if self.settings.sqs_message_binary_encoding_enabled:
+                row = self._encode_row(row, offset)
+                if row is None:
+                    continue
 
-    def _is_message_buffer_full(self, messages: list):
-        return len(messages) >= self.settings.max_sqs_send_message_batch_size
+            batch = batcher.add(row, offset, debt_id)
+            if batch:
+                await self._enqueue_batch(batches, batch)
 
-    async def _send_batch_messages(self, semaphore: asyncio.Semaphore, messages: list):
-        async with semaphore:
+    def _validate_block(self, lines: list[bytes], offsets: list[int]) -> list[str | None]:
+        texts = self._decode_block(lines, offsets)
+        if not self.settings.csv_validation_enabled:
+            return [text if text is None else text.strip() for text in texts]
+
+        if self.validator is None:
+            self.validator = RowValidator(texts[0] or "")
+        if self.block_validator is None:
+            self.block_validator = BlockValidator(self.validator)
+
+        mask, rows = self.block_validator.validate([text or "" for text in texts])
+        for index in np.flatnonzero(~mask).tolist():
+            if texts[index] is not None:
+                rows[index] = self._validate_row(texts[index], offsets[index])
+        return rows
+
+    def _decode_block(self, lines: list[bytes], offsets: list[int]) -> list[str | None]:
+        """
+        A line that is not UTF-8 (e.g. exported in Latin-1) is rejected on its own,
+        instead of failing the import, and is given as None.
+        """
+        texts = []
+        for line, offset in zip(lines, offsets):
             try:
-                self.sqs_client.send_message_batch(messages.copy())
-                METRICS.get("csv_processor_messages_sent").inc(len(messages))
-            except Exception as e:
-                self.logger.error(f"Error sending messages: {e}")
-                METRICS.get("csv_processor_messages_failed").inc(len(messages))
+                texts.append(line.decode())
+            except UnicodeDecodeError as e:
+                self._reject_row(line.decode(errors="replace").strip(), offset, f"Invalid UTF-8: {e}")
+                texts.append(None)
+        return texts
+
+    def _validate_row(self, line: str, offset: int) -> str | None:
+        try:
+            return self.validator.validate(line)
+        except InvalidRowException as e:
+            self._reject_row(line.strip(), offset, str(e))
+            return None
+
+    def _drop_duplicates(self, rows: list[str | None], offsets: list[int]):
+        """
+        The debtId is the last column of the rows sent.
+        """
+        indexes = [index for index, row in enumerate(rows) if row is not None]
+        debt_ids = [rows[index].rsplit(FIELDS_SEPARATOR, 1)[-1] for index in indexes]
+        duplicates = self.duplicate_filter.add_block(debt_ids)
+
+        for position in np.flatnonzero(duplicates).tolist():
+            index = indexes[position]
+            self._drop_duplicate(rows[index], offsets[index], debt_ids[position])
+            rows[index] = None
+
+    def _drop_unchanged(self, rows: list[str | None]):
+        indexes = [index for index, row in enumerate(rows) if row is not None]
+        unchanged = self.delta_filter.unchanged_block([rows[index] for index in indexes])
+
+        unchanged_positions = np.flatnonzero(unchanged).tolist()
+        for position in unchanged_positions:
+            rows[indexes[position]] = None
+
+        if unchanged_positions:
+            self.rows_unchanged += len(unchanged_positions)
+            METRICS.get("csv_processor_rows_unchanged").inc(len(unchanged_positions))
+            if self.job:
+                self.job.record_unchanged(len(unchanged_positions))
+
+    async def _drop_billed(self, rows: list[str | None]):
+        """
+        When Redis can't be reached the rows are sent anyway: the billing-worker
+        still skips the debts already billed.
+        """
+        indexes = [index for index, row in enumerate(rows) if row is not None]
+        debt_ids = [rows[index].rsplit(FIELDS_SEPARATOR, 1)[-1] for index in indexes]
+        try:
+            billed = await self.billed_filter.billed_block(debt_ids)
+        except Exception as e:
+            METRICS.get("csv_processor_billed_lookup_failures").inc()
+            self.logger.warning(f"Error looking up the billed debts: {e}", extra={"rows": len(debt_ids)})
+            return
+
+        billed_positions = np.flatnonzero(billed).tolist()
+        for position in billed_positions:
+            rows[indexes[position]] = None
+
+        if billed_positions:
+            self.rows_already_billed += len(billed_positions)
+            METRICS.get("csv_processor_rows_already_billed").inc(len(billed_positions))
+            if self.job:
+                self.job.record_already_billed(len(billed_positions))
+
+    def _encode_row(self, row: str, offset: int) -> str | None:
+        """
+        Only a row that was not validated can fail to be encoded.
+        """
+        try:
+            return encode_row(row)
+        except ValueError as e:
+            self._reject_row(row, offset, f"Row can't be encoded: {e}")
+            return None
+
+    def _drop_duplicate(self, row: str, offset: int, debt_id: str):
+        self.rows_duplicated += 1
+        METRICS.get("csv_processor_rows_duplicated").inc()
+        if self.error_report:
+            self.error_report.add(offset, f"Duplicate debtId: {debt_id}", row)
+        if self.job:
+            self.job.record_duplicated()
+
+    def _reject_row(self, row: str, offset: int, reason: str):
+        self.rows_rejected += 1
+        METRICS.get("csv_processor_rows_rejected").inc()
+        if self.error_report:
+            self.error_report.add(offset, reason, row)
+        if self.job:
+            self.job.record_rejected()
+
+    async def _enqueue_batch(self, batches: asyncio.Queue, batch: MessageBatch):
+        if self.checkpoint:
+            self.checkpoint.track(batch)
+        if self.job:
+            self.job.record_read(batch.rows, batch.end_offset)
+        await batches.put(batch)
+        METRICS.get("csv_processor_queue_depth").inc()
+
+    async def _sender_worker(self, batches: asyncio.Queue):
+        METRICS.get("csv_processor_sender_workers").inc()
+        try:
+            while True:
+                batch = await batches.get()
+                if batch is BATCHES_END:
+                    break
+
+                METRICS.get("csv_processor_queue_depth").dec()
+                async with self.send_scheduler.slot(self):
+                    METRICS.get("csv_processor_busy_sender_workers").inc()
+                    try:
+                        await self._send_batch(batch)
+                    finally:
+                        METRICS.get("csv_processor_busy_sender_workers").dec()
+        finally:
+            METRICS.get("csv_processor_sender_workers").dec()
+
+    async def _store_chunk(self, batch: MessageBatch):
+        try:
+            await asyncio.to_thread(get_blob_store().put, batch.chunk_key, batch.chunk)
+        except Exception:
+            METRICS.get("csv_processor_chunk_store_failures").inc()
+            raise
+
+        METRICS.get("csv_processor_chunks_stored").inc()
+        batch.chunk = None
+
+    def _line_reader(self) -> LineReader:
+        file = self.file_content
+        if hasattr(file, "__aiter__"):
+            return LineReader(file)
+        if isinstance(file, bytes):
+            file = BytesIO(file)
+
+        offset = self.checkpoint.offset if self.checkpoint else file.tell()
+        chunks = read_file_chunks(file, self.settings.csv_read_chunk_size)
+        return LineReader(chunks, offset=offset)
+
+    async def _send_batch(self, batch: MessageBatch):
+        """
+        The chunk of a claim-check batch is saved before its message is sent, so
+        the message never refers to a missing chunk.
+        """
+        messages = batch.messages
+        options = {"message_attributes": batch.message_attributes} if batch.message_attributes else {}
+        if batch.shard is not None:
+            options["queue_url"] = shard_queue_url(self.sqs_client.queue_url, batch.shard)
+        if batch.deduplication_ids:
+            options["deduplication_ids"] = batch.deduplication_ids
+        try:
+            if batch.chunk is not None:
+                await self._store_chunk(batch)
+            failed_indexes = await self.sqs_client.send_message_batch_async(messages, **options)
+        except Exception as e:
+            self.logger.error(f"Error sending messages: {e}")
+            failed_indexes = range(len(messages))
+
+        failed_rows = sum(batch.message_rows[index] for index in failed_indexes)
+        self.messages_sent += len(messages) - len(failed_indexes)
+        self.messages_failed += len(failed_indexes)
+        self.rows_sent += batch.rows - failed_rows
+        self.rows_failed += failed_rows
+
+        METRICS.get("csv_processor_messages_sent").inc(len(messages) - len(failed_indexes))
+        METRICS.get("csv_processor_rows_sent").inc(batch.rows - failed_rows)
+        if failed_indexes:
+            METRICS.get("csv_processor_messages_failed").inc(len(failed_indexes))
+            METRICS.get("csv_processor_rows_failed").inc(failed_rows)
+        if batch.shard is not None:
+            self._record_shard_sent(batch.shard, len(messages) - len(failed_indexes), batch.rows - failed_rows)
+
+        if self.checkpoint:
+            self.checkpoint.acknowledge(batch)
+        if self.job:
+            self.job.record_sent(batch.rows - failed_rows, failed_rows)
+
+    def _record_shard_sent(self, shard: int, messages: int, rows: int):
+        self.shard_messages_sent[shard] = self.shard_messages_sent.get(shard, 0) + messages
+        self.shard_rows_sent[shard] = self.shard_rows_sent.get(shard, 0) + rows
+        METRICS.get("csv_processor_shard_messages_sent", {"shard": str(shard)}).inc(messages)
+        METRICS.get("csv_processor_shard_rows_sent", {"shard": str(shard)}).inc(rows)
@@ -0,0 +1,44 @@
+import numpy as np
+from src.fingerprints.fingerprint_store import FINGERPRINT_DTYPE, FingerprintStore, fingerprint, write_fingerprint_store
+from src.processor.row_validator import FIELDS_SEPARATOR
+
+
+class DeltaFilter:
+    """
+    Tells apart the rows that changed since the previous import of the same source.
+    Each row is keyed by the fingerprint of its debtId and compared by the fingerprint
+    of the whole row, so a row is unchanged when the previous store has its debtId
+    with the same fingerprint.
+
+    The fingerprints of every row checked are kept, unchanged or not, to be saved
+    as the store of the next import.
+    """
+
+    def __init__(self, previous: FingerprintStore | None = None):
+        self.previous = previous
+        self.keys = []
+        self.fingerprints = []
+
+    def unchanged_block(self, rows: list[str]) -> np.ndarray:
+        """
+        Returns the mask of the rows unchanged since the previous import.
+        """
+        keys = fingerprint([row.rsplit(FIELDS_SEPARATOR, 1)[-1] for row in rows])
+        fingerprints = fingerprint(rows)
+        self.keys.append(keys)
+        self.fingerprints.append(fingerprints)
+
+        if self.previous is None:
+            return np.zeros(len(rows), dtype=bool)
+        return self.previous.unchanged_block(keys, fingerprints)
+
+    def save(self, path: str):
+        write_fingerprint_store(
+            path,
+            np.concatenate(self.keys) if self.keys else np.zeros(0, FINGERPRINT_DTYPE),
+            np.concatenate(self.fingerprints) if self.fingerprints else np.zeros(0, FINGERPRINT_DTYPE)
+        )
+
+    def close(self):
+        if self.previous:
+            self.previous.close()
@@ -0,0 +1,105 @@
+import math
+import numpy as np
+from src.config.settings import Settings
+
+
+"""
+Smaller than the rows of the sample files, so the number of rows of a file is
+overestimated and the false positive rate stays below the configured one
+"""
+ESTIMATED_ROW_SIZE = 64
+
+
+class ExactDuplicateFilter:
+    """
+    Remembers every key, for the files small enough to keep them all in memory.
+    """
+
+    def __init__(self):
+        self.keys = set()
+
+    def add_block(self, keys: list[str]) -> np.ndarray:
+        """
+        Adds the keys and returns the mask of the ones seen before, in this block
+        or in the previous ones.
+        """
+        duplicates = np.zeros(len(keys), dtype=bool)
+        for index, key in enumerate(keys):
+            if key in self.keys:
+                duplicates[index] = True
+            else:
+                self.keys.add(key)
+        return duplicates
+
+
+class BloomDuplicateFilter:
+    """
+    Bloom filter with `bits_count` bits and `hashes_count` hashes, sized for
+    `capacity` keys with the given false positive rate. Memory doesn't grow with
+    the keys added, but a key never seen may be taken as a duplicate.
+
+    The positions of a key come from its `hash()` and a mix of it (double hashing),
+    and each block of keys is checked and added with NumPy. The hash of a string
+    changes between processes, so the filter is never shared by them.
+    """
+
+    def __init__(self, capacity: int, false_positive_rate: float):
+        capacity = max(capacity, 1)
+        self.bits_count = max(math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2), 8)
+        self.hashes_count = max(round(self.bits_count / capacity * math.log(2)), 1)
+        self.bits = np.zeros(math.ceil(self.bits_count / 8), dtype=np.uint8)
+
+    def add_block(self, keys: list[str]) -> np.ndarray:
+        """
+        Adds the keys and returns the mask of the ones probably seen before, in
+        this block or in the previous ones.
+        """
+        if not keys:
+            return np.zeros(0, dtype=bool)
+
+        hashes = np.fromiter(map(hash, keys), dtype=np.int64, count=len(keys)).view(np.uint64)
+        steps = mix(hashes) | np.uint64(1)
+
+        positions = (hashes[:, None] + np.arange(self.hashes_count, dtype=np.uint64) * steps[:, None])
+        positions %= np.uint64(self.bits_count)
+        indexes = (positions >> np.uint64(3)).astype(np.intp)
+        masks = np.left_shift(np.uint8(1), (positions & np.uint64(7)).astype(np.uint8))
+
+        """
+        The keys repeated inside the block are not in the bits yet, so they are
+        found by their hashes
+        """
+        _, first_indexes = np.unique(hashes, return_index=True)
+        repeated = np.ones(len(keys), dtype=bool)
+        repeated[first_indexes] = False
+
+        seen = ((self.bits[indexes] & masks) != 0).all(axis=1)
+        np.bitwise_or.at(self.bits, indexes.ravel(), masks.ravel())
+        return seen | repeated
+
+
+def mix(values: np.ndarray) -> np.ndarray:
+    """
+    splitmix64 finalizer: spreads the bits of the hashes into a second hash.
+    """
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def create_duplicate_filter(settings: Settings, size: int | None) -> ExactDuplicateFilter | BloomDuplicateFilter:
+    """
+    The filter is sized from the number of rows estimated from the size of the file,
+    or of the part of it read by the processor. When the size is unknown (`None`,
+    e.g. a chunked upload), the file may be of any size, so it gets a Bloom filter
+    sized for `csv_dedup_stream_max_rows` rows.
+    """
+    if size is None:
+        return BloomDuplicateFilter(settings.csv_dedup_stream_max_rows, settings.csv_dedup_false_positive_rate)
+
+    estimated_rows = size // ESTIMATED_ROW_SIZE + 1
+    if estimated_rows <= settings.csv_dedup_exact_max_rows:
+        return ExactDuplicateFilter()
+    return BloomDuplicateFilter(estimated_rows, settings.csv_dedup_false_positive_rate)
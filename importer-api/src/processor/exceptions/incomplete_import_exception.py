@@ -0,0 +1,2 @@
+class IncompleteImportException(Exception):
+    pass
@@ -0,0 +1,2 @@
+class InvalidRowException(Exception):
+    pass
@@ -0,0 +1,57 @@
+import asyncio
+from typing import AsyncIterable, AsyncIterator, BinaryIO
+
+
+LINE_SEPARATOR = b"\n"
+
+
+async def read_file_chunks(file: BinaryIO, chunk_size: int) -> AsyncIterator[bytes]:
+    """
+    Read a binary file in fixed-size chunks without blocking the event loop.
+    """
+    while True:
+        chunk = await asyncio.to_thread(file.read, chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+class LineReader:
+    """
+    Split a stream of byte chunks into decoded lines as the chunks arrive.
+
+    Lines are split on the raw bytes, so a multi-byte character is never cut in
+    half, and only the incomplete tail of the last chunk is kept in memory.
+    `offset` is the number of bytes consumed up to the end of the last line read,
+    starting from the offset the chunks are read from.
+    """
+
+    def __init__(self, chunks: AsyncIterable[bytes], encoding: str = "utf-8", offset: int = 0):
+        self.chunks = chunks
+        self.encoding = encoding
+        self.offset = offset
+
+    async def lines(self) -> AsyncIterator[str]:
+        """
+        Raises UnicodeDecodeError on a line that is not in `encoding`.
+        """
+        async for line in self.raw_lines():
+            yield line.decode(self.encoding)
+
+    async def raw_lines(self) -> AsyncIterator[bytes]:
+        """
+        The lines as read, for the caller to decode, and reject, each one.
+        """
+        pending = b""
+
+        async for chunk in self.chunks:
+            pending += chunk
+            *complete_lines, pending = pending.split(LINE_SEPARATOR)
+
+            for line in complete_lines:
+                self.offset += len(line) + len(LINE_SEPARATOR)
+                yield line
+
+        if pending:
+            self.offset += len(pending)
+            yield pending
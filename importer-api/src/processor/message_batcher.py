@@ -0,0 +1,243 @@
+import json
+from uuid import uuid4
+from src.aws.sqs.fifo_queue import deduplication_id
+from src.aws.sqs.queue_shards import shard_of
+from src.config.settings import Settings
+from src.encoding.row_codec import FORMAT_VERSION_ATTRIBUTE, ROW_FORMAT_VERSION
+from src.models.message_batch import MessageBatch
+from src.processor.row_validator import FIELDS_SEPARATOR
+
+
+ROWS_SEPARATOR = "\n"
+
+"""
+The `MessageType` attribute of the messages that refer to a chunk of rows in the
+blob store, instead of carrying the rows
+"""
+MESSAGE_TYPE_ATTRIBUTE = "MessageType"
+CLAIM_CHECK_MESSAGE_TYPE = "claim-check"
+CLAIM_CHECK_KEY_PREFIX = "chunks"
+
+
+class MessageBatcher:
+    """
+    One SQS message per CSV row, `max_sqs_send_message_batch_size` messages per batch.
+    When the debtIds of the rows are given, they identify the messages sent to a
+    FIFO queue.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.message_attributes = format_attributes(settings)
+        self._batch = MessageBatch(message_attributes=self.message_attributes)
+
+    @property
+    def empty(self) -> bool:
+        return not self._batch.messages
+
+    def add(self, row: str, offset: int = 0, debt_id: str | None = None) -> MessageBatch | None:
+        self._batch.add(row, deduplication_id=None if debt_id is None else deduplication_id([debt_id]))
+        self._batch.end_offset = offset
+
+        if len(self._batch.messages) >= self.settings.max_sqs_send_message_batch_size:
+            return self.flush()
+        return None
+
+    def flush(self) -> MessageBatch | None:
+        batch = self._batch
+        self._batch = MessageBatch(message_attributes=self.message_attributes)
+        return batch if batch.rows else None
+
+
+class PackedMessageBatcher(MessageBatcher):
+    """
+    Packs as many CSV rows as fit in `sqs_max_message_size` bytes in a single SQS
+    message, one row per line. SQS applies the same size limit to the whole
+    SendMessageBatch payload, so every batch carries one packed message. The limit
+    counts the message attributes too, so the rows get what the attributes leave.
+    """
+
+    def __init__(self, settings: Settings):
+        super().__init__(settings)
+        self._rows = []
+        self._debt_ids = []
+        self._size = 0
+        self._end_offset = 0
+        self.max_size = settings.sqs_max_message_size - attributes_size(self.message_attributes)
+
+    @property
+    def empty(self) -> bool:
+        return not self._rows
+
+    def add(self, row: str, offset: int = 0, debt_id: str | None = None) -> MessageBatch | None:
+        if not row:
+            return None
+
+        row_size = len(row.encode()) + len(ROWS_SEPARATOR)
+        batch = None
+
+        if self._rows and self._size + row_size > self.max_size:
+            batch = self.flush()
+
+        self._rows.append(row)
+        if debt_id is not None:
+            self._debt_ids.append(debt_id)
+        self._size += row_size
+        self._end_offset = offset
+        return batch
+
+    def flush(self) -> MessageBatch | None:
+        if not self._rows:
+            return None
+
+        batch = MessageBatch(
+            [ROWS_SEPARATOR.join(self._rows)],
+            [len(self._rows)],
+            self._end_offset,
+            message_attributes=self.message_attributes,
+            deduplication_ids=self._deduplication_ids()
+        )
+        self._rows = []
+        self._debt_ids = []
+        self._size = 0
+        return batch
+
+    def _deduplication_ids(self) -> list[str]:
+        return [deduplication_id(self._debt_ids)] if self._debt_ids else []
+
+
+class ClaimCheckBatcher(PackedMessageBatcher):
+    """
+    Packs the CSV rows, one per line, in chunks of up to `claim_check_chunk_size`
+    bytes. Each chunk is saved to the blob store, and a single message with the key
+    of the chunk and its byte range is sent in its place (claim check), so the
+    messages sent grow with the chunks instead of the rows.
+    """
+
+    def __init__(self, settings: Settings):
+        super().__init__(settings)
+        self.max_size = settings.claim_check_chunk_size
+
+    def flush(self) -> MessageBatch | None:
+        if not self._rows:
+            return None
+
+        chunk = ROWS_SEPARATOR.join(self._rows).encode()
+        key = f"{CLAIM_CHECK_KEY_PREFIX}/{uuid4()}.csv"
+        batch = MessageBatch(
+            [json.dumps({"key": key, "start": 0, "end": len(chunk)})],
+            [len(self._rows)],
+            self._end_offset,
+            message_attributes={
+                **(self.message_attributes or {}),
+                MESSAGE_TYPE_ATTRIBUTE: {"DataType": "String", "StringValue": CLAIM_CHECK_MESSAGE_TYPE}
+            },
+            chunk=chunk,
+            chunk_key=key,
+            deduplication_ids=self._deduplication_ids()
+        )
+        self._rows = []
+        self._debt_ids = []
+        self._size = 0
+        return batch
+
+
+def format_attributes(settings: Settings) -> dict | None:
+    """
+    The binary encoded rows are told apart from the CSV rows by the `FormatVersion`
+    attribute of their messages.
+    """
+    if not settings.sqs_message_binary_encoding_enabled:
+        return None
+    return {FORMAT_VERSION_ATTRIBUTE: {"DataType": "Number", "StringValue": str(ROW_FORMAT_VERSION)}}
+
+
+def attributes_size(message_attributes: dict | None) -> int:
+    """
+    SQS counts the name, data type and value of each attribute in the size of
+    the message.
+    """
+    size = 0
+    for name, attribute in (message_attributes or {}).items():
+        value = attribute.get("StringValue") or attribute.get("BinaryValue") or b""
+        size += len(name.encode()) + len(attribute["DataType"].encode())
+        size += len(value.encode() if isinstance(value, str) else value)
+    return size
+
+
+class ShardedMessageBatcher:
+    """
+    Spreads the rows between `sqs_queue_shards` shard queues by their debtId, so
+    the rows of a debt always go to the same shard. Each shard has its own batcher,
+    and every batch is sent to the queue of its shard.
+
+    The shards fill up at different paces, so a batch is given as end offset the
+    offset where the oldest row still held by the shards starts, or the end of the
+    rows read when no shard holds any. The end offsets never go back, so the last
+    batch flushed ends at the last row read. Resuming from the checkpoint sends
+    again the rows of the other shards read after it, which the billing-worker
+    skips as already billed. `offset` is where the rows read start.
+    """
+
+    def __init__(self, settings: Settings, offset: int = 0):
+        self.shards = settings.sqs_queue_shards
+        self._batchers = [create_queue_batcher(settings) for _ in range(self.shards)]
+        self._offset = offset
+        self._end_offset = offset
+        self._starts = {}
+
+    def add(self, row: str, offset: int = 0, debt_id: str | None = None) -> MessageBatch | None:
+        """
+        `debt_id` is needed when the row is binary encoded. Otherwise, it is read
+        from the last column of the row.
+        """
+        if debt_id is None:
+            debt_id = row.rsplit(FIELDS_SEPARATOR, 1)[-1]
+        shard = shard_of(debt_id, self.shards)
+        batcher = self._batchers[shard]
+        row_start = self._offset
+        self._offset = offset
+
+        if batcher.empty:
+            self._starts[shard] = row_start
+        batch = batcher.add(row, offset, debt_id)
+        if batcher.empty:
+            self._starts.pop(shard, None)
+        elif batch:
+            self._starts[shard] = row_start
+
+        return self._route(batch, shard) if batch else None
+
+    def flush(self) -> MessageBatch | None:
+        """
+        Gives the batch of one shard at a time, until every shard was flushed.
+        """
+        for shard, batcher in enumerate(self._batchers):
+            batch = batcher.flush()
+            if batch:
+                self._starts.pop(shard, None)
+                return self._route(batch, shard)
+        return None
+
+    def _route(self, batch: MessageBatch, shard: int) -> MessageBatch:
+        batch.shard = shard
+        self._end_offset = max(self._end_offset, min(self._starts.values(), default=self._offset))
+        batch.end_offset = self._end_offset
+        return batch
+
+
+def create_queue_batcher(settings: Settings) -> MessageBatcher:
+    """
+    The batcher of the rows sent to a single queue.
+    """
+    if settings.claim_check_enabled:
+        return ClaimCheckBatcher(settings)
+    if settings.sqs_message_packing_enabled:
+        return PackedMessageBatcher(settings)
+    return MessageBatcher(settings)
+
+
+def create_message_batcher(settings: Settings, offset: int = 0) -> MessageBatcher | ShardedMessageBatcher:
+    if settings.sqs_queue_shards > 1:
+        return ShardedMessageBatcher(settings, offset)
+    return create_queue_batcher(settings)
@@ -0,0 +1,104 @@
+import math
+from uuid import UUID
+from datetime import date
+from src.encoding.row_codec import FIELDS_SEPARATOR, QUOTE, join_row, split_row
+from src.processor.exceptions.invalid_row_exception import InvalidRowException
+
+
+CSV_COLUMNS = ("name", "governmentId", "email", "debtAmount", "debtDueDate", "debtId")
+
+
+class RowValidator:
+    """
+    Validate the CSV rows and re-emit them with the columns in the order the
+    billing-worker reads them (`CSV_COLUMNS`). The debtId is lowercased, so the
+    key of a debt is the same in every filter, queue and message encoding. A
+    quoted field may have commas (e.g. "Doe, John"), and is quoted again in the
+    row sent when it has them.
+
+    The first line of the file tells whether the file has a header. With a header,
+    the columns are mapped by name, so they can be in any order and extra columns
+    are dropped; without one, the rows must have the columns of `CSV_COLUMNS`.
+    """
+
+    def __init__(self, first_line: str):
+        try:
+            names = [name.strip().lower() for name in split_row(first_line)]
+        except ValueError:
+            names = []
+
+        if all(column.lower() in names for column in CSV_COLUMNS):
+            self.header = first_line.strip()
+            self.fields_count = len(names)
+            self.indexes = [names.index(column.lower()) for column in CSV_COLUMNS]
+        else:
+            self.header = None
+            self.fields_count = len(CSV_COLUMNS)
+            self.indexes = list(range(len(CSV_COLUMNS)))
+
+    def validate(self, line: str) -> str | None:
+        """
+        Returns the row to send, or None for the header and blank lines.
+        Raises InvalidRowException with the reason when the row is invalid.
+        """
+        line = line.strip()
+        if not line or line == self.header:
+            return None
+
+        quoted = QUOTE in line
+        try:
+            fields = split_row(line) if quoted else line.split(FIELDS_SEPARATOR)
+        except ValueError as e:
+            raise InvalidRowException(f"Invalid quoting: {e}")
+        if len(fields) != self.fields_count:
+            raise InvalidRowException(f"Expected {self.fields_count} fields, got {len(fields)}")
+
+        name, government_id, email, debt_amount, debt_due_date, debt_id = (
+            fields[index].strip() for index in self.indexes
+        )
+
+        if not name:
+            raise InvalidRowException("Empty name")
+        if not (government_id.isascii() and government_id.isdigit()):
+            raise InvalidRowException(f"Invalid governmentId: {government_id}")
+        if "@" not in email:
+            raise InvalidRowException(f"Invalid email: {email}")
+        validate_amount(debt_amount)
+        validate_date(debt_due_date)
+        validate_uuid(debt_id)
+
+        row = [name, government_id, email, debt_amount, debt_due_date, debt_id.lower()]
+        return join_row(row) if quoted else FIELDS_SEPARATOR.join(row)
+
+
+def validate_amount(value: str):
+    try:
+        amount = float(value)
+    except ValueError:
+        raise InvalidRowException(f"Invalid debtAmount: {value}")
+
+    if not value.isascii() or not math.isfinite(amount):
+        raise InvalidRowException(f"Invalid debtAmount: {value}")
+
+
+def validate_date(value: str):
+    """
+    Only the YYYY-MM-DD format is accepted.
+    """
+    try:
+        if len(value) != 10:
+            raise ValueError
+        date.fromisoformat(value)
+    except ValueError:
+        raise InvalidRowException(f"Invalid debtDueDate: {value}")
+
+
+def validate_uuid(value: str):
+    """
+    Only the hyphenated form (8-4-4-4-12) is accepted.
+    """
+    try:
+        if str(UUID(value)) != value.lower():
+            raise ValueError
+    except ValueError:
+        raise InvalidRowException(f"Invalid debtId: {value}")
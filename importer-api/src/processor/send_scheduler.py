@@ -0,0 +1,132 @@
+import asyncio
+from time import monotonic
+from collections import OrderedDict, deque
+from functools import lru_cache
+from contextlib import asynccontextmanager
+from typing import Hashable
+from src.config.settings import get_settings
+from src.metrics.metrics_registry_manager import get_metrics_registry
+
+
+METRICS = get_metrics_registry()
+METRICS.register_gauge("send_scheduler_in_flight_sends", "Number of SQS sends in flight across all the imports")
+METRICS.register_gauge("send_scheduler_waiting_sends", "Number of SQS sends waiting for a free slot")
+METRICS.register_summary("send_scheduler_wait_seconds", "Time a SQS send waited for a free slot")
+
+
+class SendScheduler:
+    """
+    Process-wide limit of in-flight SQS sends, shared by every import.
+
+    Each import sends through its own lane. When the limit is reached, the waiting
+    sends are queued per lane and every freed slot goes to the next lane in
+    round-robin order, so a small import gets its share of the slots instead of
+    waiting behind every batch of a large one.
+
+    The process may be limited to a share of the slots, while other processes
+    send at once.
+    """
+
+    def __init__(self, max_in_flight: int):
+        self.limit = max_in_flight
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self._lanes = OrderedDict()
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(waiters) for waiters in self._lanes.values())
+
+    @asynccontextmanager
+    async def slot(self, lane: Hashable):
+        await self.acquire(lane)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, lane: Hashable):
+        if self.in_flight < self.max_in_flight and not self._lanes:
+            self._take_slot()
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._lanes.setdefault(lane, deque()).append(waiter)
+        METRICS.get("send_scheduler_waiting_sends").inc()
+        waiting_since = monotonic()
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                """
+                The slot was handed over right before the cancellation, pass it on
+                """
+                self.release()
+            else:
+                self._remove_waiter(lane, waiter)
+            raise
+        finally:
+            METRICS.get("send_scheduler_waiting_sends").dec()
+
+        METRICS.get("send_scheduler_wait_seconds").observe(monotonic() - waiting_since)
+
+    def release(self):
+        """
+        The slot is handed over to the first waiter of the next lane, without
+        going through `in_flight`, so no new send can take it in between. Over a
+        limit lowered by `set_share`, the slot is freed instead.
+        """
+        if self.in_flight > self.max_in_flight or not self._hand_over():
+            self._free_slot()
+
+    def set_share(self, share: float):
+        """
+        Limit the process to `share` of the slots it was created with. The sends
+        in flight over a lower limit finish, and the waiting sends get the slots
+        of a higher one at once.
+        """
+        self.max_in_flight = max(1, int(self.limit * share))
+        while self._lanes and self.in_flight < self.max_in_flight:
+            self._take_slot()
+            if not self._hand_over():
+                self._free_slot()
+
+    def _hand_over(self) -> bool:
+        while self._lanes:
+            lane, waiters = next(iter(self._lanes.items()))
+            waiter = waiters.popleft()
+            if waiters:
+                self._lanes.move_to_end(lane)
+            else:
+                del self._lanes[lane]
+
+            if not waiter.done():
+                waiter.set_result(None)
+                return True
+
+        return False
+
+    def _take_slot(self):
+        self.in_flight += 1
+        METRICS.get("send_scheduler_in_flight_sends").inc()
+
+    def _free_slot(self):
+        self.in_flight -= 1
+        METRICS.get("send_scheduler_in_flight_sends").dec()
+
+    def _remove_waiter(self, lane: Hashable, waiter: asyncio.Future):
+        waiters = self._lanes.get(lane)
+        if waiters and waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                del self._lanes[lane]
+
+
+@lru_cache()
+def get_send_scheduler() -> SendScheduler:
+    """
+    The limit configured is the one of the service. The processes of the pool,
+    and the API process while they run, get a share of it (`set_share`).
+    """
+    return SendScheduler(get_settings().max_sqs_in_flight_sends)
@@ -0,0 +1,395 @@
+import asyncio
+import multiprocessing
+import os
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
+from typing import BinaryIO
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from src.aws.rate_limiter import get_sqs_rate_limiter
+from src.aws.sqs.sqs_client import get_sqs_client
+from src.cache.billed_debts_filter import create_billed_debts_filter
+from src.config.settings import Settings, get_settings
+from src.fingerprints.fingerprint_store import (
+    fingerprint_part_path,
+    fingerprint_store_path,
+    merge_fingerprint_stores,
+    open_fingerprint_store
+)
+from src.logger.logger import get_logger
+from src.metrics.metrics_registry_manager import get_metrics_registry
+from src.models.import_job import ImportJob
+from src.processor.csv_processor import CSVProcessor
+from src.processor.delta_filter import DeltaFilter
+from src.processor.duplicate_filter import create_duplicate_filter
+from src.processor.exceptions.incomplete_import_exception import IncompleteImportException
+from src.processor.row_validator import RowValidator
+from src.processor.send_scheduler import get_send_scheduler
+from src.reports.import_error_report import ImportErrorReport
+from src.spool.import_checkpoint import ImportCheckpoint
+from src.spool.upload_spool import map_file
+
+
+METRICS = get_metrics_registry()
+METRICS.register_counter("csv_sharded_processor_ranges_processed", "Number of file ranges processed by the workers")
+METRICS.register_counter("csv_sharded_processor_ranges_failed", "Number of file ranges not processed because the worker failed")
+METRICS.register_summary("csv_sharded_processor_duration_seconds", "Time spent processing a CSV file split in ranges")
+
+"""
+Number of sharded imports of the API process with ranges running on the pool
+"""
+running_sharded_imports = 0
+
+class FileRange:
+    """
+    Read-only view of the bytes between `start` and `end` of a file.
+    """
+
+    def __init__(self, file: BinaryIO, start: int, end: int):
+        self.file = file
+        self.end = end
+        self.file.seek(start)
+
+    def read(self, size: int = -1) -> bytes:
+        remaining = self.end - self.file.tell()
+        if remaining <= 0:
+            return b""
+        if size < 0 or size > remaining:
+            size = remaining
+        return self.file.read(size)
+
+    def tell(self) -> int:
+        return self.file.tell()
+
+
+def find_line_ranges(file: BinaryIO, file_size: int, range_size: int) -> list[tuple[int, int]]:
+    """
+    Split the file in ranges of about `range_size` bytes. Each range is extended
+    to the end of the line it stops in, so no line is shared by two ranges.
+    """
+    ranges = []
+    start = 0
+
+    while start < file_size:
+        end = start + range_size
+        if end >= file_size:
+            end = file_size
+        else:
+            file.seek(end - 1)
+            file.readline()
+            end = file.tell()
+
+        ranges.append((start, end))
+        start = end
+
+    return ranges
+
+
+def process_share(workers: int) -> float:
+    """
+    While ranges run on a pool of `workers` processes, the API process and each
+    worker send to SQS at once, so the send limits of the service are split
+    evenly between them.
+    """
+    if workers <= 1:
+        return 1.0
+    return 1 / (workers + 1)
+
+
+def share_send_limits(share: float):
+    get_sqs_rate_limiter().set_share(share)
+    get_send_scheduler().set_share(share)
+
+
+@contextmanager
+def sharing_send_limits(workers: int):
+    """
+    The API process sends with its share of the limits while any sharded import
+    runs ranges on the pool, and gets them whole back when none does, so the
+    imports that are not sharded are not slowed down for nothing.
+    """
+    global running_sharded_imports
+    running_sharded_imports += 1
+    if running_sharded_imports == 1:
+        share_send_limits(process_share(workers))
+    try:
+        yield
+    finally:
+        running_sharded_imports -= 1
+        if not running_sharded_imports:
+            share_send_limits(1.0)
+
+
+def init_range_worker(share: float = 1.0):
+    """
+    The SQS client of the worker process is created once, when the process
+    starts, and reused by every range the process handles. The send limits of
+    the worker are its `share` of the ones of the service.
+    """
+    share_send_limits(share)
+    get_sqs_client()
+
+
+def process_file_range(
+    path: str,
+    start: int,
+    end: int,
+    first_line: str,
+    import_id: str,
+    source: str | None = None
+) -> dict[str, int | dict[int, int]]:
+    """
+    Run in the worker process. The metrics of the worker are not exposed, so the
+    counters, including the requests throttled by SQS, are returned to be added
+    up by the API process.
+
+    The ranges don't start at the header, so the validator is built from the first
+    line of the file, read by the API process. Each range has its own duplicate
+    filter, so only the debtIds repeated inside the range are dropped.
+
+    In a delta import, every worker maps the same store of the previous import of
+    the source, and the fingerprints of the range are saved to a part of the new
+    store, merged by the API process.
+    """
+    settings = get_settings()
+    error_report = ImportErrorReport(settings, import_id)
+    duplicate_filter = None
+    if settings.csv_dedup_enabled:
+        duplicate_filter = create_duplicate_filter(settings, end - start)
+    billed_filter = None
+    if settings.billed_debts_filter_enabled:
+        billed_filter = create_billed_debts_filter(settings)
+    delta_filter = None
+    if source:
+        delta_filter = DeltaFilter(open_fingerprint_store(fingerprint_store_path(settings, source)))
+
+    throttle_events = get_sqs_rate_limiter().throttle_events
+
+    try:
+        with map_file(path) as file:
+            processor = CSVProcessor(
+                settings,
+                FileRange(file, start, end),
+                get_sqs_client(),
+                validator=RowValidator(first_line),
+                error_report=error_report,
+                duplicate_filter=duplicate_filter,
+                delta_filter=delta_filter,
+                billed_filter=billed_filter
+            )
+            asyncio.run(process_range(processor))
+
+        if delta_filter:
+            delta_filter.save(fingerprint_part_path(settings, source, import_id, start))
+    finally:
+        error_report.close()
+        if delta_filter:
+            delta_filter.close()
+
+    return {
+        "messages_sent": processor.messages_sent,
+        "messages_failed": processor.messages_failed,
+        "rows_sent": processor.rows_sent,
+        "rows_failed": processor.rows_failed,
+        "rows_rejected": processor.rows_rejected,
+        "rows_duplicated": processor.rows_duplicated,
+        "rows_unchanged": processor.rows_unchanged,
+        "rows_already_billed": processor.rows_already_billed,
+        "shard_rows_sent": processor.shard_rows_sent,
+        "shard_messages_sent": processor.shard_messages_sent,
+        "sqs_throttle_events": get_sqs_rate_limiter().throttle_events - throttle_events,
+    }
+
+
+async def process_range(processor: CSVProcessor):
+    """
+    The Redis client of the billed filter is closed in the event loop it ran on.
+    """
+    try:
+        await processor.process()
+    finally:
+        if processor.billed_filter:
+            await processor.billed_filter.close()
+
+
+@lru_cache()
+def get_process_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    The pool is shared by every sharded import. Worker processes are spawned, not
+    forked, because the API process already runs threads (e.g. the SQS client pool).
+    A pool broken by a dead worker is dropped with `get_process_pool.cache_clear()`.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_range_worker,
+        initargs=(process_share(workers),)
+    )
+
+
+class ShardedCSVProcessor:
+    def __init__(
+        self,
+        settings: Settings,
+        file_path: str,
+        executor: Executor | None = None,
+        checkpoint: ImportCheckpoint | None = None,
+        job: ImportJob | None = None,
+        import_id: str = "",
+        source: str | None = None
+    ):
+        """
+        With a checkpoint, the ranges already completed are skipped and every
+        range is marked completed once its worker finishes. The progress is
+        recorded in the job, when given, as the ranges finish. The rows rejected
+        by the workers go to the error report of `import_id`.
+
+        With a `source`, the rows unchanged since the previous import of the source
+        are dropped, and the fingerprints of the ranges replace the ones of the
+        source when every range was processed by this run without failures.
+        """
+        self.settings = settings
+        self.file_path = file_path
+        self.import_id = import_id
+        self.source = source
+        self.fingerprints_complete = True
+        self.ranges_failed = 0
+        self.shared_pool = executor is None
+        self.executor = executor or get_process_pool(settings.csv_process_workers)
+        self.checkpoint = checkpoint
+        self.job = job
+        self.logger = get_logger(__name__)
+
+    @METRICS.get("csv_sharded_processor_duration_seconds").time()
+    async def process(self):
+        """
+        Each range is parsed, batched and sent by a worker process with its own
+        CSVProcessor and SQS client, so the rows are processed on all the cores.
+
+        Raises IncompleteImportException once every range is collected when any of
+        them failed, so the import is not reported as completed and its failed
+        ranges are left out of the checkpoint, to be processed when resumed.
+        """
+        ranges = await asyncio.to_thread(self._find_ranges)
+        first_line = await asyncio.to_thread(self._read_first_line)
+        if self.checkpoint:
+            completed_ranges = set(self.checkpoint.completed_ranges)
+            ranges = [file_range for file_range in ranges if file_range not in completed_ranges]
+            self.fingerprints_complete = not completed_ranges
+
+        self.logger.info("Initiating sharded CSV processing", extra={
+            "file_path": self.file_path,
+            "ranges": len(ranges)
+        })
+
+        with sharing_send_limits(self.settings.csv_process_workers) if self.shared_pool else nullcontext():
+            await self._process_ranges(ranges, first_line)
+
+        if self.source:
+            await asyncio.to_thread(self._save_fingerprints, ranges)
+
+        if self.ranges_failed:
+            raise IncompleteImportException(f"{self.ranges_failed} of {len(ranges)} file ranges failed")
+
+    async def _process_ranges(self, ranges: list[tuple[int, int]], first_line: str):
+        loop = asyncio.get_running_loop()
+        pending = {
+            loop.run_in_executor(
+                self.executor, process_file_range, self.file_path, start, end, first_line, self.import_id, self.source
+            ): (start, end)
+            for start, end in ranges
+        }
+
+        processed = 0
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                start, end = pending.pop(task)
+                processed += 1
+                self._collect_range(task, start, end, processed, len(ranges))
+
+    def _find_ranges(self) -> list[tuple[int, int]]:
+        file_size = os.path.getsize(self.file_path)
+        with open(self.file_path, "rb") as file:
+            return find_line_ranges(file, file_size, self.settings.csv_range_size)
+
+    def _read_first_line(self) -> str:
+        with open(self.file_path, "rb") as file:
+            return file.readline().decode(errors="replace")
+
+    def _save_fingerprints(self, ranges: list[tuple[int, int]]):
+        part_paths = [
+            fingerprint_part_path(self.settings, self.source, self.import_id, start) for start, _ in ranges
+        ]
+
+        try:
+            if self.fingerprints_complete:
+                merge_fingerprint_stores(part_paths, fingerprint_store_path(self.settings, self.source))
+            else:
+                self.logger.warning("Fingerprints of the delta import not saved", extra={
+                    "file_path": self.file_path,
+                    "source": self.source
+                })
+        finally:
+            for part_path in part_paths:
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+
+    def _collect_range(self, task: asyncio.Future, start: int, end: int, processed: int, total: int):
+        try:
+            result = task.result()
+        except Exception as e:
+            self.fingerprints_complete = False
+            self.ranges_failed += 1
+            if isinstance(e, BrokenProcessPool) and self.shared_pool:
+                get_process_pool.cache_clear()
+            METRICS.get("csv_sharded_processor_ranges_failed").inc()
+            self.logger.error(f"Error processing file range: {e}", extra={
+                "file_path": self.file_path,
+                "start": start,
+                "end": end
+            })
+            return
+
+        if result["rows_failed"]:
+            self.fingerprints_complete = False
+        if self.checkpoint:
+            self.checkpoint.complete_range(start, end)
+        if self.job:
+            rows = result["rows_sent"] + result["rows_failed"]
+            self.job.record_read(rows, self.job.bytes_processed + end - start)
+            self.job.record_sent(result["rows_sent"], result["rows_failed"])
+            self.job.record_rejected(result["rows_rejected"])
+            self.job.record_duplicated(result["rows_duplicated"])
+            self.job.record_unchanged(result["rows_unchanged"])
+            self.job.record_already_billed(result["rows_already_billed"])
+
+        METRICS.get("csv_sharded_processor_ranges_processed").inc()
+        METRICS.get("csv_processor_messages_sent").inc(result["messages_sent"])
+        METRICS.get("csv_processor_rows_sent").inc(result["rows_sent"])
+        if result["messages_failed"]:
+            METRICS.get("csv_processor_messages_failed").inc(result["messages_failed"])
+            METRICS.get("csv_processor_rows_failed").inc(result["rows_failed"])
+        if result["rows_rejected"]:
+            METRICS.get("csv_processor_rows_rejected").inc(result["rows_rejected"])
+        if result["rows_duplicated"]:
+            METRICS.get("csv_processor_rows_duplicated").inc(result["rows_duplicated"])
+        if result["rows_unchanged"]:
+            METRICS.get("csv_processor_rows_unchanged").inc(result["rows_unchanged"])
+        if result["rows_already_billed"]:
+            METRICS.get("csv_processor_rows_already_billed").inc(result["rows_already_billed"])
+        for shard, messages in result["shard_messages_sent"].items():
+            METRICS.get("csv_processor_shard_messages_sent", {"shard": str(shard)}).inc(messages)
+        for shard, rows in result["shard_rows_sent"].items():
+            METRICS.get("csv_processor_shard_rows_sent", {"shard": str(shard)}).inc(rows)
+        if result["sqs_throttle_events"]:
+            METRICS.get("sqs_rate_limiter_throttle_events").inc(result["sqs_throttle_events"])
+
+        self.logger.debug("File range processed", extra={
+            "file_path": self.file_path,
+            "start": start,
+            "end": end,
+            "ranges_processed": processed,
+            "ranges": total,
+            **result
+        })
@@ -0,0 +1,36 @@
+import json
+import os
+from src.config.settings import Settings
+
+
+class ImportErrorReport:
+    """
+    The rows rejected by an import, one JSON object per line, with the byte
+    offset of the row in the file, the reason and the row itself.
+
+    Each row is written with a single append, so the worker processes of a
+    sharded import can write to the same report.
+    """
+
+    def __init__(self, settings: Settings, import_id: str):
+        self.path = error_report_path(settings, import_id)
+        self.count = 0
+        self._fd = None
+
+    def add(self, offset: int, reason: str, row: str):
+        if self._fd is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+
+        line = json.dumps({"offset": offset, "reason": reason, "row": row}) + "\n"
+        os.write(self._fd, line.encode())
+        self.count += 1
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def error_report_path(settings: Settings, import_id: str) -> str:
+    return os.path.join(settings.import_error_report_dir, f"{import_id}.jsonl")
@@ -0,0 +1,211 @@
+import os
+import zlib
+import zstandard
+from typing import BinaryIO, Iterator
+from src.spool.exceptions.invalid_upload_exception import InvalidUploadException
+
+
+GZIP = "gzip"
+ZSTD = "zstd"
+
+ENCODINGS = {
+    "gzip": GZIP,
+    "x-gzip": GZIP,
+    "application/gzip": GZIP,
+    "application/x-gzip": GZIP,
+    "zstd": ZSTD,
+    "application/zstd": ZSTD,
+}
+SUFFIX_ENCODINGS = {".gz": GZIP, ".gzip": GZIP, ".zst": ZSTD, ".zstd": ZSTD}
+
+"""
+A CSV never starts with these bytes, so an upload that does is taken as
+compressed even when it is not declared
+"""
+MAGIC_NUMBERS = {GZIP: b"\x1f\x8b", ZSTD: b"\x28\xb5\x2f\xfd"}
+
+"""
+Accepts the gzip and zlib headers and the concatenated gzip members
+"""
+GZIP_WBITS = 32 + zlib.MAX_WBITS
+ZSTD_READ_SIZE = zstandard.DECOMPRESSION_RECOMMENDED_INPUT_SIZE
+
+"""
+Sizes and values of the zstd frame format (RFC 8878) followed by ZstdFrameTracker
+"""
+ZSTD_MAGIC_NUMBER_SIZE = 4
+ZSTD_SKIPPABLE_MAGIC_NUMBER = 0x184D2A50
+ZSTD_SKIPPABLE_MASK = 0xFFFFFFF0
+ZSTD_SKIPPABLE_SIZE_BYTES = 4
+ZSTD_BLOCK_HEADER_SIZE = 3
+ZSTD_RLE_BLOCK = 1
+ZSTD_CHECKSUM_SIZE = 4
+
+
+def detect_encoding(
+    head: bytes,
+    content_encoding: str | None = None,
+    content_type: str | None = None,
+    filename: str | None = None
+) -> str | None:
+    """
+    The compression of an upload, from the declared `Content-Encoding`, content
+    type or file name suffix, in this order, or else from its first bytes.
+    None when the upload is plain text.
+    """
+    for declared in (content_encoding, content_type):
+        if declared:
+            encoding = ENCODINGS.get(declared.split(";")[0].strip().lower())
+            if encoding:
+                return encoding
+
+    if filename:
+        encoding = SUFFIX_ENCODINGS.get(os.path.splitext(filename)[1].lower())
+        if encoding:
+            return encoding
+
+    for encoding, magic_number in MAGIC_NUMBERS.items():
+        if head.startswith(magic_number):
+            return encoding
+    return None
+
+
+def decompressed_chunks(file: BinaryIO, encoding: str, chunk_size: int) -> Iterator[bytes]:
+    """
+    Decompress the file as it is read, in chunks of up to `chunk_size` bytes, so
+    neither the compressed nor the decompressed content is ever whole in memory.
+    """
+    if encoding == GZIP:
+        return gzip_chunks(file, chunk_size)
+    if encoding == ZSTD:
+        return zstd_chunks(file, chunk_size)
+    raise InvalidUploadException(f"Unsupported encoding: {encoding}")
+
+
+def gzip_chunks(file: BinaryIO, chunk_size: int) -> Iterator[bytes]:
+    """
+    The output of each call is bounded by `chunk_size`, so a small chunk that
+    inflates to a huge one is split instead of being decompressed at once. When
+    the file ends, the output still held by the decompressor is drained.
+    """
+    decompressor = zlib.decompressobj(GZIP_WBITS)
+    compressed = b""
+    in_member = False
+
+    try:
+        while True:
+            if not compressed:
+                compressed = file.read(chunk_size)
+            if not compressed:
+                while in_member and not decompressor.eof and (chunk := decompressor.decompress(b"", chunk_size)):
+                    yield chunk
+                break
+
+            in_member = True
+            chunk = decompressor.decompress(compressed, chunk_size)
+            if chunk:
+                yield chunk
+
+            if decompressor.eof:
+                compressed = decompressor.unused_data
+                decompressor = zlib.decompressobj(GZIP_WBITS)
+                in_member = False
+            else:
+                compressed = decompressor.unconsumed_tail
+    except zlib.error as e:
+        raise InvalidUploadException(f"Invalid gzip content: {e}") from e
+
+    if in_member and not decompressor.eof:
+        raise InvalidUploadException("Truncated gzip content")
+
+
+def zstd_chunks(file: BinaryIO, chunk_size: int) -> Iterator[bytes]:
+    """
+    Each read of the decompressing reader fills at most `chunk_size` bytes, so a
+    small slice of the file that inflates to a huge output is split instead of
+    being decompressed at once. The reader goes on across concatenated frames but
+    stops quietly in a truncated one, so the frames are followed as they are read.
+    """
+    frames = ZstdFrameTracker(file)
+    reader = zstandard.ZstdDecompressor().stream_reader(frames, read_size=ZSTD_READ_SIZE, read_across_frames=True)
+
+    try:
+        while chunk := reader.read(chunk_size):
+            yield chunk
+    except zstandard.ZstdError as e:
+        raise InvalidUploadException(f"Invalid zstd content: {e}") from e
+
+    if frames.in_frame:
+        raise InvalidUploadException("Truncated zstd content")
+
+
+class ZstdFrameTracker:
+    """
+    Reads the compressed file for the decompressor, following the headers of the
+    frames and blocks (RFC 8878) without decompressing them, to tell whether the
+    file ended in the middle of a frame. The bodies of the blocks are skipped.
+    """
+
+    def __init__(self, file: BinaryIO):
+        self.file = file
+        self._header = b""
+        self._needed = ZSTD_MAGIC_NUMBER_SIZE
+        self._parse = self._parse_magic_number
+        self._skip = 0
+        self._checksum = False
+
+    @property
+    def in_frame(self) -> bool:
+        return bool(self._header or self._skip) or self._parse != self._parse_magic_number
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.file.read(size)
+        position = 0
+
+        while position < len(data):
+            if self._skip:
+                skipped = min(self._skip, len(data) - position)
+                self._skip -= skipped
+                position += skipped
+                continue
+
+            taken = data[position:position + self._needed - len(self._header)]
+            self._header += taken
+            position += len(taken)
+            if len(self._header) == self._needed:
+                header, self._header = self._header, b""
+                self._parse(header)
+
+        return data
+
+    def _expect(self, needed: int, parse):
+        self._needed = needed
+        self._parse = parse
+
+    def _parse_magic_number(self, header: bytes):
+        magic_number = int.from_bytes(header, "little")
+        if magic_number & ZSTD_SKIPPABLE_MASK == ZSTD_SKIPPABLE_MAGIC_NUMBER:
+            self._expect(ZSTD_SKIPPABLE_SIZE_BYTES, self._parse_skippable_size)
+        else:
+            self._expect(1, self._parse_frame_descriptor)
+
+    def _parse_skippable_size(self, header: bytes):
+        self._skip = int.from_bytes(header, "little")
+        self._expect(ZSTD_MAGIC_NUMBER_SIZE, self._parse_magic_number)
+
+    def _parse_frame_descriptor(self, header: bytes):
+        descriptor = header[0]
+        single_segment = bool(descriptor & 0x20)
+        self._checksum = bool(descriptor & 0x04)
+        content_size_bytes = (1 if single_segment else 0, 2, 4, 8)[descriptor >> 6]
+        self._skip = (0 if single_segment else 1) + (0, 1, 2, 4)[descriptor & 0x03] + content_size_bytes
+        self._expect(ZSTD_BLOCK_HEADER_SIZE, self._parse_block_header)
+
+    def _parse_block_header(self, header: bytes):
+        block_header = int.from_bytes(header, "little")
+        block_type = (block_header >> 1) & 0x03
+        self._skip = 1 if block_type == ZSTD_RLE_BLOCK else block_header >> 3
+
+        if block_header & 0x01:
+            self._skip += ZSTD_CHECKSUM_SIZE if self._checksum else 0
+            self._expect(ZSTD_MAGIC_NUMBER_SIZE, self._parse_magic_number)
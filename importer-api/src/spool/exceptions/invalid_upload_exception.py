@@ -0,0 +1,2 @@
+class InvalidUploadException(Exception):
+    pass
@@ -0,0 +1,52 @@
+from collections import deque
+from time import monotonic
+from src.models.message_batch import MessageBatch
+from src.models.spooled_import import SpooledImport
+from src.spool.upload_spool import UploadSpool
+
+
+class ImportCheckpoint:
+    """
+    The batches are sent concurrently and finish out of order, so the checkpoint
+    is the end offset of the last batch such that every batch read before it was
+    acknowledged, either sent or given up on after the retries. Resuming from it
+    re-sends at most the batches that were in flight.
+    """
+
+    def __init__(self, spool: UploadSpool, spooled_import: SpooledImport, interval: float):
+        self.spool = spool
+        self.spooled_import = spooled_import
+        self.interval = interval
+        self._pending = deque()
+        self._acknowledged = set()
+        self._saved_at = monotonic()
+
+    @property
+    def offset(self) -> int:
+        return self.spooled_import.offset
+
+    @property
+    def completed_ranges(self) -> list[tuple[int, int]]:
+        return self.spooled_import.completed_ranges
+
+    def track(self, batch: MessageBatch):
+        self._pending.append(batch)
+
+    def acknowledge(self, batch: MessageBatch):
+        self._acknowledged.add(id(batch))
+
+        while self._pending and id(self._pending[0]) in self._acknowledged:
+            batch = self._pending.popleft()
+            self._acknowledged.discard(id(batch))
+            self.spooled_import.offset = batch.end_offset
+
+        if monotonic() - self._saved_at >= self.interval:
+            self.save()
+
+    def complete_range(self, start: int, end: int):
+        self.spooled_import.completed_ranges.append((start, end))
+        self.save()
+
+    def save(self):
+        self.spool.save_manifest(self.spooled_import)
+        self._saved_at = monotonic()
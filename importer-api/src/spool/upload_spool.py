@@ -0,0 +1,165 @@
+import hashlib
+import json
+import mmap
+import os
+from io import BytesIO
+from uuid import uuid4
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator
+from src.config.settings import Settings
+from src.logger.logger import get_logger
+from src.models.spooled_import import SpooledImport
+from src.spool.decompression import decompressed_chunks
+from src.spool.exceptions.invalid_upload_exception import InvalidUploadException
+
+
+UPLOAD_SUFFIX = ".csv"
+MANIFEST_SUFFIX = ".json"
+
+
+@contextmanager
+def map_file(path: str) -> Iterator[BinaryIO]:
+    """
+    Map the file in memory, read-only. The pages are read by the kernel ahead of
+    the reader and dropped under memory pressure, so nothing is copied to the heap.
+    """
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            yield BytesIO()
+            return
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+            if hasattr(mapped_file, "madvise"):
+                mapped_file.madvise(mmap.MADV_SEQUENTIAL)
+            yield mapped_file
+
+
+class UploadSpool:
+    """
+    Save the uploaded files in the spool directory, next to a manifest with the
+    import checkpoint. The upload and the manifest are removed when the import
+    finishes, so the manifests left in the directory are the unfinished imports.
+    """
+
+    def __init__(self, settings: Settings):
+        self.directory = settings.import_spool_dir
+        self.chunk_size = settings.csv_read_chunk_size
+        self.logger = get_logger(__name__)
+
+    def save(self, file: BinaryIO, source: str | None = None, encoding: str | None = None) -> SpooledImport:
+        """
+        The SHA-256 of the upload is computed while it is copied, so the content
+        is read only once. A compressed upload (`encoding`) is decompressed chunk by
+        chunk while it is copied, so the spool and the digest have the plain CSV and
+        the offsets of the checkpoints are offsets of the CSV.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        import_id = str(uuid4())
+        spooled_import = SpooledImport(import_id, self._upload_path(import_id), source=source)
+        digest = hashlib.sha256()
+
+        file.seek(0)
+        chunks = iter(lambda: file.read(self.chunk_size), b"")
+        if encoding:
+            chunks = decompressed_chunks(file, encoding, self.chunk_size)
+
+        try:
+            with open(spooled_import.path, "wb") as spool_file:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    spool_file.write(chunk)
+                spool_file.flush()
+                os.fsync(spool_file.fileno())
+        except InvalidUploadException:
+            os.remove(spooled_import.path)
+            raise
+        spooled_import.digest = digest.hexdigest()
+        self.save_manifest(spooled_import)
+
+        self.logger.debug("Upload saved to the spool", extra={"import_id": import_id})
+        return spooled_import
+
+    def register(self, path: str, source: str | None = None, import_id: str | None = None) -> SpooledImport:
+        """
+        Import of a file already in the server, read in place: only the manifest is
+        written to the spool, so the import is resumed like an upload.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        spooled_import = SpooledImport(import_id or str(uuid4()), path, source=source, local=True)
+        self.save_manifest(spooled_import)
+
+        self.logger.debug("Local file registered in the spool", extra={
+            "import_id": spooled_import.import_id,
+            "path": path
+        })
+        return spooled_import
+
+    def save_manifest(self, spooled_import: SpooledImport):
+        """
+        Written to a temporary file and renamed, so a crash never leaves a partial manifest.
+        """
+        manifest_path = self._manifest_path(spooled_import.import_id)
+        temporary_path = f"{manifest_path}.tmp"
+
+        with open(temporary_path, "w") as manifest_file:
+            json.dump(spooled_import.to_manifest(), manifest_file)
+        os.replace(temporary_path, manifest_path)
+
+    def pending(self) -> list[SpooledImport]:
+        if not os.path.isdir(self.directory):
+            return []
+
+        spooled_imports = []
+        for file_name in sorted(os.listdir(self.directory)):
+            if not file_name.endswith(MANIFEST_SUFFIX):
+                continue
+
+            spooled_import = self._load_manifest(os.path.join(self.directory, file_name))
+            if spooled_import:
+                spooled_imports.append(spooled_import)
+
+        return spooled_imports
+
+    def remove(self, spooled_import: SpooledImport):
+        paths = [self._manifest_path(spooled_import.import_id)]
+        if not spooled_import.local:
+            paths.insert(0, spooled_import.path)
+
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                self.logger.warning("Spooled file already removed", extra={"path": path})
+
+    def _load_manifest(self, manifest_path: str) -> SpooledImport | None:
+        try:
+            with open(manifest_path) as manifest_file:
+                manifest = json.load(manifest_file)
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Error reading spool manifest: {e}", extra={"path": manifest_path})
+            return None
+
+        import_id = manifest["import_id"]
+        local = manifest.get("local", False)
+        spooled_import = SpooledImport(
+            import_id,
+            manifest["path"] if local else self._upload_path(import_id),
+            manifest["offset"],
+            [tuple(file_range) for file_range in manifest["completed_ranges"]],
+            manifest.get("source"),
+            manifest.get("digest"),
+            local
+        )
+
+        if not os.path.exists(spooled_import.path):
+            self.logger.warning("Spooled upload not found", extra={"import_id": import_id})
+            os.remove(manifest_path)
+            return None
+
+        return spooled_import
+
+    def _upload_path(self, import_id: str) -> str:
+        return os.path.join(self.directory, f"{import_id}{UPLOAD_SUFFIX}")
+
+    def _manifest_path(self, import_id: str) -> str:
+        return os.path.join(self.directory, f"{import_id}{MANIFEST_SUFFIX}")
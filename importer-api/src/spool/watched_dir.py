@@ -0,0 +1,68 @@
+import os
+from src.config.settings import Settings
+from src.logger.logger import get_logger
+
+
+WATCHED_SUFFIX = ".csv"
+PROCESSING_DIR = "processing"
+DONE_DIR = "done"
+FAILED_DIR = "failed"
+
+
+class WatchedDir:
+    """
+    A directory where the CSV files to import are dropped. A file is ready when its
+    size and modification time did not change between two polls, so a file still
+    being copied is not picked up.
+
+    A file is claimed by moving it to `processing/`, named after its import, and is
+    moved to `done/` or `failed/` when its import finishes. Moving the file within
+    the directory is atomic, so a file is never imported twice.
+    """
+
+    def __init__(self, settings: Settings):
+        self.directory = settings.import_watch_dir
+        self.logger = get_logger(__name__)
+        self._last_seen = {}
+
+    def ready_files(self) -> list[str]:
+        os.makedirs(self.directory, exist_ok=True)
+        seen = {}
+        ready = []
+
+        for entry in sorted(os.scandir(self.directory), key=lambda entry: entry.name):
+            if entry.name.startswith(".") or not entry.name.lower().endswith(WATCHED_SUFFIX) or not entry.is_file():
+                continue
+
+            stat = entry.stat()
+            seen[entry.path] = (stat.st_size, stat.st_mtime_ns)
+            if self._last_seen.get(entry.path) == seen[entry.path]:
+                ready.append(entry.path)
+
+        self._last_seen = seen
+        return ready
+
+    def processing_path(self, path: str, import_id: str) -> str:
+        return os.path.join(self.directory, PROCESSING_DIR, f"{import_id}.{os.path.basename(path)}")
+
+    def claim(self, path: str, processing_path: str):
+        os.makedirs(os.path.dirname(processing_path), exist_ok=True)
+        os.rename(path, processing_path)
+        self._last_seen.pop(path, None)
+
+    def claimed_files(self) -> list[str]:
+        directory = os.path.join(self.directory, PROCESSING_DIR)
+        if not os.path.isdir(directory):
+            return []
+        return [os.path.join(directory, file_name) for file_name in sorted(os.listdir(directory))]
+
+    def archive(self, processing_path: str, failed: bool = False):
+        directory = os.path.join(self.directory, FAILED_DIR if failed else DONE_DIR)
+        os.makedirs(directory, exist_ok=True)
+        os.rename(processing_path, os.path.join(directory, os.path.basename(processing_path)))
+
+        self.logger.info("Watched file archived", extra={"path": processing_path, "failed": failed})
+
+
+def claimed_import_id(processing_path: str) -> str:
+    return os.path.basename(processing_path).split(".", 1)[0]
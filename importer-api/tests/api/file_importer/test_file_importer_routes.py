@@ -1,29 +1,516 @@
+import gzip
+import json
+import os
+import zstandard
+import pytest
 from unittest.mock import MagicMock, patch
 from fastapi.testclient import TestClient
 from fastapi import FastAPI
-from src.api.file_importer.routes import router
+from src.api.file_importer.routes import router, settings
+from src.jobs.import_job_registry import get_import_job_registry
+from src.aws.sqs.sqs_client import get_sqs_client
+from src.jobs.import_scheduler import get_import_scheduler
+from src.jobs.upload_digest_registry import get_upload_digest_registry
+from src.processor.duplicate_filter import BloomDuplicateFilter, create_duplicate_filter
 
 app = FastAPI()
 app.include_router(router)
 
 client = TestClient(app)
 
+HEADER = "name,governmentId,email,debtAmount,debtDueDate,debtId"
+ROWS = [
+    "John Doe,11111111111,johndoe@kanastra.com.br,1000.00,2022-10-12,1adb6ccf-ff16-467f-bea7-5f05d494280f",
+    "Jane Doe,22222222222,janedoe@kanastra.com.br,250.50,2022-11-01,2bdb6ccf-ff16-467f-bea7-5f05d494280f",
+    "Joe Doe,33333333333,joedoe@kanastra.com.br,10.00,2022-12-31,3cdb6ccf-ff16-467f-bea7-5f05d494280f",
+]
+CSV_CONTENT = "\n".join([HEADER, *ROWS]).encode()
 
-@patch("boto3.client")
-def test_upload_file(boto3_client):
+
+@pytest.fixture
+def boto3_client():
+    get_sqs_client.cache_clear()
+    with patch("src.aws.sqs.sqs_client.get_aws_client_factory") as get_aws_client_factory:
+        yield get_aws_client_factory.return_value.client
+    get_sqs_client().close()
+    get_sqs_client.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def spool_dir(tmp_path, monkeypatch):
+    (tmp_path / "spool").mkdir()
+    monkeypatch.setattr(settings, "import_spool_dir", str(tmp_path / "spool"))
+    monkeypatch.setattr(settings, "import_error_report_dir", str(tmp_path / "errors"))
+    monkeypatch.setattr(settings, "import_fingerprints_dir", str(tmp_path / "fingerprints"))
+    return tmp_path / "spool"
+
+
+@pytest.fixture(autouse=True)
+def upload_digest_registry():
+    get_upload_digest_registry.cache_clear()
+    yield get_upload_digest_registry()
+    get_upload_digest_registry.cache_clear()
+
+
+def test_upload_file(boto3_client, spool_dir):
     boto3_client.return_value.send_message_batch = MagicMock()
-    messages = ["line1", "line2", "line3"]
     entries = [
-        {"Id": str(i), "MessageBody": message} for i, message in enumerate(messages)
+        {"Id": str(i), "MessageBody": message} for i, message in enumerate(ROWS)
     ]
 
     response = client.post(
-        "/v1/upload", files={"file": ("test.csv", b"line1\nline2\nline3")})
+        "/v1/upload", files={"file": ("test.csv", CSV_CONTENT)})
     assert response.status_code == 200
     assert response.json() == {
-        "message": "File received. Processing in background."}
+        "message": "File received. Processing in background.",
+        "import_id": response.json()["import_id"]}
 
     boto3_client.return_value.send_message_batch.assert_called_with(
         QueueUrl="",
         Entries=entries
     )
+    assert os.listdir(spool_dir) == []
+
+
+@patch("src.api.file_importer.routes.process_file_task")
+def test_upload_file_saves_to_the_spool(process_file_task, spool_dir):
+    response = client.post(
+        "/v1/upload", files={"file": ("test.csv", b"line1\nline2\nline3")})
+    assert response.status_code == 200
+
+    spooled_import = process_file_task.call_args.args[0]
+    with open(spooled_import.path, "rb") as spooled_file:
+        assert spooled_file.read() == b"line1\nline2\nline3"
+    assert sorted(os.listdir(spool_dir)) == [
+        f"{spooled_import.import_id}.csv",
+        f"{spooled_import.import_id}.json"
+    ]
+
+
+def test_get_import(boto3_client):
+    boto3_client.return_value.send_message_batch.return_value = {"Successful": [], "Failed": []}
+    upload_response = client.post(
+        "/v1/upload", files={"file": ("test.csv", CSV_CONTENT)})
+    import_id = upload_response.json()["import_id"]
+
+    response = client.get(f"/v1/imports/{import_id}")
+
+    assert response.status_code == 200
+    job = response.json()
+    assert job["import_id"] == import_id
+    assert job["status"] == "completed"
+    assert job["rows_read"] == 3
+    assert job["rows_sent"] == 3
+    assert job["rows_failed"] == 0
+    assert job["rows_rejected"] == 0
+    assert job["bytes_processed"] == len(CSV_CONTENT)
+    assert job["total_bytes"] == len(CSV_CONTENT)
+    assert job["finished_at"] is not None
+
+
+def test_upload_file_rejects_invalid_rows(boto3_client):
+    boto3_client.return_value.send_message_batch.return_value = {"Successful": [], "Failed": []}
+    content = "\n".join([HEADER, ROWS[0], "Jane Doe,abc,janedoe@kanastra.com.br,1.00,2022-11-01,x", ROWS[2]])
+    upload_response = client.post(
+        "/v1/upload", files={"file": ("test.csv", content.encode())})
+    import_id = upload_response.json()["import_id"]
+
+    job = client.get(f"/v1/imports/{import_id}").json()
+    assert job["rows_sent"] == 2
+    assert job["rows_rejected"] == 1
+    boto3_client.return_value.send_message_batch.assert_called_once_with(
+        QueueUrl="",
+        Entries=[{"Id": "0", "MessageBody": ROWS[0]}, {"Id": "1", "MessageBody": ROWS[2]}]
+    )
+
+    response = client.get(f"/v1/imports/{import_id}/errors")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    errors = [json.loads(line) for line in response.text.splitlines()]
+    assert errors == [{
+        "offset": len(HEADER) + len(ROWS[0]) + 2,
+        "reason": "Invalid governmentId: abc",
+        "row": "Jane Doe,abc,janedoe@kanastra.com.br,1.00,2022-11-01,x"
+    }]
+
+
+def test_upload_file_drops_duplicated_debt_ids(boto3_client):
+    boto3_client.return_value.send_message_batch.return_value = {"Successful": [], "Failed": []}
+    content = "\n".join([HEADER, ROWS[0], ROWS[1], ROWS[0]])
+    upload_response = client.post(
+        "/v1/upload", files={"file": ("test.csv", content.encode())})
+    import_id = upload_response.json()["import_id"]
+
+    job = client.get(f"/v1/imports/{import_id}").json()
+    assert job["rows_sent"] == 2
+    assert job["rows_duplicated"] == 1
+
+    errors = [json.loads(line) for line in client.get(f"/v1/imports/{import_id}/errors").text.splitlines()]
+    assert [error["reason"] for error in errors] == ["Duplicate debtId: 1adb6ccf-ff16-467f-bea7-5f05d494280f"]
+
+
+def test_upload_file_sends_only_the_rows_changed_since_the_previous_import_of_the_source(boto3_client):
+    boto3_client.return_value.send_message_batch.return_value = {"Successful": [], "Failed": []}
+    client.post("/v1/upload?source=portfolio", files={"file": ("test.csv", CSV_CONTENT)})
+    changed_row = ROWS[1].replace("250.50", "300.00")
+    content = "\n".join([HEADER, ROWS[0], changed_row, ROWS[2]])
+
+    upload_response = client.post("/v1/upload?source=portfolio", files={"file": ("test.csv", content.encode())})
+
+    job = client.get(f"/v1/imports/{upload_response.json()['import_id']}").json()
+    assert job["rows_sent"] == 1
+    assert job["rows_unchanged"] == 2
+    boto3_client.return_value.send_message_batch.assert_called_with(
+        QueueUrl="",
+        Entries=[{"Id": "0", "MessageBody": changed_row}]
+    )
+
+
+def test_upload_file_without_source_sends_every_row(boto3_client):
+    boto3_client.return_value.send_message_batch.return_value = {"Successful": [], "Failed": []}
+    client.post("/v1/upload?source=portfolio", files={"file": ("test.csv", CSV_CONTENT)})
+
+    upload_response = client.post("/v1/upload", files={"file": ("test.csv", CSV_CONTENT)})
+
+    job = client.get(f"/v1/imports/{upload_response.json()['import_id']}").json()
+    assert job["rows_sent"] == 3
+    assert job["rows_unchanged"] == 0
+
+
+@patch("src.api.file_importer.routes.process_file_task")
+def test_upload_file_with_invalid_source(process_file_task):
+    response = client.post("/v1/upload?source=../portfolio", files={"file": ("test.csv", CSV_CONTENT)})
+
+    assert response.status_code == 422
+    process_file_task.assert_not_called()
+
+
+def test_upload_file_returns_the_existing_import_of_the_same_content(boto3_client, spool_dir):
+    boto3_client.return_value.send_message_batch.return_value = {"Successful": [], "Failed": []}
+    first_response = client.post("/v1/upload", files={"file": ("test.csv", CSV_CONTENT)})
+    admitted = get_import_scheduler().admitted
+
+    response = client.post("/v1/upload", files={"file": ("retry.csv", CSV_CONTENT)})
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "message": "File already imported.",
+        "import_id": first_response.json()["import_id"]
+    }
+    boto3_client.return_value.send_message_batch.assert_called_once()
+    assert os.listdir(spool_dir) == []
+    assert get_import_scheduler().admitted == admitted
+
+
+def test_upload_file_with_the_same_content_for_another_source(boto3_client):
+    boto3_client.return_value.send_message_batch.return_value = {"Successful": [], "Failed": []}
+    first_response = client.post("/v1/upload", files={"file": ("test.csv", CSV_CONTENT)})
+
+    response = client.post("/v1/upload?source=portfolio", files={"file": ("test.csv", CSV_CONTENT)})
+
+    assert response.json()["import_id"] != first_response.json()["import_id"]
+    assert boto3_client.return_value.send_message_batch.call_count == 2
+
+
+def test_upload_file_imports_again_the_content_of_a_failed_import(boto3_client):
+    boto3_client.return_value.send_message_batch.return_value = {"Successful": [], "Failed": []}
+    first_response = client.post("/v1/upload", files={"file": ("test.csv", CSV_CONTENT)})
+    get_import_job_registry().get(first_response.json()["import_id"]).status = "failed"
+
+    response = client.post("/v1/upload", files={"file": ("test.csv", CSV_CONTENT)})
+
+    assert response.json()["import_id"] != first_response.json()["import_id"]
+
+
+@pytest.mark.parametrize("file", [
+    ("test.csv.gz", gzip.compress(CSV_CONTENT)),
+    ("test.csv", gzip.compress(CSV_CONTENT), "application/gzip"),
+    ("test.csv", zstandard.ZstdCompressor().compress(CSV_CONTENT), "text/csv"),
+])
+def test_upload_compressed_file(boto3_client, file):
+    boto3_client.return_value.send_message_batch.return_value = {"Successful": [], "Failed": []}
+
+    upload_response = client.post("/v1/upload", files={"file": file})
+
+    job = client.get(f"/v1/imports/{upload_response.json()['import_id']}").json()
+    assert job["rows_sent"] == 3
+    assert job["total_bytes"] == len(CSV_CONTENT)
+    boto3_client.return_value.send_message_batch.assert_called_once_with(
+        QueueUrl="",
+        Entries=[{"Id": str(index), "MessageBody": row} for index, row in enumerate(ROWS)]
+    )
+
+
+def test_upload_invalid_compressed_file(spool_dir):
+    admitted = get_import_scheduler().admitted
+
+    response = client.post("/v1/upload", files={"file": ("test.csv.gz", gzip.compress(CSV_CONTENT)[:-10])})
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid compressed file. Truncated gzip content"}
+    assert get_import_scheduler().admitted == admitted
+    assert os.listdir(spool_dir) == []
+
+
+@pytest.mark.parametrize("content_type", ["text/csv", "application/octet-stream", "text/csv; charset=utf-8"])
+def test_upload_stream(boto3_client, spool_dir, content_type):
+    boto3_client.return_value.send_message_batch.return_value = {"Successful": [], "Failed": []}
+    admitted = get_import_scheduler().admitted
+
+    response = client.post("/v1/upload/stream", content=CSV_CONTENT, headers={"Content-Type": content_type})
+
+    assert response.status_code == 200
+    assert response.json()["message"] == "File processed."
+    job = client.get(f"/v1/imports/{response.json()['import_id']}").json()
+    assert job["status"] == "completed"
+    assert job["rows_sent"] == 3
+    assert job["bytes_processed"] == len(CSV_CONTENT)
+    assert job["total_bytes"] == len(CSV_CONTENT)
+    boto3_client.return_value.send_message_batch.assert_called_once_with(
+        QueueUrl="",
+        Entries=[{"Id": str(index), "MessageBody": row} for index, row in enumerate(ROWS)]
+    )
+    assert os.listdir(spool_dir) == []
+    assert get_import_scheduler().admitted == admitted
+
+
+def test_upload_stream_without_content_length(boto3_client, monkeypatch):
+    """
+    A chunked upload has no Content-Length, so its size is unknown and the
+    duplicate filter must be a Bloom filter sized for a stream.
+    """
+    boto3_client.return_value.send_message_batch.return_value = {"Successful": [], "Failed": []}
+    monkeypatch.setattr(settings, "csv_dedup_stream_max_rows", 1000)
+    filters = []
+
+    def create_filter(*args):
+        filters.append(create_duplicate_filter(*args))
+        return filters[-1]
+
+    with patch("src.api.file_importer.tasks.create_duplicate_filter", side_effect=create_filter):
+        response = client.post(
+            "/v1/upload/stream",
+            content=(chunk for chunk in (CSV_CONTENT[:50], CSV_CONTENT[50:])),
+            headers={"Content-Type": "text/csv"}
+        )
+
+    assert response.status_code == 200
+    assert isinstance(filters[0], BloomDuplicateFilter)
+    assert filters[0].bits_count == BloomDuplicateFilter(1000, settings.csv_dedup_false_positive_rate).bits_count
+    job = client.get(f"/v1/imports/{response.json()['import_id']}").json()
+    assert job["status"] == "completed"
+    assert job["rows_sent"] == 3
+    assert job["total_bytes"] == 0
+
+
+def test_upload_stream_rejects_invalid_rows(boto3_client):
+    boto3_client.return_value.send_message_batch.return_value = {"Successful": [], "Failed": []}
+    content = "\n".join([HEADER, ROWS[0], "Jane Doe,abc,janedoe@kanastra.com.br,1.00,2022-11-01,x"])
+
+    response = client.post("/v1/upload/stream", content=content.encode(), headers={"Content-Type": "text/csv"})
+
+    import_id = response.json()["import_id"]
+    assert client.get(f"/v1/imports/{import_id}").json()["rows_rejected"] == 1
+    errors = [json.loads(line) for line in client.get(f"/v1/imports/{import_id}/errors").text.splitlines()]
+    assert errors[0]["offset"] == len(HEADER) + len(ROWS[0]) + 2
+
+
+def test_upload_stream_unsupported_content_type():
+    response = client.post("/v1/upload/stream", content=CSV_CONTENT, headers={"Content-Type": "application/json"})
+
+    assert response.status_code == 415
+
+
+def test_upload_stream_compressed():
+    response = client.post(
+        "/v1/upload/stream",
+        content=gzip.compress(CSV_CONTENT),
+        headers={"Content-Type": "text/csv", "Content-Encoding": "gzip"}
+    )
+
+    assert response.status_code == 415
+    assert response.json() == {"detail": "Unsupported content encoding. Use /v1/upload for compressed files."}
+
+
+@patch("src.api.file_importer.routes.process_stream")
+@patch("src.api.file_importer.routes.get_import_scheduler")
+def test_upload_stream_over_capacity(get_import_scheduler, process_stream):
+    get_import_scheduler.return_value.admit.return_value = False
+
+    response = client.post("/v1/upload/stream", content=CSV_CONTENT, headers={"Content-Type": "text/csv"})
+
+    assert response.status_code == 429
+    process_stream.assert_not_called()
+
+
+@pytest.fixture
+def local_dir(tmp_path, monkeypatch):
+    (tmp_path / "local").mkdir()
+    monkeypatch.setattr(settings, "import_local_dir", str(tmp_path / "local"))
+    return tmp_path / "local"
+
+
+def test_import_local_file(boto3_client, local_dir, spool_dir):
+    boto3_client.return_value.send_message_batch.return_value = {"Successful": [], "Failed": []}
+    (local_dir / "debts.csv").write_bytes(CSV_CONTENT)
+
+    response = client.post("/v1/imports/local", json={"path": "debts.csv"})
+
+    assert response.status_code == 200
+    assert response.json()["message"] == "File received. Processing in background."
+    job = get_import_job_registry().get(response.json()["import_id"])
+    assert job.status == "completed"
+    assert job.rows_sent == len(ROWS)
+    assert (local_dir / "debts.csv").read_bytes() == CSV_CONTENT
+    assert os.listdir(spool_dir) == []
+
+
+@patch("src.api.file_importer.routes.process_file_task")
+def test_import_local_file_registers_it_in_the_spool(process_file_task, local_dir, spool_dir):
+    (local_dir / "debts.csv").write_bytes(CSV_CONTENT)
+
+    response = client.post("/v1/imports/local", json={"path": str(local_dir / "debts.csv"), "source": "portfolio"})
+
+    assert response.status_code == 200
+    spooled_import = process_file_task.call_args.args[0]
+    assert spooled_import.path == str(local_dir / "debts.csv")
+    assert spooled_import.local
+    assert spooled_import.source == "portfolio"
+    assert os.listdir(spool_dir) == [f"{spooled_import.import_id}.json"]
+
+
+def test_import_local_file_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "import_local_dir", "")
+
+    response = client.post("/v1/imports/local", json={"path": "debts.csv"})
+
+    assert response.status_code == 403
+    assert response.json() == {"detail": "Local imports are disabled."}
+
+
+@pytest.mark.parametrize("path", ["../spool/debts.csv", "/etc/passwd", "link.csv"])
+def test_import_local_file_outside_of_the_local_dir(local_dir, path):
+    (local_dir / "link.csv").symlink_to("/etc/passwd")
+
+    response = client.post("/v1/imports/local", json={"path": path})
+
+    assert response.status_code == 403
+    assert response.json() == {"detail": "Path outside of the local import directory."}
+
+
+def test_import_local_file_not_found(local_dir):
+    response = client.post("/v1/imports/local", json={"path": "missing.csv"})
+
+    assert response.status_code == 404
+    assert response.json() == {"detail": "File not found"}
+
+
+def test_import_local_file_with_invalid_source(local_dir):
+    response = client.post("/v1/imports/local", json={"path": "debts.csv", "source": "../portfolio"})
+
+    assert response.status_code == 422
+
+
+@patch("src.api.file_importer.routes.process_file_task")
+@patch("src.api.file_importer.routes.get_import_scheduler")
+def test_import_local_file_over_capacity(get_import_scheduler, process_file_task, local_dir, spool_dir):
+    get_import_scheduler.return_value.admit.return_value = False
+    (local_dir / "debts.csv").write_bytes(CSV_CONTENT)
+
+    response = client.post("/v1/imports/local", json={"path": "debts.csv"})
+
+    assert response.status_code == 429
+    process_file_task.assert_not_called()
+    assert os.listdir(spool_dir) == []
+
+
+def test_get_import_errors_without_rejected_rows(boto3_client):
+    boto3_client.return_value.send_message_batch.return_value = {"Successful": [], "Failed": []}
+    upload_response = client.post(
+        "/v1/upload", files={"file": ("test.csv", CSV_CONTENT)})
+
+    response = client.get(f"/v1/imports/{upload_response.json()['import_id']}/errors")
+
+    assert response.status_code == 404
+    assert response.json() == {"detail": "No rows rejected"}
+
+
+def test_get_import_errors_not_found():
+    response = client.get("/v1/imports/unknown/errors")
+
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Import not found"}
+
+
+@patch("src.api.file_importer.routes.process_file_task")
+def test_get_import_running(process_file_task):
+    upload_response = client.post(
+        "/v1/upload", files={"file": ("test.csv", b"line1\nline2\nline3")})
+    job = get_import_job_registry().get(upload_response.json()["import_id"])
+    job.start()
+    job.record_read(2, 12)
+
+    response = client.get(f"/v1/imports/{job.import_id}")
+
+    assert response.json()["status"] == "running"
+    assert response.json()["rows_read"] == 2
+    assert response.json()["bytes_processed"] == 12
+
+
+def test_get_import_not_found():
+    response = client.get("/v1/imports/unknown")
+
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Import not found"}
+
+
+@patch("src.api.file_importer.routes.get_import_scheduler")
+@patch("src.api.file_importer.routes.process_file_task")
+def test_upload_file_over_capacity(process_file_task, get_import_scheduler, spool_dir, monkeypatch):
+    monkeypatch.setattr(settings, "import_retry_after_seconds", 15)
+    get_import_scheduler.return_value.admit.return_value = False
+
+    response = client.post(
+        "/v1/upload", files={"file": ("test.csv", b"line1\nline2\nline3")})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "15"
+    assert response.json() == {"detail": "Too many imports in progress. Try again later."}
+    process_file_task.assert_not_called()
+    assert os.listdir(spool_dir) == []
+
+
+@patch("src.api.file_importer.routes.UploadSpool")
+@patch("src.api.file_importer.routes.get_import_scheduler")
+def test_upload_file_is_not_admitted_when_spooling_fails(get_import_scheduler, upload_spool):
+    upload_spool.return_value.save.side_effect = OSError("disk full")
+
+    with pytest.raises(OSError):
+        client.post("/v1/upload", files={"file": ("test.csv", b"line1")})
+
+    get_import_scheduler.return_value.admit.assert_not_called()
+
+
+@patch("src.api.file_importer.routes.get_import_scheduler")
+@patch("src.api.file_importer.routes.process_file_task")
+def test_upload_file_over_capacity_returns_the_existing_import_of_the_same_content(process_file_task, get_import_scheduler, spool_dir):
+    first_response = client.post("/v1/upload", files={"file": ("test.csv", CSV_CONTENT)})
+    get_import_scheduler.return_value.admit.return_value = False
+
+    response = client.post("/v1/upload", files={"file": ("retry.csv", CSV_CONTENT)})
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "message": "File already imported.",
+        "import_id": first_response.json()["import_id"]
+    }
+    process_file_task.assert_called_once()
+
+
+def test_upload_file_leaves_the_scheduler(boto3_client):
+    admitted = get_import_scheduler().admitted
+
+    client.post("/v1/upload", files={"file": ("test.csv", CSV_CONTENT)})
+
+    assert get_import_scheduler().admitted == admitted
+    assert get_import_scheduler().active == 0
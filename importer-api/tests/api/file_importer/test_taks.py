@@ -1,24 +1,481 @@
+import asyncio
+import os
 import pytest
-from unittest.mock import AsyncMock, patch
-from src.api.file_importer.tasks import process_file_task
+from unittest.mock import AsyncMock, MagicMock, patch
+from src.api.file_importer import tasks
+from src.api.file_importer.tasks import (
+    process_file_task,
+    process_import,
+    process_stream,
+    poll_watched_dir,
+    resume_spooled_imports,
+    should_shard_file,
+    start_spool_dir_watcher,
+    watch_spool_dir
+)
+from src.models.import_job import ImportJob, ImportJobStatus
+from src.models.spooled_import import SpooledImport
+from src.processor.duplicate_filter import BloomDuplicateFilter, ExactDuplicateFilter
+from src.processor.exceptions.incomplete_import_exception import IncompleteImportException
+from src.spool.upload_spool import UploadSpool
+from src.spool.watched_dir import WatchedDir
 
 
-@patch("src.api.file_importer.tasks.settings")
-@patch("src.api.file_importer.tasks.SQSClient")
+@pytest.fixture
+def settings(tmp_path):
+    _settings = MagicMock()
+    _settings.sqs_queue_url = "test_queue_url"
+    _settings.import_spool_dir = str(tmp_path)
+    _settings.import_error_report_dir = str(tmp_path / "errors")
+    _settings.import_checkpoint_interval = 1
+    _settings.csv_process_workers = 1
+    _settings.csv_sharding_min_file_size = 10
+    _settings.csv_dedup_enabled = True
+    _settings.csv_dedup_exact_max_rows = 100000
+    _settings.csv_dedup_stream_max_rows = 1000
+    _settings.billed_debts_filter_enabled = False
+    _settings.import_fingerprints_dir = str(tmp_path / "fingerprints")
+    _settings.import_watch_dir = str(tmp_path / "watch")
+    _settings.import_watch_interval = 0
+    return _settings
+
+
+@pytest.fixture
+def spooled_import(tmp_path):
+    path = tmp_path / "import-id.csv"
+    path.write_bytes(b"line1\nline2\nline3")
+    return SpooledImport("import-id", str(path), offset=6)
+
+
+@pytest.fixture
+def job():
+    return ImportJob("import-id", 17, 6)
+
+
+@patch("src.api.file_importer.tasks.UploadSpool")
+@patch("src.api.file_importer.tasks.get_sqs_client")
 @patch("src.api.file_importer.tasks.CSVProcessor")
 @pytest.mark.asyncio
-async def test_process_file_task(csv_processor, sqs_client, settings):
-    settings.sqs_queue_url = "test_queue_url"
+async def test_process_import(csv_processor, sqs_client, upload_spool, settings, spooled_import, job):
     csv_processor.return_value.process = AsyncMock()
 
-    file_content = b"line1\nline2\nline3"
-
-    await process_file_task(file_content)
+    with patch("src.api.file_importer.tasks.settings", settings):
+        await process_import(spooled_import, job)
 
-    sqs_client.assert_called_once_with(settings.sqs_queue_url, settings)
-    sqs_client.return_value.create_client.assert_called_once()
-    csv_processor.assert_called_once_with(
-        settings, file_content,
-        sqs_client.return_value
-    )
+    processor_settings, file_range, processor_sqs_client, checkpoint, processor_job = csv_processor.call_args.args
+    assert processor_job == job
+    assert job.status == ImportJobStatus.COMPLETED
+    assert processor_settings == settings
+    assert processor_sqs_client == sqs_client.return_value
+    assert checkpoint.spooled_import == spooled_import
+    assert csv_processor.call_args.kwargs["validator"].header is None
+    assert csv_processor.call_args.kwargs["error_report"].path == str(settings.import_error_report_dir) + "/import-id.jsonl"
+    assert isinstance(csv_processor.call_args.kwargs["duplicate_filter"], ExactDuplicateFilter)
+    assert csv_processor.call_args.kwargs["billed_filter"] is None
     csv_processor.return_value.process.assert_awaited_once()
+    upload_spool.return_value.remove.assert_called_once_with(spooled_import)
+
+
+@patch("src.api.file_importer.tasks.UploadSpool")
+@patch("src.api.file_importer.tasks.get_sqs_client")
+@patch("src.api.file_importer.tasks.CSVProcessor")
+@pytest.mark.asyncio
+async def test_process_import_saves_the_fingerprints_of_a_delta_import(csv_processor, sqs_client, upload_spool, settings, tmp_path, job):
+    path = tmp_path / "import-id.csv"
+    path.write_bytes(b"line1\nline2")
+    spooled_import = SpooledImport("import-id", str(path), source="portfolio")
+    csv_processor.return_value.process = AsyncMock()
+    csv_processor.return_value.rows_failed = 0
+
+    with patch("src.api.file_importer.tasks.settings", settings):
+        await process_import(spooled_import, job)
+
+    delta_filter = csv_processor.call_args.kwargs["delta_filter"]
+    assert delta_filter.previous is None
+    assert os.listdir(settings.import_fingerprints_dir) == ["portfolio.fingerprints"]
+
+
+@pytest.mark.parametrize("offset, rows_failed", [(6, 0), (0, 1)])
+@patch("src.api.file_importer.tasks.UploadSpool")
+@patch("src.api.file_importer.tasks.get_sqs_client")
+@patch("src.api.file_importer.tasks.CSVProcessor")
+@pytest.mark.asyncio
+async def test_process_import_keeps_the_previous_fingerprints(csv_processor, sqs_client, upload_spool, offset, rows_failed, settings, tmp_path, job):
+    path = tmp_path / "import-id.csv"
+    path.write_bytes(b"line1\nline2")
+    spooled_import = SpooledImport("import-id", str(path), offset=offset, source="portfolio")
+    csv_processor.return_value.process = AsyncMock()
+    csv_processor.return_value.rows_failed = rows_failed
+
+    with patch("src.api.file_importer.tasks.settings", settings):
+        await process_import(spooled_import, job)
+
+    assert not os.path.exists(settings.import_fingerprints_dir)
+
+
+@patch("src.api.file_importer.tasks.create_billed_debts_filter")
+@patch("src.api.file_importer.tasks.UploadSpool")
+@patch("src.api.file_importer.tasks.get_sqs_client")
+@patch("src.api.file_importer.tasks.CSVProcessor")
+@pytest.mark.asyncio
+async def test_process_import_filters_billed_debts(csv_processor, sqs_client, upload_spool, create_billed_debts_filter, settings, spooled_import, job):
+    settings.billed_debts_filter_enabled = True
+    csv_processor.return_value.process = AsyncMock()
+    billed_filter = create_billed_debts_filter.return_value
+    billed_filter.close = AsyncMock()
+
+    with patch("src.api.file_importer.tasks.settings", settings):
+        await process_import(spooled_import, job)
+
+    create_billed_debts_filter.assert_called_once_with(settings)
+    assert csv_processor.call_args.kwargs["billed_filter"] == billed_filter
+    billed_filter.close.assert_awaited_once()
+
+
+@patch("src.api.file_importer.tasks.UploadSpool")
+@patch("src.api.file_importer.tasks.get_sqs_client")
+@patch("src.api.file_importer.tasks.CSVProcessor")
+@pytest.mark.asyncio
+async def test_process_import_reads_from_the_checkpoint(csv_processor, sqs_client, upload_spool, settings, spooled_import, job):
+    contents = []
+
+    async def process():
+        file_range = csv_processor.call_args.args[1]
+        contents.append(file_range.read())
+
+    csv_processor.return_value.process = process
+
+    with patch("src.api.file_importer.tasks.settings", settings):
+        await process_import(spooled_import, job)
+
+    assert contents == [b"line2\nline3"]
+
+
+@patch("src.api.file_importer.tasks.UploadSpool")
+@patch("src.api.file_importer.tasks.get_sqs_client")
+@patch("src.api.file_importer.tasks.CSVProcessor")
+@pytest.mark.asyncio
+async def test_process_import_reads_the_header_when_resumed(csv_processor, sqs_client, upload_spool, settings, tmp_path, job):
+    contents = []
+
+    async def process():
+        contents.append(csv_processor.call_args.args[1].read())
+
+    csv_processor.return_value.process = process
+    header = b"name,governmentId,email,debtAmount,debtDueDate,debtId\n"
+    path = tmp_path / "import-id.csv"
+    path.write_bytes(header + b"line2\nline3")
+
+    with patch("src.api.file_importer.tasks.settings", settings):
+        await process_import(SpooledImport("import-id", str(path), offset=len(header)), job)
+
+    assert csv_processor.call_args.kwargs["validator"].header == header.decode().strip()
+    assert contents == [b"line2\nline3"]
+
+
+@patch("src.api.file_importer.tasks.UploadSpool")
+@patch("src.api.file_importer.tasks.get_sqs_client")
+@patch("src.api.file_importer.tasks.CSVProcessor")
+@pytest.mark.asyncio
+async def test_process_import_removes_spooled_import_on_error(csv_processor, sqs_client, upload_spool, settings, spooled_import, job):
+    csv_processor.return_value.process = AsyncMock(side_effect=Exception("error"))
+
+    with patch("src.api.file_importer.tasks.settings", settings), pytest.raises(Exception):
+        await process_import(spooled_import, job)
+
+    upload_spool.return_value.remove.assert_called_once_with(spooled_import)
+    assert job.status == ImportJobStatus.FAILED
+
+
+@patch("src.api.file_importer.tasks.UploadSpool")
+@patch("src.api.file_importer.tasks.get_sqs_client")
+@patch("src.api.file_importer.tasks.CSVProcessor")
+@pytest.mark.asyncio
+async def test_process_import_keeps_spooled_import_when_cancelled(csv_processor, sqs_client, upload_spool, settings, spooled_import, job):
+    csv_processor.return_value.process = AsyncMock(side_effect=asyncio.CancelledError())
+
+    with patch("src.api.file_importer.tasks.settings", settings), pytest.raises(asyncio.CancelledError):
+        await process_import(spooled_import, job)
+
+    upload_spool.return_value.remove.assert_not_called()
+    upload_spool.return_value.save_manifest.assert_called_once_with(spooled_import)
+    assert job.status == ImportJobStatus.INTERRUPTED
+
+
+@patch("src.api.file_importer.tasks.UploadSpool")
+@patch("src.api.file_importer.tasks.ShardedCSVProcessor")
+@pytest.mark.asyncio
+async def test_process_import_keeps_spooled_import_when_ranges_fail(sharded_csv_processor, upload_spool, settings, spooled_import, job):
+    settings.csv_process_workers = 4
+    sharded_csv_processor.return_value.process = AsyncMock(side_effect=IncompleteImportException("1 of 2 file ranges failed"))
+
+    with patch("src.api.file_importer.tasks.settings", settings), pytest.raises(IncompleteImportException):
+        await process_import(spooled_import, job)
+
+    upload_spool.return_value.remove.assert_not_called()
+    upload_spool.return_value.save_manifest.assert_called_once_with(spooled_import)
+    assert job.status == ImportJobStatus.INTERRUPTED
+
+
+@patch("src.api.file_importer.tasks.UploadSpool")
+@patch("src.api.file_importer.tasks.ShardedCSVProcessor")
+@patch("src.api.file_importer.tasks.CSVProcessor")
+@pytest.mark.asyncio
+async def test_process_import_sharded(csv_processor, sharded_csv_processor, upload_spool, settings, spooled_import, job):
+    settings.csv_process_workers = 4
+    sharded_csv_processor.return_value.process = AsyncMock()
+
+    with patch("src.api.file_importer.tasks.settings", settings):
+        await process_import(spooled_import, job)
+
+    assert sharded_csv_processor.call_args.args == (settings, spooled_import.path)
+    assert sharded_csv_processor.call_args.kwargs["checkpoint"].spooled_import == spooled_import
+    assert sharded_csv_processor.call_args.kwargs["job"] == job
+    assert sharded_csv_processor.call_args.kwargs["import_id"] == "import-id"
+    sharded_csv_processor.return_value.process.assert_awaited_once()
+    upload_spool.return_value.remove.assert_called_once_with(spooled_import)
+    csv_processor.assert_not_called()
+
+
+def test_should_shard_file(settings, spooled_import, tmp_path):
+    settings.csv_process_workers = 4
+    small_file = tmp_path / "small.csv"
+    small_file.write_bytes(b"line1")
+
+    with patch("src.api.file_importer.tasks.settings", settings):
+        assert should_shard_file(spooled_import.path)
+        assert not should_shard_file(str(small_file))
+
+
+def test_should_shard_file_single_worker(settings, spooled_import):
+    with patch("src.api.file_importer.tasks.settings", settings):
+        assert not should_shard_file(spooled_import.path)
+
+
+@patch("src.api.file_importer.tasks.get_import_scheduler")
+@patch("src.api.file_importer.tasks.process_import", new_callable=AsyncMock)
+@pytest.mark.asyncio
+async def test_process_file_task_waits_for_the_scheduler(process_import, get_import_scheduler, spooled_import, job):
+    scheduler = get_import_scheduler.return_value
+
+    await process_file_task(spooled_import, job)
+
+    scheduler.run.return_value.__aenter__.assert_awaited_once()
+    process_import.assert_awaited_once_with(spooled_import, job)
+    scheduler.run.return_value.__aexit__.assert_awaited_once()
+
+
+async def stream_of(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+@patch("src.api.file_importer.tasks.get_import_scheduler")
+@patch("src.api.file_importer.tasks.get_sqs_client")
+@patch("src.api.file_importer.tasks.CSVProcessor")
+@pytest.mark.asyncio
+async def test_process_stream(csv_processor, sqs_client, get_import_scheduler, settings):
+    csv_processor.return_value.process = AsyncMock()
+    chunks = stream_of(b"line1\n", b"line2")
+    job = ImportJob("import-id", 0)
+
+    with patch("src.api.file_importer.tasks.settings", settings):
+        await process_stream("import-id", chunks, job)
+
+    get_import_scheduler.return_value.run.return_value.__aenter__.assert_awaited_once()
+    processor_settings, file_content, processor_sqs_client, checkpoint, processor_job = csv_processor.call_args.args
+    assert file_content is chunks
+    assert checkpoint is None
+    assert processor_job == job
+    assert csv_processor.call_args.kwargs["validator"] is None
+    assert isinstance(csv_processor.call_args.kwargs["duplicate_filter"], BloomDuplicateFilter)
+    assert job.status == ImportJobStatus.COMPLETED
+
+
+@patch("src.api.file_importer.tasks.get_import_scheduler")
+@patch("src.api.file_importer.tasks.get_sqs_client")
+@patch("src.api.file_importer.tasks.CSVProcessor")
+@pytest.mark.asyncio
+async def test_process_stream_fails_the_job_on_error(csv_processor, sqs_client, get_import_scheduler, settings):
+    get_import_scheduler.return_value.run.return_value.__aexit__.return_value = False
+    csv_processor.return_value.process = AsyncMock(side_effect=Exception("disconnected"))
+    job = ImportJob("import-id", 0)
+
+    with patch("src.api.file_importer.tasks.settings", settings):
+        with pytest.raises(Exception, match="disconnected"):
+            await process_stream("import-id", stream_of(b"line1"), job)
+
+    assert job.status == ImportJobStatus.FAILED
+
+
+@patch("src.api.file_importer.tasks.get_import_scheduler")
+@patch("src.api.file_importer.tasks.get_import_job_registry")
+@patch("src.api.file_importer.tasks.process_file_task", new_callable=AsyncMock)
+@patch("src.api.file_importer.tasks.UploadSpool")
+@pytest.mark.asyncio
+async def test_resume_spooled_imports(upload_spool, process_file_task, get_import_job_registry, get_import_scheduler, spooled_import):
+    upload_spool.return_value.pending.return_value = [spooled_import]
+    registry = get_import_job_registry.return_value
+
+    resume_spooled_imports()
+    await asyncio.gather(*tasks.background_imports)
+
+    registry.create.assert_called_once_with("import-id", 17, 6)
+    get_import_scheduler.return_value.admit.assert_called_once_with(force=True)
+    process_file_task.assert_awaited_once_with(spooled_import, registry.create.return_value)
+    assert not tasks.background_imports
+
+
+@patch("src.api.file_importer.tasks.get_import_scheduler")
+@patch("src.api.file_importer.tasks.get_upload_digest_registry")
+@patch("src.api.file_importer.tasks.get_import_job_registry")
+@patch("src.api.file_importer.tasks.process_file_task", new_callable=AsyncMock)
+@patch("src.api.file_importer.tasks.UploadSpool")
+@pytest.mark.asyncio
+async def test_resume_spooled_imports_registers_the_digest(upload_spool, process_file_task, get_import_job_registry, get_upload_digest_registry, get_import_scheduler, spooled_import):
+    spooled_import.source = "portfolio"
+    spooled_import.digest = "digest"
+    upload_spool.return_value.pending.return_value = [spooled_import]
+    get_import_job_registry.return_value.create.return_value = ImportJob("import-id", 17, 6)
+
+    resume_spooled_imports()
+    await asyncio.gather(*tasks.background_imports)
+
+    get_upload_digest_registry.return_value.add.assert_called_once_with("digest", "portfolio", "import-id")
+
+
+@pytest.fixture
+def watched_dir(settings):
+    with patch("src.spool.watched_dir.get_logger"):
+        yield WatchedDir(settings)
+
+
+@pytest.fixture
+def watched_file(watched_dir):
+    os.makedirs(watched_dir.directory)
+    path = os.path.join(watched_dir.directory, "debts.csv")
+    with open(path, "wb") as file:
+        file.write(b"line1\nline2")
+    watched_dir.ready_files()
+    return path
+
+
+@patch("src.api.file_importer.tasks.start_import")
+@patch("src.api.file_importer.tasks.get_import_scheduler")
+def test_poll_watched_dir_claims_the_ready_files(get_import_scheduler, start_import, settings, watched_dir, watched_file):
+    with patch("src.api.file_importer.tasks.settings", settings):
+        poll_watched_dir(watched_dir)
+
+    spooled_import = start_import.call_args.args[0]
+    assert spooled_import.local
+    assert spooled_import.path == watched_dir.processing_path(watched_file, spooled_import.import_id)
+    assert os.path.exists(spooled_import.path)
+    assert not os.path.exists(watched_file)
+    assert [pending.path for pending in UploadSpool(settings).pending()] == [spooled_import.path]
+    get_import_scheduler.return_value.admit.assert_called_once_with()
+
+
+@patch("src.api.file_importer.tasks.start_import")
+@patch("src.api.file_importer.tasks.get_import_scheduler")
+def test_poll_watched_dir_over_capacity(get_import_scheduler, start_import, settings, watched_dir, watched_file):
+    get_import_scheduler.return_value.admit.return_value = False
+
+    with patch("src.api.file_importer.tasks.settings", settings):
+        poll_watched_dir(watched_dir)
+
+    start_import.assert_not_called()
+    assert os.path.exists(watched_file)
+    assert watched_dir.claimed_files() == []
+
+
+@patch("src.api.file_importer.tasks.start_import")
+@patch("src.api.file_importer.tasks.get_import_scheduler")
+def test_poll_watched_dir_keeps_the_file_when_the_claim_fails(get_import_scheduler, start_import, settings, watched_dir, watched_file):
+    with patch("src.api.file_importer.tasks.settings", settings), \
+            patch.object(watched_dir, "claim", side_effect=OSError("gone")):
+        poll_watched_dir(watched_dir)
+
+    start_import.assert_not_called()
+    get_import_scheduler.return_value.release.assert_called_once()
+    assert UploadSpool(settings).pending() == []
+    assert os.path.exists(watched_file)
+
+
+@pytest.mark.parametrize("status, directory", [
+    (ImportJobStatus.COMPLETED, "done"),
+    (ImportJobStatus.FAILED, "failed"),
+    (None, "done"),
+])
+@patch("src.api.file_importer.tasks.get_import_job_registry")
+@patch("src.api.file_importer.tasks.get_import_scheduler")
+def test_poll_watched_dir_archives_the_finished_imports(get_import_scheduler, get_import_job_registry, settings, watched_dir, watched_file, status, directory):
+    processing_path = watched_dir.processing_path(watched_file, "import-id")
+    watched_dir.claim(watched_file, processing_path)
+    job = ImportJob("import-id", 11)
+    job.status = status
+    get_import_job_registry.return_value.get.return_value = job if status else None
+
+    with patch("src.api.file_importer.tasks.settings", settings):
+        poll_watched_dir(watched_dir)
+
+    get_import_job_registry.return_value.get.assert_called_once_with("import-id")
+    assert os.listdir(os.path.join(watched_dir.directory, directory)) == ["import-id.debts.csv"]
+
+
+@patch("src.api.file_importer.tasks.get_import_scheduler")
+def test_poll_watched_dir_keeps_the_imports_in_progress(get_import_scheduler, settings, watched_dir, watched_file):
+    processing_path = watched_dir.processing_path(watched_file, "import-id")
+    UploadSpool(settings).register(processing_path, import_id="import-id")
+    watched_dir.claim(watched_file, processing_path)
+
+    with patch("src.api.file_importer.tasks.settings", settings):
+        poll_watched_dir(watched_dir)
+
+    assert watched_dir.claimed_files() == [processing_path]
+
+
+@patch("src.api.file_importer.tasks.get_import_job_registry")
+@patch("src.api.file_importer.tasks.get_import_scheduler")
+@patch("src.api.file_importer.tasks.process_file_task", new_callable=AsyncMock)
+@pytest.mark.asyncio
+async def test_watch_spool_dir_imports_the_watched_files(process_file_task, get_import_scheduler, get_import_job_registry, settings, watched_dir, watched_file):
+    with patch("src.api.file_importer.tasks.settings", settings):
+        watcher = asyncio.create_task(watch_spool_dir(watched_dir))
+        while not process_file_task.await_count:
+            await asyncio.sleep(0)
+        watcher.cancel()
+        await asyncio.gather(*tasks.background_imports)
+
+    spooled_import, job = process_file_task.call_args.args
+    assert spooled_import.path == watched_dir.claimed_files()[0]
+    get_import_job_registry.return_value.create.assert_called_once_with(spooled_import.import_id, 11, 0)
+
+
+@patch("src.api.file_importer.tasks.poll_watched_dir")
+@patch("src.api.file_importer.tasks.logger")
+@pytest.mark.asyncio
+async def test_watch_spool_dir_keeps_polling_after_an_error(logger, poll_watched_dir, settings, watched_dir):
+    poll_watched_dir.side_effect = [OSError("unavailable"), None, asyncio.CancelledError()]
+
+    with patch("src.api.file_importer.tasks.settings", settings), pytest.raises(asyncio.CancelledError):
+        await watch_spool_dir(watched_dir)
+
+    assert poll_watched_dir.call_count == 3
+    logger.error.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_start_spool_dir_watcher_disabled(settings):
+    settings.import_watch_dir = ""
+
+    with patch("src.api.file_importer.tasks.settings", settings):
+        assert start_spool_dir_watcher() is None
+
+
+@patch("src.api.file_importer.tasks.watch_spool_dir", new_callable=AsyncMock)
+@pytest.mark.asyncio
+async def test_start_spool_dir_watcher(watch_spool_dir, settings):
+    with patch("src.api.file_importer.tasks.settings", settings), patch("src.spool.watched_dir.get_logger"):
+        await start_spool_dir_watcher()
+
+    assert watch_spool_dir.call_args.args[0].directory == settings.import_watch_dir
@@ -0,0 +1,151 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+from botocore.exceptions import ReadTimeoutError
+from src.aws.sqs.sqs_client import SQSClient
+from src.processor.csv_processor import CSVProcessor
+
+QUEUE_URL = "http://localhost:4566/000000000000/data-process.fifo"
+ROWS = [
+    "John Doe,11111111111,johndoe@kanastra.com.br,1000.00,2022-10-12,1adb6ccf-ff16-467f-bea7-5f05d494280f",
+    "Jane Doe,22222222222,janedoe@kanastra.com.br,2000.00,2022-10-12,2bdb6ccf-ff16-467f-bea7-5f05d494280f",
+    "Jim Doe,33333333333,jimdoe@kanastra.com.br,3000.00,2022-10-12,3cdb6ccf-ff16-467f-bea7-5f05d494280f"
+]
+
+
+class FIFOQueueStandIn:
+    """
+    SendMessageBatch of a FIFO queue, in memory. A message with the
+    MessageDeduplicationId of a message accepted within the deduplication window
+    is accepted, but not delivered. With `lose_next_response`, the next request is
+    accepted and fails as if its response was lost.
+    """
+
+    DEDUPLICATION_WINDOW_SECONDS = 300
+
+    def __init__(self):
+        self.now = 0
+        self.delivered = []
+        self.lose_next_response = False
+        self._accepted_at = {}
+
+    def send_message_batch(self, QueueUrl: str, Entries: list):
+        for entry in Entries:
+            message_deduplication_id = entry["MessageDeduplicationId"]
+            assert entry["MessageGroupId"]
+
+            accepted_at = self._accepted_at.get(message_deduplication_id)
+            if accepted_at is None or self.now - accepted_at >= self.DEDUPLICATION_WINDOW_SECONDS:
+                self._accepted_at[message_deduplication_id] = self.now
+                self.delivered.append(entry["MessageBody"])
+
+        if self.lose_next_response:
+            self.lose_next_response = False
+            raise ReadTimeoutError(endpoint_url="http://localhost:4566")
+        return {"Successful": [{"Id": entry["Id"]} for entry in Entries]}
+
+
+@pytest.fixture(autouse=True)
+def sleep():
+    with patch("src.aws.sqs.sqs_client.sleep") as _sleep:
+        yield _sleep
+
+
+@pytest.fixture
+def settings():
+    _settings = MagicMock()
+    _settings.max_csv_process_concurrent_tasks = 2
+    _settings.csv_process_queue_size = 2
+    _settings.max_sqs_send_message_batch_size = 2
+    _settings.csv_read_chunk_size = 64
+    _settings.sqs_message_packing_enabled = False
+    _settings.claim_check_enabled = False
+    _settings.sqs_message_binary_encoding_enabled = False
+    _settings.sqs_queue_shards = 1
+    _settings.sqs_queue_url = QUEUE_URL
+    _settings.sqs_fifo_message_group_strategy = "debt_id"
+    _settings.csv_validation_enabled = False
+    _settings.csv_validation_block_size = 10
+    _settings.sqs_max_message_size = 262144
+    _settings.sqs_batch_max_retries = 2
+    _settings.sqs_batch_retry_base_delay = 0.1
+    _settings.sqs_batch_retry_max_delay = 1
+    _settings.sqs_batch_retry_budget_ratio = 0.5
+    _settings.sqs_batch_retry_budget_max_tokens = 10
+    return _settings
+
+
+@pytest.fixture
+def queue():
+    return FIFOQueueStandIn()
+
+
+@pytest.fixture
+def sqs_client(settings, queue):
+    _sqs_client = SQSClient(QUEUE_URL, settings)
+    _sqs_client._client = queue
+    _sqs_client._executor = ThreadPoolExecutor(max_workers=1)
+    yield _sqs_client
+    _sqs_client.close()
+
+
+async def import_rows(settings, sqs_client, rows: list[str]):
+    await CSVProcessor(settings, "\n".join(rows).encode(), sqs_client).process()
+
+
+@pytest.mark.asyncio
+async def test_rows_imported_twice_are_delivered_once(settings, sqs_client, queue):
+    await import_rows(settings, sqs_client, ROWS)
+    await import_rows(settings, sqs_client, ROWS)
+
+    assert sorted(queue.delivered) == sorted(ROWS)
+
+
+@pytest.mark.asyncio
+async def test_batch_resent_after_a_lost_response_is_delivered_once(settings, sqs_client, queue, sleep):
+    queue.lose_next_response = True
+
+    await import_rows(settings, sqs_client, ROWS)
+
+    assert sleep.call_count == 1
+    assert sorted(queue.delivered) == sorted(ROWS)
+
+
+@pytest.mark.asyncio
+async def test_rows_are_delivered_again_after_the_deduplication_window(settings, sqs_client, queue):
+    await import_rows(settings, sqs_client, ROWS[:1])
+    queue.now += FIFOQueueStandIn.DEDUPLICATION_WINDOW_SECONDS
+
+    await import_rows(settings, sqs_client, ROWS[:1])
+
+    assert queue.delivered == [ROWS[0], ROWS[0]]
+
+
+@pytest.mark.asyncio
+async def test_row_changed_within_the_deduplication_window_is_dropped(settings, sqs_client, queue):
+    await import_rows(settings, sqs_client, ROWS[:1])
+
+    await import_rows(settings, sqs_client, [ROWS[0].replace("1000.00", "1500.00")])
+
+    assert queue.delivered == [ROWS[0]]
+
+
+@pytest.mark.asyncio
+async def test_packed_rows_imported_twice_are_delivered_once(settings, sqs_client, queue):
+    settings.sqs_message_packing_enabled = True
+
+    await import_rows(settings, sqs_client, ROWS)
+    await import_rows(settings, sqs_client, ROWS)
+
+    assert queue.delivered == ["\n".join(ROWS)]
+
+
+@pytest.mark.asyncio
+async def test_rows_of_a_fixed_group(settings, sqs_client, queue):
+    settings.sqs_fifo_message_group_strategy = "fixed"
+    settings.sqs_fifo_message_group_id = "data-process"
+
+    await import_rows(settings, sqs_client, ROWS)
+    await import_rows(settings, sqs_client, ROWS)
+
+    assert sorted(queue.delivered) == sorted(ROWS)
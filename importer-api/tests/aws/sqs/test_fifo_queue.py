@@ -0,0 +1,20 @@
+import hashlib
+from src.aws.sqs.fifo_queue import deduplication_id, is_fifo_queue
+
+
+def test_is_fifo_queue():
+    assert is_fifo_queue("http://localhost:4566/000000000000/data-process.fifo")
+    assert not is_fifo_queue("http://localhost:4566/000000000000/data-process")
+
+
+def test_deduplication_id_of_a_single_row():
+    assert deduplication_id(["1adb6ccf-ff16-467f-bea7-5f05d494280f"]) == "1adb6ccf-ff16-467f-bea7-5f05d494280f"
+
+
+def test_deduplication_id_of_many_rows():
+    assert deduplication_id(["id1", "id2"]) == hashlib.sha256(b"id1\nid2").hexdigest()
+
+
+def test_deduplication_id_not_accepted_by_sqs():
+    assert deduplication_id(["debt id"]) == hashlib.sha256(b"debt id").hexdigest()
+    assert deduplication_id(["a" * 129]) == hashlib.sha256(b"a" * 129).hexdigest()
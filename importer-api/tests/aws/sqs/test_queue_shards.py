@@ -0,0 +1,22 @@
+import uuid
+from collections import Counter
+from src.aws.sqs.queue_shards import shard_of, shard_queue_url
+
+
+def test_shard_of_is_stable():
+    assert shard_of("1adb6ccf-ff16-467f-bea7-5f05d494280f", 4) == 2750045697 % 4
+
+
+def test_shard_of_spreads_the_debt_ids():
+    shards = Counter(shard_of(str(uuid.UUID(int=index * 7919 + 1)), 4) for index in range(10000))
+
+    assert sorted(shards) == [0, 1, 2, 3]
+    assert all(2300 < count < 2700 for count in shards.values())
+
+
+def test_shard_queue_url():
+    assert shard_queue_url("queue", 2) == "queue-2"
+
+
+def test_shard_queue_url_of_a_fifo_queue():
+    assert shard_queue_url("queue.fifo", 2) == "queue-2.fifo"
@@ -1,6 +1,9 @@
+import hashlib
 import pytest
-from unittest.mock import MagicMock, patch
-from src.aws.sqs.sqs_client import SQSClient
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, call, patch
+from botocore.exceptions import ClientError, ConnectTimeoutError, EndpointConnectionError, ReadTimeoutError
+from src.aws.sqs.sqs_client import SQSClient, get_sqs_client, is_retryable_error
 from src.aws.sqs.exceptions.sqs_client_exception import SQSClientException
 
 
@@ -9,9 +12,29 @@ def settings():
     _settings = MagicMock()
     _settings.aws_region = "us-east-1"
     _settings.sqs_endpoint_url = "http://localhost:4566"
+    _settings.max_sqs_in_flight_sends = 250
+    _settings.sqs_batch_max_retries = 2
+    _settings.sqs_batch_retry_base_delay = 0.1
+    _settings.sqs_batch_retry_max_delay = 1
+    _settings.sqs_batch_retry_budget_ratio = 0.5
+    _settings.sqs_batch_retry_budget_max_tokens = 10
     return _settings
 
 
+@pytest.fixture(autouse=True)
+def sleep():
+    with patch("src.aws.sqs.sqs_client.sleep") as _sleep:
+        yield _sleep
+
+
+@pytest.fixture
+def metrics():
+    _metrics = {}
+    with patch("src.aws.sqs.sqs_client.METRICS") as mock_metrics:
+        mock_metrics.get.side_effect = lambda name: _metrics.setdefault(name, MagicMock())
+        yield _metrics
+
+
 @patch("src.aws.sqs.sqs_client.get_logger")
 def test_init(get_logger, settings):
     sqs_client = SQSClient("http://localhost:4566/queue", settings)
@@ -21,17 +44,31 @@ def test_init(get_logger, settings):
     get_logger.assert_called_with("src.aws.sqs.sqs_client")
 
 
-@patch("src.aws.sqs.sqs_client.boto3.client")
+@patch("src.aws.sqs.sqs_client.get_aws_client_factory")
 @patch("src.aws.sqs.sqs_client.get_logger")
-def test_create_client(get_logger, boto3_client, settings):
+def test_create_client(get_logger, get_aws_client_factory, settings):
     sqs_client = SQSClient("http://localhost:4566/queue", settings)
     sqs_client.create_client()
 
-    boto3_client.assert_called_with(
-        "sqs", region_name="us-east-1",
-        endpoint_url="http://localhost:4566"
-    )
+    get_aws_client_factory.return_value.client.assert_called_once_with("sqs", "http://localhost:4566", max_attempts=1)
+    assert sqs_client._client == get_aws_client_factory.return_value.client.return_value
+    assert isinstance(sqs_client._executor, ThreadPoolExecutor)
+    assert sqs_client._executor._max_workers == 250
     get_logger.return_value.info.assert_called_with("SQS client created")
+    sqs_client.close()
+
+
+@patch("src.aws.sqs.sqs_client.get_aws_client_factory")
+@patch("src.aws.sqs.sqs_client.get_logger")
+def test_close(get_logger, get_aws_client_factory, settings):
+    sqs_client = SQSClient("http://localhost:4566/queue", settings)
+    sqs_client.create_client()
+    executor = sqs_client._executor
+
+    sqs_client.close()
+
+    assert sqs_client._executor is None
+    assert executor._shutdown
 
 
 @patch("src.aws.sqs.sqs_client.get_logger")
@@ -94,7 +131,7 @@ def test_send_message_batch_exception(get_logger, settings):
     sqs_client = SQSClient("http://localhost:4566/queue", settings)
     sqs_client._client = MagicMock()
     sqs_client._client.send_message_batch.side_effect = Exception("error")
-    sqs_client.send_message_batch(["message1", "message2"])
+    failed = sqs_client.send_message_batch(["message1", "message2"])
 
     sqs_client._client.send_message_batch.assert_called_with(
         QueueUrl="http://localhost:4566/queue",
@@ -103,13 +140,337 @@ def test_send_message_batch_exception(get_logger, settings):
             {"Id": "1", "MessageBody": "message2"}
         ]
     )
-    get_logger.return_value.error.assert_called_with(
+    get_logger.return_value.error.assert_any_call(
         "Error sending messages to queue http://localhost:4566/queue",
         extra={
             "messages": ["message1", "message2"],
             "error": "error"
         }
     )
+    get_logger.return_value.error.assert_called_with(
+        "Messages not sent to queue http://localhost:4566/queue",
+        extra={"messages": ["message1", "message2"]}
+    )
+    assert failed == [0, 1]
+
+
+@patch("src.aws.sqs.sqs_client.get_logger")
+def test_send_message_batch_returns_no_failures(get_logger, settings, metrics):
+    sqs_client = SQSClient("http://localhost:4566/queue", settings)
+    sqs_client._client = MagicMock()
+    sqs_client._client.send_message_batch.return_value = {
+        "Successful": [{"Id": "0"}, {"Id": "1"}]
+    }
+
+    assert sqs_client.send_message_batch(["message1", "message2"]) == []
+    metrics["sqs_client_entries_sent"].inc.assert_called_once_with(2)
+    assert "sqs_client_entries_retried" not in metrics
+    assert "sqs_client_entries_failed" not in metrics
+
+
+@patch("src.aws.sqs.sqs_client.get_logger")
+def test_send_message_batch_to_fifo_queue(get_logger, settings, metrics):
+    settings.sqs_fifo_message_group_strategy = "debt_id"
+    sqs_client = SQSClient("http://localhost:4566/queue.fifo", settings)
+    sqs_client._client = MagicMock()
+    sqs_client._client.send_message_batch.return_value = {}
+
+    sqs_client.send_message_batch(["message1", "message2"], deduplication_ids=["id1", "id2"])
+
+    sqs_client._client.send_message_batch.assert_called_with(
+        QueueUrl="http://localhost:4566/queue.fifo",
+        Entries=[
+            {"Id": "0", "MessageBody": "message1", "MessageDeduplicationId": "id1", "MessageGroupId": "id1"},
+            {"Id": "1", "MessageBody": "message2", "MessageDeduplicationId": "id2", "MessageGroupId": "id2"}
+        ]
+    )
+
+
+@patch("src.aws.sqs.sqs_client.get_logger")
+def test_send_message_batch_to_fifo_queue_with_a_fixed_group(get_logger, settings, metrics):
+    settings.sqs_fifo_message_group_strategy = "fixed"
+    settings.sqs_fifo_message_group_id = "data-process"
+    sqs_client = SQSClient("http://localhost:4566/queue.fifo", settings)
+    sqs_client._client = MagicMock()
+    sqs_client._client.send_message_batch.return_value = {}
+
+    sqs_client.send_message_batch(["message1"], deduplication_ids=["id1"])
+
+    assert sqs_client._client.send_message_batch.call_args.kwargs["Entries"] == [
+        {"Id": "0", "MessageBody": "message1", "MessageDeduplicationId": "id1", "MessageGroupId": "data-process"}
+    ]
+
+
+@patch("src.aws.sqs.sqs_client.get_logger")
+def test_send_message_batch_to_fifo_queue_without_deduplication_ids(get_logger, settings, metrics):
+    settings.sqs_fifo_message_group_strategy = "debt_id"
+    sqs_client = SQSClient("http://localhost:4566/queue.fifo", settings)
+    sqs_client._client = MagicMock()
+    sqs_client._client.send_message_batch.return_value = {}
+
+    sqs_client.send_message_batch(["message 1"])
+
+    entry = sqs_client._client.send_message_batch.call_args.kwargs["Entries"][0]
+    assert entry["MessageDeduplicationId"] == hashlib.sha256(b"message 1").hexdigest()
+
+
+@patch("src.aws.sqs.sqs_client.get_logger")
+def test_send_message_batch_to_fifo_queue_with_unknown_group_strategy(get_logger, settings):
+    settings.sqs_fifo_message_group_strategy = "other"
+    sqs_client = SQSClient("http://localhost:4566/queue.fifo", settings)
+    sqs_client._client = MagicMock()
+
+    with pytest.raises(SQSClientException) as exc:
+        sqs_client.send_message_batch(["message1"], deduplication_ids=["id1"])
+    assert str(exc.value) == "Unknown MessageGroupId strategy: other"
+
+
+@patch("src.aws.sqs.sqs_client.get_logger")
+def test_send_message_batch_ignores_deduplication_ids_on_standard_queue(get_logger, settings, metrics):
+    sqs_client = SQSClient("http://localhost:4566/queue", settings)
+    sqs_client._client = MagicMock()
+    sqs_client._client.send_message_batch.return_value = {}
+
+    sqs_client.send_message_batch(["message1"], deduplication_ids=["id1"])
+
+    assert sqs_client._client.send_message_batch.call_args.kwargs["Entries"] == [{"Id": "0", "MessageBody": "message1"}]
+
+
+@patch("src.aws.sqs.sqs_client.get_sqs_rate_limiter")
+@patch("src.aws.sqs.sqs_client.get_logger")
+def test_send_message_batch_goes_through_the_rate_limiter(get_logger, get_sqs_rate_limiter, settings, metrics):
+    sqs_client = SQSClient("http://localhost:4566/queue", settings)
+    sqs_client._client = MagicMock()
+    sqs_client._client.send_message_batch.side_effect = [
+        {"Failed": [{"Id": "1", "SenderFault": False, "Code": "InternalError"}]},
+        {}
+    ]
+
+    sqs_client.send_message_batch(["message1", "message2"])
+
+    assert get_sqs_rate_limiter.return_value.acquire.call_args_list == [call(2), call(1)]
+    get_sqs_rate_limiter.return_value.throttled.assert_not_called()
+
+
+@patch("src.aws.sqs.sqs_client.get_sqs_rate_limiter")
+@patch("src.aws.sqs.sqs_client.get_logger")
+def test_send_message_batch_reports_throttled_requests(get_logger, get_sqs_rate_limiter, settings, metrics):
+    sqs_client = SQSClient("http://localhost:4566/queue", settings)
+    sqs_client._client = MagicMock()
+    sqs_client._client.send_message_batch.side_effect = [
+        ClientError({"Error": {"Code": "AWS.SimpleQueueService.RequestThrottled", "Message": "Throttled"}}, "SendMessageBatch"),
+        {"Failed": [{"Id": "0", "SenderFault": False, "Code": "RequestThrottled"}]},
+        {}
+    ]
+
+    assert sqs_client.send_message_batch(["message1"]) == []
+    assert get_sqs_rate_limiter.return_value.throttled.call_count == 2
+
+
+@patch("src.aws.sqs.sqs_client.get_logger")
+def test_send_message_batch_retries_only_failed_entries(get_logger, settings, metrics, sleep):
+    sqs_client = SQSClient("http://localhost:4566/queue", settings)
+    sqs_client._client = MagicMock()
+    sqs_client._client.send_message_batch.side_effect = [
+        {"Successful": [{"Id": "0"}], "Failed": [{"Id": "1", "SenderFault": False}, {"Id": "2", "SenderFault": False}]},
+        {"Successful": [{"Id": "2"}], "Failed": [{"Id": "1", "SenderFault": False}]},
+        {"Successful": [{"Id": "1"}]}
+    ]
+
+    failed = sqs_client.send_message_batch(["message1", "message2", "message3"])
+
+    assert failed == []
+    assert sqs_client._client.send_message_batch.call_args_list[1].kwargs["Entries"] == [
+        {"Id": "1", "MessageBody": "message2"},
+        {"Id": "2", "MessageBody": "message3"}
+    ]
+    assert sqs_client._client.send_message_batch.call_args_list[2].kwargs["Entries"] == [
+        {"Id": "1", "MessageBody": "message2"}
+    ]
+    assert sleep.call_count == 2
+    assert all(0 <= call.args[0] <= 1 for call in sleep.call_args_list)
+    metrics["sqs_client_entries_retried"].inc.assert_any_call(2)
+    metrics["sqs_client_entries_retried"].inc.assert_any_call(1)
+    assert "sqs_client_entries_failed" not in metrics
+
+
+@patch("src.aws.sqs.sqs_client.get_logger")
+def test_send_message_batch_gives_up_after_max_retries(get_logger, settings, metrics, sleep):
+    sqs_client = SQSClient("http://localhost:4566/queue", settings)
+    sqs_client._client = MagicMock()
+    sqs_client._client.send_message_batch.return_value = {
+        "Successful": [{"Id": "0"}],
+        "Failed": [{"Id": "1", "SenderFault": False}]
+    }
+
+    failed = sqs_client.send_message_batch(["message1", "message2"])
+
+    assert failed == [1]
+    assert sqs_client._client.send_message_batch.call_count == 3
+    assert sleep.call_count == 2
+    metrics["sqs_client_entries_failed"].inc.assert_called_once_with(1)
+    get_logger.return_value.error.assert_called_with(
+        "Messages not sent to queue http://localhost:4566/queue",
+        extra={"messages": ["message2"]}
+    )
+
+
+@patch("src.aws.sqs.sqs_client.get_logger")
+def test_send_message_batch_does_not_retry_sender_fault(get_logger, settings, metrics, sleep):
+    sqs_client = SQSClient("http://localhost:4566/queue", settings)
+    sqs_client._client = MagicMock()
+    sqs_client._client.send_message_batch.return_value = {
+        "Successful": [{"Id": "1"}],
+        "Failed": [{"Id": "0", "SenderFault": True, "Code": "InvalidParameterValue"}]
+    }
+
+    failed = sqs_client.send_message_batch(["", "message2"])
+
+    assert failed == [0]
+    sqs_client._client.send_message_batch.assert_called_once()
+    sleep.assert_not_called()
+    metrics["sqs_client_entries_failed"].inc.assert_called_once_with(1)
+
+
+@patch("src.aws.sqs.sqs_client.get_logger")
+def test_send_message_batch_retries_whole_batch_on_exception(get_logger, settings, metrics, sleep):
+    sqs_client = SQSClient("http://localhost:4566/queue", settings)
+    sqs_client._client = MagicMock()
+    sqs_client._client.send_message_batch.side_effect = [
+        EndpointConnectionError(endpoint_url="http://localhost:4566"),
+        {"Successful": [{"Id": "0"}, {"Id": "1"}]}
+    ]
+
+    failed = sqs_client.send_message_batch(["message1", "message2"])
+
+    assert failed == []
+    assert sqs_client._client.send_message_batch.call_count == 2
+    metrics["sqs_client_entries_retried"].inc.assert_called_once_with(2)
+    metrics["sqs_client_entries_sent"].inc.assert_called_once_with(2)
+
+
+@patch("src.aws.sqs.sqs_client.get_logger")
+def test_send_message_batch_fails_at_once_on_non_retryable_exception(get_logger, settings, metrics, sleep):
+    sqs_client = SQSClient("http://localhost:4566/queue", settings)
+    sqs_client._client = MagicMock()
+    sqs_client._client.send_message_batch.side_effect = ClientError(
+        {"Error": {"Code": "AccessDenied", "Message": "Access denied"}, "ResponseMetadata": {"HTTPStatusCode": 403}},
+        "SendMessageBatch"
+    )
+
+    failed = sqs_client.send_message_batch(["message1", "message2"])
+
+    assert failed == [0, 1]
+    sqs_client._client.send_message_batch.assert_called_once()
+    sleep.assert_not_called()
+    assert "sqs_client_entries_retried" not in metrics
+    metrics["sqs_client_entries_failed"].inc.assert_called_once_with(2)
+
+
+@pytest.mark.parametrize("error, retryable", [
+    (ClientError({"Error": {"Code": "ThrottlingException"}}, "SendMessageBatch"), True),
+    (ClientError({"Error": {"Code": "InternalError"}, "ResponseMetadata": {"HTTPStatusCode": 500}}, "SendMessageBatch"), True),
+    (ClientError({"Error": {"Code": "ServiceUnavailable"}, "ResponseMetadata": {"HTTPStatusCode": 503}}, "SendMessageBatch"), True),
+    (EndpointConnectionError(endpoint_url="http://localhost:4566"), True),
+    (ConnectTimeoutError(endpoint_url="http://localhost:4566"), True),
+    (ReadTimeoutError(endpoint_url="http://localhost:4566"), True),
+    (ClientError({"Error": {"Code": "AccessDenied"}, "ResponseMetadata": {"HTTPStatusCode": 403}}, "SendMessageBatch"), False),
+    (ClientError({"Error": {"Code": "AWS.SimpleQueueService.NonExistentQueue"}, "ResponseMetadata": {"HTTPStatusCode": 400}}, "SendMessageBatch"), False),
+    (Exception("error"), False)
+])
+def test_is_retryable_error(error, retryable):
+    assert is_retryable_error(error) is retryable
+
+
+@patch("src.aws.sqs.sqs_client.get_logger")
+def test_send_message_batch_respects_retry_budget(get_logger, settings, metrics, sleep):
+    settings.sqs_batch_retry_budget_max_tokens = 1
+    sqs_client = SQSClient("http://localhost:4566/queue", settings)
+    sqs_client._client = MagicMock()
+    sqs_client._client.send_message_batch.side_effect = [
+        {"Failed": [{"Id": "0", "SenderFault": False}, {"Id": "1", "SenderFault": False}]},
+        {"Successful": [{"Id": "0"}]}
+    ]
+
+    failed = sqs_client.send_message_batch(["message1", "message2"])
+
+    assert failed == [1]
+    assert sqs_client._client.send_message_batch.call_args_list[1].kwargs["Entries"] == [
+        {"Id": "0", "MessageBody": "message1"}
+    ]
+    metrics["sqs_client_entries_retried"].inc.assert_called_once_with(1)
+    metrics["sqs_client_entries_failed"].inc.assert_called_once_with(1)
+
+
+@patch("src.aws.sqs.sqs_client.get_logger")
+@pytest.mark.asyncio
+async def test_send_message_batch_async(get_logger, settings):
+    sqs_client = SQSClient("http://localhost:4566/queue", settings)
+    sqs_client._client = MagicMock()
+    sqs_client._executor = ThreadPoolExecutor(max_workers=1)
+
+    await sqs_client.send_message_batch_async(["message1", "message2"])
+
+    sqs_client._client.send_message_batch.assert_called_with(
+        QueueUrl="http://localhost:4566/queue",
+        Entries=[
+            {"Id": "0", "MessageBody": "message1"},
+            {"Id": "1", "MessageBody": "message2"}
+        ]
+    )
+    sqs_client.close()
+
+
+@patch("src.aws.sqs.sqs_client.get_logger")
+@pytest.mark.asyncio
+async def test_send_message_batch_async_with_message_attributes(get_logger, settings):
+    sqs_client = SQSClient("http://localhost:4566/queue", settings)
+    sqs_client._client = MagicMock()
+    sqs_client._executor = ThreadPoolExecutor(max_workers=1)
+    attributes = {"MessageType": {"DataType": "String", "StringValue": "claim-check"}}
+
+    await sqs_client.send_message_batch_async(["message1", "message2"], attributes)
+
+    sqs_client._client.send_message_batch.assert_called_with(
+        QueueUrl="http://localhost:4566/queue",
+        Entries=[
+            {"Id": "0", "MessageBody": "message1", "MessageAttributes": attributes},
+            {"Id": "1", "MessageBody": "message2", "MessageAttributes": attributes}
+        ]
+    )
+    sqs_client.close()
+
+
+@patch("src.aws.sqs.sqs_client.get_logger")
+@pytest.mark.asyncio
+async def test_send_message_batch_async_to_another_queue(get_logger, settings):
+    sqs_client = SQSClient("http://localhost:4566/queue", settings)
+    sqs_client._client = MagicMock()
+    sqs_client._client.send_message_batch.return_value = {}
+    sqs_client._executor = ThreadPoolExecutor(max_workers=1)
+
+    await sqs_client.send_message_batch_async(["message1"], queue_url="http://localhost:4566/queue-1")
+
+    sqs_client._client.send_message_batch.assert_called_with(
+        QueueUrl="http://localhost:4566/queue-1",
+        Entries=[{"Id": "0", "MessageBody": "message1"}]
+    )
+    get_logger.return_value.debug.assert_called_with(
+        "Messages sent to queue http://localhost:4566/queue-1",
+        extra={"messages": ["message1"]}
+    )
+    sqs_client.close()
+
+
+@patch("src.aws.sqs.sqs_client.get_logger")
+@pytest.mark.asyncio
+async def test_send_message_batch_async_no_client(get_logger, settings):
+    sqs_client = SQSClient("http://localhost:4566/queue", settings)
+
+    with pytest.raises(SQSClientException) as exc:
+        await sqs_client.send_message_batch_async(["message1"])
+
+    assert str(exc.value) == "SQS client not created"
 
 
 @patch("src.aws.sqs.sqs_client.get_logger")
@@ -139,3 +500,21 @@ def test_validate_client_no_client(get_logger, settings):
 
     assert str(exc.value) == "SQS client not created"
     get_logger.return_value.error.assert_called_with("SQS client not created")
+
+
+@patch("src.aws.sqs.sqs_client.get_aws_client_factory")
+@patch("src.aws.sqs.sqs_client.get_settings")
+def test_get_sqs_client(get_settings, get_aws_client_factory):
+    get_sqs_client.cache_clear()
+    get_settings.return_value.sqs_queue_url = "http://localhost:4566/queue"
+    get_settings.return_value.max_sqs_in_flight_sends = 2
+
+    try:
+        sqs_client = get_sqs_client()
+
+        assert sqs_client.queue_url == "http://localhost:4566/queue"
+        assert sqs_client._client == get_aws_client_factory.return_value.client.return_value
+        assert get_sqs_client() is sqs_client
+    finally:
+        get_sqs_client().close()
+        get_sqs_client.cache_clear()
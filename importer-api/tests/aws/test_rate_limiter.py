@@ -0,0 +1,215 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from botocore.exceptions import ClientError
+from src.aws.rate_limiter import SQSRateLimiter, TokenBucket, get_sqs_rate_limiter, is_throttling_error
+
+
+@pytest.fixture
+def clock():
+    with patch("src.aws.rate_limiter.monotonic") as _clock:
+        _clock.return_value = 100.0
+        yield _clock
+
+
+@pytest.fixture(autouse=True)
+def sleep():
+    with patch("src.aws.rate_limiter.sleep") as _sleep:
+        yield _sleep
+
+
+@pytest.fixture
+def metrics():
+    _metrics = {}
+    with patch("src.aws.rate_limiter.METRICS") as mock_metrics:
+        mock_metrics.get.side_effect = lambda name, labels={}: _metrics.setdefault(name, MagicMock())
+        yield _metrics
+
+
+def test_token_bucket_starts_full(clock):
+    bucket = TokenBucket(100)
+
+    assert bucket.tokens == 10
+    assert bucket.take(10) == 0
+
+
+def test_token_bucket_holds_at_least_one_token(clock):
+    bucket = TokenBucket(2)
+
+    assert bucket.tokens == 1
+    assert bucket.take(1) == 0
+    assert bucket.take(1) == 0.5
+
+
+def test_token_bucket_waits_for_the_missing_tokens(clock):
+    bucket = TokenBucket(100)
+    bucket.take(10)
+
+    assert bucket.take(50) == 0.5
+    assert bucket.take(50) == 1.0
+
+
+def test_token_bucket_refills(clock):
+    bucket = TokenBucket(100)
+    bucket.take(10)
+
+    clock.return_value += 0.05
+    assert bucket.tokens == pytest.approx(5)
+    clock.return_value += 10
+    assert bucket.tokens == 10
+
+
+def test_token_bucket_set_rate(clock):
+    bucket = TokenBucket(100)
+
+    bucket.set_rate(40)
+
+    assert bucket.rate == 40
+    assert bucket.max_rate == 100
+    assert bucket.tokens == 4
+
+
+def test_rate_limiter_without_limits(clock, sleep, metrics):
+    limiter = SQSRateLimiter(0, 0)
+
+    assert limiter.acquire(10) == 0
+    sleep.assert_not_called()
+    assert metrics == {}
+
+
+def test_rate_limiter_limits_requests(clock, sleep, metrics):
+    limiter = SQSRateLimiter(2, 0)
+
+    assert limiter.acquire(10) == 0
+    assert limiter.acquire(10) == 0.5
+    sleep.assert_called_once_with(0.5)
+    metrics["sqs_rate_limiter_wait_seconds"].observe.assert_called_with(0.5)
+
+
+def test_rate_limiter_limits_messages(clock, sleep, metrics):
+    limiter = SQSRateLimiter(100, 100)
+
+    assert limiter.acquire(10) == 0
+    assert limiter.acquire(50) == 0.5
+
+
+def test_rate_limiter_exports_tokens_and_rate(clock):
+    with patch("src.aws.rate_limiter.METRICS") as mock_metrics:
+        SQSRateLimiter(2, 10)
+
+    mock_metrics.get.assert_any_call("sqs_rate_limiter_tokens", {"bucket": "requests"})
+    mock_metrics.get.assert_any_call("sqs_rate_limiter_rate", {"bucket": "messages"})
+
+
+def test_rate_limiter_throttled_counts_the_event(clock, metrics):
+    limiter = SQSRateLimiter(10, 100)
+
+    limiter.throttled()
+
+    metrics["sqs_rate_limiter_throttle_events"].inc.assert_called_once_with()
+    assert limiter._buckets["requests"].rate == 10
+
+
+def test_adaptive_rate_limiter_lowers_the_rates(clock, metrics):
+    limiter = SQSRateLimiter(10, 100, adaptive=True)
+
+    limiter.throttled()
+
+    assert limiter._buckets["requests"].rate == 5
+    assert limiter._buckets["messages"].rate == 50
+
+
+def test_adaptive_rate_limiter_ignores_throttles_within_the_cooldown(clock, metrics):
+    limiter = SQSRateLimiter(10, 0, adaptive=True)
+
+    limiter.throttled()
+    clock.return_value += 0.5
+    limiter.throttled()
+
+    assert limiter._buckets["requests"].rate == 5
+    assert metrics["sqs_rate_limiter_throttle_events"].inc.call_count == 2
+
+
+def test_adaptive_rate_limiter_minimum_rate(clock, metrics):
+    limiter = SQSRateLimiter(10, 0, adaptive=True)
+
+    for _ in range(10):
+        limiter.throttled()
+        clock.return_value += 1
+
+    assert limiter._buckets["requests"].rate == 1
+
+
+def test_adaptive_rate_limiter_recovers(clock, metrics):
+    limiter = SQSRateLimiter(10, 0, adaptive=True)
+    limiter.throttled()
+
+    clock.return_value += 2
+    limiter.acquire(1)
+    assert limiter._buckets["requests"].rate == 7
+
+    clock.return_value += 10
+    limiter.acquire(1)
+    assert limiter._buckets["requests"].rate == 10
+
+
+@pytest.mark.parametrize("code, throttling", [
+    ("AWS.SimpleQueueService.RequestThrottled", True),
+    ("ThrottlingException", True),
+    ("InvalidParameterValue", False)
+])
+def test_is_throttling_error(code, throttling):
+    error = ClientError({"Error": {"Code": code, "Message": "message"}}, "SendMessageBatch")
+
+    assert is_throttling_error(error) == throttling
+
+
+def test_is_throttling_error_without_response():
+    assert not is_throttling_error(Exception("error"))
+
+
+def test_rate_limiter_counts_throttle_events(clock, metrics):
+    limiter = SQSRateLimiter(10, 0)
+
+    limiter.throttled()
+    limiter.throttled()
+
+    assert limiter.throttle_events == 2
+
+
+def test_rate_limiter_share(clock, metrics):
+    limiter = SQSRateLimiter(100, 1000, adaptive=True)
+
+    limiter.set_share(0.25)
+
+    assert limiter._buckets["requests"].rate == 25
+    assert limiter._buckets["messages"].rate == 250
+
+    limiter.throttled()
+    limiter.set_share(1.0)
+
+    assert limiter._buckets["requests"].max_rate == 100
+    assert limiter._buckets["requests"].rate == 50
+    assert limiter._buckets["messages"].rate == 500
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+@patch("src.aws.rate_limiter.get_settings")
+def test_get_sqs_rate_limiter_has_the_full_rates(get_settings, workers, metrics):
+    """
+    Only the pool workers, and the API process while they run ranges, get a share
+    of the rates, so an import that is not sharded sends at the full rates.
+    """
+    get_sqs_rate_limiter.cache_clear()
+    get_settings.return_value.csv_process_workers = workers
+    get_settings.return_value.sqs_rate_limit_requests_per_second = 100
+    get_settings.return_value.sqs_rate_limit_messages_per_second = 1000
+    get_settings.return_value.sqs_rate_limit_adaptive_enabled = True
+
+    try:
+        limiter = get_sqs_rate_limiter()
+    finally:
+        get_sqs_rate_limiter.cache_clear()
+
+    assert limiter._buckets["requests"].rate == 100
+    assert limiter._buckets["messages"].rate == 1000
+    assert limiter.adaptive
@@ -0,0 +1,51 @@
+from unittest.mock import patch
+from src.aws.retry import RetryBudget, backoff_delay
+
+
+@patch("src.aws.retry.random.uniform")
+def test_backoff_delay(uniform):
+    assert backoff_delay(3, 0.1, 5) == uniform.return_value
+    uniform.assert_called_once_with(0, 0.8)
+
+
+@patch("src.aws.retry.random.uniform")
+def test_backoff_delay_is_capped(uniform):
+    backoff_delay(10, 0.1, 5)
+    uniform.assert_called_once_with(0, 5)
+
+
+def test_backoff_delay_range():
+    for attempt in range(10):
+        assert 0 <= backoff_delay(attempt, 0.1, 1) <= 1
+
+
+def test_retry_budget_starts_full():
+    budget = RetryBudget(0.2, 10)
+    assert budget.tokens == 10
+
+
+def test_retry_budget_withdraw():
+    budget = RetryBudget(0.2, 3)
+
+    assert budget.withdraw(2) == 2
+    assert budget.withdraw(2) == 1
+    assert budget.withdraw(1) == 0
+    assert budget.tokens == 0
+
+
+def test_retry_budget_deposit():
+    budget = RetryBudget(0.5, 3)
+    budget.withdraw(3)
+
+    budget.deposit(4)
+
+    assert budget.tokens == 2
+    assert budget.withdraw(5) == 2
+
+
+def test_retry_budget_deposit_is_capped():
+    budget = RetryBudget(0.5, 3)
+
+    budget.deposit(100)
+
+    assert budget.tokens == 3
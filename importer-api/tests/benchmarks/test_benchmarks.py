@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+import pytest
+
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.mark.parametrize("benchmark, args", [
+    ("bench_block_validation", ["200", "50"]),
+    ("bench_claim_check", ["200", "50"]),
+    ("bench_compressed_upload", ["200", "1000"]),
+    ("bench_delta_filter", ["200", "10"]),
+    ("bench_fair_send", ["200", "20", "1"]),
+    ("bench_local_import", ["200", "1000"]),
+    ("bench_sharded_ingestion", ["2000", "2"]),
+    ("bench_sqs_rate_limit", ["200", "1000"]),
+    ("bench_sqs_send_throughput", ["200", "1"]),
+    ("bench_stream_upload", ["200", "1000"]),
+    ("bench_streaming_memory", ["1"]),
+])
+def test_benchmark_runs_on_a_small_input(benchmark, args):
+    """
+    Each benchmark runs in its own process, as documented in its usage, so the
+    settings and clients it changes do not leak into the other tests.
+    """
+    result = subprocess.run(
+        [sys.executable, "-m", f"benchmarks.{benchmark}", *args],
+        cwd=SERVICE_DIR,
+        env={**os.environ, "PYTHONPATH": "."},
+        capture_output=True,
+        timeout=120
+    )
+
+    assert result.returncode == 0, result.stderr.decode(errors="replace")
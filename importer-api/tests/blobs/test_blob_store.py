@@ -0,0 +1,58 @@
+import os
+from unittest.mock import MagicMock, patch
+from src.blobs.blob_store import LocalBlobStore, S3BlobStore, get_blob_store
+
+
+def test_local_blob_store_put(tmp_path):
+    store = LocalBlobStore(str(tmp_path / "blobs"))
+
+    store.put("chunks/key.csv", b"line1\nline2")
+
+    assert (tmp_path / "blobs" / "chunks" / "key.csv").read_bytes() == b"line1\nline2"
+    assert os.listdir(tmp_path / "blobs" / "chunks") == ["key.csv"]
+
+
+def test_local_blob_store_put_replaces_the_blob(tmp_path):
+    store = LocalBlobStore(str(tmp_path))
+
+    store.put("key.csv", b"line1")
+    store.put("key.csv", b"line2")
+
+    assert (tmp_path / "key.csv").read_bytes() == b"line2"
+
+
+def test_s3_blob_store_put():
+    client = MagicMock()
+
+    S3BlobStore("bucket", client).put("chunks/key.csv", b"line1")
+
+    client.put_object.assert_called_once_with(Bucket="bucket", Key="chunks/key.csv", Body=b"line1")
+
+
+@patch("src.blobs.blob_store.get_aws_client_factory")
+@patch("src.blobs.blob_store.get_settings")
+def test_get_blob_store(get_settings, get_aws_client_factory):
+    get_settings.return_value.blob_store_bucket = ""
+    get_settings.return_value.blob_store_dir = "/var/lib/blobs"
+    get_blob_store.cache_clear()
+
+    store = get_blob_store()
+
+    assert isinstance(store, LocalBlobStore)
+    assert store.directory == "/var/lib/blobs"
+    get_blob_store.cache_clear()
+
+
+@patch("src.blobs.blob_store.get_aws_client_factory")
+@patch("src.blobs.blob_store.get_settings")
+def test_get_blob_store_with_bucket(get_settings, get_aws_client_factory):
+    get_settings.return_value.blob_store_bucket = "bucket"
+    get_settings.return_value.s3_endpoint_url = "http://localstack:4566"
+    get_blob_store.cache_clear()
+
+    store = get_blob_store()
+
+    assert isinstance(store, S3BlobStore)
+    assert store.bucket == "bucket"
+    get_aws_client_factory.return_value.client.assert_called_once_with("s3", "http://localstack:4566")
+    get_blob_store.cache_clear()
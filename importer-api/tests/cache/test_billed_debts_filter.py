@@ -0,0 +1,78 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from src.cache.billed_debts_filter import BilledDebtsFilter, create_billed_debts_filter
+
+
+@pytest.fixture
+def settings():
+    _settings = MagicMock()
+    _settings.redis_host = "host"
+    _settings.redis_port = 1234
+    _settings.redis_db = 0
+    _settings.redis_connect_timeout = 5
+    _settings.redis_operation_timeout = 5
+    _settings.billed_debts_filter_chunk_size = 2
+    return _settings
+
+
+@pytest.fixture
+def pipeline():
+    _pipeline = MagicMock()
+    _pipeline.execute = AsyncMock()
+    return _pipeline
+
+
+@pytest.fixture
+def client(pipeline):
+    _client = MagicMock()
+    _client.pipeline.return_value = pipeline
+    _client.aclose = AsyncMock()
+    return _client
+
+
+@pytest.mark.asyncio
+async def test_billed_block_reads_the_keys_in_chunks_of_one_pipeline(client, pipeline):
+    pipeline.execute.return_value = [[b"1", None], [None]]
+    billed_filter = BilledDebtsFilter(client, 2)
+
+    billed = await billed_filter.billed_block(["a", "b", "c"])
+
+    assert billed.tolist() == [True, False, False]
+    client.pipeline.assert_called_once_with(transaction=False)
+    assert [call.args for call in pipeline.mget.call_args_list] == [
+        (["processed:a", "processed:b"],),
+        (["processed:c"],)
+    ]
+    pipeline.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_billed_block_without_debt_ids(client):
+    billed_filter = BilledDebtsFilter(client, 2)
+
+    billed = await billed_filter.billed_block([])
+
+    assert billed.tolist() == []
+    client.pipeline.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_close(client):
+    await BilledDebtsFilter(client, 2).close()
+
+    client.aclose.assert_awaited_once()
+
+
+@patch("src.cache.billed_debts_filter.Redis")
+def test_create_billed_debts_filter(mock_redis, settings):
+    billed_filter = create_billed_debts_filter(settings)
+
+    assert billed_filter.client == mock_redis.return_value
+    assert billed_filter.chunk_size == 2
+    mock_redis.assert_called_once_with(
+        host="host",
+        port=1234,
+        db=0,
+        socket_connect_timeout=5,
+        socket_timeout=5
+    )
@@ -0,0 +1,17 @@
+import pytest
+from pydantic import ValidationError
+from src.config.settings import Settings
+
+
+@pytest.mark.parametrize("strategy", ["debt_id", "fixed"])
+def test_fifo_message_group_strategy(monkeypatch, strategy):
+    monkeypatch.setenv("SQS_FIFO_MESSAGE_GROUP_STRATEGY", strategy)
+
+    assert Settings().sqs_fifo_message_group_strategy == strategy
+
+
+def test_unknown_fifo_message_group_strategy(monkeypatch):
+    monkeypatch.setenv("SQS_FIFO_MESSAGE_GROUP_STRATEGY", "other")
+
+    with pytest.raises(ValidationError):
+        Settings()
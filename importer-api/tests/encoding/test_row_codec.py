@@ -0,0 +1,87 @@
+import base64
+import pytest
+from src.encoding.row_codec import ROW_HEADER, decode_row, encode_fields, encode_row, join_row, split_row
+
+ROW = "John Doe,11111111111,johndoe@kanastra.com.br,1000000.00,2022-10-12,1adb6ccf-ff16-467f-bea7-5f05d494280f"
+
+
+def test_round_trip():
+    assert decode_row(encode_row(ROW)) == (
+        "John Doe",
+        11111111111,
+        "johndoe@kanastra.com.br",
+        1000000.00,
+        "2022-10-12",
+        "1adb6ccf-ff16-467f-bea7-5f05d494280f"
+    )
+
+
+def test_round_trip_of_a_name_with_commas_and_accents():
+    encoded_row = encode_fields("Doe, João", "1", "joao@kanastra.com.br", "10.5", "2022-10-12", "1ADB6CCF-FF16-467F-BEA7-5F05D494280F")
+
+    assert decode_row(encoded_row) == (
+        "Doe, João", 1, "joao@kanastra.com.br", 10.5, "2022-10-12", "1adb6ccf-ff16-467f-bea7-5f05d494280f"
+    )
+
+
+def test_round_trip_of_a_quoted_name_with_commas():
+    row = '"Doe, John",11111111111,johndoe@kanastra.com.br,1000000.00,2022-10-12,1adb6ccf-ff16-467f-bea7-5f05d494280f'
+
+    assert decode_row(encode_row(row))[0] == "Doe, John"
+
+
+@pytest.mark.parametrize("row, fields", [
+    ("John Doe,1", ["John Doe", "1"]),
+    ('"Doe, John",1', ["Doe, John", "1"]),
+    ('"John ""JD"" Doe",1', ['John "JD" Doe', "1"]),
+    ('John "JD" Doe,1', ['John "JD" Doe', "1"]),
+])
+def test_split_row(row, fields):
+    assert split_row(row) == fields
+
+
+@pytest.mark.parametrize("row", ['"Doe, John,1', '"Doe" John,1'])
+def test_split_row_with_unbalanced_quotes(row):
+    with pytest.raises(ValueError):
+        split_row(row)
+
+
+@pytest.mark.parametrize("fields", [
+    ["John Doe", "1"],
+    ["Doe, John", "1"],
+    ['John "JD" Doe', "1"],
+])
+def test_join_row_is_split_back(fields):
+    assert split_row(join_row(fields)) == fields
+
+
+def test_encode_row_is_compact_text():
+    encoded_row = encode_row(ROW)
+
+    assert "\n" not in encoded_row
+    assert "," not in encoded_row
+    assert len(base64.b64decode(encoded_row)) == ROW_HEADER.size + len("John Doe") + len("johndoe@kanastra.com.br")
+
+
+@pytest.mark.parametrize("row", [
+    "John Doe,11111111111",
+    '"Doe, John,11111111111,johndoe@kanastra.com.br,1000.00,2022-10-12,1adb6ccf-ff16-467f-bea7-5f05d494280f',
+    "John Doe,abc,johndoe@kanastra.com.br,1000.00,2022-10-12,1adb6ccf-ff16-467f-bea7-5f05d494280f",
+    "John Doe,123456789012345678901,johndoe@kanastra.com.br,1000.00,2022-10-12,1adb6ccf-ff16-467f-bea7-5f05d494280f",
+    "John Doe,11111111111,johndoe@kanastra.com.br,1000.00,2022-1-12,1adb6ccf-ff16-467f-bea7-5f05d494280f",
+    "John Doe,11111111111,johndoe@kanastra.com.br,1000.00,2022-10-12,not-an-uuid",
+])
+def test_encode_invalid_row(row):
+    with pytest.raises(ValueError):
+        encode_row(row)
+
+
+@pytest.mark.parametrize("encoded_row", [
+    "not base64!",
+    base64.b64encode(b"short").decode(),
+    encode_row(ROW)[:-4],
+    base64.b64encode(base64.b64decode(encode_row(ROW)) + b"extra").decode(),
+])
+def test_decode_invalid_row(encoded_row):
+    with pytest.raises(ValueError):
+        decode_row(encoded_row)
@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+from src.fingerprints.fingerprint_store import (
+    STORE_HEADER,
+    FingerprintStore,
+    fingerprint,
+    fingerprint_part_path,
+    fingerprint_store_path,
+    merge_fingerprint_stores,
+    open_fingerprint_store,
+    write_fingerprint_store
+)
+
+
+def keys_of(*values):
+    return np.array(values, dtype=np.uint64)
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / "fingerprints" / "source.fingerprints")
+
+
+def test_write_and_read_store(store_path):
+    write_fingerprint_store(store_path, keys_of(3, 1, 2), keys_of(30, 10, 20))
+
+    store = FingerprintStore(store_path)
+
+    assert store.count == 3
+    assert store.keys.tolist() == [1, 2, 3]
+    assert store.fingerprints.tolist() == [10, 20, 30]
+    store.close()
+
+
+def test_write_store_keeps_the_first_fingerprint_of_a_repeated_key(store_path):
+    write_fingerprint_store(store_path, keys_of(1, 1), keys_of(10, 11))
+
+    store = FingerprintStore(store_path)
+
+    assert store.keys.tolist() == [1]
+    assert store.fingerprints.tolist() == [10]
+    store.close()
+
+
+def test_unchanged_block(store_path):
+    write_fingerprint_store(store_path, keys_of(1, 2, 3), keys_of(10, 20, 30))
+    store = FingerprintStore(store_path)
+
+    unchanged = store.unchanged_block(keys_of(1, 2, 4, 0), keys_of(10, 21, 40, 0))
+
+    assert unchanged.tolist() == [True, False, False, False]
+    store.close()
+
+
+def test_unchanged_block_on_empty_store(store_path):
+    write_fingerprint_store(store_path, keys_of(), keys_of())
+    store = FingerprintStore(store_path)
+
+    assert store.unchanged_block(keys_of(1), keys_of(10)).tolist() == [False]
+    store.close()
+
+
+def test_invalid_store(store_path, tmp_path):
+    path = tmp_path / "invalid.fingerprints"
+    path.write_bytes(STORE_HEADER.pack(b"FPSTORE1", 2) + bytes(8))
+
+    with pytest.raises(ValueError):
+        FingerprintStore(str(path))
+
+
+def test_open_fingerprint_store(store_path):
+    assert open_fingerprint_store(store_path) is None
+
+    write_fingerprint_store(store_path, keys_of(1), keys_of(10))
+    store = open_fingerprint_store(store_path)
+
+    assert store.count == 1
+    store.close()
+
+
+def test_merge_fingerprint_stores(store_path, tmp_path):
+    first_path = str(tmp_path / "first.part")
+    second_path = str(tmp_path / "second.part")
+    write_fingerprint_store(first_path, keys_of(3, 1), keys_of(30, 10))
+    write_fingerprint_store(second_path, keys_of(2), keys_of(20))
+
+    merge_fingerprint_stores([first_path, second_path], store_path)
+
+    store = FingerprintStore(store_path)
+    assert store.keys.tolist() == [1, 2, 3]
+    assert store.fingerprints.tolist() == [10, 20, 30]
+    store.close()
+
+
+def test_fingerprint():
+    fingerprints = fingerprint(["a", "b", "a"])
+
+    assert fingerprints.dtype == np.uint64
+    assert fingerprints[0] == fingerprints[2]
+    assert fingerprints[0] != fingerprints[1]
+    assert fingerprint([]).tolist() == []
+
+
+def test_fingerprint_paths():
+    settings = MagicMock()
+    settings.import_fingerprints_dir = "/fingerprints"
+
+    assert fingerprint_store_path(settings, "source") == "/fingerprints/source.fingerprints"
+    assert fingerprint_part_path(settings, "source", "import-id", 12) == "/fingerprints/source.import-id.12.fingerprints.part"
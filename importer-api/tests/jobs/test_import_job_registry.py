@@ -0,0 +1,52 @@
+from unittest.mock import patch
+from src.jobs.import_job_registry import ImportJobRegistry, get_import_job_registry
+from src.models.import_job import ImportJobStatus
+
+
+def test_create_and_get():
+    registry = ImportJobRegistry(2)
+
+    job = registry.create("import-1", 100, 10)
+
+    assert registry.get("import-1") == job
+    assert job.total_bytes == 100
+    assert job.bytes_processed == 10
+    assert registry.get("unknown") is None
+
+
+def test_evicts_the_oldest_finished_job():
+    registry = ImportJobRegistry(2)
+    registry.create("import-1", 100)
+    registry.create("import-2", 100).finish(ImportJobStatus.COMPLETED)
+
+    registry.create("import-3", 100)
+
+    assert len(registry) == 2
+    assert registry.get("import-1") is not None
+    assert registry.get("import-2") is None
+
+
+def test_evicts_the_oldest_job_when_none_finished():
+    registry = ImportJobRegistry(2)
+    registry.create("import-1", 100)
+    registry.create("import-2", 100)
+
+    registry.create("import-3", 100)
+
+    assert registry.get("import-1") is None
+    assert registry.get("import-2") is not None
+    assert registry.get("import-3") is not None
+
+
+@patch("src.jobs.import_job_registry.get_settings")
+def test_get_import_job_registry(get_settings):
+    get_import_job_registry.cache_clear()
+    get_settings.return_value.import_jobs_max_entries = 5
+
+    try:
+        registry = get_import_job_registry()
+
+        assert registry.max_jobs == 5
+        assert get_import_job_registry() is registry
+    finally:
+        get_import_job_registry.cache_clear()
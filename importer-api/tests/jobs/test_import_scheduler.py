@@ -0,0 +1,154 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock, patch
+from src.jobs.import_scheduler import ImportScheduler, get_import_scheduler
+
+
+@pytest.fixture
+def metrics():
+    return {}
+
+
+def metrics_by_name(mock_metrics, metrics):
+    mock_metrics.get.side_effect = lambda name: metrics.setdefault(name, MagicMock())
+
+
+@patch("src.jobs.import_scheduler.METRICS")
+def test_admit_up_to_the_capacity(mock_metrics, metrics):
+    metrics_by_name(mock_metrics, metrics)
+    scheduler = ImportScheduler(max_concurrent_imports=1, queue_capacity=2)
+
+    assert scheduler.admit()
+    assert scheduler.admit()
+    assert scheduler.admit()
+    assert not scheduler.admit()
+
+    assert scheduler.admitted == 3
+    assert scheduler.queued == 3
+    assert metrics["import_scheduler_queued_imports"].inc.call_count == 3
+    metrics["import_scheduler_rejected_imports"].inc.assert_called_once()
+
+
+@patch("src.jobs.import_scheduler.METRICS")
+def test_admit_forced_over_the_capacity(mock_metrics):
+    scheduler = ImportScheduler(max_concurrent_imports=1, queue_capacity=0)
+    scheduler.admit()
+
+    assert scheduler.admit(force=True)
+    assert scheduler.admitted == 2
+
+
+@patch("src.jobs.import_scheduler.METRICS")
+def test_release(mock_metrics, metrics):
+    metrics_by_name(mock_metrics, metrics)
+    scheduler = ImportScheduler(max_concurrent_imports=1, queue_capacity=0)
+    scheduler.admit()
+
+    scheduler.release()
+
+    assert scheduler.admitted == 0
+    assert scheduler.admit()
+    metrics["import_scheduler_queued_imports"].dec.assert_called_once()
+
+
+@patch("src.jobs.import_scheduler.METRICS")
+@pytest.mark.asyncio
+async def test_run(mock_metrics, metrics):
+    metrics_by_name(mock_metrics, metrics)
+    scheduler = ImportScheduler(max_concurrent_imports=1, queue_capacity=1)
+    scheduler.admit()
+
+    async with scheduler.run():
+        assert scheduler.active == 1
+        assert scheduler.queued == 0
+
+    assert scheduler.admitted == 0
+    assert scheduler.active == 0
+    metrics["import_scheduler_queue_wait_seconds"].observe.assert_called_once()
+    metrics["import_scheduler_active_imports"].inc.assert_called_once()
+    metrics["import_scheduler_active_imports"].dec.assert_called_once()
+
+
+@patch("src.jobs.import_scheduler.METRICS")
+@pytest.mark.asyncio
+async def test_run_limits_concurrent_imports(mock_metrics):
+    scheduler = ImportScheduler(max_concurrent_imports=2, queue_capacity=5)
+    running = 0
+    max_running = 0
+
+    async def run_import():
+        nonlocal running, max_running
+        async with scheduler.run():
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    for _ in range(5):
+        scheduler.admit()
+    await asyncio.gather(*(run_import() for _ in range(5)))
+
+    assert max_running == 2
+    assert scheduler.admitted == 0
+
+
+@patch("src.jobs.import_scheduler.METRICS")
+@pytest.mark.asyncio
+async def test_run_queued_import_waits(mock_metrics):
+    scheduler = ImportScheduler(max_concurrent_imports=1, queue_capacity=1)
+    started = asyncio.Event()
+    finish = asyncio.Event()
+
+    async def first_import():
+        async with scheduler.run():
+            started.set()
+            await finish.wait()
+
+    scheduler.admit()
+    scheduler.admit()
+    first = asyncio.create_task(first_import())
+    await started.wait()
+    second = asyncio.create_task(scheduler.run().__aenter__())
+    await asyncio.sleep(0)
+
+    assert scheduler.active == 1
+    assert scheduler.queued == 1
+    assert not second.done()
+
+    finish.set()
+    await first
+    await second
+    assert scheduler.active == 1
+
+
+@patch("src.jobs.import_scheduler.METRICS")
+@pytest.mark.asyncio
+async def test_run_cancelled_while_queued(mock_metrics):
+    scheduler = ImportScheduler(max_concurrent_imports=1, queue_capacity=1)
+    scheduler.admit()
+    scheduler.admit()
+
+    async with scheduler.run():
+        waiting = asyncio.create_task(scheduler.run().__aenter__())
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+    assert scheduler.admitted == 0
+
+
+@patch("src.jobs.import_scheduler.get_settings")
+def test_get_import_scheduler(get_settings):
+    get_import_scheduler.cache_clear()
+    get_settings.return_value.max_concurrent_imports = 3
+    get_settings.return_value.import_queue_capacity = 7
+
+    try:
+        scheduler = get_import_scheduler()
+
+        assert scheduler.max_concurrent_imports == 3
+        assert scheduler.queue_capacity == 7
+        assert get_import_scheduler() is scheduler
+    finally:
+        get_import_scheduler.cache_clear()
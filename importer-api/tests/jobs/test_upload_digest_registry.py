@@ -0,0 +1,65 @@
+from unittest.mock import patch
+from src.jobs.upload_digest_registry import UploadDigestRegistry, get_upload_digest_registry
+
+
+def test_add_and_get():
+    registry = UploadDigestRegistry(2, 60)
+
+    registry.add("digest", None, "import-1")
+
+    assert registry.get("digest") == "import-1"
+    assert registry.get("unknown") is None
+
+
+def test_source_is_part_of_the_key():
+    registry = UploadDigestRegistry(2, 60)
+
+    registry.add("digest", "portfolio", "import-1")
+
+    assert registry.get("digest", "portfolio") == "import-1"
+    assert registry.get("digest") is None
+    assert registry.get("digest", "other") is None
+
+
+@patch("src.jobs.upload_digest_registry.monotonic")
+def test_digest_expires_after_the_window(monotonic):
+    registry = UploadDigestRegistry(2, 60)
+    monotonic.return_value = 100
+    registry.add("digest", None, "import-1")
+
+    monotonic.return_value = 159
+    assert registry.get("digest") == "import-1"
+
+    monotonic.return_value = 160
+    assert registry.get("digest") is None
+    assert len(registry) == 0
+
+
+def test_evicts_the_least_recently_used_digest():
+    registry = UploadDigestRegistry(2, 60)
+    registry.add("digest-1", None, "import-1")
+    registry.add("digest-2", None, "import-2")
+    registry.get("digest-1")
+
+    registry.add("digest-3", None, "import-3")
+
+    assert len(registry) == 2
+    assert registry.get("digest-1") == "import-1"
+    assert registry.get("digest-2") is None
+    assert registry.get("digest-3") == "import-3"
+
+
+@patch("src.jobs.upload_digest_registry.get_settings")
+def test_get_upload_digest_registry(get_settings):
+    get_upload_digest_registry.cache_clear()
+    get_settings.return_value.import_idempotency_max_entries = 5
+    get_settings.return_value.import_idempotency_window_seconds = 30
+
+    try:
+        registry = get_upload_digest_registry()
+
+        assert registry.max_entries == 5
+        assert registry.window_seconds == 30
+        assert get_upload_digest_registry() is registry
+    finally:
+        get_upload_digest_registry.cache_clear()
@@ -0,0 +1,151 @@
+from unittest.mock import patch
+from src.models.import_job import ImportJob, ImportJobStatus
+
+
+def test_init():
+    job = ImportJob("import-id", 100, 10)
+
+    assert job.status == ImportJobStatus.QUEUED
+    assert job.total_bytes == 100
+    assert job.bytes_processed == 10
+    assert job.rows_read == job.rows_sent == job.rows_failed == 0
+    assert not job.finished
+
+
+def test_record_read():
+    job = ImportJob("import-id", 100)
+
+    job.record_read(2, 20)
+    job.record_read(3, 50)
+
+    assert job.rows_read == 5
+    assert job.bytes_processed == 50
+
+
+def test_record_rejected():
+    job = ImportJob("import-id", 100)
+
+    job.record_rejected()
+    job.record_rejected(2)
+
+    assert job.rows_rejected == 3
+    assert job.rows_read == 0
+
+
+def test_record_duplicated():
+    job = ImportJob("import-id", 100)
+
+    job.record_duplicated()
+    job.record_duplicated(2)
+
+    assert job.rows_duplicated == 3
+
+
+def test_record_unchanged():
+    job = ImportJob("import-id", 100)
+
+    job.record_unchanged()
+    job.record_unchanged(2)
+
+    assert job.rows_unchanged == 3
+
+
+def test_record_already_billed():
+    job = ImportJob("import-id", 100)
+
+    job.record_already_billed()
+    job.record_already_billed(2)
+
+    assert job.rows_already_billed == 3
+
+
+@patch("src.models.import_job.monotonic")
+def test_rows_per_second(monotonic):
+    monotonic.side_effect = [0, 0, 0.5, 0.6, 2, 2.5]
+    job = ImportJob("import-id", 100)
+    job.start()
+
+    job.record_sent(10)
+    assert job.rows_per_second() == 0.0
+
+    job.record_sent(20, 10)
+    assert job.rows_per_second() == 20.0
+    assert job.rows_sent == 30
+    assert job.rows_failed == 10
+
+
+@patch("src.models.import_job.monotonic")
+def test_rows_per_second_goes_down_when_stuck(monotonic):
+    monotonic.side_effect = [0, 0, 2, 6]
+    job = ImportJob("import-id", 100)
+    job.start()
+    job.record_sent(40)
+
+    assert job.rows_per_second() == 0.0
+
+
+@patch("src.models.import_job.monotonic")
+def test_eta_seconds(monotonic):
+    monotonic.side_effect = [0, 0, 1, 1.5]
+    job = ImportJob("import-id", 1000)
+    job.start()
+    job.record_read(20, 200)
+    job.record_sent(10)
+
+    assert job.eta_seconds() == 9.0
+
+
+def test_eta_seconds_without_rate():
+    job = ImportJob("import-id", 1000)
+    job.record_read(20, 200)
+
+    assert job.eta_seconds() is None
+
+
+@patch("src.models.import_job.monotonic")
+def test_eta_seconds_without_total_bytes(monotonic):
+    monotonic.side_effect = [0, 0, 1, 1.5]
+    job = ImportJob("import-id", 0)
+    job.start()
+    job.record_read(20, 200)
+    job.record_sent(10)
+
+    assert job.eta_seconds() is None
+
+
+def test_finish():
+    job = ImportJob("import-id", 100)
+    job.start()
+
+    job.finish(ImportJobStatus.COMPLETED)
+
+    assert job.finished
+    assert job.finished_at is not None
+    assert job.rows_per_second() == 0.0
+    assert job.eta_seconds() is None
+
+
+def test_to_dict():
+    job = ImportJob("import-id", 100, 10)
+    job.record_read(2, 20)
+
+    job_dict = job.to_dict()
+
+    assert job_dict == {
+        "import_id": "import-id",
+        "status": ImportJobStatus.QUEUED,
+        "rows_read": 2,
+        "rows_sent": 0,
+        "rows_failed": 0,
+        "rows_rejected": 0,
+        "rows_duplicated": 0,
+        "rows_unchanged": 0,
+        "rows_already_billed": 0,
+        "rows_per_second": 0.0,
+        "bytes_processed": 20,
+        "total_bytes": 100,
+        "created_at": job.created_at.isoformat(),
+        "finished_at": None,
+        "eta_seconds": None,
+        "estimated_completion": None,
+    }
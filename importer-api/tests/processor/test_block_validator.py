@@ -0,0 +1,134 @@
+import pytest
+from src.processor.block_validator import BlockValidator
+from src.processor.exceptions.invalid_row_exception import InvalidRowException
+from src.processor.row_validator import RowValidator
+
+
+HEADER = "name,governmentId,email,debtAmount,debtDueDate,debtId"
+ROW = "John Doe,11111111111,johndoe@kanastra.com.br,1000.00,2022-10-12,1adb6ccf-ff16-467f-bea7-5f05d494280f"
+
+
+def test_validate():
+    validator = BlockValidator(RowValidator(HEADER))
+
+    mask, rows = validator.validate([HEADER, ROW, "invalid", "", ROW])
+
+    assert mask.tolist() == [False, True, False, False, True]
+    assert rows == [None, ROW, None, None, ROW]
+
+
+def test_validate_maps_columns_by_name():
+    validator = BlockValidator(RowValidator("debtId,extra,email,name,debtDueDate,debtAmount,governmentId"))
+    row = "1adb6ccf-ff16-467f-bea7-5f05d494280f,ignored,johndoe@kanastra.com.br,John Doe,2022-10-12,1000.00,11111111111"
+
+    mask, rows = validator.validate([row])
+
+    assert mask.tolist() == [True]
+    assert rows == [ROW]
+
+
+def test_validate_empty_block():
+    mask, rows = BlockValidator(RowValidator(HEADER)).validate([])
+
+    assert mask.tolist() == []
+    assert rows == []
+
+
+def test_validate_without_candidates():
+    mask, rows = BlockValidator(RowValidator(HEADER)).validate(["a,b", "c"])
+
+    assert mask.tolist() == [False, False]
+    assert rows == [None, None]
+
+
+@pytest.mark.parametrize("line, valid", [
+    (ROW, True),
+    (ROW.replace("John Doe", " "), False),
+    (ROW.replace("11111111111", "111.111.111-11"), False),
+    (ROW.replace("11111111111", ""), False),
+    (ROW.replace("11111111111", "١٢٣"), False),
+    (ROW.replace("11111111111", "²"), False),
+    (ROW.replace("johndoe@kanastra.com.br", "johndoe"), False),
+    (ROW.replace("1000.00", "1000"), True),
+    (ROW.replace("1000.00", ".5"), True),
+    (ROW.replace("1000.00", "1."), True),
+    (ROW.replace("1000.00", "."), False),
+    (ROW.replace("1000.00", "1.0.0"), False),
+    (ROW.replace("1000.00", "R$1000"), False),
+    (ROW.replace("1000.00", "nan"), False),
+    (ROW.replace("1000.00", "١٠٠٠"), False),
+    (ROW.replace("2022-10-12", "2024-02-29"), True),
+    (ROW.replace("2022-10-12", "2023-02-29"), False),
+    (ROW.replace("2022-10-12", "1900-02-29"), False),
+    (ROW.replace("2022-10-12", "2000-02-29"), True),
+    (ROW.replace("2022-10-12", "2022-04-31"), False),
+    (ROW.replace("2022-10-12", "2022-13-01"), False),
+    (ROW.replace("2022-10-12", "2022-00-10"), False),
+    (ROW.replace("2022-10-12", "2022-10-00"), False),
+    (ROW.replace("2022-10-12", "0000-10-12"), False),
+    (ROW.replace("2022-10-12", "2022/10/12"), False),
+    (ROW.replace("2022-10-12", "2022-1-012"), False),
+    (ROW.replace("2022-10-12", "12/10/2022"), False),
+    (ROW.replace("2022-10-12", "20221012"), False),
+    (ROW.replace("2022-10-12", "2022-10-12T00:00"), False),
+    (ROW.replace("1adb6ccf-ff16-467f-bea7-5f05d494280f", "1adb6ccf-ff16-467f-bea7-5f05d494280g"), False),
+    (ROW.replace("1adb6ccf-ff16-467f-bea7-5f05d494280f", "1adb6ccfff16-467f-bea7-5f05d494280f0"), False),
+    (ROW.replace("1adb6ccf-ff16-467f-bea7-5f05d494280f", "1adb6ccfff16467fbea75f05d494280f"), False),
+    (ROW.replace("1adb6ccf-ff16-467f-bea7-5f05d494280f", "{1adb6ccf-ff16-467f-bea7-5f05d494280f}"), False),
+    (ROW.replace("John Doe", "João"), True),
+    (ROW.replace("John Doe", "\u00a0"), False),
+    (ROW.replace("11111111111", "1" * 20), True),
+])
+def test_validate_agrees_with_the_row_validator(line, valid):
+    row_validator = RowValidator(HEADER)
+
+    mask, rows = BlockValidator(row_validator).validate([line])
+
+    assert mask.tolist() == [valid]
+    if valid:
+        assert rows == [row_validator.validate(line)]
+    else:
+        assert rows == [None]
+        with pytest.raises(InvalidRowException):
+            row_validator.validate(line)
+
+
+@pytest.mark.parametrize("line", [
+    ROW.replace("1000.00", "-1000.00"),
+    ROW.replace("1000.00", "1e3"),
+    ROW.replace("11111111111", "1" * 21),
+    ROW.replace("John Doe", "Ágata Doe"),
+    ROW.replace("John Doe", " John Doe"),
+    f" {ROW}\r",
+    ROW.replace("John Doe", '"John Doe"'),
+])
+def test_validate_leaves_to_the_row_validator(line):
+    """
+    Stricter than the RowValidator: these rows are out of the mask but still valid
+    """
+    row_validator = RowValidator(HEADER)
+
+    mask, _ = BlockValidator(row_validator).validate([line])
+
+    assert mask.tolist() == [False]
+    assert row_validator.validate(line) == line.strip().replace(" John", "John").replace('"', "")
+
+
+def test_validate_leaves_quoted_commas_to_the_row_validator():
+    row_validator = RowValidator(HEADER)
+    line = ROW.replace("John Doe", '"Doe, John"')
+
+    mask, _ = BlockValidator(row_validator).validate([line])
+
+    assert mask.tolist() == [False]
+    assert row_validator.validate(line) == line
+
+
+def test_validate_leaves_uppercase_debt_ids_to_the_row_validator():
+    row_validator = RowValidator(HEADER)
+    line = ROW.replace("1adb6ccf-ff16-467f-bea7-5f05d494280f", "1ADB6CCF-FF16-467F-BEA7-5F05D494280F")
+
+    mask, _ = BlockValidator(row_validator).validate([line])
+
+    assert mask.tolist() == [False]
+    assert row_validator.validate(line) == ROW
@@ -1,19 +1,50 @@
+import asyncio
+import json
+import numpy as np
 import pytest
+from io import BytesIO
 from unittest.mock import AsyncMock, MagicMock, patch
+from src.encoding.row_codec import decode_row, split_row
+from src.models.import_job import ImportJob
+from src.models.message_batch import MessageBatch
 from src.processor.csv_processor import CSVProcessor
+from src.processor.duplicate_filter import ExactDuplicateFilter
+from src.processor.row_validator import RowValidator
+from src.processor.send_scheduler import SendScheduler
 
 
 @pytest.fixture
 def settings():
     _settings = MagicMock()
     _settings.max_csv_process_concurrent_tasks = 5
+    _settings.csv_process_queue_size = 2
     _settings.max_sqs_send_message_batch_size = 10
+    _settings.csv_read_chunk_size = 4
+    _settings.sqs_message_packing_enabled = False
+    _settings.claim_check_enabled = False
+    _settings.sqs_message_binary_encoding_enabled = False
+    _settings.sqs_queue_shards = 1
+    _settings.sqs_queue_url = "queue"
+    _settings.csv_validation_enabled = False
+    _settings.csv_validation_block_size = 4
+    _settings.sqs_max_message_size = 262144
     return _settings
 
 
+@pytest.fixture
+def metrics():
+    return {}
+
+
+def metrics_by_name(mock_metrics, metrics):
+    mock_metrics.get.side_effect = lambda name: metrics.setdefault(name, MagicMock())
+
+
 @pytest.fixture
 def sqs_client():
-    return AsyncMock()
+    _sqs_client = AsyncMock()
+    _sqs_client.send_message_batch_async.return_value = []
+    return _sqs_client
 
 
 @pytest.fixture
@@ -42,7 +73,7 @@ async def test_process_full_batch(mock_metrics, csv_processor, sqs_client):
 
     await csv_processor.process()
 
-    assert sqs_client.send_message_batch.call_count == 2
+    assert sqs_client.send_message_batch_async.call_count == 2
     mock_metrics.get("csv_processor_messages_sent").inc.assert_any_call(10)
     mock_metrics.get("csv_processor_messages_sent").inc.assert_any_call(1)
 
@@ -50,10 +81,11 @@ async def test_process_full_batch(mock_metrics, csv_processor, sqs_client):
 @patch("src.processor.csv_processor.METRICS")
 @pytest.mark.asyncio
 async def test_process_handles_empty_file(mock_metrics, settings, sqs_client):
+    metrics_by_name(mock_metrics, {})
     csv_processor = CSVProcessor(settings, b"", sqs_client)
     await csv_processor.process()
 
-    sqs_client.send_message_batch.assert_not_called()
+    sqs_client.send_message_batch_async.assert_not_called()
     mock_metrics.get("csv_processor_messages_sent").inc.assert_not_called()
     mock_metrics.get("csv_processor_messages_failed").inc.assert_not_called()
 
@@ -61,7 +93,7 @@ async def test_process_handles_empty_file(mock_metrics, settings, sqs_client):
 @patch("src.processor.csv_processor.METRICS")
 @pytest.mark.asyncio
 async def test_process_handles_failed_send(mock_metrics, csv_processor, sqs_client):
-    sqs_client.send_message_batch.side_effect = Exception("SQS error")
+    sqs_client.send_message_batch_async.side_effect = Exception("SQS error")
 
     await csv_processor.process()
 
@@ -71,35 +103,580 @@ async def test_process_handles_failed_send(mock_metrics, csv_processor, sqs_clie
 
 @patch("src.processor.csv_processor.METRICS")
 @pytest.mark.asyncio
-async def test_process_semaphore_limited_concurrency(mock_metrics, settings, sqs_client):
+async def test_process_streams_file_object(mock_metrics, settings, sqs_client):
+    file = BytesIO(b"line1\r\nline2\nl\xc3\xadne3")
+    csv_processor = CSVProcessor(settings, file, sqs_client)
+
+    await csv_processor.process()
+
+    sqs_client.send_message_batch_async.assert_called_once_with(
+        ["line1", "line2", "l\u00edne3"])
+
+
+@patch("src.processor.csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_single_sender_worker(mock_metrics, settings, sqs_client):
     settings.max_csv_process_concurrent_tasks = 1
     file_content = b"line1\nline2\nline3"
     csv_processor = CSVProcessor(settings, file_content, sqs_client)
 
     await csv_processor.process()
 
-    sqs_client.send_message_batch.assert_called_once()
+    sqs_client.send_message_batch_async.assert_called_once()
 
 
 @patch("src.processor.csv_processor.METRICS")
 @pytest.mark.asyncio
-async def test_send_batch_messages(mock_metrics, csv_processor, sqs_client):
-    messages = ["message1", "message2", "message3"]
-    semaphore = MagicMock()
+async def test_process_keeps_sending_while_a_batch_is_slow(mock_metrics, settings, sqs_client):
+    settings.max_csv_process_concurrent_tasks = 2
+    settings.max_sqs_send_message_batch_size = 1
+    slow_batch_released = asyncio.Event()
+    sent = []
+
+    async def send_message_batch_async(messages):
+        if messages == ["line1"]:
+            await slow_batch_released.wait()
+        sent.append(messages[0])
+        return []
+
+    sqs_client.send_message_batch_async.side_effect = send_message_batch_async
+    file_content = b"\n".join(f"line{i}".encode() for i in range(1, 21))
+    csv_processor = CSVProcessor(settings, file_content, sqs_client)
+
+    process = asyncio.create_task(csv_processor.process())
+    while len(sent) < 19:
+        await asyncio.sleep(0)
+
+    assert "line1" not in sent
+    slow_batch_released.set()
+    await process
+
+    assert len(sent) == 20
+    assert sent[-1] == "line1"
+
 
-    await csv_processor._send_batch_messages(semaphore, messages)
+@patch("src.processor.csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_limits_in_flight_batches(mock_metrics, settings, sqs_client):
+    settings.max_csv_process_concurrent_tasks = 3
+    settings.max_sqs_send_message_batch_size = 1
+    in_flight = 0
+    max_in_flight = 0
+
+    async def send_message_batch_async(messages):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        return []
+
+    sqs_client.send_message_batch_async.side_effect = send_message_batch_async
+    file_content = b"\n".join(f"line{i}".encode() for i in range(30))
+    csv_processor = CSVProcessor(settings, file_content, sqs_client)
 
-    sqs_client.send_message_batch.assert_called_once_with(messages)
-    mock_metrics.get("csv_processor_messages_sent").inc.assert_called_with(3)
+    await csv_processor.process()
+
+    assert sqs_client.send_message_batch_async.call_count == 30
+    assert max_in_flight == 3
 
 
 @patch("src.processor.csv_processor.METRICS")
 @pytest.mark.asyncio
-async def test_send_batch_messages_handles_exception(mock_metrics, csv_processor, sqs_client):
+async def test_process_sender_workers_metrics(mock_metrics, metrics, csv_processor):
+    metrics_by_name(mock_metrics, metrics)
+
+    await csv_processor.process()
+
+    assert metrics["csv_processor_queue_depth"].inc.call_count == 2
+    assert metrics["csv_processor_queue_depth"].dec.call_count == 2
+    assert metrics["csv_processor_busy_sender_workers"].inc.call_count == 2
+    assert metrics["csv_processor_busy_sender_workers"].dec.call_count == 2
+    assert metrics["csv_processor_sender_workers"].inc.call_count == 5
+    assert metrics["csv_processor_sender_workers"].dec.call_count == 5
+
+
+@patch("src.processor.csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_stops_workers_when_reading_fails(mock_metrics, metrics, settings, sqs_client):
+    metrics_by_name(mock_metrics, metrics)
+    file = MagicMock(spec=["read", "tell"])
+    file.tell.return_value = 0
+    file.read.side_effect = OSError("read error")
+    csv_processor = CSVProcessor(settings, file, sqs_client)
+
+    with pytest.raises(OSError):
+        await csv_processor.process()
+
+    assert metrics["csv_processor_sender_workers"].dec.call_count == 5
+
+
+@patch("src.processor.csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_packed_messages(mock_metrics, metrics, settings, sqs_client):
+    metrics_by_name(mock_metrics, metrics)
+    settings.sqs_message_packing_enabled = True
+    settings.sqs_max_message_size = 12
+    csv_processor = CSVProcessor(settings, b"line1\nline2\n\nline3", sqs_client)
+
+    await csv_processor.process()
+
+    sqs_client.send_message_batch_async.assert_any_call(["line1\nline2"])
+    sqs_client.send_message_batch_async.assert_any_call(["line3"])
+    assert sqs_client.send_message_batch_async.call_count == 2
+    metrics["csv_processor_rows_sent"].inc.assert_any_call(2)
+    metrics["csv_processor_rows_sent"].inc.assert_any_call(1)
+
+
+@patch("src.processor.csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_binary_encoded_rows(mock_metrics, metrics, settings, sqs_client):
+    metrics_by_name(mock_metrics, metrics)
+    settings.sqs_message_binary_encoding_enabled = True
+    settings.csv_validation_enabled = True
+    other_row = VALID_ROW.replace("1adb6ccf", "2bdb6ccf")
+    error_report = MagicMock()
+    csv_processor = CSVProcessor(
+        settings,
+        f"{VALID_ROW}\nJohn Doe,123456789012345678901,a@b.c,1.00,2022-10-12,3cdb6ccf-ff16-467f-bea7-5f05d494280f\n{other_row}".encode(),
+        sqs_client,
+        validator=RowValidator(VALID_ROW),
+        error_report=error_report
+    )
+
+    await csv_processor.process()
+
+    messages = sqs_client.send_message_batch_async.call_args.args[0]
+    assert [decode_row(message)[5] for message in messages] == [
+        "1adb6ccf-ff16-467f-bea7-5f05d494280f",
+        "2bdb6ccf-ff16-467f-bea7-5f05d494280f"
+    ]
+    assert sqs_client.send_message_batch_async.call_args.kwargs["message_attributes"] == {
+        "FormatVersion": {"DataType": "Number", "StringValue": "1"}
+    }
+    assert csv_processor.rows_rejected == 1
+    assert error_report.add.call_args.args[1].startswith("Row can't be encoded")
+
+
+@pytest.mark.parametrize("binary_encoding", [False, True])
+@patch("src.processor.csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_a_quoted_name_with_commas(mock_metrics, binary_encoding, settings, sqs_client):
+    settings.sqs_message_binary_encoding_enabled = binary_encoding
+    settings.csv_validation_enabled = True
+    row = VALID_ROW.replace("John Doe", '"Doe, John"')
+    csv_processor = CSVProcessor(settings, f"{VALID_ROW}\n{row}".encode(), sqs_client, validator=RowValidator(VALID_ROW))
+
+    await csv_processor.process()
+
+    messages = sqs_client.send_message_batch_async.call_args.args[0]
+    names = [decode_row(message)[0] if binary_encoding else split_row(message)[0] for message in messages]
+    assert names == ["John Doe", "Doe, John"]
+    assert csv_processor.rows_rejected == 0
+
+
+@patch("src.processor.csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_sends_rows_to_shard_queues(mock_metrics, settings, sqs_client):
+    settings.sqs_queue_shards = 2
+    settings.sqs_message_binary_encoding_enabled = True
+    settings.csv_validation_enabled = True
+    sqs_client.queue_url = "queue"
+    other_row = VALID_ROW.replace("1adb6ccf", "2bdb6ccf")
+    csv_processor = CSVProcessor(settings, f"{VALID_ROW}\n{other_row}".encode(), sqs_client, validator=RowValidator(VALID_ROW))
+
+    await csv_processor.process()
+
+    sent = {
+        call.kwargs["queue_url"]: [decode_row(message)[5] for message in call.args[0]]
+        for call in sqs_client.send_message_batch_async.call_args_list
+    }
+    assert sent == {
+        "queue-0": ["2bdb6ccf-ff16-467f-bea7-5f05d494280f"],
+        "queue-1": ["1adb6ccf-ff16-467f-bea7-5f05d494280f"]
+    }
+    assert csv_processor.shard_rows_sent == {0: 1, 1: 1}
+    assert csv_processor.shard_messages_sent == {0: 1, 1: 1}
+    mock_metrics.get.assert_any_call("csv_processor_shard_rows_sent", {"shard": "0"})
+
+
+@patch("src.processor.csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_to_shard_queues_processes_every_byte(mock_metrics, settings, sqs_client):
+    settings.sqs_queue_shards = 3
+    sqs_client.queue_url = "queue"
+    data = b"row1,id4\nrow2,id0\nrow3,id1"
+    job = ImportJob("import-id", len(data))
+    csv_processor = CSVProcessor(settings, data, sqs_client, job=job)
+
+    await csv_processor.process()
+
+    assert [call.kwargs["queue_url"] for call in sqs_client.send_message_batch_async.call_args_list] == [
+        "queue-0", "queue-1", "queue-2"
+    ]
+    assert job.rows_read == 3
+    assert job.bytes_processed == job.total_bytes
+
+
+@patch("src.processor.csv_processor.get_blob_store")
+@patch("src.processor.csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_claim_check(mock_metrics, get_blob_store, metrics, settings, sqs_client):
+    metrics_by_name(mock_metrics, metrics)
+    settings.claim_check_enabled = True
+    settings.claim_check_chunk_size = 12
+    job = MagicMock()
+    csv_processor = CSVProcessor(settings, b"line1\nline2\nline3", sqs_client, job=job)
+
+    await csv_processor.process()
+
+    stored_chunks = {call.args[0]: call.args[1] for call in get_blob_store.return_value.put.call_args_list}
+    assert sorted(stored_chunks.values()) == [b"line1\nline2", b"line3"]
+    assert sqs_client.send_message_batch_async.call_count == 2
+    for call in sqs_client.send_message_batch_async.call_args_list:
+        reference = json.loads(call.args[0][0])
+        assert stored_chunks[reference["key"]][reference["start"]:reference["end"]] in (b"line1\nline2", b"line3")
+        assert call.kwargs["message_attributes"]["MessageType"]["StringValue"] == "claim-check"
+    assert csv_processor.messages_sent == 2
+    assert csv_processor.rows_sent == 3
+    assert metrics["csv_processor_chunks_stored"].inc.call_count == 2
+    job.record_sent.assert_any_call(2, 0)
+    job.record_sent.assert_any_call(1, 0)
+
+
+@patch("src.processor.csv_processor.get_blob_store")
+@patch("src.processor.csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_send_batch_fails_when_the_chunk_is_not_stored(mock_metrics, get_blob_store, metrics, csv_processor, sqs_client):
+    metrics_by_name(mock_metrics, metrics)
+    get_blob_store.return_value.put.side_effect = OSError("disk full")
+    batch = MessageBatch(["reference"], [3], chunk=b"line1\nline2\nline3", chunk_key="chunks/key.csv")
+
+    await csv_processor._send_batch(batch)
+
+    sqs_client.send_message_batch_async.assert_not_called()
+    assert csv_processor.messages_failed == 1
+    assert csv_processor.rows_failed == 3
+    metrics["csv_processor_chunk_store_failures"].inc.assert_called_once()
+    metrics["csv_processor_rows_failed"].inc.assert_called_once_with(3)
+
+
+@patch("src.processor.csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_send_batch(mock_metrics, metrics, csv_processor, sqs_client):
+    metrics_by_name(mock_metrics, metrics)
     messages = ["message1", "message2", "message3"]
-    semaphore = MagicMock()
-    sqs_client.send_message_batch.side_effect = Exception("SQS error")
 
-    await csv_processor._send_batch_messages(semaphore, messages)
+    await csv_processor._send_batch(MessageBatch(messages))
+
+    sqs_client.send_message_batch_async.assert_called_once_with(messages)
+    metrics["csv_processor_messages_sent"].inc.assert_called_with(3)
+    metrics["csv_processor_rows_sent"].inc.assert_called_with(3)
+
+
+@patch("src.processor.csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_send_batch_handles_exception(mock_metrics, metrics, csv_processor, sqs_client):
+    metrics_by_name(mock_metrics, metrics)
+    messages = ["message1\nmessage2", "message3"]
+    sqs_client.send_message_batch_async.side_effect = Exception("SQS error")
+
+    await csv_processor._send_batch(MessageBatch(messages, [2, 1]))
+
+    metrics["csv_processor_messages_failed"].inc.assert_called_with(2)
+    metrics["csv_processor_rows_failed"].inc.assert_called_with(3)
+
+
+@patch("src.processor.csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_send_batch_partial_failure(mock_metrics, metrics, csv_processor, sqs_client):
+    metrics_by_name(mock_metrics, metrics)
+    messages = ["message1\nmessage2", "message3", "message4\nmessage5\nmessage6"]
+    sqs_client.send_message_batch_async.return_value = [0, 2]
+
+    await csv_processor._send_batch(MessageBatch(messages, [2, 1, 3]))
+
+    metrics["csv_processor_messages_sent"].inc.assert_called_with(1)
+    metrics["csv_processor_rows_sent"].inc.assert_called_with(1)
+    metrics["csv_processor_messages_failed"].inc.assert_called_with(2)
+    metrics["csv_processor_rows_failed"].inc.assert_called_with(5)
+
+
+@patch("src.processor.csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_send_batch_counts_sent_and_failed(mock_metrics, csv_processor, sqs_client):
+    sqs_client.send_message_batch_async.side_effect = [[], [1]]
+
+    await csv_processor._send_batch(MessageBatch(["message1\nmessage2", "message3"], [2, 1]))
+    await csv_processor._send_batch(MessageBatch(["message4", "message5\nmessage6"], [1, 2]))
+
+    assert csv_processor.messages_sent == 3
+    assert csv_processor.messages_failed == 1
+    assert csv_processor.rows_sent == 4
+    assert csv_processor.rows_failed == 2
+
+
+@patch("src.processor.csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_chunks_as_they_arrive(mock_metrics, settings, sqs_client):
+    async def chunks():
+        yield b"line1\nli"
+        yield b"ne2\n"
+        yield b"line3"
+
+    csv_processor = CSVProcessor(settings, chunks(), sqs_client)
+
+    await csv_processor.process()
+
+    sqs_client.send_message_batch_async.assert_called_once_with(["line1", "line2", "line3"])
+    assert csv_processor.rows_sent == 3
+
+
+@patch("src.processor.csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_acknowledges_batches_to_the_checkpoint(mock_metrics, settings, sqs_client):
+    settings.max_sqs_send_message_batch_size = 2
+    checkpoint = MagicMock()
+    checkpoint.offset = 6
+    csv_processor = CSVProcessor(settings, BytesIO(b"line2\nline3\nline4"), sqs_client, checkpoint)
+
+    await csv_processor.process()
+
+    tracked = [call.args[0] for call in checkpoint.track.call_args_list]
+    acknowledged = [call.args[0] for call in checkpoint.acknowledge.call_args_list]
+    assert [batch.end_offset for batch in tracked] == [18, 23]
+    assert sorted(acknowledged, key=lambda batch: batch.end_offset) == tracked
+
+
+@patch("src.processor.csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_records_progress_in_the_job(mock_metrics, settings, sqs_client):
+    settings.max_sqs_send_message_batch_size = 2
+    sqs_client.send_message_batch_async.side_effect = [[], [0]]
+    job = MagicMock()
+    csv_processor = CSVProcessor(settings, b"line1\nline2\nline3", sqs_client, job=job)
+
+    await csv_processor.process()
+
+    job.record_read.assert_any_call(2, 12)
+    job.record_read.assert_any_call(1, 17)
+    job.record_sent.assert_any_call(2, 0)
+    job.record_sent.assert_any_call(0, 1)
+
+
+VALID_ROW = "John Doe,11111111111,johndoe@kanastra.com.br,1000.00,2022-10-12,1adb6ccf-ff16-467f-bea7-5f05d494280f"
+
+
+@pytest.mark.parametrize("block_size", [1, 2, 10])
+@patch("src.processor.csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_validates_rows(mock_metrics, block_size, metrics, settings, sqs_client):
+    metrics_by_name(mock_metrics, metrics)
+    settings.csv_validation_enabled = True
+    settings.csv_validation_block_size = block_size
+    error_report = MagicMock()
+    job = MagicMock()
+    header = "debtId,name,governmentId,email,debtAmount,debtDueDate"
+    row = "1adb6ccf-ff16-467f-bea7-5f05d494280f,John Doe,11111111111,johndoe@kanastra.com.br,1000.00,2022-10-12"
+    content = f"{header}\n{row}\ninvalid\n"
+    csv_processor = CSVProcessor(settings, content.encode(), sqs_client, job=job, error_report=error_report)
+
+    await csv_processor.process()
+
+    sqs_client.send_message_batch_async.assert_called_once_with([VALID_ROW])
+    assert csv_processor.rows_rejected == 1
+    error_report.add.assert_called_once_with(
+        len(header) + len(row) + 2, "Expected 6 fields, got 1", "invalid"
+    )
+    metrics["csv_processor_rows_rejected"].inc.assert_called_once_with()
+    job.record_rejected.assert_called_once_with()
+    job.record_read.assert_called_once_with(1, len(header) + len(row) + 2)
+
+
+@pytest.mark.parametrize("validation_enabled, block_size", [(False, 10), (True, 1), (True, 10)])
+@patch("src.processor.csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_rejects_rows_not_in_utf8(mock_metrics, validation_enabled, block_size, metrics, settings, sqs_client):
+    metrics_by_name(mock_metrics, metrics)
+    settings.csv_validation_enabled = validation_enabled
+    settings.csv_validation_block_size = block_size
+    error_report = MagicMock()
+    job = MagicMock()
+    latin1_row = "José,11111111111,jose@kanastra.com.br,1000.00,2022-10-12,2adb6ccf-ff16-467f-bea7-5f05d494280f".encode("latin-1")
+    content = latin1_row + f"\n{VALID_ROW}\n".encode()
+    csv_processor = CSVProcessor(settings, content, sqs_client, job=job, error_report=error_report)
+
+    await csv_processor.process()
+
+    sqs_client.send_message_batch_async.assert_called_once_with([VALID_ROW])
+    assert csv_processor.rows_sent == 1
+    assert csv_processor.rows_rejected == 1
+    offset, reason, row = error_report.add.call_args.args
+    assert offset == 0
+    assert reason.startswith("Invalid UTF-8: 'utf-8' codec can't decode byte 0xe9 in position 3")
+    assert row.startswith("Jos\ufffd,11111111111")
+    job.record_rejected.assert_called_once_with()
+
 
-    mock_metrics.get("csv_processor_messages_failed").inc.assert_called_with(3)
+@patch("src.processor.csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_validates_rows_with_the_given_validator(mock_metrics, settings, sqs_client):
+    settings.csv_validation_enabled = True
+    validator = RowValidator("name,governmentId,email,debtAmount,debtDueDate,debtId")
+    csv_processor = CSVProcessor(settings, f"{VALID_ROW}\n".encode(), sqs_client, validator=validator)
+
+    await csv_processor.process()
+
+    sqs_client.send_message_batch_async.assert_called_once_with([VALID_ROW])
+    assert csv_processor.rows_rejected == 0
+
+
+@pytest.mark.parametrize("block_size", [1, 10])
+@patch("src.processor.csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_drops_duplicated_debt_ids(mock_metrics, block_size, metrics, settings, sqs_client):
+    metrics_by_name(mock_metrics, metrics)
+    settings.csv_validation_enabled = True
+    settings.csv_validation_block_size = block_size
+    error_report = MagicMock()
+    job = MagicMock()
+    other_row = VALID_ROW.replace("1adb6ccf", "2adb6ccf")
+    content = f"{VALID_ROW}\n{other_row}\n{VALID_ROW}\n".encode()
+    csv_processor = CSVProcessor(
+        settings, content, sqs_client, job=job, error_report=error_report, duplicate_filter=ExactDuplicateFilter()
+    )
+
+    await csv_processor.process()
+
+    sqs_client.send_message_batch_async.assert_called_once_with([VALID_ROW, other_row])
+    assert csv_processor.rows_duplicated == 1
+    error_report.add.assert_called_once_with(
+        2 * len(VALID_ROW) + 2, "Duplicate debtId: 1adb6ccf-ff16-467f-bea7-5f05d494280f", VALID_ROW
+    )
+    metrics["csv_processor_rows_duplicated"].inc.assert_called_once_with()
+    job.record_duplicated.assert_called_once_with()
+
+
+@patch("src.processor.csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_drops_unchanged_rows(mock_metrics, metrics, settings, sqs_client):
+    metrics_by_name(mock_metrics, metrics)
+    settings.csv_validation_enabled = True
+    job = MagicMock()
+    error_report = MagicMock()
+    other_row = VALID_ROW.replace("1adb6ccf", "2adb6ccf")
+    delta_filter = MagicMock()
+    delta_filter.unchanged_block.side_effect = lambda rows: np.array([row == VALID_ROW for row in rows], dtype=bool)
+    csv_processor = CSVProcessor(
+        settings, f"{VALID_ROW}\n{other_row}\n".encode(), sqs_client, job=job, error_report=error_report, delta_filter=delta_filter
+    )
+
+    await csv_processor.process()
+
+    sqs_client.send_message_batch_async.assert_called_once_with([other_row])
+    assert csv_processor.rows_unchanged == 1
+    error_report.add.assert_not_called()
+    metrics["csv_processor_rows_unchanged"].inc.assert_called_once_with(1)
+    job.record_unchanged.assert_called_once_with(1)
+
+
+def billed_filter_of(billed_debt_ids):
+    _billed_filter = MagicMock()
+    _billed_filter.billed_block = AsyncMock(
+        side_effect=lambda debt_ids: np.array([debt_id in billed_debt_ids for debt_id in debt_ids], dtype=bool)
+    )
+    return _billed_filter
+
+
+@pytest.mark.parametrize("block_size", [1, 10])
+@patch("src.processor.csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_drops_already_billed_debt_ids(mock_metrics, block_size, metrics, settings, sqs_client):
+    metrics_by_name(mock_metrics, metrics)
+    settings.csv_validation_enabled = True
+    settings.csv_validation_block_size = block_size
+    error_report = MagicMock()
+    job = MagicMock()
+    other_row = VALID_ROW.replace("1adb6ccf", "2adb6ccf")
+    content = f"{VALID_ROW}\n{other_row}\n".encode()
+    billed_filter = billed_filter_of({"1adb6ccf-ff16-467f-bea7-5f05d494280f"})
+    csv_processor = CSVProcessor(
+        settings, content, sqs_client, job=job, error_report=error_report, billed_filter=billed_filter
+    )
+
+    await csv_processor.process()
+
+    sqs_client.send_message_batch_async.assert_called_once_with([other_row])
+    assert csv_processor.rows_already_billed == 1
+    error_report.add.assert_not_called()
+    metrics["csv_processor_rows_already_billed"].inc.assert_called_once_with(1)
+    job.record_already_billed.assert_called_once_with(1)
+
+
+@patch("src.processor.csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_looks_up_only_the_rows_left_to_send(mock_metrics, settings, sqs_client):
+    settings.csv_validation_enabled = True
+    settings.csv_validation_block_size = 10
+    other_row = VALID_ROW.replace("1adb6ccf", "2adb6ccf")
+    content = f"{VALID_ROW}\ninvalid\n{VALID_ROW}\n{other_row}\n".encode()
+    billed_filter = billed_filter_of(set())
+    csv_processor = CSVProcessor(
+        settings, content, sqs_client, duplicate_filter=ExactDuplicateFilter(), billed_filter=billed_filter
+    )
+
+    await csv_processor.process()
+
+    billed_filter.billed_block.assert_awaited_once_with([
+        "1adb6ccf-ff16-467f-bea7-5f05d494280f", "2adb6ccf-ff16-467f-bea7-5f05d494280f"
+    ])
+    sqs_client.send_message_batch_async.assert_called_once_with([VALID_ROW, other_row])
+
+
+@patch("src.processor.csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_sends_the_rows_when_the_billed_lookup_fails(mock_metrics, metrics, settings, sqs_client):
+    metrics_by_name(mock_metrics, metrics)
+    settings.csv_validation_enabled = True
+    billed_filter = MagicMock()
+    billed_filter.billed_block = AsyncMock(side_effect=ConnectionError("Redis is down"))
+    csv_processor = CSVProcessor(settings, f"{VALID_ROW}\n".encode(), sqs_client, billed_filter=billed_filter)
+
+    await csv_processor.process()
+
+    sqs_client.send_message_batch_async.assert_called_once_with([VALID_ROW])
+    assert csv_processor.rows_already_billed == 0
+    metrics["csv_processor_billed_lookup_failures"].inc.assert_called_once_with()
+
+
+@patch("src.processor.send_scheduler.METRICS")
+@patch("src.processor.csv_processor.METRICS")
+@patch("src.processor.csv_processor.get_send_scheduler")
+@pytest.mark.asyncio
+async def test_small_import_is_not_stuck_behind_a_large_one(
+    get_send_scheduler, mock_metrics, send_scheduler_metrics, settings
+):
+    get_send_scheduler.return_value = SendScheduler(2)
+    settings.max_sqs_send_message_batch_size = 1
+    finished = []
+
+    async def send_message_batch_async(messages):
+        await asyncio.sleep(0.001)
+        return []
+
+    def processor(name: str, rows: int):
+        sqs_client = AsyncMock()
+        sqs_client.send_message_batch_async.side_effect = send_message_batch_async
+        content = b"\n".join(f"{name}{i}".encode() for i in range(rows))
+        return CSVProcessor(settings, content, sqs_client)
+
+    async def run(name: str, rows: int):
+        await processor(name, rows).process()
+        finished.append(name)
+
+    large = asyncio.create_task(run("large", 200))
+    await asyncio.sleep(0.005)
+    await run("small", 5)
+
+    assert finished == ["small"]
+    await large
@@ -0,0 +1,51 @@
+from src.fingerprints.fingerprint_store import FingerprintStore
+from src.processor.delta_filter import DeltaFilter
+
+
+ROW = "John Doe,11111111111,johndoe@kanastra.com.br,1000.00,2022-10-12,1adb6ccf-ff16-467f-bea7-5f05d494280f"
+OTHER_ROW = ROW.replace("1adb6ccf", "2adb6ccf")
+
+
+def test_every_row_is_changed_without_previous_import():
+    delta_filter = DeltaFilter()
+
+    assert delta_filter.unchanged_block([ROW, OTHER_ROW]).tolist() == [False, False]
+
+
+def test_rows_unchanged_since_the_previous_import(tmp_path):
+    path = str(tmp_path / "source.fingerprints")
+    previous_filter = DeltaFilter()
+    previous_filter.unchanged_block([ROW])
+    previous_filter.unchanged_block([OTHER_ROW])
+    previous_filter.save(path)
+
+    delta_filter = DeltaFilter(FingerprintStore(path))
+    changed_row = OTHER_ROW.replace("1000.00", "1500.00")
+    new_row = ROW.replace("1adb6ccf", "3adb6ccf")
+
+    unchanged = delta_filter.unchanged_block([ROW, changed_row, new_row])
+
+    assert unchanged.tolist() == [True, False, False]
+    delta_filter.close()
+
+
+def test_save_keeps_the_fingerprints_of_every_row(tmp_path):
+    path = str(tmp_path / "source.fingerprints")
+    delta_filter = DeltaFilter()
+    delta_filter.unchanged_block([ROW, OTHER_ROW])
+
+    delta_filter.save(path)
+
+    store = FingerprintStore(path)
+    assert store.count == 2
+    store.close()
+
+
+def test_save_without_rows(tmp_path):
+    path = str(tmp_path / "source.fingerprints")
+
+    DeltaFilter().save(path)
+
+    store = FingerprintStore(path)
+    assert store.count == 0
+    store.close()
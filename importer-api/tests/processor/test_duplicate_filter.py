@@ -0,0 +1,61 @@
+from unittest.mock import MagicMock
+from src.processor.duplicate_filter import (
+    BloomDuplicateFilter,
+    ExactDuplicateFilter,
+    create_duplicate_filter
+)
+
+
+def test_exact_add_block():
+    duplicate_filter = ExactDuplicateFilter()
+
+    assert duplicate_filter.add_block(["a", "b", "a"]).tolist() == [False, False, True]
+    assert duplicate_filter.add_block(["c", "b"]).tolist() == [False, True]
+
+
+def test_bloom_add_block():
+    duplicate_filter = BloomDuplicateFilter(100, 0.0001)
+
+    assert duplicate_filter.add_block(["a", "b", "a"]).tolist() == [False, False, True]
+    assert duplicate_filter.add_block(["c", "b"]).tolist() == [False, True]
+    assert duplicate_filter.add_block([]).tolist() == []
+
+
+def test_bloom_size():
+    duplicate_filter = BloomDuplicateFilter(1000, 0.01)
+
+    assert duplicate_filter.bits_count == 9586
+    assert duplicate_filter.hashes_count == 7
+    assert len(duplicate_filter.bits) == 1199
+
+
+def test_bloom_false_positive_rate():
+    duplicate_filter = BloomDuplicateFilter(10000, 0.01)
+    duplicate_filter.add_block([f"key-{index}" for index in range(10000)])
+
+    false_positives = duplicate_filter.add_block([f"other-{index}" for index in range(10000)]).sum()
+
+    assert false_positives < 200
+
+
+def test_create_duplicate_filter():
+    settings = MagicMock()
+    settings.csv_dedup_exact_max_rows = 10
+    settings.csv_dedup_false_positive_rate = 0.01
+
+    assert isinstance(create_duplicate_filter(settings, 64 * 9), ExactDuplicateFilter)
+    bloom_filter = create_duplicate_filter(settings, 64 * 1000)
+    assert isinstance(bloom_filter, BloomDuplicateFilter)
+    assert bloom_filter.bits_count == BloomDuplicateFilter(1001, 0.01).bits_count
+
+
+def test_create_duplicate_filter_of_unknown_size():
+    settings = MagicMock()
+    settings.csv_dedup_exact_max_rows = 10
+    settings.csv_dedup_false_positive_rate = 0.01
+    settings.csv_dedup_stream_max_rows = 5000
+
+    assert isinstance(create_duplicate_filter(settings, 0), ExactDuplicateFilter)
+    bloom_filter = create_duplicate_filter(settings, None)
+    assert isinstance(bloom_filter, BloomDuplicateFilter)
+    assert bloom_filter.bits_count == BloomDuplicateFilter(5000, 0.01).bits_count
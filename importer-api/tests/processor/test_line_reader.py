@@ -0,0 +1,88 @@
+import pytest
+from io import BytesIO
+from src.processor.line_reader import LineReader, read_file_chunks
+
+
+async def as_chunks(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(async_iterator):
+    return [item async for item in async_iterator]
+
+
+@pytest.mark.asyncio
+async def test_read_file_chunks():
+    file = BytesIO(b"0123456789")
+
+    chunks = await collect(read_file_chunks(file, 4))
+
+    assert chunks == [b"0123", b"4567", b"89"]
+
+
+@pytest.mark.asyncio
+async def test_read_file_chunks_empty_file():
+    chunks = await collect(read_file_chunks(BytesIO(b""), 4))
+
+    assert chunks == []
+
+
+@pytest.mark.asyncio
+async def test_lines_across_chunks():
+    reader = LineReader(as_chunks(b"li", b"ne1\nline", b"2\n", b"line3"))
+
+    lines = await collect(reader.lines())
+
+    assert lines == ["line1", "line2", "line3"]
+    assert reader.offset == 17
+
+
+@pytest.mark.asyncio
+async def test_lines_offset_from_start_offset():
+    reader = LineReader(as_chunks(b"line4\nline5"), offset=18)
+
+    lines = await collect(reader.lines())
+
+    assert lines == ["line4", "line5"]
+    assert reader.offset == 29
+
+
+@pytest.mark.asyncio
+async def test_lines_keep_blank_lines():
+    reader = LineReader(as_chunks(b"line1\n\nline2\n"))
+
+    lines = await collect(reader.lines())
+
+    assert lines == ["line1", "", "line2"]
+    assert reader.offset == 13
+
+
+@pytest.mark.asyncio
+async def test_lines_with_multibyte_character_split_across_chunks():
+    encoded = "José\nJoão\n".encode()
+    reader = LineReader(as_chunks(encoded[:4], encoded[4:]))
+
+    lines = await collect(reader.lines())
+
+    assert lines == ["José", "João"]
+
+
+@pytest.mark.asyncio
+async def test_lines_empty_stream():
+    reader = LineReader(as_chunks())
+
+    lines = await collect(reader.lines())
+
+    assert lines == []
+    assert reader.offset == 0
+
+
+@pytest.mark.asyncio
+async def test_raw_lines_are_not_decoded():
+    reader = LineReader(as_chunks("José\n".encode("latin-1"), b"line2"))
+
+    lines = await collect(reader.raw_lines())
+
+    assert lines == [b"Jos\xe9", b"line2"]
+    assert reader.offset == 10
@@ -0,0 +1,305 @@
+import hashlib
+import json
+import pytest
+from unittest.mock import MagicMock
+from src.processor.message_batcher import (
+    ClaimCheckBatcher,
+    MessageBatcher,
+    PackedMessageBatcher,
+    ShardedMessageBatcher,
+    attributes_size,
+    create_message_batcher
+)
+from src.encoding.row_codec import encode_row
+
+
+@pytest.fixture
+def settings():
+    _settings = MagicMock()
+    _settings.max_sqs_send_message_batch_size = 2
+    _settings.sqs_max_message_size = 16
+    _settings.sqs_message_packing_enabled = False
+    _settings.claim_check_enabled = False
+    _settings.sqs_message_binary_encoding_enabled = False
+    _settings.sqs_queue_shards = 1
+    _settings.claim_check_chunk_size = 24
+    return _settings
+
+
+def test_message_batcher(settings):
+    batcher = MessageBatcher(settings)
+
+    assert batcher.add("row1") is None
+    batch = batcher.add("row2")
+
+    assert batch.messages == ["row1", "row2"]
+    assert batch.rows == 2
+
+
+def test_message_batcher_flush(settings):
+    batcher = MessageBatcher(settings)
+    batcher.add("row1")
+
+    batch = batcher.flush()
+
+    assert batch.messages == ["row1"]
+    assert batch.rows == 1
+    assert batcher.flush() is None
+
+
+def test_message_batcher_end_offset(settings):
+    batcher = MessageBatcher(settings)
+    batcher.add("row1", 5)
+
+    assert batcher.add("row2", 10).end_offset == 10
+    batcher.add("row3", 15)
+    assert batcher.flush().end_offset == 15
+
+
+def test_packed_message_batcher(settings):
+    batcher = PackedMessageBatcher(settings)
+
+    assert batcher.add("row1") is None
+    assert batcher.add("row2") is None
+    assert batcher.add("row3") is None
+    batch = batcher.add("row4")
+
+    assert batch.messages == ["row1\nrow2\nrow3"]
+    assert batch.rows == 3
+    assert batcher.flush().messages == ["row4"]
+    assert batcher.flush() is None
+
+
+def test_packed_message_batcher_end_offset(settings):
+    batcher = PackedMessageBatcher(settings)
+    batcher.add("row1", 5)
+    batcher.add("row2", 10)
+    batcher.add("row3", 15)
+
+    assert batcher.add("row4", 20).end_offset == 15
+    assert batcher.flush().end_offset == 20
+
+
+def test_packed_message_batcher_counts_encoded_bytes(settings):
+    batcher = PackedMessageBatcher(settings)
+
+    assert batcher.add("João") is None
+    assert batcher.add("José") is None
+    batch = batcher.add("Zé!")
+
+    assert batch.messages == ["João\nJosé"]
+
+
+def test_packed_message_batcher_skips_blank_rows(settings):
+    batcher = PackedMessageBatcher(settings)
+
+    assert batcher.add("") is None
+    assert batcher.flush() is None
+
+
+def test_packed_message_batcher_oversized_row(settings):
+    batcher = PackedMessageBatcher(settings)
+    batcher.add("row1")
+
+    batch = batcher.add("a-row-larger-than-the-limit")
+
+    assert batch.messages == ["row1"]
+    assert batcher.flush().messages == ["a-row-larger-than-the-limit"]
+
+
+def test_create_message_batcher(settings):
+    assert type(create_message_batcher(settings)) is MessageBatcher
+
+    settings.sqs_message_packing_enabled = True
+    assert type(create_message_batcher(settings)) is PackedMessageBatcher
+
+    settings.claim_check_enabled = True
+    assert type(create_message_batcher(settings)) is ClaimCheckBatcher
+
+
+def test_claim_check_batcher(settings):
+    batcher = ClaimCheckBatcher(settings)
+
+    assert batcher.add("row1", 5) is None
+    assert batcher.add("row2", 10) is None
+    assert batcher.add("row3", 15) is None
+    batch = batcher.add("a-row-larger-than-the-limit", 43)
+
+    assert batch.chunk == b"row1\nrow2\nrow3"
+    assert batch.chunk_key.startswith("chunks/")
+    assert json.loads(batch.messages[0]) == {"key": batch.chunk_key, "start": 0, "end": 14}
+    assert batch.message_rows == [3]
+    assert batch.end_offset == 15
+    assert batch.message_attributes == {"MessageType": {"DataType": "String", "StringValue": "claim-check"}}
+    assert batcher.flush().chunk == b"a-row-larger-than-the-limit"
+
+
+def test_claim_check_batcher_uses_a_new_key_per_chunk(settings):
+    batcher = ClaimCheckBatcher(settings)
+
+    batcher.add("row1")
+    first_batch = batcher.flush()
+    batcher.add("row2")
+
+    assert batcher.flush().chunk_key != first_batch.chunk_key
+    assert batcher.flush() is None
+
+
+def test_message_batcher_with_binary_encoding(settings):
+    settings.sqs_message_binary_encoding_enabled = True
+    attributes = {"FormatVersion": {"DataType": "Number", "StringValue": "1"}}
+
+    batcher = MessageBatcher(settings)
+    batcher.add("row1")
+    assert batcher.add("row2").message_attributes == attributes
+
+    packed_batcher = PackedMessageBatcher(settings)
+    packed_batcher.add("row1")
+    assert packed_batcher.flush().message_attributes == attributes
+
+    claim_check_batcher = ClaimCheckBatcher(settings)
+    claim_check_batcher.add("row1")
+    assert claim_check_batcher.flush().message_attributes == {
+        **attributes,
+        "MessageType": {"DataType": "String", "StringValue": "claim-check"}
+    }
+
+
+def test_attributes_size():
+    assert attributes_size(None) == 0
+    assert attributes_size({
+        "FormatVersion": {"DataType": "Number", "StringValue": "1"},
+        "Payload": {"DataType": "Binary", "BinaryValue": b"abc"}
+    }) == 13 + 6 + 1 + 7 + 6 + 3
+
+
+def test_packed_message_batcher_with_binary_encoding_leaves_room_for_the_attributes(settings):
+    settings.sqs_message_packing_enabled = True
+    settings.sqs_message_binary_encoding_enabled = True
+    settings.sqs_max_message_size = 1024
+    batcher = create_message_batcher(settings)
+    rows = [
+        encode_row(f"{'x' * (5 + index % 36)},11111111111,name@kanastra.com.br,1000.00,2024-01-01,{index:08d}-0000-4000-8000-000000000000")
+        for index in range(200)
+    ]
+
+    batches = [batch for batch in (batcher.add(row) for row in rows) if batch] + [batcher.flush()]
+
+    assert sum(len(batch.messages[0].split("\n")) for batch in batches) == 200
+    for batch in batches:
+        size = len(batch.messages[0].encode()) + attributes_size(batch.message_attributes)
+        assert batch.message_attributes["FormatVersion"]["StringValue"] == "1"
+        assert size <= settings.sqs_max_message_size
+
+
+def test_message_batcher_without_binary_encoding(settings):
+    batcher = MessageBatcher(settings)
+    batcher.add("row1")
+
+    assert batcher.add("row2").message_attributes is None
+
+
+def test_sharded_message_batcher(settings):
+    settings.sqs_queue_shards = 2
+    batcher = ShardedMessageBatcher(settings)
+
+    assert batcher.add("a,id1", 10) is None
+    assert batcher.add("b,id4", 20) is None
+    batch = batcher.add("c,id2", 30)
+
+    assert batch.messages == ["a,id1", "c,id2"]
+    assert batch.shard == 0
+    assert batch.end_offset == 10
+
+
+def test_sharded_message_batcher_flush(settings):
+    settings.sqs_queue_shards = 2
+    batcher = ShardedMessageBatcher(settings, offset=5)
+    batcher.add("a,id4", 10)
+    batcher.add("b,id1", 20)
+
+    first = batcher.flush()
+    second = batcher.flush()
+
+    assert (first.messages, first.shard, first.end_offset) == (["b,id1"], 0, 5)
+    assert (second.messages, second.shard, second.end_offset) == (["a,id4"], 1, 20)
+    assert batcher.flush() is None
+
+
+def test_sharded_message_batcher_with_debt_id(settings):
+    settings.sqs_queue_shards = 2
+    batcher = ShardedMessageBatcher(settings)
+    batcher.add("encoded", 10, "id4")
+
+    assert batcher.flush().shard == 1
+
+
+def test_sharded_message_batcher_packs_each_shard(settings):
+    settings.sqs_queue_shards = 2
+    settings.sqs_message_packing_enabled = True
+    batcher = ShardedMessageBatcher(settings)
+
+    assert batcher.add("x,id4", 5) is None
+    assert batcher.add("a,id1", 10) is None
+    assert batcher.add("b,id1", 15) is None
+    batch = batcher.add("c,id1", 20)
+
+    assert batch.messages == ["a,id1\nb,id1"]
+    assert batch.shard == 0
+    assert batch.end_offset == 0
+    last = batcher.flush()
+    assert (last.messages, last.end_offset) == (["c,id1"], 0)
+    assert batcher.flush().end_offset == 20
+
+
+def test_sharded_message_batcher_end_offsets_never_go_back(settings):
+    settings.sqs_queue_shards = 3
+    settings.max_sqs_send_message_batch_size = 2
+    batcher = ShardedMessageBatcher(settings)
+    batches = []
+
+    for i, debt_id in enumerate(["id1", "id2", "id3", "id1", "id2", "id3", "id4"]):
+        batches.append(batcher.add(f"{i},{debt_id}", (i + 1) * 10))
+    while batch := batcher.flush():
+        batches.append(batch)
+
+    end_offsets = [batch.end_offset for batch in batches if batch]
+    assert end_offsets == sorted(end_offsets)
+    assert end_offsets[-1] == 70
+
+
+def test_create_message_batcher_with_shards(settings):
+    settings.sqs_queue_shards = 2
+
+    assert isinstance(create_message_batcher(settings), ShardedMessageBatcher)
+
+
+
+def test_message_batcher_deduplication_ids(settings):
+    batcher = MessageBatcher(settings)
+    batcher.add("a,id1", 5, "id1")
+
+    assert batcher.add("b,id2", 10, "id2").deduplication_ids == ["id1", "id2"]
+
+
+def test_message_batcher_without_debt_ids(settings):
+    batcher = MessageBatcher(settings)
+    batcher.add("row1")
+
+    assert batcher.flush().deduplication_ids == []
+
+
+def test_packed_message_batcher_deduplication_ids(settings):
+    settings.sqs_max_message_size = 64
+    batcher = PackedMessageBatcher(settings)
+    batcher.add("a,id1", 5, "id1")
+    batcher.add("b,id2", 10, "id2")
+
+    assert batcher.flush().deduplication_ids == [hashlib.sha256(b"id1\nid2").hexdigest()]
+
+
+def test_claim_check_batcher_deduplication_ids(settings):
+    batcher = ClaimCheckBatcher(settings)
+    batcher.add("a,id1", 5, "id1")
+
+    assert batcher.flush().deduplication_ids == ["id1"]
@@ -0,0 +1,78 @@
+import pytest
+from src.processor.exceptions.invalid_row_exception import InvalidRowException
+from src.processor.row_validator import RowValidator
+
+
+HEADER = "name,governmentId,email,debtAmount,debtDueDate,debtId"
+ROW = "John Doe,11111111111,johndoe@kanastra.com.br,1000.00,2022-10-12,1adb6ccf-ff16-467f-bea7-5f05d494280f"
+
+
+def test_detects_header():
+    validator = RowValidator(HEADER)
+
+    assert validator.header == HEADER
+    assert validator.validate(HEADER) is None
+    assert validator.validate(ROW) == ROW
+
+
+def test_without_header():
+    validator = RowValidator(ROW)
+
+    assert validator.header is None
+    assert validator.validate(ROW) == ROW
+
+
+def test_maps_columns_by_name():
+    validator = RowValidator(" DebtId , extra,email,name,debtDueDate,debtAmount,governmentId\n")
+
+    row = "1adb6ccf-ff16-467f-bea7-5f05d494280f,ignored,johndoe@kanastra.com.br,John Doe,2022-10-12,1000.00,11111111111"
+    assert validator.validate(row) == ROW
+
+
+def test_maps_quoted_header_columns():
+    validator = RowValidator('"name","governmentId","email","debtAmount","debtDueDate","debtId"')
+
+    assert validator.validate(ROW) == ROW
+
+
+def test_keeps_a_quoted_name_with_commas():
+    validator = RowValidator(HEADER)
+
+    assert validator.validate(ROW.replace("John Doe", '"Doe, John"')) == ROW.replace("John Doe", '"Doe, John"')
+    assert validator.validate(ROW.replace("John Doe", '"John Doe"')) == ROW
+    assert validator.validate(ROW.replace("John Doe", '"John ""JD"" Doe"')) == ROW.replace("John Doe", '"John ""JD"" Doe"')
+
+
+def test_skips_blank_lines():
+    assert RowValidator(HEADER).validate("  \n") is None
+
+
+@pytest.mark.parametrize("row, reason", [
+    ("John Doe,11111111111,johndoe@kanastra.com.br,1000.00,2022-10-12", "Expected 6 fields, got 5"),
+    (ROW + ",extra", "Expected 6 fields, got 7"),
+    (ROW.replace("John Doe", "Doe, John"), "Expected 6 fields, got 7"),
+    (ROW.replace("John Doe", '"Doe, John'), "Invalid quoting"),
+    (ROW.replace("John Doe", " "), "Empty name"),
+    (ROW.replace("11111111111", "111.111.111-11"), "Invalid governmentId: 111.111.111-11"),
+    (ROW.replace("11111111111", "١٢٣"), "Invalid governmentId: ١٢٣"),
+    (ROW.replace("11111111111", "²"), "Invalid governmentId: ²"),
+    (ROW.replace("johndoe@kanastra.com.br", "johndoe"), "Invalid email: johndoe"),
+    (ROW.replace("1000.00", "R$1000"), "Invalid debtAmount: R$1000"),
+    (ROW.replace("1000.00", "nan"), "Invalid debtAmount: nan"),
+    (ROW.replace("1000.00", "١٠٠٠"), "Invalid debtAmount: ١٠٠٠"),
+    (ROW.replace("2022-10-12", "12/10/2022"), "Invalid debtDueDate: 12/10/2022"),
+    (ROW.replace("2022-10-12", "2022-02-30"), "Invalid debtDueDate: 2022-02-30"),
+    (ROW.replace("2022-10-12", "20221012"), "Invalid debtDueDate: 20221012"),
+    (ROW.replace("1adb6ccf-ff16-467f-bea7-5f05d494280f", "1"), "Invalid debtId: 1"),
+    (ROW.replace("1adb6ccf-ff16-467f-bea7-5f05d494280f", "1adb6ccfff16467fbea75f05d494280f"),
+     "Invalid debtId: 1adb6ccfff16467fbea75f05d494280f"),
+])
+def test_rejects_invalid_rows(row, reason):
+    with pytest.raises(InvalidRowException, match=reason.replace("$", r"\$")):
+        RowValidator(HEADER).validate(row)
+
+
+def test_lowercases_the_debt_id():
+    validator = RowValidator(HEADER)
+
+    assert validator.validate(ROW.replace("1adb6ccf-ff16-467f-bea7-5f05d494280f", "1ADB6CCF-ff16-467F-BEA7-5F05D494280F")) == ROW
@@ -0,0 +1,187 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock, patch
+from src.processor.send_scheduler import SendScheduler, get_send_scheduler
+
+
+@pytest.fixture(autouse=True)
+def mock_metrics():
+    with patch("src.processor.send_scheduler.METRICS") as _mock_metrics:
+        yield _mock_metrics
+
+
+async def wait_for_waiters(scheduler: SendScheduler, count: int):
+    while scheduler.waiting < count:
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_slot_within_the_limit():
+    scheduler = SendScheduler(2)
+
+    async with scheduler.slot("import-1"):
+        async with scheduler.slot("import-2"):
+            assert scheduler.in_flight == 2
+
+    assert scheduler.in_flight == 0
+    assert scheduler.waiting == 0
+
+
+@pytest.mark.asyncio
+async def test_slot_waits_over_the_limit():
+    scheduler = SendScheduler(1)
+    await scheduler.acquire("import-1")
+
+    waiting = asyncio.create_task(scheduler.acquire("import-1"))
+    await wait_for_waiters(scheduler, 1)
+    assert not waiting.done()
+
+    scheduler.release()
+    await waiting
+    assert scheduler.in_flight == 1
+    assert scheduler.waiting == 0
+
+
+@pytest.mark.asyncio
+async def test_slots_are_shared_round_robin_across_lanes():
+    scheduler = SendScheduler(1)
+    order = []
+    await scheduler.acquire("holder")
+
+    async def send(lane: str):
+        async with scheduler.slot(lane):
+            order.append(lane)
+
+    sends = [asyncio.create_task(send("large")) for _ in range(4)]
+    await wait_for_waiters(scheduler, 4)
+    sends += [asyncio.create_task(send("small")) for _ in range(2)]
+    await wait_for_waiters(scheduler, 6)
+
+    scheduler.release()
+    await asyncio.gather(*sends)
+
+    assert order == ["large", "small", "large", "small", "large", "large"]
+    assert scheduler.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_new_sends_do_not_skip_the_waiters():
+    scheduler = SendScheduler(1)
+    await scheduler.acquire("import-1")
+    waiting = asyncio.create_task(scheduler.acquire("import-2"))
+    await wait_for_waiters(scheduler, 1)
+
+    scheduler.release()
+    late = asyncio.create_task(scheduler.acquire("import-3"))
+    await waiting
+    await asyncio.sleep(0)
+
+    assert not late.done()
+    scheduler.release()
+    await late
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_queue():
+    scheduler = SendScheduler(1)
+    await scheduler.acquire("import-1")
+    waiting = asyncio.create_task(scheduler.acquire("import-2"))
+    await wait_for_waiters(scheduler, 1)
+
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+
+    assert scheduler.waiting == 0
+    scheduler.release()
+    assert scheduler.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_slot_handed_to_a_cancelled_waiter_is_passed_on():
+    scheduler = SendScheduler(1)
+    await scheduler.acquire("import-1")
+    first = asyncio.create_task(scheduler.acquire("import-2"))
+    second = asyncio.create_task(scheduler.acquire("import-3"))
+    await wait_for_waiters(scheduler, 2)
+
+    scheduler.release()
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+    await second
+    assert scheduler.in_flight == 1
+
+
+@pytest.mark.asyncio
+async def test_in_flight_metrics(mock_metrics):
+    metrics = {}
+    mock_metrics.get.side_effect = lambda name: metrics.setdefault(name, MagicMock())
+    scheduler = SendScheduler(1)
+
+    async with scheduler.slot("import-1"):
+        pass
+
+    metrics["send_scheduler_in_flight_sends"].inc.assert_called_once()
+    metrics["send_scheduler_in_flight_sends"].dec.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_set_share_lowers_the_limit_once_the_sends_in_flight_finish():
+    scheduler = SendScheduler(4)
+    for lane in ("import-1", "import-2", "import-3", "import-4"):
+        await scheduler.acquire(lane)
+    waiter = asyncio.create_task(scheduler.acquire("import-5"))
+    await wait_for_waiters(scheduler, 1)
+
+    scheduler.set_share(0.25)
+    for _ in range(3):
+        scheduler.release()
+
+    assert scheduler.max_in_flight == 1
+    assert scheduler.in_flight == 1
+    assert not waiter.done()
+
+    scheduler.release()
+    await waiter
+    assert scheduler.in_flight == 1
+
+
+@pytest.mark.asyncio
+async def test_set_share_hands_the_new_slots_to_the_waiting_sends():
+    scheduler = SendScheduler(4)
+    scheduler.set_share(0.25)
+    await scheduler.acquire("import-1")
+    waiters = [asyncio.create_task(scheduler.acquire(f"import-{index}")) for index in (2, 3)]
+    await wait_for_waiters(scheduler, 2)
+
+    scheduler.set_share(1.0)
+    await asyncio.gather(*waiters)
+
+    assert scheduler.max_in_flight == 4
+    assert scheduler.in_flight == 3
+    assert scheduler.waiting == 0
+
+
+@pytest.mark.parametrize("share, max_in_flight", [(1.0, 8), (0.25, 2), (0.05, 1)])
+def test_set_share(share, max_in_flight):
+    scheduler = SendScheduler(8)
+
+    scheduler.set_share(share)
+
+    assert scheduler.max_in_flight == max_in_flight
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+@patch("src.processor.send_scheduler.get_settings")
+def test_get_send_scheduler_has_the_full_limit(get_settings, workers):
+    get_send_scheduler.cache_clear()
+    get_settings.return_value.max_sqs_in_flight_sends = 8
+    get_settings.return_value.csv_process_workers = workers
+
+    try:
+        assert get_send_scheduler().max_in_flight == 8
+        assert get_send_scheduler() is get_send_scheduler()
+    finally:
+        get_send_scheduler.cache_clear()
@@ -0,0 +1,437 @@
+import json
+import os
+import pytest
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import AsyncMock, MagicMock, patch
+from src.models.import_job import ImportJob
+from src.processor.exceptions.incomplete_import_exception import IncompleteImportException
+from src.processor.sharded_csv_processor import (
+    FileRange,
+    ShardedCSVProcessor,
+    find_line_ranges,
+    init_range_worker,
+    process_file_range,
+    process_share
+)
+
+
+@pytest.fixture
+def settings(tmp_path):
+    _settings = MagicMock()
+    _settings.import_error_report_dir = str(tmp_path / "errors")
+    _settings.max_csv_process_concurrent_tasks = 2
+    _settings.csv_process_queue_size = 2
+    _settings.max_sqs_send_message_batch_size = 2
+    _settings.csv_read_chunk_size = 4
+    _settings.csv_process_workers = 2
+    _settings.csv_range_size = 8
+    _settings.sqs_message_packing_enabled = False
+    _settings.claim_check_enabled = False
+    _settings.sqs_message_binary_encoding_enabled = False
+    _settings.sqs_queue_shards = 1
+    _settings.sqs_queue_url = "queue"
+    _settings.csv_validation_enabled = False
+    _settings.csv_validation_block_size = 4
+    _settings.csv_dedup_enabled = False
+    _settings.billed_debts_filter_enabled = False
+    _settings.import_fingerprints_dir = str(tmp_path / "fingerprints")
+    return _settings
+
+
+@pytest.fixture
+def metrics():
+    return {}
+
+
+def metrics_by_name(mock_metrics, metrics):
+    mock_metrics.get.side_effect = lambda name: metrics.setdefault(name, MagicMock())
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / "file.csv"
+    path.write_bytes(b"line1\nline2\nline3\nline4\nline5")
+    return str(path)
+
+
+def test_file_range_read():
+    file_range = FileRange(BytesIO(b"line1\nline2\nline3"), 6, 12)
+
+    assert file_range.tell() == 6
+    assert file_range.read(4) == b"line"
+    assert file_range.read(4) == b"2\n"
+    assert file_range.read(4) == b""
+
+
+def test_file_range_read_all():
+    assert FileRange(BytesIO(b"line1\nline2\nline3"), 6, 12).read() == b"line2\n"
+
+
+def test_find_line_ranges():
+    content = b"line1\nline2\nline3\nline4\nline5"
+
+    ranges = find_line_ranges(BytesIO(content), len(content), 8)
+
+    assert ranges == [(0, 12), (12, 24), (24, 29)]
+    assert b"".join(content[start:end] for start, end in ranges) == content
+
+
+def test_find_line_ranges_on_line_boundary():
+    content = b"line1\nline2\nline3\n"
+
+    assert find_line_ranges(BytesIO(content), len(content), 6) == [(0, 6), (6, 12), (12, 18)]
+
+
+def test_find_line_ranges_long_line():
+    content = b"a-very-long-line\nline2"
+
+    assert find_line_ranges(BytesIO(content), len(content), 4) == [(0, 17), (17, 22)]
+
+
+def test_find_line_ranges_empty_file():
+    assert find_line_ranges(BytesIO(b""), 0, 8) == []
+
+
+@patch("src.processor.sharded_csv_processor.get_send_scheduler")
+@patch("src.processor.sharded_csv_processor.get_sqs_rate_limiter")
+@patch("src.processor.sharded_csv_processor.get_sqs_client")
+def test_init_range_worker(get_sqs_client, get_sqs_rate_limiter, get_send_scheduler):
+    init_range_worker(0.2)
+
+    get_sqs_rate_limiter.return_value.set_share.assert_called_once_with(0.2)
+    get_send_scheduler.return_value.set_share.assert_called_once_with(0.2)
+    get_sqs_client.assert_called_once()
+
+
+@pytest.mark.parametrize("workers, share", [(1, 1.0), (2, 1 / 3), (4, 0.2)])
+def test_process_share(workers, share):
+    assert process_share(workers) == share
+
+
+@patch("src.processor.sharded_csv_processor.get_sqs_rate_limiter")
+@patch("src.processor.sharded_csv_processor.get_sqs_client")
+@patch("src.processor.sharded_csv_processor.get_settings")
+def test_process_file_range_reports_the_throttled_requests(get_settings, get_sqs_client, get_sqs_rate_limiter, settings, csv_file):
+    get_settings.return_value = settings
+    rate_limiter = get_sqs_rate_limiter.return_value
+    rate_limiter.throttle_events = 3
+
+    async def send_message_batch_async(messages):
+        rate_limiter.throttle_events += 2
+        return []
+
+    get_sqs_client.return_value.send_message_batch_async = send_message_batch_async
+
+    result = process_file_range(csv_file, 12, 24, "line1\n", "import-id")
+
+    assert result["sqs_throttle_events"] == 2
+
+
+@patch("src.processor.sharded_csv_processor.get_sqs_client")
+@patch("src.processor.sharded_csv_processor.get_settings")
+def test_process_file_range(get_settings, get_sqs_client, settings, csv_file):
+    get_settings.return_value = settings
+    sqs_client = get_sqs_client.return_value
+    sqs_client.send_message_batch_async = AsyncMock(side_effect=[[], [0]])
+
+    result = process_file_range(csv_file, 12, 29, "line1\n", "import-id")
+
+    sqs_client.send_message_batch_async.assert_any_call(["line3", "line4"])
+    sqs_client.send_message_batch_async.assert_any_call(["line5"])
+    assert result == {"messages_sent": 2, "messages_failed": 1, "rows_sent": 2, "rows_failed": 1, "rows_rejected": 0, "rows_duplicated": 0, "rows_unchanged": 0, "rows_already_billed": 0, "shard_rows_sent": {}, "shard_messages_sent": {}, "sqs_throttle_events": 0}
+
+
+@patch("src.processor.sharded_csv_processor.process_file_range")
+@patch("src.processor.sharded_csv_processor.get_logger")
+@patch("src.processor.sharded_csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process(mock_metrics, get_logger, process_file_range, metrics, settings, csv_file):
+    metrics_by_name(mock_metrics, metrics)
+    process_file_range.return_value = {"messages_sent": 2, "messages_failed": 0, "rows_sent": 2, "rows_failed": 0, "rows_rejected": 0, "rows_duplicated": 0, "rows_unchanged": 0, "rows_already_billed": 0, "shard_rows_sent": {}, "shard_messages_sent": {}, "sqs_throttle_events": 0}
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        await ShardedCSVProcessor(settings, csv_file, executor).process()
+
+    process_file_range.assert_any_call(csv_file, 0, 12, "line1\n", "", None)
+    process_file_range.assert_any_call(csv_file, 12, 24, "line1\n", "", None)
+    process_file_range.assert_any_call(csv_file, 24, 29, "line1\n", "", None)
+    assert metrics["csv_sharded_processor_ranges_processed"].inc.call_count == 3
+    assert metrics["csv_processor_rows_sent"].inc.call_count == 3
+    metrics["csv_processor_rows_sent"].inc.assert_called_with(2)
+    assert "csv_processor_rows_failed" not in metrics
+
+
+@patch("src.processor.sharded_csv_processor.process_file_range")
+@patch("src.processor.sharded_csv_processor.get_logger")
+@patch("src.processor.sharded_csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_combines_failed_rows(mock_metrics, get_logger, process_file_range, metrics, settings, csv_file):
+    metrics_by_name(mock_metrics, metrics)
+    settings.csv_range_size = 100
+    process_file_range.return_value = {"messages_sent": 1, "messages_failed": 2, "rows_sent": 3, "rows_failed": 4, "rows_rejected": 0, "rows_duplicated": 0, "rows_unchanged": 0, "rows_already_billed": 0, "shard_rows_sent": {}, "shard_messages_sent": {}, "sqs_throttle_events": 0}
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        await ShardedCSVProcessor(settings, csv_file, executor).process()
+
+    metrics["csv_processor_messages_sent"].inc.assert_called_once_with(1)
+    metrics["csv_processor_rows_sent"].inc.assert_called_once_with(3)
+    metrics["csv_processor_messages_failed"].inc.assert_called_once_with(2)
+    metrics["csv_processor_rows_failed"].inc.assert_called_once_with(4)
+
+
+@patch("src.processor.sharded_csv_processor.process_file_range")
+@patch("src.processor.sharded_csv_processor.get_logger")
+@patch("src.processor.sharded_csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_fails_after_every_range_when_a_range_fails(mock_metrics, get_logger, process_file_range, metrics, settings, csv_file):
+    metrics_by_name(mock_metrics, metrics)
+    process_file_range.side_effect = [
+        {"messages_sent": 2, "messages_failed": 0, "rows_sent": 2, "rows_failed": 0, "rows_rejected": 0, "rows_duplicated": 0, "rows_unchanged": 0, "rows_already_billed": 0, "shard_rows_sent": {}, "shard_messages_sent": {}, "sqs_throttle_events": 0},
+        Exception("worker error"),
+        {"messages_sent": 1, "messages_failed": 0, "rows_sent": 1, "rows_failed": 0, "rows_rejected": 0, "rows_duplicated": 0, "rows_unchanged": 0, "rows_already_billed": 0, "shard_rows_sent": {}, "shard_messages_sent": {}, "sqs_throttle_events": 0},
+    ]
+
+    checkpoint = MagicMock()
+    checkpoint.completed_ranges = []
+
+    with ThreadPoolExecutor(max_workers=1) as executor, pytest.raises(IncompleteImportException, match="1 of 3 file ranges failed"):
+        await ShardedCSVProcessor(settings, csv_file, executor, checkpoint).process()
+
+    assert metrics["csv_sharded_processor_ranges_processed"].inc.call_count == 2
+    metrics["csv_sharded_processor_ranges_failed"].inc.assert_called_once()
+    assert sorted(call.args for call in checkpoint.complete_range.call_args_list) == [(0, 12), (24, 29)]
+    get_logger.return_value.error.assert_called_once_with(
+        "Error processing file range: worker error",
+        extra={"file_path": csv_file, "start": 12, "end": 24}
+    )
+
+
+@patch("src.processor.sharded_csv_processor.share_send_limits")
+@patch("src.processor.sharded_csv_processor.process_file_range")
+@patch("src.processor.sharded_csv_processor.get_process_pool")
+@patch("src.processor.sharded_csv_processor.get_logger")
+@patch("src.processor.sharded_csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_shares_the_send_limits_while_ranges_run(mock_metrics, get_logger, get_process_pool, process_file_range, share_send_limits, settings, csv_file):
+    """
+    The API process sends with its share of the limits only while the ranges run
+    on the pool, and gets them whole back for the imports that are not sharded.
+    """
+    shares_while_running = []
+
+    def process_range(*args):
+        shares_while_running.append(share_send_limits.call_args.args[0])
+        return {"messages_sent": 1, "messages_failed": 0, "rows_sent": 1, "rows_failed": 0, "rows_rejected": 0, "rows_duplicated": 0, "rows_unchanged": 0, "rows_already_billed": 0, "shard_rows_sent": {}, "shard_messages_sent": {}, "sqs_throttle_events": 0}
+
+    process_file_range.side_effect = process_range
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        get_process_pool.return_value = executor
+        await ShardedCSVProcessor(settings, csv_file).process()
+
+    assert shares_while_running == [1 / 3] * 3
+    assert [call.args[0] for call in share_send_limits.call_args_list] == [1 / 3, 1.0]
+
+
+@patch("src.processor.sharded_csv_processor.share_send_limits")
+@patch("src.processor.sharded_csv_processor.process_file_range")
+@patch("src.processor.sharded_csv_processor.get_process_pool")
+@patch("src.processor.sharded_csv_processor.get_logger")
+@patch("src.processor.sharded_csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_drops_a_broken_process_pool(mock_metrics, get_logger, get_process_pool, process_file_range, share_send_limits, settings, csv_file):
+    process_file_range.side_effect = BrokenProcessPool("worker died")
+
+    with ThreadPoolExecutor(max_workers=1) as executor, pytest.raises(IncompleteImportException):
+        get_process_pool.return_value = executor
+        await ShardedCSVProcessor(settings, csv_file).process()
+
+    get_process_pool.cache_clear.assert_called()
+    share_send_limits.assert_called_with(1.0)
+
+
+@patch("src.processor.sharded_csv_processor.get_process_pool")
+@patch("src.processor.sharded_csv_processor.get_logger")
+def test_init_uses_shared_process_pool(get_logger, get_process_pool, settings, csv_file):
+    processor = ShardedCSVProcessor(settings, csv_file)
+
+    get_process_pool.assert_called_once_with(2)
+    assert processor.executor == get_process_pool.return_value
+
+
+@patch("src.processor.sharded_csv_processor.process_file_range")
+@patch("src.processor.sharded_csv_processor.get_logger")
+@patch("src.processor.sharded_csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_resumes_from_the_checkpoint(mock_metrics, get_logger, process_file_range, settings, csv_file):
+    process_file_range.return_value = {"messages_sent": 2, "messages_failed": 0, "rows_sent": 2, "rows_failed": 0, "rows_rejected": 0, "rows_duplicated": 0, "rows_unchanged": 0, "rows_already_billed": 0, "shard_rows_sent": {}, "shard_messages_sent": {}, "sqs_throttle_events": 0}
+    checkpoint = MagicMock()
+    checkpoint.completed_ranges = [(0, 12)]
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        await ShardedCSVProcessor(settings, csv_file, executor, checkpoint).process()
+
+    assert process_file_range.call_count == 2
+    process_file_range.assert_any_call(csv_file, 12, 24, "line1\n", "", None)
+    process_file_range.assert_any_call(csv_file, 24, 29, "line1\n", "", None)
+    checkpoint.complete_range.assert_any_call(12, 24)
+    checkpoint.complete_range.assert_any_call(24, 29)
+
+
+@patch("src.processor.sharded_csv_processor.process_file_range")
+@patch("src.processor.sharded_csv_processor.get_logger")
+@patch("src.processor.sharded_csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_does_not_complete_failed_ranges(mock_metrics, get_logger, process_file_range, settings, csv_file):
+    settings.csv_range_size = 100
+    process_file_range.side_effect = Exception("worker error")
+    checkpoint = MagicMock()
+    checkpoint.completed_ranges = []
+
+    with ThreadPoolExecutor(max_workers=1) as executor, pytest.raises(IncompleteImportException):
+        await ShardedCSVProcessor(settings, csv_file, executor, checkpoint).process()
+
+    checkpoint.complete_range.assert_not_called()
+
+
+@patch("src.processor.sharded_csv_processor.process_file_range")
+@patch("src.processor.sharded_csv_processor.get_logger")
+@patch("src.processor.sharded_csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_records_progress_in_the_job(mock_metrics, get_logger, process_file_range, settings, csv_file):
+    process_file_range.side_effect = [
+        {"messages_sent": 2, "messages_failed": 0, "rows_sent": 2, "rows_failed": 0, "rows_rejected": 0, "rows_duplicated": 0, "rows_unchanged": 0, "rows_already_billed": 0, "shard_rows_sent": {}, "shard_messages_sent": {}, "sqs_throttle_events": 0},
+        {"messages_sent": 1, "messages_failed": 1, "rows_sent": 1, "rows_failed": 1, "rows_rejected": 0, "rows_duplicated": 0, "rows_unchanged": 0, "rows_already_billed": 0, "shard_rows_sent": {}, "shard_messages_sent": {}, "sqs_throttle_events": 0},
+        {"messages_sent": 1, "messages_failed": 0, "rows_sent": 1, "rows_failed": 0, "rows_rejected": 0, "rows_duplicated": 0, "rows_unchanged": 0, "rows_already_billed": 0, "shard_rows_sent": {}, "shard_messages_sent": {}, "sqs_throttle_events": 0},
+    ]
+    job = ImportJob("import-id", 29)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        await ShardedCSVProcessor(settings, csv_file, executor, job=job).process()
+
+    assert job.rows_read == 5
+    assert job.rows_sent == 4
+    assert job.rows_failed == 1
+    assert job.bytes_processed == 29
+
+
+@patch("src.processor.sharded_csv_processor.get_sqs_client")
+@patch("src.processor.sharded_csv_processor.get_settings")
+def test_process_file_range_rejects_invalid_and_duplicated_rows(get_settings, get_sqs_client, settings, tmp_path):
+    settings.csv_validation_enabled = True
+    settings.csv_dedup_enabled = True
+    settings.csv_dedup_exact_max_rows = 100
+    get_settings.return_value = settings
+    get_sqs_client.return_value.send_message_batch_async = AsyncMock(return_value=[])
+    header = "debtId,name,governmentId,email,debtAmount,debtDueDate\n"
+    row = "1adb6ccf-ff16-467f-bea7-5f05d494280f,John Doe,11111111111,johndoe@kanastra.com.br,1000.00,2022-10-12\n"
+    path = tmp_path / "file.csv"
+    path.write_bytes((header + row + "invalid\n" + row).encode())
+
+    result = process_file_range(str(path), len(header), path.stat().st_size, header, "import-id")
+
+    get_sqs_client.return_value.send_message_batch_async.assert_called_once_with([
+        "John Doe,11111111111,johndoe@kanastra.com.br,1000.00,2022-10-12,1adb6ccf-ff16-467f-bea7-5f05d494280f"
+    ])
+    assert result["rows_sent"] == 1
+    assert result["rows_rejected"] == 1
+    assert result["rows_duplicated"] == 1
+    with open(tmp_path / "errors" / "import-id.jsonl") as report:
+        assert [json.loads(line) for line in report] == [{
+            "offset": len(header) + len(row),
+            "reason": "Expected 6 fields, got 1",
+            "row": "invalid"
+        }, {
+            "offset": len(header) + len(row) + 8,
+            "reason": "Duplicate debtId: 1adb6ccf-ff16-467f-bea7-5f05d494280f",
+            "row": "John Doe,11111111111,johndoe@kanastra.com.br,1000.00,2022-10-12,1adb6ccf-ff16-467f-bea7-5f05d494280f"
+        }]
+
+
+@patch("src.processor.sharded_csv_processor.process_file_range")
+@patch("src.processor.sharded_csv_processor.get_logger")
+@patch("src.processor.sharded_csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_combines_rejected_duplicated_and_billed_rows(mock_metrics, get_logger, process_file_range, metrics, settings, csv_file):
+    metrics_by_name(mock_metrics, metrics)
+    settings.csv_range_size = 100
+    process_file_range.return_value = {
+        "messages_sent": 1, "messages_failed": 0, "rows_sent": 1, "rows_failed": 0, "rows_rejected": 3, "rows_duplicated": 2, "rows_unchanged": 0,
+        "rows_already_billed": 4, "shard_rows_sent": {}, "shard_messages_sent": {}, "sqs_throttle_events": 0
+    }
+    job = ImportJob("import-id", 29)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        await ShardedCSVProcessor(settings, csv_file, executor, job=job, import_id="import-id").process()
+
+    process_file_range.assert_called_once_with(csv_file, 0, 29, "line1\n", "import-id", None)
+    metrics["csv_processor_rows_rejected"].inc.assert_called_once_with(3)
+    metrics["csv_processor_rows_duplicated"].inc.assert_called_once_with(2)
+    metrics["csv_processor_rows_already_billed"].inc.assert_called_once_with(4)
+    assert job.rows_rejected == 3
+    assert job.rows_duplicated == 2
+    assert job.rows_already_billed == 4
+
+
+@patch("src.processor.sharded_csv_processor.process_file_range")
+@patch("src.processor.sharded_csv_processor.get_logger")
+@patch("src.processor.sharded_csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_combines_shard_metrics(mock_metrics, get_logger, process_file_range, settings, csv_file):
+    settings.csv_range_size = 100
+    process_file_range.return_value = {
+        "messages_sent": 3, "messages_failed": 0, "rows_sent": 3, "rows_failed": 0, "rows_rejected": 0, "rows_duplicated": 0, "rows_unchanged": 0,
+        "rows_already_billed": 0, "shard_rows_sent": {0: 1, 1: 2}, "shard_messages_sent": {0: 1, 1: 2}, "sqs_throttle_events": 5
+    }
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        await ShardedCSVProcessor(settings, csv_file, executor, import_id="import-id").process()
+
+    mock_metrics.get.assert_any_call("sqs_rate_limiter_throttle_events")
+    mock_metrics.get.return_value.inc.assert_any_call(5)
+    mock_metrics.get.assert_any_call("csv_processor_shard_messages_sent", {"shard": "0"})
+    mock_metrics.get.assert_any_call("csv_processor_shard_rows_sent", {"shard": "1"})
+    mock_metrics.get.return_value.inc.assert_any_call(2)
+
+
+@patch("src.processor.sharded_csv_processor.get_sqs_client")
+@patch("src.processor.sharded_csv_processor.get_settings")
+@patch("src.processor.sharded_csv_processor.get_logger")
+@patch("src.processor.sharded_csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_sends_only_the_rows_changed_since_the_previous_import(mock_metrics, get_logger, get_settings, get_sqs_client, settings, csv_file, tmp_path):
+    get_settings.return_value = settings
+    sqs_client = get_sqs_client.return_value
+    sqs_client.send_message_batch_async = AsyncMock(return_value=[])
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        await ShardedCSVProcessor(settings, csv_file, executor, import_id="first", source="portfolio").process()
+
+        sqs_client.send_message_batch_async.reset_mock()
+        with open(csv_file, "wb") as file:
+            file.write(b"line1\nline2\nline3-changed\nline4\nline5")
+        job = ImportJob("second", 36)
+        await ShardedCSVProcessor(settings, csv_file, executor, job=job, import_id="second", source="portfolio").process()
+
+    sqs_client.send_message_batch_async.assert_called_once_with(["line3-changed"])
+    assert job.rows_unchanged == 4
+    assert os.listdir(tmp_path / "fingerprints") == ["portfolio.fingerprints"]
+
+
+@patch("src.processor.sharded_csv_processor.merge_fingerprint_stores")
+@patch("src.processor.sharded_csv_processor.process_file_range")
+@patch("src.processor.sharded_csv_processor.get_logger")
+@patch("src.processor.sharded_csv_processor.METRICS")
+@pytest.mark.asyncio
+async def test_process_keeps_the_previous_fingerprints_when_a_range_fails(mock_metrics, get_logger, process_file_range, merge_fingerprint_stores, settings, csv_file):
+    process_file_range.side_effect = [
+        {"messages_sent": 2, "messages_failed": 0, "rows_sent": 2, "rows_failed": 0, "rows_rejected": 0, "rows_duplicated": 0, "rows_unchanged": 0, "rows_already_billed": 0, "shard_rows_sent": {}, "shard_messages_sent": {}, "sqs_throttle_events": 0},
+        Exception("worker error"),
+        {"messages_sent": 1, "messages_failed": 0, "rows_sent": 1, "rows_failed": 0, "rows_rejected": 0, "rows_duplicated": 0, "rows_unchanged": 0, "rows_already_billed": 0, "shard_rows_sent": {}, "shard_messages_sent": {}, "sqs_throttle_events": 0},
+    ]
+
+    with ThreadPoolExecutor(max_workers=1) as executor, pytest.raises(IncompleteImportException):
+        await ShardedCSVProcessor(settings, csv_file, executor, import_id="import-id", source="portfolio").process()
+
+    merge_fingerprint_stores.assert_not_called()
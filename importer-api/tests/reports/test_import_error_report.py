@@ -0,0 +1,43 @@
+import json
+from unittest.mock import MagicMock
+from src.reports.import_error_report import ImportErrorReport, error_report_path
+
+
+def test_add(tmp_path):
+    settings = MagicMock()
+    settings.import_error_report_dir = str(tmp_path / "errors")
+    report = ImportErrorReport(settings, "import-id")
+
+    report.add(10, "Empty name", ",1,a@b.c,1,2022-10-12,x")
+    report.add(50, "Invalid debtId: x", "a,1,a@b.c,1,2022-10-12,x")
+    report.close()
+
+    with open(tmp_path / "errors" / "import-id.jsonl") as file:
+        lines = [json.loads(line) for line in file]
+    assert lines == [
+        {"offset": 10, "reason": "Empty name", "row": ",1,a@b.c,1,2022-10-12,x"},
+        {"offset": 50, "reason": "Invalid debtId: x", "row": "a,1,a@b.c,1,2022-10-12,x"},
+    ]
+    assert report.count == 2
+
+
+def test_appends_to_existing_report(tmp_path):
+    settings = MagicMock()
+    settings.import_error_report_dir = str(tmp_path)
+
+    for offset in (1, 2):
+        report = ImportErrorReport(settings, "import-id")
+        report.add(offset, "reason", "row")
+        report.close()
+
+    with open(error_report_path(settings, "import-id")) as file:
+        assert len(file.readlines()) == 2
+
+
+def test_not_created_without_rejected_rows(tmp_path):
+    settings = MagicMock()
+    settings.import_error_report_dir = str(tmp_path)
+
+    ImportErrorReport(settings, "import-id").close()
+
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,111 @@
+import gzip
+import tracemalloc
+import zstandard
+import pytest
+from io import BytesIO
+from src.spool.decompression import GZIP, ZSTD, decompressed_chunks, detect_encoding
+from src.spool.exceptions.invalid_upload_exception import InvalidUploadException
+
+
+CONTENT = b"".join(f"line{index}\n".encode() for index in range(1000))
+
+
+def decompress(compressed: bytes, encoding: str, chunk_size: int) -> list[bytes]:
+    return list(decompressed_chunks(BytesIO(compressed), encoding, chunk_size))
+
+
+@pytest.mark.parametrize("head, content_encoding, content_type, filename, encoding", [
+    (b"line", None, None, "file.csv", None),
+    (b"line", "gzip", None, None, GZIP),
+    (b"line", None, "application/x-gzip", None, GZIP),
+    (b"line", None, "application/zstd; charset=binary", None, ZSTD),
+    (b"line", None, "text/csv", "file.csv.gz", GZIP),
+    (b"line", None, None, "FILE.CSV.ZST", ZSTD),
+    (b"\x1f\x8b\x08\x00", None, "text/csv", "file.csv", GZIP),
+    (b"\x28\xb5\x2f\xfd", None, None, None, ZSTD),
+    (b"line", "identity", "text/csv", "file.csv", None),
+])
+def test_detect_encoding(head, content_encoding, content_type, filename, encoding):
+    assert detect_encoding(head, content_encoding, content_type, filename) == encoding
+
+
+@pytest.mark.parametrize("chunk_size", [3, 64, 1 << 20])
+def test_gzip_chunks(chunk_size):
+    compressed = gzip.compress(CONTENT[:100]) + gzip.compress(CONTENT[100:])
+
+    chunks = decompress(compressed, GZIP, chunk_size)
+
+    assert b"".join(chunks) == CONTENT
+    assert max(len(chunk) for chunk in chunks) <= chunk_size
+
+
+def test_gzip_chunks_truncated():
+    with pytest.raises(InvalidUploadException, match="Truncated gzip content"):
+        decompress(gzip.compress(CONTENT)[:-10], GZIP, 64)
+
+
+def test_gzip_chunks_invalid():
+    with pytest.raises(InvalidUploadException, match="Invalid gzip content"):
+        decompress(CONTENT, GZIP, 64)
+
+
+@pytest.mark.parametrize("chunk_size", [3, 64, 1 << 20])
+def test_zstd_chunks(chunk_size):
+    compressor = zstandard.ZstdCompressor()
+    compressed = compressor.compress(CONTENT[:100]) + compressor.compress(CONTENT[100:])
+
+    chunks = decompress(compressed, ZSTD, chunk_size)
+
+    assert b"".join(chunks) == CONTENT
+    assert max(len(chunk) for chunk in chunks) <= chunk_size
+
+
+@pytest.mark.parametrize("write_checksum", [False, True])
+@pytest.mark.parametrize("cut", [1, 4, 10, 20])
+def test_zstd_chunks_truncated(write_checksum, cut):
+    compressed = zstandard.ZstdCompressor(write_checksum=write_checksum).compress(CONTENT)
+
+    with pytest.raises(InvalidUploadException, match="Truncated zstd content"):
+        decompress(compressed + compressed[:-cut], ZSTD, 64)
+
+
+def test_zstd_chunks_skippable_frame():
+    skippable = (0x184D2A53).to_bytes(4, "little") + (3).to_bytes(4, "little") + b"abc"
+    compressed = zstandard.ZstdCompressor(write_checksum=True).compress(CONTENT)
+
+    assert b"".join(decompress(skippable + compressed, ZSTD, 64)) == CONTENT
+
+
+@pytest.mark.parametrize("encoding, compress", [
+    (GZIP, gzip.compress),
+    (ZSTD, zstandard.ZstdCompressor().compress),
+])
+def test_high_ratio_content_is_decompressed_in_bounded_chunks(encoding, compress):
+    compressed = compress(b"a" * (64 << 20))
+    chunks = decompressed_chunks(BytesIO(compressed), encoding, 65536)
+
+    tracemalloc.start()
+    try:
+        chunk = next(chunks)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert len(compressed) < 100_000
+    assert len(chunk) == 65536
+    assert peak < 4 << 20
+
+
+def test_zstd_chunks_invalid():
+    with pytest.raises(InvalidUploadException, match="Invalid zstd content"):
+        decompress(b"\x28\xb5\x2f\xfd" + CONTENT, ZSTD, 64)
+
+
+@pytest.mark.parametrize("encoding", [GZIP, ZSTD])
+def test_empty_file(encoding):
+    assert decompress(b"", encoding, 64) == []
+
+
+def test_unsupported_encoding():
+    with pytest.raises(InvalidUploadException):
+        decompressed_chunks(BytesIO(CONTENT), "br", 64)
@@ -0,0 +1,95 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from src.models.message_batch import MessageBatch
+from src.models.spooled_import import SpooledImport
+from src.spool.import_checkpoint import ImportCheckpoint
+
+
+@pytest.fixture
+def spool():
+    return MagicMock()
+
+
+@pytest.fixture
+def spooled_import():
+    return SpooledImport("import-id", "/spool/import-id.csv", offset=10)
+
+
+@pytest.fixture
+def checkpoint(spool, spooled_import):
+    return ImportCheckpoint(spool, spooled_import, interval=60)
+
+
+def test_offset(checkpoint):
+    assert checkpoint.offset == 10
+
+
+def test_acknowledge_in_order(checkpoint):
+    first, second = MessageBatch(["row1"], end_offset=20), MessageBatch(["row2"], end_offset=30)
+    checkpoint.track(first)
+    checkpoint.track(second)
+
+    checkpoint.acknowledge(first)
+    assert checkpoint.offset == 20
+
+    checkpoint.acknowledge(second)
+    assert checkpoint.offset == 30
+
+
+def test_acknowledge_out_of_order(checkpoint):
+    batches = [MessageBatch([f"row{i}"], end_offset=20 + i * 10) for i in range(3)]
+    for batch in batches:
+        checkpoint.track(batch)
+
+    checkpoint.acknowledge(batches[2])
+    checkpoint.acknowledge(batches[1])
+    assert checkpoint.offset == 10
+
+    checkpoint.acknowledge(batches[0])
+    assert checkpoint.offset == 40
+
+
+def test_acknowledge_saves_after_the_interval(spool, spooled_import):
+    checkpoint = ImportCheckpoint(spool, spooled_import, interval=0)
+    batch = MessageBatch(["row1"], end_offset=20)
+    checkpoint.track(batch)
+
+    checkpoint.acknowledge(batch)
+
+    spool.save_manifest.assert_called_once_with(spooled_import)
+
+
+def test_acknowledge_does_not_save_within_the_interval(spool, checkpoint):
+    batch = MessageBatch(["row1"], end_offset=20)
+    checkpoint.track(batch)
+
+    checkpoint.acknowledge(batch)
+
+    spool.save_manifest.assert_not_called()
+
+
+@patch("src.spool.import_checkpoint.monotonic")
+def test_acknowledge_saves_once_per_interval(monotonic, spool, spooled_import):
+    monotonic.side_effect = [0, 0.5, 1.5, 1.5, 2]
+    checkpoint = ImportCheckpoint(spool, spooled_import, interval=1)
+    batches = [MessageBatch([f"row{i}"], end_offset=20 + i * 10) for i in range(3)]
+    for batch in batches:
+        checkpoint.track(batch)
+
+    for batch in batches:
+        checkpoint.acknowledge(batch)
+
+    spool.save_manifest.assert_called_once_with(spooled_import)
+
+
+def test_complete_range(spool, spooled_import, checkpoint):
+    checkpoint.complete_range(0, 20)
+
+    assert checkpoint.completed_ranges == [(0, 20)]
+    spool.save_manifest.assert_called_once_with(spooled_import)
+
+
+def test_save(spool, spooled_import, checkpoint):
+    checkpoint.save()
+
+    spool.save_manifest.assert_called_once_with(spooled_import)
@@ -0,0 +1,216 @@
+import gzip
+import hashlib
+import json
+import os
+import pytest
+from io import BytesIO
+from unittest.mock import MagicMock, patch
+from src.models.spooled_import import SpooledImport
+from src.spool.exceptions.invalid_upload_exception import InvalidUploadException
+from src.spool.upload_spool import UploadSpool, map_file
+
+
+@pytest.fixture
+def settings(tmp_path):
+    _settings = MagicMock()
+    _settings.import_spool_dir = str(tmp_path / "spool")
+    _settings.csv_read_chunk_size = 4
+    return _settings
+
+
+def read_manifest(spool, spooled_import):
+    with open(os.path.join(spool.directory, f"{spooled_import.import_id}.json")) as manifest_file:
+        return json.load(manifest_file)
+
+
+@patch("src.spool.upload_spool.get_logger")
+def test_save(get_logger, settings):
+    file = BytesIO(b"line1\nline2\nline3")
+    file.read()
+    spool = UploadSpool(settings)
+
+    spooled_import = spool.save(file)
+
+    assert spooled_import.path == os.path.join(settings.import_spool_dir, f"{spooled_import.import_id}.csv")
+    assert spooled_import.offset == 0
+    assert spooled_import.digest == hashlib.sha256(b"line1\nline2\nline3").hexdigest()
+    with open(spooled_import.path, "rb") as spool_file:
+        assert spool_file.read() == b"line1\nline2\nline3"
+    assert read_manifest(spool, spooled_import) == {
+        "import_id": spooled_import.import_id,
+        "offset": 0,
+        "completed_ranges": [],
+        "source": None,
+        "digest": hashlib.sha256(b"line1\nline2\nline3").hexdigest(),
+        "path": spooled_import.path,
+        "local": False
+    }
+
+
+@patch("src.spool.upload_spool.get_logger")
+def test_save_decompresses_the_upload(get_logger, settings):
+    spool = UploadSpool(settings)
+
+    spooled_import = spool.save(BytesIO(gzip.compress(b"line1\nline2\nline3")), encoding="gzip")
+
+    with open(spooled_import.path, "rb") as spool_file:
+        assert spool_file.read() == b"line1\nline2\nline3"
+    assert spooled_import.digest == hashlib.sha256(b"line1\nline2\nline3").hexdigest()
+
+
+@patch("src.spool.upload_spool.get_logger")
+def test_save_removes_an_invalid_compressed_upload(get_logger, settings):
+    spool = UploadSpool(settings)
+
+    with pytest.raises(InvalidUploadException):
+        spool.save(BytesIO(b"line1\nline2"), encoding="gzip")
+
+    assert os.listdir(spool.directory) == []
+
+
+@patch("src.spool.upload_spool.get_logger")
+def test_save_uses_a_new_file_per_upload(get_logger, settings):
+    spool = UploadSpool(settings)
+
+    assert spool.save(BytesIO(b"a")).path != spool.save(BytesIO(b"a")).path
+
+
+@patch("src.spool.upload_spool.get_logger")
+def test_save_manifest(get_logger, settings):
+    spool = UploadSpool(settings)
+    spooled_import = spool.save(BytesIO(b"line1\nline2"))
+    spooled_import.offset = 6
+    spooled_import.completed_ranges.append((0, 6))
+
+    spool.save_manifest(spooled_import)
+
+    assert read_manifest(spool, spooled_import)["offset"] == 6
+    assert read_manifest(spool, spooled_import)["completed_ranges"] == [[0, 6]]
+    assert not any(name.endswith(".tmp") for name in os.listdir(spool.directory))
+
+
+@patch("src.spool.upload_spool.get_logger")
+def test_pending(get_logger, settings):
+    spool = UploadSpool(settings)
+    spooled_import = spool.save(BytesIO(b"line1\nline2"))
+    spooled_import.offset = 6
+    spooled_import.completed_ranges.append((0, 6))
+    spool.save_manifest(spooled_import)
+
+    pending = spool.pending()
+
+    assert len(pending) == 1
+    assert pending[0].import_id == spooled_import.import_id
+    assert pending[0].path == spooled_import.path
+    assert pending[0].offset == 6
+    assert pending[0].completed_ranges == [(0, 6)]
+    assert pending[0].digest == spooled_import.digest
+
+
+@patch("src.spool.upload_spool.get_logger")
+def test_pending_keeps_the_source(get_logger, settings):
+    spool = UploadSpool(settings)
+    spooled_import = spool.save(BytesIO(b"line1\nline2"), "portfolio")
+
+    assert spooled_import.source == "portfolio"
+    assert spool.pending()[0].source == "portfolio"
+
+
+@patch("src.spool.upload_spool.get_logger")
+def test_register(get_logger, settings, tmp_path):
+    path = tmp_path / "local.csv"
+    path.write_bytes(b"line1\nline2")
+    spool = UploadSpool(settings)
+
+    spooled_import = spool.register(str(path), "portfolio")
+
+    assert spooled_import.path == str(path)
+    assert spooled_import.local
+    assert os.listdir(spool.directory) == [f"{spooled_import.import_id}.json"]
+    pending = spool.pending()
+    assert pending[0].path == str(path)
+    assert pending[0].local
+    assert pending[0].source == "portfolio"
+
+
+@patch("src.spool.upload_spool.get_logger")
+def test_register_with_import_id(get_logger, settings, tmp_path):
+    spooled_import = UploadSpool(settings).register(str(tmp_path / "local.csv"), import_id="import-id")
+
+    assert spooled_import.import_id == "import-id"
+
+
+@patch("src.spool.upload_spool.get_logger")
+def test_pending_without_spool_dir(get_logger, settings):
+    assert UploadSpool(settings).pending() == []
+
+
+@patch("src.spool.upload_spool.get_logger")
+def test_pending_discards_manifest_without_upload(get_logger, settings):
+    spool = UploadSpool(settings)
+    spooled_import = spool.save(BytesIO(b"line1"))
+    os.remove(spooled_import.path)
+
+    assert spool.pending() == []
+    assert os.listdir(spool.directory) == []
+
+
+@patch("src.spool.upload_spool.get_logger")
+def test_pending_skips_unreadable_manifest(get_logger, settings):
+    spool = UploadSpool(settings)
+    os.makedirs(spool.directory)
+    with open(os.path.join(spool.directory, "broken.json"), "w") as manifest_file:
+        manifest_file.write("{")
+
+    assert spool.pending() == []
+    get_logger.return_value.error.assert_called_once()
+
+
+@patch("src.spool.upload_spool.get_logger")
+def test_remove(get_logger, settings):
+    spool = UploadSpool(settings)
+    spooled_import = spool.save(BytesIO(b"line1"))
+
+    spool.remove(spooled_import)
+
+    assert os.listdir(spool.directory) == []
+
+
+@patch("src.spool.upload_spool.get_logger")
+def test_remove_keeps_the_local_file(get_logger, settings, tmp_path):
+    path = tmp_path / "local.csv"
+    path.write_bytes(b"line1")
+    spool = UploadSpool(settings)
+    spooled_import = spool.register(str(path))
+
+    spool.remove(spooled_import)
+
+    assert os.listdir(spool.directory) == []
+    assert path.read_bytes() == b"line1"
+
+
+@patch("src.spool.upload_spool.get_logger")
+def test_remove_missing_files(get_logger, settings):
+    spooled_import = SpooledImport("missing", os.path.join(settings.import_spool_dir, "missing.csv"))
+
+    UploadSpool(settings).remove(spooled_import)
+
+    assert get_logger.return_value.warning.call_count == 2
+
+
+def test_map_file(tmp_path):
+    path = tmp_path / "file.csv"
+    path.write_bytes(b"line1\nline2")
+
+    with map_file(str(path)) as file:
+        file.seek(6)
+        assert file.read(3) == b"lin"
+        assert file.read() == b"e2"
+
+
+def test_map_empty_file(tmp_path):
+    path = tmp_path / "file.csv"
+    path.write_bytes(b"")
+
+    with map_file(str(path)) as file:
+        assert file.read() == b""
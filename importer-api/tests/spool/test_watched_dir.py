@@ -0,0 +1,86 @@
+import os
+import pytest
+from unittest.mock import MagicMock, patch
+from src.spool.watched_dir import WatchedDir, claimed_import_id
+
+
+@pytest.fixture
+def settings(tmp_path):
+    _settings = MagicMock()
+    _settings.import_watch_dir = str(tmp_path / "watch")
+    return _settings
+
+
+@pytest.fixture
+def watched_dir(settings):
+    with patch("src.spool.watched_dir.get_logger"):
+        yield WatchedDir(settings)
+
+
+def write_file(watched_dir, file_name, content=b"line1\nline2"):
+    os.makedirs(watched_dir.directory, exist_ok=True)
+    path = os.path.join(watched_dir.directory, file_name)
+    with open(path, "wb") as file:
+        file.write(content)
+    return path
+
+
+def test_ready_files_creates_the_directory(watched_dir):
+    assert watched_dir.ready_files() == []
+    assert os.path.isdir(watched_dir.directory)
+
+
+def test_ready_files_after_two_polls(watched_dir):
+    path = write_file(watched_dir, "debts.csv")
+
+    assert watched_dir.ready_files() == []
+    assert watched_dir.ready_files() == [path]
+
+
+def test_ready_files_skips_a_file_still_being_written(watched_dir):
+    path = write_file(watched_dir, "debts.csv")
+    watched_dir.ready_files()
+    with open(path, "ab") as file:
+        file.write(b"\nline3")
+
+    assert watched_dir.ready_files() == []
+    assert watched_dir.ready_files() == [path]
+
+
+def test_ready_files_skips_other_files(watched_dir):
+    write_file(watched_dir, "debts.csv.gz")
+    write_file(watched_dir, ".debts.csv")
+    os.makedirs(os.path.join(watched_dir.directory, "folder.csv"))
+    watched_dir.ready_files()
+
+    assert watched_dir.ready_files() == []
+
+
+def test_claim(watched_dir):
+    path = write_file(watched_dir, "debts.csv")
+    watched_dir.ready_files()
+    processing_path = watched_dir.processing_path(path, "import-id")
+
+    watched_dir.claim(path, processing_path)
+
+    assert processing_path == os.path.join(watched_dir.directory, "processing", "import-id.debts.csv")
+    assert not os.path.exists(path)
+    assert watched_dir.claimed_files() == [processing_path]
+    assert claimed_import_id(processing_path) == "import-id"
+    assert watched_dir.ready_files() == []
+
+
+def test_claimed_files_without_claims(watched_dir):
+    assert watched_dir.claimed_files() == []
+
+
+@pytest.mark.parametrize("failed, directory", [(False, "done"), (True, "failed")])
+def test_archive(watched_dir, failed, directory):
+    path = write_file(watched_dir, "debts.csv")
+    processing_path = watched_dir.processing_path(path, "import-id")
+    watched_dir.claim(path, processing_path)
+
+    watched_dir.archive(processing_path, failed)
+
+    assert watched_dir.claimed_files() == []
+    assert os.listdir(os.path.join(watched_dir.directory, directory)) == ["import-id.debts.csv"]
@@ -1,3 +1,4 @@
+from unittest.mock import patch
 from fastapi.testclient import TestClient
 from src.main import app
 from src.api.file_importer.routes import router as file_importer_router
@@ -20,3 +21,20 @@ def test_included_routers():
 
     for route in file_importer_router.routes:
         assert route in app.routes
+
+
+@patch("src.main.get_aws_client_factory")
+@patch("src.main.get_sqs_client")
+@patch("src.main.start_spool_dir_watcher")
+@patch("src.main.resume_spooled_imports")
+def test_lifespan(resume_spooled_imports, start_spool_dir_watcher, get_sqs_client, get_aws_client_factory):
+    with TestClient(app):
+        get_sqs_client.assert_called_once()
+        resume_spooled_imports.assert_called_once()
+        start_spool_dir_watcher.assert_called_once()
+        get_sqs_client.return_value.close.assert_not_called()
+        start_spool_dir_watcher.return_value.cancel.assert_not_called()
+
+    get_sqs_client.return_value.close.assert_called_once()
+    get_aws_client_factory.return_value.close.assert_called_once()
+    start_spool_dir_watcher.return_value.cancel.assert_called_once()
@@ -1,4 +1,4 @@
-import boto3
+from src.aws.client_factory import get_aws_client_factory
 from src.aws.sqs.exceptions.sqs_consumer_exception import SQSConsumerException
 from src.config.settings import Settings
 from src.logger.logger import get_logger
@@ -20,11 +20,7 @@ class SQSConsumer:
         self.logger = get_logger(__name__)
 
     def create_client(self):
-        self._client = boto3.client(
-            "sqs",
-            region_name=self.settings.aws_region,
-            endpoint_url=self.settings.sqs_endpoint_url
-        )
+        self._client = get_aws_client_factory().client("sqs", self.settings.sqs_endpoint_url)
         self.logger.info("Client created")
 
     def consume(self, run_forever=True):
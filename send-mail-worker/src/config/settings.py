@@ -5,7 +5,13 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     log_level: str = getenv("LOG_LEVEL", "INFO")
+    aws_connect_timeout: float = float(getenv("AWS_CONNECT_TIMEOUT", 5))
+    aws_max_attempts: int = int(getenv("AWS_MAX_ATTEMPTS", 3))
+    aws_max_pool_connections: int = int(getenv("AWS_MAX_POOL_CONNECTIONS", 10))
+    aws_read_timeout: float = float(getenv("AWS_READ_TIMEOUT", 60))
     aws_region: str = getenv("AWS_REGION", "us-east-1")
+    aws_retry_mode: str = getenv("AWS_RETRY_MODE", "adaptive")
+    aws_tcp_keepalive: bool = getenv("AWS_TCP_KEEPALIVE", "true").lower() == "true"
     sqs_queue_url: str = getenv("SQS_QUEUE_URL", "")
     sqs_endpoint_url: str = getenv("SQS_ENDPOINT_URL", "")
     sqs_max_messages: int = int(getenv("SQS_MAX_MESSAGES", 10))
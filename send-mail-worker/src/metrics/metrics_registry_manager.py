@@ -1,4 +1,4 @@
-from prometheus_client import REGISTRY, Counter, Summary
+from prometheus_client import REGISTRY, Counter, Gauge, Summary
 
 
 class MetricsRegistryManager:
@@ -29,6 +29,14 @@ class MetricsRegistryManager:
             labels
         )
 
+    def register_gauge(self, metric_name: str, metric_description: str, labels: set[str] = {}):
+        self._abstract_register(
+            Gauge,
+            metric_name,
+            metric_description,
+            labels
+        )
+
     def register_summary(self, metric_name: str, metric_description: str, labels: set[str] = {}):
         self._abstract_register(
             Summary,
@@ -25,13 +25,12 @@ def test_init(get_logger, settings):
 
 
 @patch("src.aws.sqs.sqs_consumer.get_logger")
-@patch("src.aws.sqs.sqs_consumer.boto3")
-def test_create_client(boto3, get_logger, settings):
+@patch("src.aws.sqs.sqs_consumer.get_aws_client_factory")
+def test_create_client(get_aws_client_factory, get_logger, settings):
     consumer = SQSConsumer(settings)
     consumer.create_client()
-    assert consumer._client == boto3.client.return_value
-    boto3.client.assert_called_once_with(
-        "sqs", region_name="aws_region", endpoint_url=None)
+    assert consumer._client == get_aws_client_factory.return_value.client.return_value
+    get_aws_client_factory.return_value.client.assert_called_once_with("sqs", None)
     get_logger.return_value.info.assert_called_once_with("Client created")
 
 
@@ -0,0 +1,109 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from src.aws.client_factory import AWSClientFactory, connection_pool_stats, get_aws_client_factory
+
+
+@pytest.fixture
+def settings():
+    _settings = MagicMock()
+    _settings.aws_region = "us-east-1"
+    _settings.aws_max_pool_connections = 50
+    _settings.aws_connect_timeout = 2
+    _settings.aws_read_timeout = 30
+    _settings.aws_tcp_keepalive = True
+    _settings.aws_retry_mode = "adaptive"
+    _settings.aws_max_attempts = 4
+    return _settings
+
+
+@pytest.fixture
+def metrics():
+    _metrics = {}
+    with patch("src.aws.client_factory.METRICS") as mock_metrics:
+        mock_metrics.get.side_effect = lambda name, labels: _metrics.setdefault((name, labels["client"]), MagicMock())
+        yield _metrics
+
+
+@patch("src.aws.client_factory.get_logger")
+def test_config(get_logger, settings):
+    config = AWSClientFactory(settings).config()
+
+    assert config.max_pool_connections == 50
+    assert config.connect_timeout == 2
+    assert config.read_timeout == 30
+    assert config.tcp_keepalive is True
+    assert config.retries == {"mode": "adaptive", "total_max_attempts": 4}
+
+
+@patch("src.aws.client_factory.boto3.session.Session")
+@patch("src.aws.client_factory.get_logger")
+def test_client(get_logger, session, settings, metrics):
+    factory = AWSClientFactory(settings)
+
+    client = factory.client("sqs", "http://localhost:4566")
+
+    session.assert_called_once_with(region_name="us-east-1")
+    session.return_value.client.assert_called_once()
+    assert session.return_value.client.call_args.args == ("sqs",)
+    assert session.return_value.client.call_args.kwargs["endpoint_url"] == "http://localhost:4566"
+    assert session.return_value.client.call_args.kwargs["config"].max_pool_connections == 50
+    assert client == session.return_value.client.return_value
+    metrics[("aws_client_connections_created", "sqs")].set_function.assert_called_once()
+    metrics[("aws_client_requests", "sqs")].set_function.assert_called_once()
+
+
+@patch("src.aws.client_factory.boto3.session.Session")
+@patch("src.aws.client_factory.get_logger")
+def test_client_is_created_once(get_logger, session, settings, metrics):
+    factory = AWSClientFactory(settings)
+
+    assert factory.client("sqs", "http://localhost:4566") is factory.client("sqs", "http://localhost:4566")
+    session.return_value.client.assert_called_once()
+
+
+@patch("src.aws.client_factory.boto3.session.Session")
+@patch("src.aws.client_factory.get_logger")
+def test_client_without_endpoint(get_logger, session, settings, metrics):
+    AWSClientFactory(settings).client("sqs", "")
+
+    assert session.return_value.client.call_args.kwargs["endpoint_url"] is None
+
+
+@patch("src.aws.client_factory.boto3.session.Session")
+@patch("src.aws.client_factory.get_logger")
+def test_close(get_logger, session, settings, metrics):
+    factory = AWSClientFactory(settings)
+    client = factory.client("sqs")
+
+    factory.close()
+
+    client.close.assert_called_once()
+    factory.client("sqs")
+    assert session.return_value.client.call_count == 2
+
+
+@patch("src.aws.client_factory.get_logger")
+def test_connection_pool_stats(get_logger, settings):
+    client = AWSClientFactory(settings).client("sqs", "http://localhost:4566")
+    assert connection_pool_stats(client) == (0, 0)
+
+    pools = client._endpoint.http_session._manager.pools
+    pool = MagicMock(num_connections=2, num_requests=10)
+    pools["pool"] = pool
+
+    assert connection_pool_stats(client) == (2, 10)
+
+
+def test_connection_pool_stats_unknown_client():
+    assert connection_pool_stats(object()) == (0, 0)
+
+
+@patch("src.aws.client_factory.get_settings")
+def test_get_aws_client_factory(get_settings):
+    get_aws_client_factory.cache_clear()
+
+    try:
+        assert get_aws_client_factory().settings == get_settings.return_value
+        assert get_aws_client_factory() is get_aws_client_factory()
+    finally:
+        get_aws_client_factory.cache_clear()